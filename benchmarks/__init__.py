@@ -0,0 +1,12 @@
+"""
+Benchmarki wydajności: parsery PlantUML, generatory XMI, układ diagramów oraz
+walidacja, generowanie XML i automatyczne poprawki procesów BPMN.
+
+    python -m benchmarks                          # pomiar i porównanie z benchmarks/baseline.json
+    python -m benchmarks --sizes 10,100,1000,10000 --workloads activity,bpmn
+    python -m benchmarks --save-baseline          # zapis nowych wartości bazowych
+
+Porównanie kończy się kodem 1, gdy któryś etap jest wolniejszy od wartości
+bazowej o więcej niż próg (--threshold, domyślnie 25%). Wartości bazowe zależą
+od maszyny - w CI należy je wygenerować na tym samym typie maszyny.
+"""
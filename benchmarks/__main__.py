@@ -0,0 +1,61 @@
+import argparse
+import sys
+
+from benchmarks.runner import (BASELINE_PATH, DEFAULT_MIN_DELTA_MS, DEFAULT_REPEAT, DEFAULT_SIZES,
+                               DEFAULT_THRESHOLD, WORKLOADS, compare, load_results, run_suite,
+                               save_results)
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m benchmarks",
+                                     description="Benchmarki etapów przetwarzania diagramów i procesów BPMN")
+    parser.add_argument("--workloads", default=",".join(WORKLOADS),
+                        help=f"obciążenia oddzielone przecinkami ({', '.join(WORKLOADS)})")
+    parser.add_argument("--sizes", default=",".join(map(str, DEFAULT_SIZES)),
+                        help="rozmiary (liczba elementów) oddzielone przecinkami")
+    parser.add_argument("--repeat", type=int, default=DEFAULT_REPEAT, help="liczba powtórzeń pomiaru")
+    parser.add_argument("--baseline", default=BASELINE_PATH, help="plik z wartościami bazowymi")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD,
+                        help="dopuszczalny względny wzrost czasu (0.25 = 25%%)")
+    parser.add_argument("--min-delta-ms", type=float, default=DEFAULT_MIN_DELTA_MS,
+                        help="minimalna różnica czasu uznawana za regresję")
+    parser.add_argument("--save-baseline", action="store_true", help="zapisz wyniki jako wartości bazowe")
+    parser.add_argument("--output", help="zapisz wyniki do pliku JSON")
+    args = parser.parse_args(argv)
+
+    workloads = [name.strip() for name in args.workloads.split(",") if name.strip()]
+    unknown = [name for name in workloads if name not in WORKLOADS]
+    if unknown:
+        parser.error(f"nieznane obciążenia: {', '.join(unknown)}")
+    sizes = [int(size) for size in args.sizes.split(",") if size.strip()]
+
+    results = run_suite(workloads, sizes, args.repeat, progress=print)
+    if args.output:
+        save_results(results, args.output)
+
+    if args.save_baseline:
+        baseline = load_results(args.baseline) or {"results": {}}
+        baseline["meta"] = results["meta"]
+        # Pominięte etapy (brak zależności) nie trafiają do wartości bazowych
+        baseline["results"].update({key: result for key, result in results["results"].items()
+                                    if "best_ms" in result})
+        save_results(baseline, args.baseline)
+        print(f"Zapisano wartości bazowe: {args.baseline}")
+        return 0
+
+    baseline = load_results(args.baseline)
+    if baseline is None:
+        print(f"Brak wartości bazowych ({args.baseline}) - uruchom z --save-baseline")
+        return 0
+    regressions = compare(results, baseline, args.threshold, args.min_delta_ms)
+    for regression in regressions:
+        print(f"REGRESJA {regression['key']}: {regression['baseline_ms']:.1f} ms -> "
+              f"{regression['current_ms']:.1f} ms (x{regression['ratio']})")
+    if regressions:
+        return 1
+    print(f"Brak regresji powyżej {args.threshold:.0%} względem {args.baseline}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
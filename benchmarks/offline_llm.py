@@ -0,0 +1,235 @@
+"""
+Zamiennik LLM do testów wydajnościowych end-to-end: serwer HTTP zgodny z OpenAI
+i odpowiedzi z generatora modeli syntetycznych.
+
+Rdzeń (`OfflineLLM`, konfiguracja, błędy) jest w `bpmn_v2/offline_model.py`. Tutaj
+`OfflineLLM` generuje procesy BPMN i diagramy PlantUML przez `SyntheticModelGenerator`
+(rozmiar i struktura zależne od ziarna). Zamiennik odpowiada na prompty bez sieci i bez kosztów:
+
+1. odpowiedzią nagraną - plik JSONL z polami `prompt`/`response` (także
+   `request`/`response` z dziennika interakcji) albo baza historii SQLite
+   (`HistoryStore.find_response`),
+2. odpowiedzią z szablonu - proces BPMN v2 JSON (prompty pipeline'u BPMN,
+   prompty poprawek z procesem w treści), diagram PlantUML, analiza PDF,
+3. krótką odpowiedzią tekstową.
+
+Czas odpowiedzi to opóźnienie bazowe (rozkład log-normalny wokół `latency_ms`)
+plus czas generowania tokenów (`tokens_per_second`); błędy (429, 500, przekroczenie
+czasu) pojawiają się z prawdopodobieństwem `error_rate`. Losowanie zależy od
+`seed`, treści promptu i numeru próby dla tego promptu, więc ten sam ciąg wywołań
+daje te same odpowiedzi, opóźnienia i błędy, a ponowienie po błędzie może się udać.
+
+Użycie:
+    - serwer HTTP zgodny z OpenAI, podawany jako CHAT_URL (aplikacja, analizator PDF):
+
+        python -m benchmarks.offline_llm --port 1234 --latency-ms 300 --tokens-per-second 40 --error-rate 0.05
+
+        with OfflineLLMServer(OfflineLLM(OfflineLLMConfig(time_scale=0))) as server:
+            requests.post(server.chat_url, json={"messages": [{"role": "user", "content": "..."}]})
+
+Konfiguracja (.env): OFFLINE_LLM_LATENCY_MS, OFFLINE_LLM_LATENCY_JITTER,
+OFFLINE_LLM_TOKENS_PER_SECOND, OFFLINE_LLM_ERROR_RATE, OFFLINE_LLM_ERROR_KINDS,
+OFFLINE_LLM_TIMEOUT_S, OFFLINE_LLM_RECORDINGS, OFFLINE_LLM_SEED, OFFLINE_LLM_TIME_SCALE.
+"""
+
+import argparse
+import json
+import os
+import random
+import re
+import sys
+import threading
+import time
+import uuid
+from dataclasses import replace
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Optional
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BPMN_V2_DIR = os.path.join(ROOT_DIR, "bpmn_v2")
+for path in (ROOT_DIR, BPMN_V2_DIR):
+    if path not in sys.path:
+        sys.path.append(path)
+
+from offline_model import (OfflineCompletion, OfflineLLMConfig, OfflineLLMError,
+                           OfflineLLM as _OfflineLLM)
+from utils.logger_utils import log_warning
+from utils.prompt_budget import estimate_tokens
+from benchmarks.synthetic import SyntheticConfig, SyntheticModelGenerator
+
+class OfflineLLM(_OfflineLLM):
+    """Zamiennik LLM z procesami i diagramami z generatora modeli syntetycznych."""
+
+    def _bpmn_process(self, prompt: str, rng: random.Random) -> str:
+        config = SyntheticConfig(size=self.config.bpmn_size, lanes=2, decision_rate=0.15, fork_rate=0.05,
+                                 loop_rate=0.05, seed=rng.randrange(1 << 30))
+        return json.dumps(SyntheticModelGenerator(config).bpmn_process(), ensure_ascii=False, indent=2)
+
+    def _plantuml_code(self, kind: str, rng: random.Random) -> str:
+        generator = SyntheticModelGenerator(SyntheticConfig(size=rng.randint(8, 20), seed=rng.randrange(1 << 30)))
+        return getattr(generator, f"{kind}_diagram")()
+
+
+# ===== Serwer HTTP zgodny z OpenAI =====
+
+class _Handler(BaseHTTPRequestHandler):
+    server: "OfflineLLMServer"
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send_json(self, status: int, body: Dict, headers: Optional[Dict[str, str]] = None):
+        data = json.dumps(body, ensure_ascii=False).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_GET(self):
+        if self.path.rstrip("/").endswith("/models"):
+            self._send_json(200, {"object": "list", "data": [
+                {"id": self.server.llm.model, "object": "model", "owned_by": "offline"}]})
+        elif self.path.rstrip("/").endswith("/health"):
+            self._send_json(200, {"status": "ok"})
+        else:
+            self._send_json(404, {"error": {"message": f"Nieznana ścieżka: {self.path}", "type": "not_found"}})
+
+    def do_POST(self):
+        if not self.path.rstrip("/").endswith("/chat/completions"):
+            self._send_json(404, {"error": {"message": f"Nieznana ścieżka: {self.path}", "type": "not_found"}})
+            return
+        try:
+            payload = json.loads(self.rfile.read(int(self.headers.get("Content-Length") or 0)) or b"{}")
+            messages = payload.get("messages") or []
+            prompt = next((m.get("content", "") for m in reversed(messages) if m.get("role") == "user"), "")
+            if isinstance(prompt, list):
+                # Treść wieloczęściowa (tekst + obrazy) - liczy się tylko tekst
+                prompt = "\n".join(part.get("text", "") for part in prompt if isinstance(part, dict))
+        except (ValueError, AttributeError) as e:
+            self._send_json(400, {"error": {"message": f"Niepoprawne żądanie: {e}", "type": "invalid_request_error"}})
+            return
+
+        llm = self.server.llm
+        try:
+            completion = llm.complete(prompt, model=payload.get("model"), max_tokens=payload.get("max_tokens"),
+                                      wait=not payload.get("stream"))
+        except OfflineLLMError as e:
+            headers = {"Retry-After": "1"} if e.kind == "rate_limit" else None
+            self._send_json(e.status, {"error": {"message": str(e), "type": e.error_type, "code": e.status}}, headers)
+            return
+
+        completion_id = f"chatcmpl-{uuid.uuid4().hex[:24]}"
+        if payload.get("stream"):
+            self._stream(completion_id, completion)
+            return
+        self._send_json(200, {
+            "id": completion_id,
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": completion.model,
+            "choices": [{"index": 0, "message": {"role": "assistant", "content": completion.content},
+                         "finish_reason": completion.finish_reason}],
+            "usage": completion.usage,
+        })
+
+    def _stream(self, completion_id: str, completion: OfflineCompletion):
+        """Odpowiedź strumieniowa (SSE) - fragmenty w tempie tokens_per_second."""
+        llm = self.server.llm
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Cache-Control", "no-cache")
+        self.send_header("Connection", "close")
+        self.end_headers()
+        self.close_connection = True
+        time.sleep(completion.first_token_ms * llm.config.time_scale / 1000)
+
+        chunks = re.findall(r"\S*\s*", completion.content)
+        for chunk in filter(None, chunks):
+            self._event(completion_id, completion.model, {"content": chunk}, None)
+            time.sleep(llm.generation_ms(estimate_tokens(chunk)) * llm.config.time_scale / 1000)
+        self._event(completion_id, completion.model, {}, completion.finish_reason)
+        self.wfile.write(b"data: [DONE]\n\n")
+        self.wfile.flush()
+
+    def _event(self, completion_id: str, model: str, delta: Dict, finish_reason: Optional[str]):
+        event = {"id": completion_id, "object": "chat.completion.chunk", "created": int(time.time()), "model": model,
+                 "choices": [{"index": 0, "delta": delta, "finish_reason": finish_reason}]}
+        self.wfile.write(f"data: {json.dumps(event, ensure_ascii=False)}\n\n".encode("utf-8"))
+        self.wfile.flush()
+
+
+class OfflineLLMServer(ThreadingHTTPServer):
+    """Serwer HTTP zgodny z OpenAI Chat Completions (POST .../chat/completions, GET .../models)."""
+
+    daemon_threads = True
+
+    def __init__(self, llm: Optional[OfflineLLM] = None, host: str = "127.0.0.1", port: int = 0):
+        super().__init__((host, port), _Handler)
+        self.llm = llm or OfflineLLM(OfflineLLMConfig.from_env())
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}/v1"
+
+    @property
+    def chat_url(self) -> str:
+        """Adres do użycia jako CHAT_URL."""
+        return f"{self.base_url}/chat/completions"
+
+    def start(self) -> "OfflineLLMServer":
+        """Uruchamia serwer w wątku w tle."""
+        self._thread = threading.Thread(target=self.serve_forever, name="offline-llm", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
+        if self._thread:
+            self._thread.join()
+
+    def __enter__(self) -> "OfflineLLMServer":
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.offline_llm",
+                                     description="Lokalny serwer zgodny z OpenAI do testów bez sieci")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=1234)
+    parser.add_argument("--model", default="offline-llm")
+    config = OfflineLLMConfig.from_env()
+    for name in ("latency_ms", "latency_jitter", "tokens_per_second", "error_rate", "timeout_s", "bpmn_size",
+                 "seed", "time_scale"):
+        parser.add_argument(f"--{name.replace('_', '-')}", type=type(getattr(config, name)),
+                            default=getattr(config, name))
+    parser.add_argument("--error-kinds", default=",".join(config.error_kinds))
+    parser.add_argument("--recordings", default=config.recordings)
+    args = parser.parse_args(argv)
+
+    config = replace(config, error_kinds=tuple(k for k in args.error_kinds.split(",") if k),
+                     **{name: getattr(args, name) for name in ("latency_ms", "latency_jitter", "tokens_per_second",
+                                                              "error_rate", "timeout_s", "recordings", "bpmn_size",
+                                                              "seed", "time_scale")})
+    server = OfflineLLMServer(OfflineLLM(config, model=args.model), args.host, args.port)
+    print(f"Offline LLM: CHAT_URL={server.chat_url}  API_URL={server.base_url}/models")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        log_warning("Offline LLM: zatrzymano serwer")
+    finally:
+        server.server_close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,198 @@
+"""
+Pomiar etapów przetwarzania na syntetycznych obciążeniach i porównanie z wartościami bazowymi.
+
+Etapy PlantUML (dla każdego typu diagramu):
+    identify - rozpoznanie typu diagramu (identify_plantuml_diagram_type)
+    parse    - parser PlantUML (XMIConverter.parse)
+    layout   - układ diagramu aktywności (run_layout, pusta pamięć podręczna układów)
+    xmi      - generowanie XMI (XMIConverter.generate)
+
+Etapy BPMN (proces JSON):
+    validate - BPMNComplianceValidator.validate_bpmn_compliance
+    layout   - BPMNLayoutCalculator.calculate_layout
+    xml      - BPMNXMLGenerator.generate_bpmn_xml
+    auto_fix - AdvancedBPMNAutoFixer.apply_comprehensive_auto_fixes (na wygenerowanym XML)
+
+Wynik etapu to najlepszy i medianowy czas z `repeat` powtórzeń całego ciągu
+etapów, poprzedzonych jednym przebiegiem rozgrzewkowym bez pomiaru (import
+modułów przy pierwszym wywołaniu nie zawyża wyniku). Etap, którego moduł nie daje się zaimportować (brak zależności), jest
+oznaczany jako pominięty, a kolejne etapy korzystają z danych wejściowych
+znanych z obciążenia.
+"""
+
+import contextlib
+import gc
+import io
+import json
+import os
+import platform
+import statistics
+import sys
+import time
+from datetime import datetime
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+for path in (ROOT_DIR, os.path.join(ROOT_DIR, "bpmn_v2")):
+    if path not in sys.path:
+        sys.path.append(path)
+
+# Benchmark mierzy konfigurację domyślną (.env.template), a nie pełne logowanie DEBUG
+os.environ.setdefault("LOG_LEVEL", "INFO")
+
+from benchmarks.workloads import DIAGRAM_TYPE_NAMES, PLANTUML_WORKLOADS, bpmn_process
+
+DEFAULT_SIZES = (10, 100, 1000)
+DEFAULT_REPEAT = 3
+DEFAULT_THRESHOLD = 0.25      # dopuszczalny wzrost czasu względem wartości bazowej
+DEFAULT_MIN_DELTA_MS = 5.0    # różnice poniżej tej wartości traktowane jako szum
+BASELINE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baseline.json")
+
+WORKLOADS = tuple(PLANTUML_WORKLOADS) + ("bpmn",)
+
+Stage = Tuple[str, Callable[[Dict[str, Any]], None]]
+
+
+def _plantuml_stages(kind: str) -> List[Stage]:
+    from utils.xmi.xmi_conversion import XMIConverter
+
+    converter = XMIConverter()
+
+    def identify(ctx):
+        from utils.plantuml.plantuml_utils import identify_plantuml_diagram_type
+        ctx["type_name"] = identify_plantuml_diagram_type(ctx["code"])
+
+    def parse(ctx):
+        ctx["parsed"] = converter.parse(ctx["code"], DIAGRAM_TYPE_NAMES[kind])
+
+    def layout(ctx):
+        from utils.xmi.layout_cache import layout_cache
+        from utils.xmi.layout_engines import run_layout
+        layout_cache.clear()
+        run_layout(kind, ctx["parsed"][1])
+
+    def xmi(ctx):
+        ctx["xmi"] = converter.generate(*ctx["parsed"])
+
+    stages = [("identify", identify), ("parse", parse)]
+    if kind == "activity":
+        stages.append(("layout", layout))
+    stages.append(("xmi", xmi))
+    return stages
+
+
+def _bpmn_stages() -> List[Stage]:
+    def validate(ctx):
+        from bpmn_compliance_validator import BPMNComplianceValidator
+        ctx["report"] = BPMNComplianceValidator().validate_bpmn_compliance(ctx["process"])
+
+    def layout(ctx):
+        from json_to_bpmn_generator import BPMNLayoutCalculator
+        BPMNLayoutCalculator().calculate_layout(ctx["process"])
+
+    def xml(ctx):
+        from json_to_bpmn_generator import BPMNXMLGenerator
+        ctx["xml"] = BPMNXMLGenerator().generate_bpmn_xml(ctx["process"])
+
+    def auto_fix(ctx):
+        from advanced_auto_fixer import AdvancedBPMNAutoFixer
+        AdvancedBPMNAutoFixer().apply_comprehensive_auto_fixes(ctx["xml"])
+
+    return [("validate", validate), ("layout", layout), ("xml", xml), ("auto_fix", auto_fix)]
+
+
+def _workload(name: str, size: int) -> Tuple[Dict[str, Any], List[Stage]]:
+    if name == "bpmn":
+        return {"process": bpmn_process(size)}, _bpmn_stages()
+    return {"code": PLANTUML_WORKLOADS[name](size)}, _plantuml_stages(name)
+
+
+def run_workload(name: str, size: int, repeat: int = DEFAULT_REPEAT) -> Dict[str, Dict[str, Any]]:
+    """Mierzy etapy jednego obciążenia; klucz wyniku: nazwa etapu."""
+    timings: Dict[str, List[float]] = {}
+    skipped: Dict[str, str] = {}
+    order: List[str] = []
+    # Pierwsze przejście bez pomiaru - importy modułów i rozgrzanie pamięci podręcznych
+    for attempt in range(repeat + 1):
+        ctx, stages = _workload(name, size)
+        order = [stage for stage, _ in stages]
+        for stage, func in stages:
+            if stage in skipped:
+                continue
+            gc.collect()
+            start = time.perf_counter()
+            try:
+                # Parsery i generatory wypisują diagnostykę na stdout
+                with contextlib.redirect_stdout(io.StringIO()):
+                    func(ctx)
+            except ImportError as e:
+                skipped[stage] = f"{type(e).__name__}: {e}"
+                continue
+            if attempt:
+                timings.setdefault(stage, []).append((time.perf_counter() - start) * 1000)
+
+    results: Dict[str, Dict[str, Any]] = {}
+    for stage in order:
+        if stage in skipped:
+            results[stage] = {"skipped": skipped[stage]}
+        elif stage in timings:
+            results[stage] = {"best_ms": round(min(timings[stage]), 3),
+                              "median_ms": round(statistics.median(timings[stage]), 3)}
+    return results
+
+
+def run_suite(workloads: Iterable[str] = WORKLOADS, sizes: Iterable[int] = DEFAULT_SIZES,
+              repeat: int = DEFAULT_REPEAT, progress: Optional[Callable[[str], None]] = None) -> Dict[str, Any]:
+    """Uruchamia benchmarki; wyniki w postaci {"meta": ..., "results": {"obciążenie/etap/rozmiar": ...}}."""
+    results: Dict[str, Dict[str, Any]] = {}
+    for name in workloads:
+        for size in sizes:
+            for stage, result in run_workload(name, size, repeat).items():
+                key = f"{name}/{stage}/{size}"
+                results[key] = result
+                if progress:
+                    progress(format_result(key, result))
+    return {
+        "meta": {
+            "created": datetime.now().isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "repeat": repeat,
+        },
+        "results": results,
+    }
+
+
+def format_result(key: str, result: Dict[str, Any]) -> str:
+    if "skipped" in result:
+        return f"{key:<32} pominięto ({result['skipped']})"
+    return f"{key:<32} {result['best_ms']:>10.1f} ms  (mediana {result['median_ms']:.1f} ms)"
+
+
+def compare(current: Dict[str, Any], baseline: Dict[str, Any], threshold: float = DEFAULT_THRESHOLD,
+            min_delta_ms: float = DEFAULT_MIN_DELTA_MS) -> List[Dict[str, Any]]:
+    """Regresje: etapy wolniejsze od wartości bazowej o więcej niż `threshold` (i `min_delta_ms`)."""
+    regressions = []
+    base_results = baseline.get("results", {})
+    for key, result in current.get("results", {}).items():
+        base = base_results.get(key)
+        if not base or "best_ms" not in base or "best_ms" not in result:
+            continue
+        delta = result["best_ms"] - base["best_ms"]
+        if result["best_ms"] > base["best_ms"] * (1 + threshold) and delta > min_delta_ms:
+            regressions.append({"key": key, "baseline_ms": base["best_ms"], "current_ms": result["best_ms"],
+                                "ratio": round(result["best_ms"] / base["best_ms"], 2) if base["best_ms"] else None})
+    return regressions
+
+
+def load_results(path: str = BASELINE_PATH) -> Optional[Dict[str, Any]]:
+    if not os.path.exists(path):
+        return None
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def save_results(results: Dict[str, Any], path: str = BASELINE_PATH):
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(results, f, ensure_ascii=False, indent=2, sort_keys=True)
+        f.write("\n")
@@ -0,0 +1,582 @@
+"""
+Generator dużych, syntetycznych modeli do testów obciążeniowych.
+
+Tworzy diagramy PlantUML (aktywności, klas, sekwencji, komponentów) oraz
+procesy BPMN v2 (JSON) o zadanym rozmiarze i kształcie:
+
+    config = SyntheticConfig(size=5000, branching=3, max_depth=4, error_rate=0.01, seed=7)
+    generator = SyntheticModelGenerator(config)
+    generator.activity_diagram()          # tory, decyzje, zagnieżdżone fork/join, pętle
+    generator.bpmn_process()              # wiele Pool z torami, bramki XOR/AND, Message Flow
+    generator.injected_errors             # błędy wstrzyknięte w ostatnio wygenerowany model
+
+Procesy BPMN są budowane ze struktur `bpmn_v2/structure_definition.py`
+(`BPMNDiagram`, `Pool`, `Lane`, `Process`, `Task`, `Gateway`, `SequenceFlow`,
+`MessageFlow`) i dopiero potem zapisywane w formacie JSON pipeline'u BPMN v2,
+więc `generator.bpmn_diagram().validate()` sprawdza poprawny model strukturami
+projektu.
+
+Wynik zależy tylko od konfiguracji (także `seed`) - każdy typ modelu ma własny
+generator liczb losowych, więc kolejność wywołań nie zmienia wyników.
+Wstrzykiwanie błędów (`error_rate` - prawdopodobieństwo na element) daje
+wejścia dla ścieżek obsługi błędów parserów, walidatorów i auto-poprawek.
+
+    python -m benchmarks.synthetic activity --size 5000 --branching 3 --error-rate 0.01 -o duzy.puml
+"""
+
+import argparse
+import json
+import os
+import random
+import sys
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Tuple
+
+BPMN_V2_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "bpmn_v2")
+if BPMN_V2_DIR not in sys.path:
+    sys.path.append(BPMN_V2_DIR)
+
+from structure_definition import (BPMNDiagram, EndEvent, Gateway, GatewayType, Lane, MessageFlow, Pool,
+                                  Process, SequenceFlow, StartEvent, Task, TaskType)
+
+MODEL_KINDS = ("activity", "class", "sequence", "component", "bpmn")
+
+
+@dataclass
+class SyntheticConfig:
+    """Parametry generowanego modelu.
+
+    size         - liczba głównych elementów: akcji, klas, komunikatów, komponentów, zadań BPMN
+    branching    - gałęzie rozwidleń/bramek i fragmentów alt, liczba asocjacji klasy
+    max_depth    - maksymalne zagnieżdżenie bloków (i głębokość dziedziczenia klas)
+    decision_rate, fork_rate, loop_rate - prawdopodobieństwo otwarcia bloku zamiast elementu
+    lanes        - tory diagramu aktywności, uczestnicy sekwencji, Pool procesu BPMN
+    lanes_per_pool - tory w każdym Pool
+    message_rate - prawdopodobieństwo Message Flow z zadania do innego Pool
+    error_rate   - prawdopodobieństwo wstrzyknięcia błędu przy elemencie
+    """
+    size: int = 100
+    branching: int = 2
+    max_depth: int = 3
+    decision_rate: float = 0.1
+    fork_rate: float = 0.05
+    loop_rate: float = 0.02
+    lanes: int = 3
+    lanes_per_pool: int = 2
+    message_rate: float = 0.1
+    error_rate: float = 0.0
+    seed: int = 0
+
+
+@dataclass
+class InjectedError:
+    """Błąd celowo wprowadzony do modelu (linia PlantUML albo identyfikator elementu BPMN)."""
+    kind: str
+    location: str
+    description: str
+
+
+@dataclass
+class _PoolState:
+    """Stan budowy jednego Pool procesu BPMN."""
+    index: int
+    pool: Pool
+    process: Process
+    tasks: List[str] = field(default_factory=list)
+
+
+class SyntheticModelGenerator:
+    """Deterministyczny generator modeli PlantUML i BPMN według `SyntheticConfig`."""
+
+    def __init__(self, config: Optional[SyntheticConfig] = None):
+        self.config = config or SyntheticConfig()
+        self.injected_errors: List[InjectedError] = []
+
+    # ===== Wspólne =====
+
+    def _start(self, kind: str) -> random.Random:
+        self.injected_errors = []
+        self._counter = 0
+        return random.Random(f"{self.config.seed}:{kind}")
+
+    def _inject(self, rng: random.Random, kind: str, location, description: str) -> bool:
+        if self.config.error_rate <= 0 or rng.random() >= self.config.error_rate:
+            return False
+        self.injected_errors.append(InjectedError(kind, str(location), description))
+        return True
+
+    def _next(self) -> int:
+        self._counter += 1
+        return self._counter
+
+    def _block_kind(self, rng: random.Random, depth: int, remaining: int) -> Optional[str]:
+        """Rodzaj bloku do otwarcia (decision/fork/loop) albo None - zwykły element."""
+        cfg = self.config
+        if depth >= cfg.max_depth or remaining < max(2, cfg.branching):
+            return None
+        r = rng.random()
+        for kind, rate in (("decision", cfg.decision_rate), ("fork", cfg.fork_rate), ("loop", cfg.loop_rate)):
+            if r < rate:
+                return kind
+            r -= rate
+        return None
+
+    @property
+    def _branches(self) -> int:
+        return max(2, self.config.branching)
+
+    def _budgets(self, rng: random.Random, remaining: List[int], parts: int) -> List[int]:
+        """Rezerwuje elementy dla `parts` gałęzi bloku (każda co najmniej jeden) - rozmiar modelu jest dokładny."""
+        total = rng.randint(parts, max(parts, min(remaining[0], parts * 3)))
+        remaining[0] -= total
+        budgets = [1] * parts
+        for _ in range(total - parts):
+            budgets[rng.randrange(parts)] += 1
+        return budgets
+
+    # ===== Diagram aktywności =====
+
+    def activity_diagram(self) -> str:
+        """Diagram aktywności: tory, if/else, fork z `branching` gałęziami, pętle while."""
+        rng = self._start("activity")
+        cfg = self.config
+        lanes = [f"Tor {i + 1}" for i in range(max(1, cfg.lanes))]
+        lines = ["@startuml", f"title Syntetyczny diagram aktywności ({cfg.size})", f"|{lanes[0]}|", "start"]
+        remaining = [cfg.size]
+        lane_period = max(5, cfg.size // (3 * len(lanes)))
+        while remaining[0] > 0:
+            if len(lanes) > 1 and self._counter and rng.random() < 1 / lane_period:
+                lines.append(f"|{lanes[rng.randrange(len(lanes))]}|")
+            self._activity_item(lines, rng, 0, remaining)
+        lines += ["stop", "@enduml"]
+        return "\n".join(lines)
+
+    def _activity_body(self, lines: List[str], rng: random.Random, depth: int, budget: int):
+        remaining = [budget]
+        while remaining[0] > 0:
+            self._activity_item(lines, rng, depth, remaining)
+
+    def _activity_item(self, lines: List[str], rng: random.Random, depth: int, remaining: List[int]):
+        pad = "  " * depth
+        block = self._block_kind(rng, depth, remaining[0])
+        if block == "decision":
+            n = self._next()
+            then_budget, else_budget = self._budgets(rng, remaining, 2)
+            lines.append(f"{pad}if (Warunek {n}?) then (tak)")
+            self._activity_body(lines, rng, depth + 1, then_budget)
+            lines.append(f"{pad}else (nie)")
+            self._activity_body(lines, rng, depth + 1, else_budget)
+            if not self._inject(rng, "missing_endif", len(lines) + 1, f"Brak endif dla warunku {n}"):
+                lines.append(f"{pad}endif")
+        elif block == "fork":
+            lines.append(f"{pad}fork")
+            for branch, budget in enumerate(self._budgets(rng, remaining, self._branches)):
+                if branch:
+                    lines.append(f"{pad}fork again")
+                self._activity_body(lines, rng, depth + 1, budget)
+            lines.append(f"{pad}end fork")
+        elif block == "loop":
+            n = self._next()
+            lines.append(f"{pad}while (Powtórzyć {n}?) is (tak)")
+            self._activity_body(lines, rng, depth + 1, *self._budgets(rng, remaining, 1))
+            lines.append(f"{pad}endwhile")
+        else:
+            n = self._next()
+            remaining[0] -= 1
+            if self._inject(rng, "malformed_action", len(lines) + 1, f"Akcja {n} bez średnika"):
+                lines.append(f"{pad}:Krok {n}")
+            else:
+                lines.append(f"{pad}:Krok {n};")
+
+    # ===== Diagram klas =====
+
+    def class_diagram(self) -> str:
+        """Diagram klas: pakiety, interfejsy, enumeracje, dziedziczenie do `max_depth`, asocjacje."""
+        rng = self._start("class")
+        cfg = self.config
+        size = max(1, cfg.size)
+        interfaces = [f"IUsluga{i}" for i in range(max(1, size // 20))]
+        enums = [f"Status{i}" for i in range(max(1, size // 50))]
+        lines = ["@startuml", f"title Syntetyczny diagram klas ({size})"]
+        for name in interfaces:
+            lines += [f"interface {name} {{", "  +wykonaj() : void", "}"]
+        for name in enums:
+            lines += [f"enum {name} {{", "  AKTYWNY", "  ZAWIESZONY", "  ZAMKNIETY", "}"]
+
+        types = ["int", "String", "double", "boolean", "Date"] + enums
+        package_size = 50
+        for i in range(size):
+            if i % package_size == 0:
+                if i:
+                    lines.append("}")
+                lines.append(f'package "Moduł {i // package_size}" {{')
+            lines.append(f"class Klasa{i} {{")
+            for a in range(rng.randint(1, 4)):
+                if self._inject(rng, "malformed_member", len(lines) + 1, f"Atrybut bez nazwy w Klasa{i}"):
+                    lines.append("  - : int")
+                else:
+                    lines.append(f"  -pole{a} : {rng.choice(types)}")
+            for m in range(rng.randint(1, 3)):
+                lines.append(f"  +operacja{m}(wartosc : {rng.choice(types)}) : {rng.choice(types)}")
+            lines.append("}")
+        lines.append("}")
+
+        depth = [0] * size
+        arrows = ("-->", "*--", "o--", "..>")
+        for i in range(1, size):
+            parent = rng.randrange(i)
+            if depth[parent] < cfg.max_depth and rng.random() < 0.2:
+                depth[i] = depth[parent] + 1
+                lines.append(f"Klasa{parent} <|-- Klasa{i}")
+            if rng.random() < 0.15:
+                lines.append(f"Klasa{i} ..|> {rng.choice(interfaces)}")
+            for _ in range(rng.randint(1, max(1, cfg.branching))):
+                target = f"Klasa{rng.randrange(i)}"
+                if self._inject(rng, "undefined_reference", len(lines) + 1, f"Relacja Klasa{i} do nieistniejącej klasy"):
+                    target = f"Nieistniejaca{i}"
+                lines.append(f'Klasa{i} "1" {rng.choice(arrows)} "0..*" {target} : relacja{i}')
+        lines.append("@enduml")
+        return "\n".join(lines)
+
+    # ===== Diagram sekwencji =====
+
+    def sequence_diagram(self) -> str:
+        """Diagram sekwencji: uczestnicy różnych typów, aktywacje, zagnieżdżone alt/opt/loop."""
+        rng = self._start("sequence")
+        cfg = self.config
+        kinds = ("actor", "participant", "boundary", "control", "entity", "database")
+        participants = [f"U{p}" for p in range(max(2, cfg.lanes))]
+        lines = ["@startuml", f"title Syntetyczny diagram sekwencji ({cfg.size})"]
+        for p, alias in enumerate(participants):
+            lines.append(f'{kinds[p % len(kinds)]} "Uczestnik {p}" as {alias}')
+        remaining = [cfg.size]
+        while remaining[0] > 0:
+            self._sequence_item(lines, rng, 0, remaining, participants)
+        lines.append("@enduml")
+        return "\n".join(lines)
+
+    def _sequence_body(self, lines, rng, depth, budget, participants):
+        remaining = [budget]
+        while remaining[0] > 0:
+            self._sequence_item(lines, rng, depth, remaining, participants)
+
+    def _sequence_item(self, lines: List[str], rng: random.Random, depth: int, remaining: List[int],
+                       participants: List[str]):
+        pad = "  " * depth
+        block = self._block_kind(rng, depth, remaining[0])
+        if block is not None:
+            n = self._next()
+            if block == "decision":
+                lines.append(f"{pad}alt Przypadek {n}.1")
+                for branch, budget in enumerate(self._budgets(rng, remaining, self._branches)):
+                    if branch:
+                        lines.append(f"{pad}else Przypadek {n}.{branch + 1}")
+                    self._sequence_body(lines, rng, depth + 1, budget, participants)
+            else:
+                lines.append(f"{pad}{'opt' if block == 'fork' else 'loop'} Fragment {n}")
+                self._sequence_body(lines, rng, depth + 1, *self._budgets(rng, remaining, 1), participants)
+            if not self._inject(rng, "unclosed_fragment", len(lines) + 1, f"Fragment {n} bez end"):
+                lines.append(f"{pad}end")
+            return
+
+        n = self._next()
+        remaining[0] -= 1
+        source, target = rng.sample(participants, 2)
+        if self._inject(rng, "undeclared_participant", len(lines) + 1, f"Komunikat {n} do niezadeklarowanego uczestnika"):
+            target = f"Nieznany{n}"
+        lines.append(f"{pad}{source} -> {target} : {n}. Żądanie")
+        if rng.random() < 0.25:
+            lines += [f"{pad}activate {target}", f"{pad}{target} --> {source} : {n}. Odpowiedź",
+                      f"{pad}deactivate {target}"]
+        if rng.random() < 0.05:
+            lines.append(f"{pad}note right: Notatka {n}")
+
+    # ===== Diagram komponentów =====
+
+    def component_diagram(self) -> str:
+        """Diagram komponentów: zagnieżdżone pakiety, interfejsy, bazy danych i zależności."""
+        rng = self._start("component")
+        cfg = self.config
+        size = max(1, cfg.size)
+        lines = ["@startuml", f"title Syntetyczny diagram komponentów ({size})",
+                 'cloud "Usługa zewnętrzna" as zewnetrzna']
+        aliases: List[str] = []
+        interfaces: List[str] = []
+        group_size = 20
+        nested_depth = max(1, min(cfg.max_depth, 3))
+        for i in range(size):
+            if i % group_size == 0:
+                if i:
+                    lines += ["}"] * nested_depth
+                group = i // group_size
+                for level in range(nested_depth):
+                    keyword = "package" if level < nested_depth - 1 or level == 0 else "node"
+                    lines.append(f'{keyword} "Warstwa {group}.{level}" {{')
+            alias = f"komp{i}"
+            aliases.append(alias)
+            if rng.random() < 0.1:
+                lines.append(f'database "Baza {i}" as {alias}')
+            else:
+                lines.append(f'component "Komponent {i}" <<service>> as {alias}')
+            if rng.random() < 0.07:
+                interface = f"api{i}"
+                interfaces.append(interface)
+                lines.append(f'interface "API {i}" as {interface}')
+        lines += ["}"] * nested_depth
+
+        for i in range(1, size):
+            for _ in range(rng.randint(1, max(1, cfg.branching))):
+                target = aliases[rng.randrange(i)]
+                if self._inject(rng, "undefined_reference", len(lines) + 1, f"Zależność komp{i} do nieznanego aliasu"):
+                    target = f"brak{i}"
+                lines.append(f'{target} --> komp{i} : "wywołanie"')
+            if interfaces and rng.random() < 0.1:
+                lines.append(f"komp{i} ..> {rng.choice(interfaces)}")
+        lines += ["komp0 --> zewnetrzna", "@enduml"]
+        return "\n".join(lines)
+
+    # ===== Proces BPMN =====
+
+    def bpmn_diagram(self) -> BPMNDiagram:
+        """Proces BPMN jako struktury `structure_definition` (bez wstrzykniętych błędów)."""
+        diagram, _ = self._build_bpmn(self._start("bpmn"))
+        return diagram
+
+    def bpmn_process(self) -> Dict:
+        """Proces BPMN v2 w formacie JSON pipeline'u (z błędami, gdy `error_rate` > 0)."""
+        rng = self._start("bpmn")
+        diagram, pools = self._build_bpmn(rng)
+        process_json = bpmn_diagram_to_json(diagram)
+        self._inject_bpmn_errors(rng, process_json, pools)
+        return process_json
+
+    def _build_bpmn(self, rng: random.Random) -> Tuple[BPMNDiagram, List[_PoolState]]:
+        cfg = self.config
+        pool_count = max(1, min(cfg.lanes, cfg.size or 1))
+        diagram = BPMNDiagram(id="diagram_synthetic", name=f"Syntetyczny proces ({cfg.size} zadań)")
+        pools: List[_PoolState] = []
+        for p in range(pool_count):
+            process = Process(id=f"process_{p}", name=f"Proces uczestnika {p}")
+            pool = Pool(id=f"pool_{p}", name=f"Uczestnik {p}", process_ref=process.id,
+                        lanes=[Lane(id=f"lane_{p}_{l}", name=f"Rola {p}.{l}")
+                               for l in range(max(1, cfg.lanes_per_pool))])
+            diagram.pools.append(pool)
+            diagram.processes.append(process)
+            pools.append(_PoolState(p, pool, process))
+
+        for state, task_count in zip(pools, _split(cfg.size, pool_count)):
+            start = StartEvent(id=f"start_{state.index}", name=f"Początek procesu {state.index}")
+            state.process.start_events.append(start)
+            self._assign_lane(rng, state, start.id)
+            remaining = [task_count]
+            ends = [start.id]
+            while remaining[0] > 0:
+                ends = self._bpmn_item(rng, state, ends, 0, remaining)
+            end = EndEvent(id=f"end_{state.index}", name=f"Koniec procesu {state.index}")
+            state.process.end_events.append(end)
+            self._assign_lane(rng, state, end.id)
+            self._connect(state, ends, end.id)
+
+        # Message Flow do losowego zadania innego Pool
+        if pool_count > 1:
+            for state in pools:
+                for task_id in state.tasks:
+                    if rng.random() < cfg.message_rate:
+                        other = pools[(state.index + rng.randrange(1, pool_count)) % pool_count]
+                        if other.tasks:
+                            diagram.message_flows.append(MessageFlow(
+                                id=f"messageFlow_{len(diagram.message_flows) + 1}",
+                                name=f"Wiadomość {len(diagram.message_flows) + 1}",
+                                source_ref=task_id, target_ref=rng.choice(other.tasks)))
+        return diagram, pools
+
+    def _assign_lane(self, rng: random.Random, state: _PoolState, element_id: str):
+        rng.choice(state.pool.lanes).element_refs.append(element_id)
+
+    def _flow(self, state: _PoolState, source: str, target: str, name: Optional[str] = None,
+              condition: Optional[str] = None) -> SequenceFlow:
+        flow = SequenceFlow(id=f"flow_{state.index}_{len(state.process.sequence_flows) + 1}", name=name,
+                            source_ref=source, target_ref=target, condition_expression=condition)
+        state.process.sequence_flows.append(flow)
+        return flow
+
+    def _connect(self, state: _PoolState, ends: List[str], target: str) -> List[SequenceFlow]:
+        return [self._flow(state, source, target) for source in ends]
+
+    def _bpmn_body(self, rng, state, ends, depth, budget) -> List[str]:
+        remaining = [budget]
+        while remaining[0] > 0:
+            ends = self._bpmn_item(rng, state, ends, depth, remaining)
+        return ends
+
+    def _bpmn_item(self, rng: random.Random, state: _PoolState, ends: List[str], depth: int,
+                   remaining: List[int]) -> List[str]:
+        """Dodaje zadanie albo blok bramek za elementami `ends`; zwraca nowe otwarte końce ścieżek.
+
+        Gałęzie bramki XOR łączą się niejawnie w kolejnym elemencie (walidator zgodności
+        wymaga co najmniej dwóch wyjść z każdej bramki XOR), gałęzie bramki AND - w bramce AND.
+        """
+        block = self._block_kind(rng, depth, remaining[0])
+        if block in ("decision", "fork"):
+            n = self._next()
+            gateway_type = GatewayType.EXCLUSIVE if block == "decision" else GatewayType.PARALLEL
+            split = Gateway(id=f"gateway_{state.index}_{n}_split", name=f"Decyzja {state.index}.{n}?",
+                            gateway_type=gateway_type)
+            state.process.gateways.append(split)
+            self._assign_lane(rng, state, split.id)
+            self._connect(state, ends, split.id)
+            branch_ends: List[str] = []
+            for branch, budget in enumerate(self._budgets(rng, remaining, self._branches)):
+                first_flow = len(state.process.sequence_flows)
+                branch_ends += self._bpmn_body(rng, state, [split.id], depth + 1, budget)
+                if block == "decision":
+                    # Warunek na przepływie wychodzącym z bramki (pierwszy przepływ gałęzi)
+                    flow = state.process.sequence_flows[first_flow]
+                    condition = f"wariant_{state.index}_{n}_{branch + 1}"
+                    flow.name, flow.condition_expression = f"Wariant {branch + 1}", condition
+                    split.conditions[flow.target_ref] = condition
+            if block == "decision":
+                return branch_ends
+            join = Gateway(id=f"gateway_{state.index}_{n}_join", name=f"Scalenie {state.index}.{n}",
+                           gateway_type=gateway_type)
+            state.process.gateways.append(join)
+            self._assign_lane(rng, state, join.id)
+            self._connect(state, branch_ends, join.id)
+            return [join.id]
+
+        if block == "loop":
+            # Pętla: zadania, po nich bramka XOR z powrotem do pierwszego zadania pętli
+            n = self._next()
+            loop_budget = [sum(self._budgets(rng, remaining, 2))]
+            first_task = self._add_task(rng, state, ends, loop_budget)
+            body_ends = self._bpmn_body(rng, state, [first_task], depth + 1, loop_budget[0])
+            gateway = Gateway(id=f"gateway_{state.index}_{n}_loop", name=f"Powtórzyć {state.index}.{n}?")
+            state.process.gateways.append(gateway)
+            self._assign_lane(rng, state, gateway.id)
+            self._connect(state, body_ends, gateway.id)
+            self._flow(state, gateway.id, first_task, name="tak", condition=f"powtorz_{state.index}_{n}")
+            gateway.conditions[first_task] = f"powtorz_{state.index}_{n}"
+            return [gateway.id]
+
+        return [self._add_task(rng, state, ends, remaining)]
+
+    def _add_task(self, rng: random.Random, state: _PoolState, ends: List[str], remaining: List[int]) -> str:
+        remaining[0] -= 1
+        n = self._next()
+        task_type = TaskType.USER if state.index == 0 or rng.random() < 0.3 else TaskType.SERVICE
+        task = Task(id=f"task_{state.index}_{n}", name=f"Zadanie {state.index}.{n}", task_type=task_type)
+        state.process.tasks.append(task)
+        state.tasks.append(task.id)
+        self._assign_lane(rng, state, task.id)
+        self._connect(state, ends, task.id)
+        return task.id
+
+    def _inject_bpmn_errors(self, rng: random.Random, process: Dict, pools: List[_PoolState]):
+        """Wstrzykuje błędy do JSON procesu: wiszące przepływy, przepływy między Pool, duplikaty ID, brak nazwy."""
+        if self.config.error_rate <= 0:
+            return
+        elements = process["elements"]
+        flows = process["flows"]
+        element_pool = {element["id"]: element["participant"] for element in elements}
+        for index, element in enumerate(list(elements)):
+            if element["type"] not in ("userTask", "serviceTask"):
+                continue
+            if self._inject(rng, "dangling_flow", element["id"], "Przepływ do nieistniejącego elementu"):
+                flows.append({"id": f"flow_error_{index}", "source": element["id"], "target": f"missing_{index}"})
+            elif len(pools) > 1 and self._inject(rng, "cross_pool_sequence_flow", element["id"],
+                                                 "Sequence Flow do elementu innego Pool"):
+                others = [state.tasks for state in pools if f"pool_{state.index}" != element_pool[element["id"]]]
+                target = rng.choice([task for tasks in others for task in tasks] or [element["id"]])
+                flows.append({"id": f"flow_error_{index}", "source": element["id"], "target": target})
+            elif self._inject(rng, "duplicate_id", element["id"], "Element z powtórzonym ID"):
+                elements.append({**element, "name": f"{element['name']} (kopia)"})
+            elif self._inject(rng, "unnamed_element", element["id"], "Element bez nazwy"):
+                element["name"] = ""
+
+
+def _split(total: int, parts: int) -> List[int]:
+    return [total // parts + (1 if i < total % parts else 0) for i in range(parts)]
+
+
+_TASK_TYPES = {TaskType.USER: ("userTask", "user"), TaskType.SERVICE: ("serviceTask", "service"),
+               TaskType.SEND: ("serviceTask", "send"), TaskType.RECEIVE: ("serviceTask", "receive")}
+
+
+def bpmn_diagram_to_json(diagram: BPMNDiagram) -> Dict:
+    """Zapisuje `BPMNDiagram` w formacie JSON pipeline'u BPMN v2 (participants/elements/flows/gateways)."""
+    processes = {process.id: process for process in diagram.processes}
+    participants, elements, flows, gateways = [], [], [], []
+    for index, pool in enumerate(diagram.pools):
+        participants.append({"id": pool.id, "name": pool.name, "type": "human" if index == 0 else "system",
+                             "lanes": [{"id": lane.id, "name": lane.name} for lane in pool.lanes]})
+        lane_of = {element_id: lane.id for lane in pool.lanes for element_id in lane.element_refs}
+        process = processes.get(pool.process_ref)
+        if process is None:
+            continue
+
+        def add(element_id: str, name: Optional[str], element_type: str, **extra):
+            element = {"id": element_id, "name": name or "", "type": element_type, "participant": pool.id}
+            if element_id in lane_of:
+                element["lane"] = lane_of[element_id]
+            elements.append({**element, **extra})
+
+        for event in process.start_events:
+            add(event.id, event.name, "startEvent")
+        for task in process.tasks:
+            element_type, task_type = _TASK_TYPES.get(task.task_type, ("userTask", "user"))
+            add(task.id, task.name, element_type, task_type=task_type)
+        for gateway in process.gateways:
+            add(gateway.id, gateway.name, gateway.gateway_type.value,
+                gateway_type=gateway.gateway_type.value.replace("Gateway", ""))
+            if gateway.conditions:
+                # Ostatni warunek bramki decyzyjnej jest domyślny (bramka pętli ma tylko warunek powrotu)
+                default = next(reversed(gateway.conditions)) if len(gateway.conditions) > 1 else None
+                gateways.append({"id": gateway.id, "conditions": [
+                    {"target": target, "condition": condition, "is_default": target == default}
+                    for target, condition in gateway.conditions.items()]})
+        for event in process.end_events:
+            add(event.id, event.name, "endEvent")
+        for flow in process.sequence_flows:
+            entry = {"id": flow.id, "source": flow.source_ref, "target": flow.target_ref}
+            if flow.name:
+                entry["name"] = flow.name
+            if flow.condition_expression:
+                entry["condition"] = flow.condition_expression
+            flows.append(entry)
+
+    for message in diagram.message_flows:
+        flows.append({"id": message.id, "source": message.source_ref, "target": message.target_ref,
+                      "type": "message", "name": message.name or ""})
+
+    process_json = {"process_name": diagram.name, "participants": participants, "elements": elements, "flows": flows}
+    if gateways:
+        process_json["gateways"] = gateways
+    return process_json
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.synthetic",
+                                     description="Generator syntetycznych modeli PlantUML/BPMN")
+    parser.add_argument("kind", choices=MODEL_KINDS)
+    defaults = SyntheticConfig()
+    for name, value in vars(defaults).items():
+        parser.add_argument(f"--{name.replace('_', '-')}", type=type(value), default=value)
+    parser.add_argument("-o", "--output", help="plik wynikowy (domyślnie stdout)")
+    args = parser.parse_args(argv)
+
+    config = SyntheticConfig(**{name: getattr(args, name) for name in vars(defaults)})
+    generator = SyntheticModelGenerator(config)
+    model = generator.bpmn_process() if args.kind == "bpmn" else getattr(generator, f"{args.kind}_diagram")()
+    text = json.dumps(model, ensure_ascii=False, indent=2) if args.kind == "bpmn" else model
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(text)
+    else:
+        print(text)
+    for error in generator.injected_errors:
+        print(f"Wstrzyknięty błąd: {error.kind} @ {error.location} - {error.description}", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,63 @@
+"""
+Syntetyczne obciążenia dla benchmarków: diagramy PlantUML i procesy BPMN JSON.
+
+Obciążenia pochodzą z generatora `benchmarks.synthetic` ze stałą konfiguracją
+(`WORKLOAD_CONFIG`), więc są deterministyczne (ten sam rozmiar - ten sam tekst),
+a wyniki kolejnych uruchomień i wartości bazowe dotyczą identycznych danych.
+Rozmiar to liczba głównych elementów diagramu: klas, komunikatów, akcji,
+komponentów albo zadań procesu BPMN.
+"""
+
+from dataclasses import replace
+from typing import Callable, Dict
+
+from benchmarks.synthetic import SyntheticConfig, SyntheticModelGenerator
+
+# Kształt obciążeń benchmarkowych - zmiana unieważnia wartości bazowe (baseline.json)
+WORKLOAD_CONFIG = SyntheticConfig(branching=2, max_depth=3, decision_rate=0.1, fork_rate=0.05,
+                                  loop_rate=0.03, lanes=3, lanes_per_pool=2, message_rate=0.1, seed=2024)
+
+
+def _generator(size: int, **overrides) -> SyntheticModelGenerator:
+    return SyntheticModelGenerator(replace(WORKLOAD_CONFIG, size=size, **overrides))
+
+
+def class_diagram(size: int) -> str:
+    """Diagram klas: pakiety, interfejsy, enumeracje, dziedziczenie i asocjacje z krotnościami."""
+    return _generator(size).class_diagram()
+
+
+def sequence_diagram(size: int) -> str:
+    """Diagram sekwencji: uczestnicy różnych typów, aktywacje, fragmenty alt/opt/loop i notatki."""
+    return _generator(size, lanes=max(2, min(20, size // 10 + 2))).sequence_diagram()
+
+
+def activity_diagram(size: int) -> str:
+    """Diagram aktywności: tory, decyzje if/else, rozwidlenia fork/join i pętle."""
+    return _generator(size).activity_diagram()
+
+
+def component_diagram(size: int) -> str:
+    """Diagram komponentów: zagnieżdżone pakiety, interfejsy, bazy danych i zależności."""
+    return _generator(size).component_diagram()
+
+
+def bpmn_process(size: int, pools: int = 3) -> Dict:
+    """Proces BPMN v2 (JSON): kilka Pool z torami, bramki XOR/AND, pętle zwrotne i Message Flow."""
+    return _generator(size, lanes=pools).bpmn_process()
+
+
+PLANTUML_WORKLOADS: Dict[str, Callable[[int], str]] = {
+    "class": class_diagram,
+    "sequence": sequence_diagram,
+    "activity": activity_diagram,
+    "component": component_diagram,
+}
+
+# Nazwy typów jak z identify_plantuml_diagram_type - wejście XMIConverter
+DIAGRAM_TYPE_NAMES = {
+    "class": "Diagram klas",
+    "sequence": "Diagram sekwencji",
+    "activity": "Diagram aktywności",
+    "component": "Diagram komponentów",
+}
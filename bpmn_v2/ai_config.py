@@ -30,7 +30,8 @@ def _get_provider_from_env() -> AIProvider:
         'openai': AIProvider.OPENAI,
         'local': AIProvider.OLLAMA,  # local = Ollama
         'claude': AIProvider.CLAUDE,
-        'ollama': AIProvider.OLLAMA
+        'ollama': AIProvider.OLLAMA,
+        'mock': AIProvider.MOCK
     }
     
     model_provider = os.getenv('MODEL_PROVIDER', 'gemini').lower()
@@ -143,6 +144,9 @@ def get_available_models_for_provider() -> dict:
             'llama2',
             'mistral',
             'codellama'
+        ],
+        AIProvider.MOCK: [
+            'offline-llm'
         ]
     }
     
@@ -175,6 +179,9 @@ def validate_config(config: AIConfig) -> bool:
         except:
             return False
     
+    elif config.provider == AIProvider.MOCK:
+        return True
+    
     return False
 
 
@@ -7,7 +7,8 @@ Ten moduł zawiera:
 2. OpenAI client implementation  
 3. Claude client implementation
 4. Local Ollama client implementation
-5. Response parsing and error handling
+5. Offline (mock) client for performance tests without network
+6. Response parsing and error handling
 """
 
 import json
@@ -52,6 +53,7 @@ class AIProvider(Enum):
     OLLAMA = "ollama"
     GEMINI = "gemini"
     LOCAL = "local"  # LLM Studio
+    MOCK = "mock"  # Offline LLM (offline_model.py) - testy bez sieci
 
 
 @dataclass
@@ -78,7 +80,8 @@ class AIConfig:
             "claude": FreshAIProvider.CLAUDE,
             "ollama": FreshAIProvider.OLLAMA,
             "gemini": FreshAIProvider.GEMINI,
-            "local": FreshAIProvider.LOCAL
+            "local": FreshAIProvider.LOCAL,
+            "mock": FreshAIProvider.MOCK
         }
         
         provider = provider_map.get(model_provider.lower(), FreshAIProvider.GEMINI)
@@ -96,6 +99,8 @@ class AIConfig:
             model = "models/gemini-2.0-flash"
         elif provider == FreshAIProvider.LOCAL:
             model = "google/gemma-3-4b"  # Default local model
+        elif provider == FreshAIProvider.MOCK:
+            model = "offline-llm"
         else:
             model = "models/gemini-2.0-flash"  # fallback
             
@@ -439,6 +444,54 @@ class OllamaClient(AIClientInterface):
             return False
 
 
+class MockAIClient(AIClientInterface):
+    """Klient offline - deterministyczne odpowiedzi z offline_model.py (konfiguracja OFFLINE_LLM_*)"""
+    
+    def __init__(self, config: AIConfig, llm=None):
+        try:
+            from .offline_model import OfflineLLM, OfflineLLMConfig, OfflineLLMError
+        except ImportError:
+            from offline_model import OfflineLLM, OfflineLLMConfig, OfflineLLMError
+        
+        self.config = config
+        self.model = config.model or "offline-llm"
+        self.llm = llm or OfflineLLM(OfflineLLMConfig.from_env(), model=self.model)
+        self._error_type = OfflineLLMError
+    
+    def generate_response(self, prompt: str) -> AIResponse:
+        """Generuje odpowiedź offline (z symulowanym opóźnieniem i błędami)"""
+        try:
+            completion = self.llm.complete(prompt, model=self.model, max_tokens=self.config.max_tokens)
+        except self._error_type as e:
+            return AIResponse(
+                content="",
+                model=self.model,
+                provider=AIProvider.MOCK,
+                metadata={"status_code": e.status, "error_kind": e.kind},
+                success=False,
+                error=str(e)
+            )
+        
+        return AIResponse(
+            content=completion.content,
+            model=self.model,
+            provider=AIProvider.MOCK,
+            usage=completion.usage,
+            metadata={"source": completion.source, "latency_ms": round(completion.latency_ms, 1),
+                      "finish_reason": completion.finish_reason},
+            success=True
+        )
+    
+    async def generate_response_async(self, prompt: str) -> AIResponse:
+        """Asynchroniczna wersja (wywołanie w puli wątków - opóźnienia nie blokują pętli zdarzeń)"""
+        loop = asyncio.get_event_loop()
+        return await loop.run_in_executor(None, self.generate_response, prompt)
+    
+    def test_connection(self) -> bool:
+        """Klient offline jest zawsze dostępny"""
+        return True
+
+
 class AIClientFactory:
     """Factory do tworzenia klientów AI"""
     
@@ -457,6 +510,8 @@ class AIClientFactory:
             return OllamaClient(config)
         elif config.provider == AIProvider.GEMINI:
             return GeminiClient(config)
+        elif config.provider == AIProvider.MOCK:
+            return MockAIClient(config)
         else:
             # Force Gemini if no valid provider
             print(f"⚠️ Unsupported provider {config.provider}, forcing Gemini...")
@@ -475,6 +530,11 @@ class AIClientFactory:
         """Zwraca listę dostępnych dostawców"""
         providers = [AIProvider.OLLAMA, AIProvider.LOCAL]  # Always available
         
+        # Klient offline tylko na żądanie (MODEL_PROVIDER=mock albo OFFLINE_LLM_ENABLED w testach)
+        if (os.getenv('MODEL_PROVIDER', '').strip().lower() == 'mock'
+                or os.getenv('OFFLINE_LLM_ENABLED', '').strip().lower() in ('1', 'true', 'yes')):
+            providers.append(AIProvider.MOCK)
+        
         if HAS_OPENAI:
             providers.append(AIProvider.OPENAI)
         if HAS_ANTHROPIC:
@@ -10,8 +10,11 @@ from dataclasses import dataclass
 from typing import Dict, List, Any, Tuple, Set
 from enum import Enum
 import json
+import logging
 import xml.etree.ElementTree as ET
 
+logger = logging.getLogger(__name__)
+
 class BPMNSeverity(Enum):
     """Poziomy ważności błędów BPMN"""
     CRITICAL = "critical"      # Błędy naruszające standard BPMN
@@ -226,16 +229,14 @@ class BPMNComplianceValidator:
         statistics = self._generate_statistics(issues, bpmn_json)
         priorities = self._determine_improvement_priorities(issues)
         
-        # DEBUG: Pokazuj szczegóły issues
-        critical_count = len([i for i in issues if i.severity == BPMNSeverity.CRITICAL])
-        major_count = len([i for i in issues if i.severity == BPMNSeverity.MAJOR])
-        print(f"🏭 BPMN Compliance Debug:")
-        print(f"   Total issues: {len(issues)} (Critical: {critical_count}, Major: {major_count})")
-        print(f"   Score: {overall_score}")
-        if critical_count > 0:
-            print(f"   Critical issues:")
-            for issue in [i for i in issues if i.severity == BPMNSeverity.CRITICAL][:3]:
-                print(f"      - {issue.rule_code}: {issue.message}")
+        # DEBUG: Pokazuj szczegóły issues (tylko gdy poziom DEBUG jest włączony)
+        if logger.isEnabledFor(logging.DEBUG):
+            critical_issues = [i for i in issues if i.severity == BPMNSeverity.CRITICAL]
+            major_count = len([i for i in issues if i.severity == BPMNSeverity.MAJOR])
+            logger.debug("BPMN Compliance: %d issues (Critical: %d, Major: %d), score: %s",
+                         len(issues), len(critical_issues), major_count, overall_score)
+            for issue in critical_issues[:3]:
+                logger.debug("   - %s: %s", issue.rule_code, issue.message)
         
         return BPMNComplianceReport(
             overall_score=overall_score,
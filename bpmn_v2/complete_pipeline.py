@@ -10,6 +10,7 @@ Ten moduł integruje wszystkie komponenty v2:
 
 import json
 import os
+import time
 from datetime import datetime
 from typing import Dict, List, Any, Optional
 import traceback
@@ -25,6 +26,11 @@ from json_to_bpmn_generator import BPMNJSONConverter
 from ai_integration import AIClientFactory, ResponseParser, AIResponse
 from ai_config import get_default_config, AIConfig
 from ai_integration import AIProvider  # Import AIProvider z primary source
+from utils.db.history_store import ARTIFACT_BPMN_JSON, ARTIFACT_BPMN_XML, submit_history_job
+
+
+def _elapsed_ms(started: float) -> float:
+    return round((time.perf_counter() - started) * 1000, 1)
 
 
 class BPMNv2Pipeline:
@@ -92,12 +98,17 @@ class BPMNv2Pipeline:
         # Analyze Polish text first
         analysis = self.analyze_process_description(polish_text)
         
-        # Generate context-aware prompt
-        prompt = self.prompt_generator.generate_prompt(
-            process_description=polish_text
+        # Generate context-aware prompt fitted to the model's token budget
+        budgeted = self.prompt_generator.generate_budgeted_prompt(
+            process_description=polish_text,
+            model_name=self.ai_config.model,
+            reserved_output_tokens=self.ai_config.max_tokens
         )
+        prompt = budgeted.text
         
-        print(f"📄 Wygenerowany prompt ({len(prompt)} znaków)")
+        print(f"📄 Wygenerowany prompt ({len(prompt)} znaków, {budgeted.total_tokens}/{budgeted.budget} tokenów)")
+        if budgeted.tokens_saved > 0:
+            print(f"📉 Zaoszczędzono {budgeted.tokens_saved} tokenów (pominięte: {budgeted.dropped or '-'})")
         
         return prompt
     
@@ -151,9 +162,11 @@ class BPMNv2Pipeline:
         return bpmn_xml
     
     def save_pipeline_outputs(self, process_name: str, polish_text: str, 
-                             ai_prompt: str, ai_response: Dict, bpmn_xml: str) -> Dict[str, str]:
+                             ai_prompt: str, ai_response: Dict, bpmn_xml: str,
+                             latency_ms: Optional[int] = None, quality: Optional[Dict[str, float]] = None,
+                             stage_timings: Optional[Dict[str, float]] = None) -> Dict[str, str]:
         """
-        Zapisuje wszystkie artefakty pipeline'u
+        Zapisuje wszystkie artefakty pipeline'u (pliki + magazyn historii)
         
         Args:
             process_name: Nazwa procesu
@@ -161,6 +174,9 @@ class BPMNv2Pipeline:
             ai_prompt: Wygenerowany prompt
             ai_response: Odpowiedź AI w JSON
             bpmn_xml: Wygenerowany BPMN XML
+            latency_ms: Czas odpowiedzi modelu (opcjonalnie)
+            quality: Oceny jakości procesu {metryka: wynik} (opcjonalnie)
+            stage_timings: Czasy etapów pipeline'u w ms (opcjonalnie)
             
         Returns:
             Dictionary z ścieżkami zapisanych plików
@@ -200,8 +216,36 @@ class BPMNv2Pipeline:
         for artifact_type, filepath in files.items():
             print(f"   {artifact_type}: {filepath}")
         
+        self.record_history(ai_prompt, ai_response, bpmn_xml, files, latency_ms, quality, stage_timings)
         return files
     
+    def record_history(self, ai_prompt: str, ai_response: Dict, bpmn_xml: str,
+                       files: Dict[str, str], latency_ms: Optional[int] = None,
+                       quality: Optional[Dict[str, float]] = None,
+                       stage_timings: Optional[Dict[str, float]] = None):
+        """Zapisuje prompt, odpowiedź, artefakty BPMN, oceny jakości (dla XML) i czasy etapów
+        w magazynie historii (jeśli włączony).
+
+        Zapis wykonuje wątek w tle - pipeline nie czeka na bazę."""
+        model = self.ai_config.model
+        response_json = json.dumps(ai_response, ensure_ascii=False)
+        
+        def job(store):
+            ids = store.record_interaction(ai_prompt, response_json, model, diagram_type="bpmn",
+                                           latency_ms=latency_ms, source="bpmn_v2")
+            store.record_artifact(ARTIFACT_BPMN_JSON, response_json, request_id=ids["request_id"],
+                                  response_id=ids["response_id"], diagram_type="bpmn", model=model,
+                                  path=files.get('ai_response'))
+            xml_id = store.record_artifact(ARTIFACT_BPMN_XML, bpmn_xml, request_id=ids["request_id"],
+                                           response_id=ids["response_id"], diagram_type="bpmn", model=model,
+                                           path=files.get('bpmn_output'))
+            for metric, score in (quality or {}).items():
+                store.record_quality(xml_id, score, metric=metric)
+            for stage, elapsed_ms in (stage_timings or {}).items():
+                store.record_timing(stage, elapsed_ms, ids["request_id"], model, "bpmn")
+        
+        submit_history_job(job)
+    
     def run_complete_pipeline(self, polish_text: str, process_name: str = "Process", 
                             context: str = "banking", save_artifacts: bool = True) -> Dict[str, Any]:
         """
@@ -229,18 +273,25 @@ class BPMNv2Pipeline:
             'process_name': process_name,
             'context': context,
             'timestamp': datetime.now().isoformat(),
-            'files': {}
+            'files': {},
+            # Czasy etapów (ms) bez wywołania modelu - ten jest w 'ai_latency_ms'
+            'stage_timings': {}
         }
+        stage_timings = result['stage_timings']
         
         try:
             # Step 1: Analyze Polish text
             print(f"\n📍 KROK 1: Analiza polskiego tekstu")
+            started = time.perf_counter()
             analysis = self.analyze_process_description(polish_text)
+            stage_timings['analysis'] = _elapsed_ms(started)
             result['analysis'] = analysis
             
             # Step 2: Generate AI prompt
             print(f"\n📍 KROK 2: Generowanie promptu AI")
+            started = time.perf_counter()
             ai_prompt = self.generate_ai_prompt(polish_text, context)
+            stage_timings['prompt'] = _elapsed_ms(started)
             result['ai_prompt'] = ai_prompt
             
             # Step 3: Get AI response
@@ -248,7 +299,10 @@ class BPMNv2Pipeline:
             print(f"🤖 Model: {self.ai_config.model}")
             print(f"📊 Prompt size: {len(ai_prompt)} znaków")
             
+            ai_started = time.perf_counter()
             ai_response = self.ai_client.generate_response(ai_prompt)
+            ai_latency_ms = int((time.perf_counter() - ai_started) * 1000)
+            result['ai_latency_ms'] = ai_latency_ms
             
             if not ai_response.success:
                 raise ValueError(f"AI API error: {ai_response.error}")
@@ -259,7 +313,9 @@ class BPMNv2Pipeline:
             
             # Step 4: Parse AI response to JSON
             print(f"\n📍 KROK 4: Parsing odpowiedzi AI do JSON")
+            started = time.perf_counter()
             json_success, parsed_json, parse_errors = self.response_parser.extract_json(ai_response)
+            stage_timings['parse'] = _elapsed_ms(started)
             
             if not json_success:
                 raise ValueError(f"JSON parsing failed: {parse_errors}")
@@ -269,6 +325,7 @@ class BPMNv2Pipeline:
             
             # Step 5: Validate AI response
             print(f"\n📍 KROK 5: Walidacja JSON względem schema")
+            started = time.perf_counter()
             
             # Pre-process: Fix Polish complexity values to English
             if 'metadata' in parsed_json and 'complexity' in parsed_json['metadata']:
@@ -290,6 +347,7 @@ class BPMNv2Pipeline:
             json_string = json.dumps(parsed_json, ensure_ascii=False)
             validation_result = self.response_validator.validate_response(json_string)
             is_valid, validated_json, validation_errors = validation_result
+            stage_timings['validate'] = _elapsed_ms(started)
             
             validation = {
                 'is_valid': is_valid,
@@ -304,14 +362,17 @@ class BPMNv2Pipeline:
             
             # Step 6: Generate BPMN XML
             print(f"\n📍 KROK 6: Generowanie BPMN XML")
+            started = time.perf_counter()
             bpmn_xml = self.convert_json_to_bpmn(parsed_json)
+            stage_timings['bpmn_xml'] = _elapsed_ms(started)
             result['bpmn_xml'] = bpmn_xml
             
             # Step 7: Save artifacts
             if save_artifacts:
                 print(f"\n📍 KROK 7: Zapisywanie artefaktów")
                 files = self.save_pipeline_outputs(
-                    process_name, polish_text, ai_prompt, parsed_json, bpmn_xml
+                    process_name, polish_text, ai_prompt, parsed_json, bpmn_xml, ai_latency_ms,
+                    stage_timings=stage_timings
                 )
                 result['files'] = files
             
@@ -9,11 +9,16 @@ Data: 2025-11-29
 from typing import Dict, List, Any, Optional, Tuple
 from dataclasses import dataclass
 from collections import defaultdict, Counter
-import json
 import hashlib
 from datetime import datetime
 import numpy as np
 
+try:
+    from .process_canonical import structural_hash
+except ImportError:
+    # Fallback for direct execution
+    from process_canonical import structural_hash
+
 @dataclass
 class ProcessKnowledge:
     """Wiedza wydobyta z procesu BPMN"""
@@ -136,15 +141,8 @@ class CrossProcessLearner:
     
     def _calculate_process_hash(self, process_data: Dict) -> str:
         """Oblicza hash procesu dla detekcji duplikatów"""
-        # Normalize process data for hashing
-        normalized = {
-            'element_types': sorted([e.get('type', '') for e in process_data.get('elements', [])]),
-            'participant_count': len(process_data.get('participants', [])),
-            'flow_count': len(process_data.get('flows', []))
-        }
-        
-        hash_string = json.dumps(normalized, sort_keys=True)
-        return hashlib.sha256(hash_string.encode()).hexdigest()
+        # Struktura grafu (typy, uczestnicy, połączenia) - niezależna od id i nazw
+        return structural_hash(process_data)
     
     def _extract_process_patterns(self, process_data: Dict) -> Dict[str, Any]:
         """Wydobywa wzorce z procesu"""
@@ -21,6 +21,7 @@ sys.path.append(os.path.join(os.path.dirname(__file__)))
 from .complete_pipeline import BPMNv2Pipeline
 from .mcp_server_simple import SimpleMCPServer
 from .ai_config import get_default_config
+from .process_canonical import content_hash, diff_processes, structural_hash
 
 
 class IterativeImprovementPipeline:
@@ -78,8 +79,10 @@ class IterativeImprovementPipeline:
             'success': False,
             'total_improvements': 0,
             'fixed_categories': [],  # Tracking naprawionych kategorii
-            'category_progression': []  # Historia kategorii
+            'category_progression': [],  # Historia kategorii
+            'stage_timings': {}  # Czasy etapów (ms) - zapisywane w magazynie historii
         }
+        stage_timings = result['stage_timings']
         
         current_process = None
         iteration = 0
@@ -99,9 +102,12 @@ class IterativeImprovementPipeline:
                 raise ValueError(f"Initial generation failed: {initial_result.get('error')}")
             
             current_process = initial_result['ai_response']
+            stage_timings.update(initial_result.get('stage_timings', {}))
             
             # Verify initial process with original participants count
+            started = time.perf_counter()
             initial_verification = self.mcp_server.verify_bpmn_process(current_process, result['original_participants_count'])
+            stage_timings['initial_verification'] = round((time.perf_counter() - started) * 1000, 1)
             
             # Record initial iteration
             iteration_result = {
@@ -125,9 +131,15 @@ class IterativeImprovementPipeline:
                     'success': True,
                     'final_quality': initial_verification['overall_quality']
                 })
+                self.pipeline.record_history(
+                    initial_result['ai_prompt'], current_process, initial_result['bpmn_xml'], {},
+                    initial_result.get('ai_latency_ms'), quality=self._quality_scores(initial_verification),
+                    stage_timings=stage_timings
+                )
             else:
                 # ITERATIVE IMPROVEMENT LOOP
                 iteration_count = 0
+                started = time.perf_counter()
                 # Note: iteration 0 was initial generation, now iterations 1-max_iterations are improvements
                 for iteration in range(1, self.max_iterations):
                     iteration_count = iteration
@@ -421,7 +433,10 @@ class IterativeImprovementPipeline:
                         current_iteration_result['type'] = 'max_iterations_reached'
                         break
             
+                stage_timings['improvement_iterations'] = round((time.perf_counter() - started) * 1000, 1)
+                
                 # Final verification and finalization
+                started = time.perf_counter()
                 final_verification = self.mcp_server.verify_bpmn_process(current_process, result['original_participants_count'])
                 
                 # DEBUG: Check if final process has required structure (wyłączone)
@@ -467,13 +482,17 @@ class IterativeImprovementPipeline:
                     final_bpmn_xml = self.pipeline.convert_json_to_bpmn(current_process)
                     print(f"🔧 Fallback XML length: {len(final_bpmn_xml) if final_bpmn_xml else 0}")
                 
-                # Save final artifacts
+                stage_timings['finalize'] = round((time.perf_counter() - started) * 1000, 1)
+                
+                # Save final artifacts (z oceną jakości i czasami etapów w magazynie historii)
                 final_files = self.pipeline.save_pipeline_outputs(
                     process_name + "_improved", 
                     polish_text, 
                     "Iteratively improved process",
                     current_process, 
-                    final_bpmn_xml
+                    final_bpmn_xml,
+                    quality=self._quality_scores(final_verification),
+                    stage_timings=stage_timings
                 )
                 
                 result.update({
@@ -502,6 +521,17 @@ class IterativeImprovementPipeline:
         
         return result
     
+    def _quality_scores(self, verification: Dict) -> Dict[str, float]:
+        """Oceny jakości z weryfikacji (EnhancedBPMNQualityChecker) do magazynu historii"""
+        scores = {
+            'overall': verification.get('overall_quality', 0.0),
+            'completeness': verification.get('completeness_score', 0.0),
+        }
+        compliance_score = verification.get('bpmn_compliance', {}).get('score')
+        if compliance_score is not None:
+            scores['compliance'] = compliance_score
+        return scores
+    
     def _validate_process_structure(self, process: Dict) -> bool:
         """Weryfikuje czy proces ma poprawną strukturę przed konwersją"""
         if not process or not isinstance(process, dict):
@@ -537,9 +567,14 @@ class IterativeImprovementPipeline:
             'iteration_count': len(result['iterations']),
             'quality_progression': [],
             'improvements_timeline': [],
-            'total_changes': 0
+            'total_changes': 0,
+            'process_changes': [],
+            'unchanged_iterations': []
         }
         
+        previous_process = None
+        previous_hash = None
+        structure_hashes = {}
         for iteration in result['iterations']:
             comparison['quality_progression'].append({
                 'iteration': iteration['iteration'],
@@ -553,6 +588,26 @@ class IterativeImprovementPipeline:
                     'changes': iteration['improvements_applied']
                 })
                 comparison['total_changes'] += len(iteration['improvements_applied'])
+            
+            # Faktyczne zmiany procesu względem poprzedniej iteracji (diff tylko gdy skrót się różni)
+            process = iteration.get('process')
+            if isinstance(process, dict):
+                current_hash = content_hash(process)
+                if previous_hash is not None:
+                    if current_hash == previous_hash:
+                        comparison['unchanged_iterations'].append(iteration['iteration'])
+                    else:
+                        diff = diff_processes(previous_process, process)
+                        for key, value in ((previous_hash, previous_process), (current_hash, process)):
+                            if key not in structure_hashes:
+                                structure_hashes[key] = structural_hash(value)
+                        comparison['process_changes'].append({
+                            'iteration': iteration['iteration'],
+                            'summary': diff.summary(),
+                            'changes': diff.describe(),
+                            'structure_changed': structure_hashes[previous_hash] != structure_hashes[current_hash]
+                        })
+                previous_process, previous_hash = process, current_hash
         
         # Calculate improvement rate
         if len(comparison['quality_progression']) > 1:
@@ -10,13 +10,19 @@ Ten moduł zawiera:
 
 import json
 import re
+import os
+import sys
+from functools import lru_cache
 from typing import Dict, List, Any, Optional, Tuple
 from dataclasses import dataclass, asdict
 from enum import Enum
 import jsonschema
 
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
 from structure_definition import ElementType, TaskType, GatewayType
 from polish_dictionary import ContextType
+from utils.prompt_budget import PromptBudgeter, PromptSection, BudgetedPrompt
 
 
 class ResponseFormat(Enum):
@@ -165,58 +171,87 @@ class BPMNJSONSchema:
 class PromptGenerator:
     """Generator promptów dla AI z JSON Schema"""
     
+    # Sekcje statyczne (wszystko poza opisem procesu) zależą tylko od kontekstu
+    # i włączenia przykładów - są liczone raz i współdzielone między instancjami
+    _static_sections_cache: Dict[Tuple[ContextType, bool], Tuple[List[PromptSection], List[PromptSection]]] = {}
+    
     def __init__(self, template: AIPromptTemplate):
         self.template = template
         self.schema = BPMNJSONSchema.get_schema()
+        self._static_sections()
     
-    def generate_prompt(self, process_description: str) -> str:
+    def generate_prompt(self, process_description: str, model_name: Optional[str] = None,
+                        token_budget: Optional[int] = None) -> str:
         """
         Generuje kompletny prompt dla AI
         
         Args:
             process_description: Opis procesu biznesowego
+            model_name: Model docelowy - jeśli podany, prompt jest dopasowywany do jego budżetu tokenów
+            token_budget: Jawny budżet tokenów (nadpisuje budżet wynikający z modelu)
             
         Returns:
             Gotowy prompt dla AI
         """
-        # Podstawowa część promptu
-        base_prompt = self._get_base_prompt()
-        
-        # Kontekst biznesowy
-        context_section = self._get_context_section()
-        
-        # JSON Schema
-        schema_section = self._get_schema_section()
-        
-        # Przykłady
-        examples_section = self._get_examples_section() if self.template.include_examples else ""
-        
-        # Instrukcje walidacji
-        validation_section = self._get_validation_section()
-        
-        # Opis procesu
-        process_section = f"""
+        if model_name is None and token_budget is None:
+            head, tail = self._static_sections()
+            return "\n\n".join([self._static_text(head), self._process_section(process_description),
+                                  self._static_text(tail)])
+        return self.generate_budgeted_prompt(process_description, model_name, token_budget).text
+    
+    def generate_budgeted_prompt(self, process_description: str, model_name: Optional[str] = None,
+                                 token_budget: Optional[int] = None,
+                                 reserved_output_tokens: Optional[int] = None) -> BudgetedPrompt:
+        """Generuje prompt mieszczący się w budżecie tokenów modelu (z raportem oszczędności)"""
+        budgeter = PromptBudgeter(model_name, budget=token_budget, reserved_output_tokens=reserved_output_tokens)
+        return budgeter.assemble(self.build_sections(process_description))
+    
+    def build_sections(self, process_description: str) -> List[PromptSection]:
+        """Zwraca sekcje promptu z priorytetami używanymi przy budżetowaniu"""
+        head, tail = self._static_sections()
+        return head + [PromptSection("process", self._process_section(process_description), required=True)] + tail
+    
+    @staticmethod
+    def _process_section(process_description: str) -> str:
+        """Opis procesu"""
+        return f"""
 **OPIS PROCESU DO ANALIZY:**
 {process_description}
 
 """
-        
-        # Instrukcja wyjścia
-        output_instruction = self._get_output_instruction()
-        
-        return f"""{base_prompt}
-
-{context_section}
-
-{schema_section}
-
-{examples_section}
-
-{validation_section}
-
-{process_section}
-
-{output_instruction}"""
+    
+    @staticmethod
+    def _static_text(sections: List[PromptSection]) -> str:
+        return "\n\n".join(section.text for section in sections)
+    
+    def _static_sections(self) -> Tuple[List[PromptSection], List[PromptSection]]:
+        """Sekcje przed i po opisie procesu (prekompilowane: schema JSON, przykłady)"""
+        key = (self.template.context_type, self.template.include_examples)
+        cached = self._static_sections_cache.get(key)
+        if cached is None:
+            include_examples = self.template.include_examples
+            head = [
+                # Podstawowa część promptu
+                PromptSection("base", self._get_base_prompt(), priority=80),
+                # Kontekst biznesowy
+                PromptSection("context", self._get_context_section(), priority=40),
+                # JSON Schema - przycięty schema jest bezużyteczny, więc tylko wersja kompaktowa
+                PromptSection("schema", self._get_schema_section(), priority=60,
+                              compact=self._get_schema_section(compact=True), truncatable=False),
+                # Przykłady
+                PromptSection("examples", self._get_examples_section() if include_examples else "", priority=20,
+                              compact=self._get_examples_section(compact=True) if include_examples else None,
+                              truncatable=False),
+                # Instrukcje walidacji
+                PromptSection("validation", self._get_validation_section(), priority=30),
+            ]
+            tail = [
+                # Instrukcja wyjścia
+                PromptSection("output", self._get_output_instruction(), required=True),
+            ]
+            cached = (head, tail)
+            self._static_sections_cache[key] = cached
+        return cached
     
     def _get_base_prompt(self) -> str:
         """Podstawowa część promptu"""
@@ -304,7 +339,14 @@ class PromptGenerator:
 - **ZAWSZE zachowuj wszystkich uczestników jako oddzielne Pool
 - NIGDY nie upraszczaj procesów - zachowuj zgodność ze standardem BPMN 2.0"""
     
-    def _get_schema_section(self) -> str:
+    @staticmethod
+    def _dump_json(data: Dict[str, Any], compact: bool = False) -> str:
+        """JSON do promptu - wcięty lub kompaktowy (mniej tokenów)"""
+        if compact:
+            return json.dumps(data, ensure_ascii=False, separators=(",", ":"))
+        return json.dumps(data, indent=2, ensure_ascii=False)
+    
+    def _get_schema_section(self, compact: bool = False) -> str:
         """Sekcja z JSON Schema"""
         return f"""
 **WYMAGANY FORMAT ODPOWIEDZI - JSON SCHEMA:**
@@ -312,17 +354,17 @@ class PromptGenerator:
 Twoja odpowiedź MUSI być poprawnym JSON zgodnym z poniższym schema:
 
 ```json
-{json.dumps(self.schema, indent=2, ensure_ascii=False)}
+{self._dump_json(self.schema, compact)}
 ```"""
     
-    def _get_examples_section(self) -> str:
+    def _get_examples_section(self, compact: bool = False) -> str:
         """Sekcja z przykładami"""
         if self.template.context_type == ContextType.BANKING:
-            return self._get_banking_example()
+            return self._get_banking_example(compact)
         else:
-            return self._get_generic_example()
+            return self._get_generic_example(compact)
     
-    def _get_banking_example(self) -> str:
+    def _get_banking_example(self, compact: bool = False) -> str:
         """Przykład bankowy"""
         example = {
             "process_name": "Przelew internetowy",
@@ -370,10 +412,10 @@ Twoja odpowiedź MUSI być poprawnym JSON zgodnym z poniższym schema:
 **PRZYKŁAD ODPOWIEDZI (proces bankowy):**
 
 ```json
-{json.dumps(example, indent=2, ensure_ascii=False)}
+{self._dump_json(example, compact)}
 ```"""
     
-    def _get_generic_example(self) -> str:
+    def _get_generic_example(self, compact: bool = False) -> str:
         """Przykład ogólny"""
         example = {
             "process_name": "Obsługa zamówienia",
@@ -396,7 +438,7 @@ Twoja odpowiedź MUSI być poprawnym JSON zgodnym z poniższym schema:
 **PRZYKŁAD ODPOWIEDZI:**
 
 ```json
-{json.dumps(example, indent=2, ensure_ascii=False)}
+{self._dump_json(example, compact)}
 ```"""
     
     def _get_validation_section(self) -> str:
@@ -515,6 +557,15 @@ Przed zwróceniem odpowiedzi sprawdź czy:
 - ✅ Proces zachowuje pełną funkcjonalność biznesową z opisu"""
 
 
+@lru_cache(maxsize=1)
+def _compiled_schema_validator():
+    """Walidator schema BPMN zbudowany raz (jsonschema.validate sprawdza schema i tworzy walidator przy każdym wywołaniu)"""
+    schema = BPMNJSONSchema.get_schema()
+    validator_class = jsonschema.validators.validator_for(schema)
+    validator_class.check_schema(schema)
+    return validator_class(schema)
+
+
 class ResponseValidator:
     """Walidator odpowiedzi AI"""
     
@@ -547,20 +598,31 @@ class ResponseValidator:
             errors.append(f"Błąd parsowania JSON: {e}")
             return False, None, errors
         
-        # 3. Waliduj względem schema
+        # 3-4. Waliduj schema i logikę biznesową
+        is_valid, errors = self.validate_process(parsed_json)
+        return is_valid, parsed_json, errors
+    
+    def validate_process(self, data: Dict) -> Tuple[bool, List[str]]:
+        """
+        Waliduje proces już dostępny jako słownik (bez serializacji do JSON i ponownego parsowania)
+        
+        Returns:
+            Tuple (is_valid, errors)
+        """
+        errors = []
+        
+        # Waliduj względem schema - ten sam komunikat co jsonschema.validate (best_match)
         try:
-            jsonschema.validate(parsed_json, self.schema)
-        except jsonschema.ValidationError as e:
-            errors.append(f"Błąd walidacji schema: {e.message}")
+            error = jsonschema.exceptions.best_match(_compiled_schema_validator().iter_errors(data))
+            if error is not None:
+                errors.append(f"Błąd walidacji schema: {error.message}")
         except jsonschema.SchemaError as e:
             errors.append(f"Błąd w schema: {e}")
         
-        # 4. Waliduj logikę biznesową
-        business_errors = self._validate_business_logic(parsed_json)
-        errors.extend(business_errors)
+        # Waliduj logikę biznesową
+        errors.extend(self._validate_business_logic(data))
         
-        is_valid = len(errors) == 0
-        return is_valid, parsed_json, errors
+        return len(errors) == 0, errors
     
     def _extract_json(self, response: str) -> Optional[str]:
         """Wyodrębnia JSON z odpowiedzi AI"""
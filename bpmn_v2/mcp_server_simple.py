@@ -15,8 +15,11 @@ Funkcje:
 10. Adaptive strategy management
 """
 
+import copy
 import json
 import asyncio
+import logging
+from collections import OrderedDict
 from typing import Dict, List, Any, Optional, Tuple
 from datetime import datetime
 import sys
@@ -28,6 +31,7 @@ sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 from .complete_pipeline import BPMNv2Pipeline
 from .ai_config import get_default_config
 from .json_prompt_template import ResponseValidator
+from .process_canonical import content_hash, diff_processes
 
 # Import nowego systemu walidacji BPMN
 from .bpmn_compliance_validator import (
@@ -47,6 +51,8 @@ except ImportError:
 
 from enum import Enum
 
+logger = logging.getLogger(__name__)
+
 class ErrorCategory(Enum):
     """Kategorie błędów BPMN dla progresywnego naprawiania"""
     STRUCTURE = "structure"  # Start/End Events, Pool structure
@@ -56,17 +62,41 @@ class ErrorCategory(Enum):
     SEMANTICS = "semantics"   # Business logic correctness
 
 
+def _env_int(name: str, default: int) -> int:
+    value = os.getenv(name, "").strip()
+    try:
+        return int(value or default)
+    except ValueError:
+        logger.warning("Nieprawidłowa wartość %s=%r - używana domyślna %d", name, value, default)
+        return default
+
+
+def process_hash(bpmn_json: Dict) -> str:
+    """Skrót postaci kanonicznej procesu (klucze posortowane - kolejność kluczy nie zmienia skrótu)"""
+    # Kolejność list zachowana - raport jakości wymienia problemy w kolejności elementów
+    return content_hash(bpmn_json, sort_lists=False)
+
+
 class EnhancedBPMNQualityChecker:
     """
     Zaawansowany sprawdzacz jakości BPMN z pełną walidacją zgodności ze standardem
     + Intelligence Layer integration
+    
+    Wyniki check_process_quality są zapamiętywane (LRU, QUALITY_CACHE_SIZE wpisów, 0 wyłącza)
+    pod skrótem treści procesu - niezmieniony proces nie jest oceniany ponownie.
     """
     
-    def __init__(self):
+    def __init__(self, cache_size: Optional[int] = None):
         self.validator = ResponseValidator()
         self.compliance_validator = BPMNComplianceValidator()
         self.improvement_engine = None  # Będzie ustawione przez SimpleMCPServer
         
+        if cache_size is None:
+            cache_size = _env_int('QUALITY_CACHE_SIZE', 64)
+        self.cache_size = cache_size
+        self._quality_cache: "OrderedDict[Tuple[str, int], Dict[str, Any]]" = OrderedDict()
+        self.cache_stats = {'hits': 0, 'misses': 0}
+        
         # Initialize Intelligence Orchestrator if available
         if INTELLIGENCE_ENABLED:
             self.intelligence = IntelligenceOrchestrator(enable_learning=True)
@@ -83,9 +113,32 @@ class EnhancedBPMNQualityChecker:
         Returns:
             Kompletny raport jakości z oceną zgodności BPMN
         """
-        # 1. Podstawowa walidacja schema JSON
-        json_string = json.dumps(bpmn_json, ensure_ascii=False)
-        is_valid, parsed_json, schema_errors = self.validator.validate_response(json_string)
+        if self.cache_size <= 0:
+            return self._score_process(bpmn_json, original_participants_count)
+        
+        key = (process_hash(bpmn_json), original_participants_count)
+        cached = self._quality_cache.get(key)
+        if cached is not None:
+            self._quality_cache.move_to_end(key)
+            self.cache_stats['hits'] += 1
+            return copy.deepcopy(cached)
+        
+        self.cache_stats['misses'] += 1
+        result = self._score_process(bpmn_json, original_participants_count)
+        # Kopia - wywołujący może modyfikować zwrócony raport
+        self._quality_cache[key] = copy.deepcopy(result)
+        while len(self._quality_cache) > self.cache_size:
+            self._quality_cache.popitem(last=False)
+        return result
+    
+    def clear_cache(self):
+        """Czyści pamięć wyników oceny jakości"""
+        self._quality_cache.clear()
+    
+    def _score_process(self, bpmn_json: Dict, original_participants_count: int = 0) -> Dict[str, Any]:
+        """Pełna ocena jakości procesu (bez pamięci podręcznej)"""
+        # 1. Podstawowa walidacja schema - bezpośrednio na słowniku
+        is_valid, schema_errors = self.validator.validate_process(bpmn_json)
         
         # 2. Zaawansowana walidacja zgodności BPMN
         compliance_report = self.compliance_validator.validate_bpmn_compliance(bpmn_json)
@@ -474,7 +527,7 @@ class EnhancedBPMNQualityChecker:
         # Debug logging
         print(f"📊 Jakość - detale:")
         print(f"   Kompletność: {completeness:.2f}")
-        print(f"   Braki: {len(result.missing_elements)} (penalty: {missing_penalty:.2f})")
+        print(f"   Braki: {len(result.get('missing_elements', []))} (penalty: {missing_penalty:.2f})")
         print(f"   Quality bonus: {quality_bonus:.2f}")
         print(f"   Przed strictness: {overall:.2f}")
         print(f"   Po strictness (0.95): {final_quality:.2f}")
@@ -1483,31 +1536,8 @@ ORYGINALNY PROCES DO POPRAWY:
     
     def _identify_changes(self, original: Dict, improved: Dict) -> List[str]:
         """Identyfikuje zmiany między wersjami - tylko notacyjne poprawki"""
-        changes = []
-        
-        if original.get('description') != improved.get('description'):
-            changes.append("Dodano/poprawiono opis procesu")
-        
-        # Check element names and types
-        orig_elements = original.get('elements', [])
-        impr_elements = improved.get('elements', [])
-        
-        for i, (orig_elem, impr_elem) in enumerate(zip(orig_elements, impr_elements)):
-            if orig_elem.get('name') != impr_elem.get('name'):
-                changes.append(f"Poprawiono nazwę elementu: {orig_elem.get('id')}")
-            
-            if orig_elem.get('type') != impr_elem.get('type'):
-                changes.append(f"Poprawiono typ elementu {orig_elem.get('id')}: {orig_elem.get('type')} → {impr_elem.get('type')}")
-        
-        # Check flow names  
-        orig_flows = original.get('flows', [])
-        impr_flows = improved.get('flows', [])
-        
-        for orig_flow, impr_flow in zip(orig_flows, impr_flows):
-            if not orig_flow.get('name') and impr_flow.get('name'):
-                changes.append(f"Dodano nazwę przepływu: {impr_flow['name']}")
-        
-        return changes
+        # Elementy i przepływy dopasowywane po id, nie po pozycji na liście
+        return diff_processes(original, improved).describe()
 
 
 def test_mcp_server():
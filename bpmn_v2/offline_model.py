@@ -0,0 +1,390 @@
+"""
+Deterministyczny, lokalny zamiennik LLM - klient `AIProvider.MOCK` (MODEL_PROVIDER=mock).
+
+`OfflineLLM` odpowiada na prompty bez sieci i bez kosztów:
+
+1. odpowiedzią nagraną - plik JSONL z polami `prompt`/`response` (także
+   `request`/`response` z dziennika interakcji) albo baza historii SQLite
+   (`HistoryStore.find_response`),
+2. odpowiedzią z szablonu - proces BPMN v2 JSON (prompty pipeline'u BPMN,
+   prompty poprawek z procesem w treści), diagram PlantUML, analiza PDF,
+3. krótką odpowiedzią tekstową.
+
+Czas odpowiedzi to opóźnienie bazowe (rozkład log-normalny wokół `latency_ms`)
+plus czas generowania tokenów (`tokens_per_second`); błędy (429, 500, przekroczenie
+czasu) pojawiają się z prawdopodobieństwem `error_rate`. Losowanie zależy od
+`seed`, treści promptu i numeru próby dla tego promptu, więc ten sam ciąg wywołań
+daje te same odpowiedzi, opóźnienia i błędy, a ponowienie po błędzie może się udać.
+
+Serwer HTTP zgodny z OpenAI i szablony z generatora modeli syntetycznych są
+w `benchmarks/offline_llm.py`.
+
+Konfiguracja (.env): OFFLINE_LLM_LATENCY_MS, OFFLINE_LLM_LATENCY_JITTER,
+OFFLINE_LLM_TOKENS_PER_SECOND, OFFLINE_LLM_ERROR_RATE, OFFLINE_LLM_ERROR_KINDS,
+OFFLINE_LLM_TIMEOUT_S, OFFLINE_LLM_RECORDINGS, OFFLINE_LLM_SEED, OFFLINE_LLM_TIME_SCALE.
+"""
+
+import hashlib
+import json
+import os
+import random
+import re
+import sys
+import threading
+import time
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Optional, Tuple, Union
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT_DIR not in sys.path:
+    sys.path.append(ROOT_DIR)
+
+from utils.logger_utils import log_info
+from utils.prompt_budget import estimate_tokens
+
+# Rodzaj błędu -> (status HTTP, typ błędu w stylu OpenAI)
+ERROR_KINDS = {
+    "rate_limit": (429, "rate_limit_exceeded"),
+    "server_error": (500, "server_error"),
+    "timeout": (504, "timeout"),
+}
+
+
+@dataclass
+class OfflineLLMConfig:
+    """Parametry zamiennika LLM.
+
+    latency_ms        - mediana opóźnienia przed pierwszym tokenem
+    latency_jitter    - odchylenie rozkładu log-normalnego (0 = stałe opóźnienie)
+    tokens_per_second - szybkość generowania odpowiedzi (0 = bez limitu)
+    error_rate        - prawdopodobieństwo błędu na wywołanie
+    error_kinds       - rodzaje błędów (ERROR_KINDS) losowane z równym prawdopodobieństwem
+    timeout_s         - czas oczekiwania przed błędem `timeout`
+    recordings        - plik JSONL z nagranymi odpowiedziami albo baza historii (.db/.sqlite)
+    time_scale        - mnożnik wszystkich opóźnień (0 = bez czekania, wynik nadal podaje czasy)
+    """
+    latency_ms: float = 300.0
+    latency_jitter: float = 0.25
+    tokens_per_second: float = 50.0
+    error_rate: float = 0.0
+    error_kinds: Tuple[str, ...] = ("rate_limit", "server_error", "timeout")
+    timeout_s: float = 30.0
+    recordings: Optional[str] = None
+    bpmn_size: int = 8
+    seed: int = 0
+    time_scale: float = 1.0
+
+    @classmethod
+    def from_env(cls) -> "OfflineLLMConfig":
+        defaults = cls()
+
+        def env(name: str, default):
+            value = os.getenv(f"OFFLINE_LLM_{name}", "").strip()
+            return type(default)(value) if value else default
+
+        kinds = os.getenv("OFFLINE_LLM_ERROR_KINDS", "").strip()
+        return cls(
+            latency_ms=env("LATENCY_MS", defaults.latency_ms),
+            latency_jitter=env("LATENCY_JITTER", defaults.latency_jitter),
+            tokens_per_second=env("TOKENS_PER_SECOND", defaults.tokens_per_second),
+            error_rate=env("ERROR_RATE", defaults.error_rate),
+            error_kinds=tuple(k.strip() for k in kinds.split(",") if k.strip()) if kinds else defaults.error_kinds,
+            timeout_s=env("TIMEOUT_S", defaults.timeout_s),
+            recordings=os.getenv("OFFLINE_LLM_RECORDINGS") or None,
+            bpmn_size=env("BPMN_SIZE", defaults.bpmn_size),
+            seed=env("SEED", defaults.seed),
+            time_scale=env("TIME_SCALE", defaults.time_scale),
+        )
+
+
+class OfflineLLMError(Exception):
+    """Wstrzyknięty błąd dostawcy (kind: klucz ERROR_KINDS, status: kod HTTP)."""
+
+    def __init__(self, kind: str, message: str):
+        super().__init__(message)
+        self.kind = kind
+        self.status, self.error_type = ERROR_KINDS[kind]
+
+
+@dataclass
+class OfflineCompletion:
+    """Odpowiedź zamiennika z symulowanymi czasami (ms)."""
+    content: str
+    model: str
+    prompt_tokens: int
+    completion_tokens: int
+    first_token_ms: float
+    latency_ms: float
+    source: str
+    finish_reason: str = "stop"
+
+    @property
+    def usage(self) -> Dict[str, int]:
+        return {"prompt_tokens": self.prompt_tokens, "completion_tokens": self.completion_tokens,
+                "total_tokens": self.prompt_tokens + self.completion_tokens}
+
+
+Template = Tuple[str, Callable[[str], bool], Callable[[str, random.Random], Optional[str]]]
+
+
+def _prompt_hash(prompt: str) -> str:
+    return hashlib.sha256(prompt.encode("utf-8")).hexdigest()
+
+
+class OfflineLLM:
+    """Deterministyczny zamiennik modelu językowego (bezpieczny wątkowo)."""
+
+    def __init__(self, config: Optional[OfflineLLMConfig] = None, model: str = "offline-llm"):
+        self.config = config or OfflineLLMConfig()
+        self.model = model
+        unknown = set(self.config.error_kinds) - set(ERROR_KINDS)
+        if unknown:
+            raise ValueError(f"Nieznane rodzaje błędów: {sorted(unknown)} (dostępne: {sorted(ERROR_KINDS)})")
+        self._lock = threading.Lock()
+        self._attempts: Dict[str, int] = {}
+        self._recorded: Dict[str, str] = {}
+        self._history = None
+        self.templates: List[Template] = [
+            ("bpmn_improvement", _has_embedded_process, _echo_embedded_process),
+            ("pdf_analysis", lambda p: "dokument pdf" in p.lower(), _pdf_analysis),
+            ("plantuml", _asks_for_plantuml, self._plantuml_diagram),
+            ("bpmn", lambda p: "bpmn" in p.lower() or "json schema" in p.lower(), self._bpmn_process),
+        ]
+        if self.config.recordings:
+            self.load_recordings(self.config.recordings)
+
+    # ===== Odpowiedzi =====
+
+    def load_recordings(self, path: str):
+        """Wczytuje nagrane odpowiedzi: JSONL (prompt/request + response) albo baza historii SQLite."""
+        if path.endswith((".db", ".sqlite", ".sqlite3")):
+            from utils.db.history_store import HistoryStore
+            self._history = HistoryStore("sqlite", path)
+            return
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                if not line.strip():
+                    continue
+                entry = json.loads(line)
+                prompt = entry.get("prompt", entry.get("request"))
+                if prompt is not None and entry.get("response") is not None:
+                    self._recorded[_prompt_hash(prompt)] = entry["response"]
+        log_info("Offline LLM: wczytano %d nagranych odpowiedzi z %s", len(self._recorded), path)
+
+    def record(self, prompt: str, response: str):
+        """Dodaje nagraną odpowiedź dla promptu."""
+        self._recorded[_prompt_hash(prompt)] = response
+
+    def add_template(self, name: str, matches: Union[str, Callable[[str], bool]],
+                     response: Union[str, Callable[[str, random.Random], Optional[str]]]):
+        """Dodaje szablon przed wbudowanymi: `matches` to wyrażenie regularne albo predykat,
+        `response` - tekst z polem {prompt} albo funkcja (prompt, rng) -> odpowiedź."""
+        predicate = (lambda p, pattern=re.compile(matches): bool(pattern.search(p))) if isinstance(matches, str) \
+            else matches
+        render = (lambda p, rng, text=response: text.format(prompt=p)) if isinstance(response, str) else response
+        self.templates.insert(0, (name, predicate, render))
+
+    def respond(self, prompt: str, rng: Optional[random.Random] = None) -> Tuple[str, str]:
+        """Treść odpowiedzi i jej źródło (recorded, template:<nazwa>, default) - bez opóźnień i błędów."""
+        rng = rng or random.Random(f"{self.config.seed}:{_prompt_hash(prompt)}")
+        recorded = self._recorded.get(_prompt_hash(prompt))
+        if recorded is None and self._history is not None:
+            row = self._history.find_response(prompt)
+            recorded = row["content"] if row else None
+        if recorded is not None:
+            return recorded, "recorded"
+        for name, matches, render in self.templates:
+            if matches(prompt):
+                content = render(prompt, rng)
+                if content is not None:
+                    return content, f"template:{name}"
+        return f"Odpowiedź testowa ({len(prompt)} znaków promptu).", "default"
+
+    def _bpmn_process(self, prompt: str, rng: random.Random) -> str:
+        return json.dumps(_bpmn_process(self.config.bpmn_size, rng), ensure_ascii=False, indent=2)
+
+    def _plantuml_diagram(self, prompt: str, rng: random.Random) -> str:
+        lower = prompt.lower()
+        kind = next((kind for kind, pattern in _DIAGRAM_KINDS if re.search(pattern, lower)), "activity")
+        return f"Oto diagram:\n\n```plantuml\n{self._plantuml_code(kind, rng)}\n```\n"
+
+    def _plantuml_code(self, kind: str, rng: random.Random) -> str:
+        return _PLANTUML_DIAGRAMS[kind](rng)
+
+    # ===== Wywołanie z opóźnieniem i błędami =====
+
+    def plan(self, prompt: str) -> Tuple[random.Random, Optional[str]]:
+        """Generator losowy dla kolejnej próby promptu i ewentualny błąd tej próby."""
+        key = _prompt_hash(prompt)
+        with self._lock:
+            attempt = self._attempts.get(key, 0)
+            self._attempts[key] = attempt + 1
+        rng = random.Random(f"{self.config.seed}:{key}:{attempt}")
+        error = None
+        if self.config.error_kinds and rng.random() < self.config.error_rate:
+            error = rng.choice(self.config.error_kinds)
+        return rng, error
+
+    def complete(self, prompt: str, model: Optional[str] = None, max_tokens: Optional[int] = None,
+                 wait: bool = True) -> OfflineCompletion:
+        """Odpowiedź z symulowanym czasem; błąd jako OfflineLLMError (po odczekaniu timeout_s dla `timeout`).
+
+        wait=False - bez czekania na odpowiedź (serwer strumieniowy odmierza czas fragmentami).
+        """
+        rng, error = self.plan(prompt)
+        if error:
+            if error == "timeout":
+                time.sleep(self.config.timeout_s * self.config.time_scale)
+            raise OfflineLLMError(error, f"Offline LLM: wstrzyknięty błąd {error} ({ERROR_KINDS[error][0]})")
+
+        content, source = self.respond(prompt, rng)
+        completion_tokens = estimate_tokens(content)
+        finish_reason = "stop"
+        if max_tokens and completion_tokens > max_tokens:
+            # Przybliżone przycięcie do limitu tokenów jak u dostawcy
+            content = content[:max(1, len(content) * max_tokens // completion_tokens)]
+            completion_tokens, finish_reason = max_tokens, "length"
+        first_token_ms = self.first_token_ms(rng)
+        completion = OfflineCompletion(content=content, model=model or self.model,
+                                       prompt_tokens=estimate_tokens(prompt), completion_tokens=completion_tokens,
+                                       first_token_ms=first_token_ms,
+                                       latency_ms=first_token_ms + self.generation_ms(completion_tokens),
+                                       source=source, finish_reason=finish_reason)
+        if wait:
+            time.sleep(completion.latency_ms * self.config.time_scale / 1000)
+        return completion
+
+    def first_token_ms(self, rng: random.Random) -> float:
+        if self.config.latency_jitter <= 0:
+            return self.config.latency_ms
+        return self.config.latency_ms * rng.lognormvariate(0, self.config.latency_jitter)
+
+    def generation_ms(self, tokens: int) -> float:
+        return tokens * 1000 / self.config.tokens_per_second if self.config.tokens_per_second > 0 else 0.0
+
+
+# ===== Szablony odpowiedzi =====
+
+_DIAGRAM_KINDS = (("sequence", r"sekwencj|sequence"), ("class", r"diagram\w* klas|class diagram"),
+                  ("component", r"komponent|component"), ("activity", r"aktywno|activity"))
+
+
+def _asks_for_plantuml(prompt: str) -> bool:
+    lower = prompt.lower()
+    return "plantuml" in lower or "@startuml" in lower
+
+
+def _activity_diagram(rng: random.Random) -> str:
+    steps = [f":Krok {i + 1};" for i in range(rng.randint(3, 6))]
+    return "\n".join(["@startuml", "start", *steps[:-1], "if (Czy dane są poprawne?) then (tak)", f"  {steps[-1]}",
+                      "else (nie)", "  :Odrzuć wniosek;", "endif", "stop", "@enduml"])
+
+
+def _sequence_diagram(rng: random.Random) -> str:
+    lines = ["@startuml", 'actor "Klient" as K', 'participant "System" as S', 'database "Baza" as B']
+    for i in range(rng.randint(2, 4)):
+        lines += [f"K -> S : operacja{i + 1}()", f"S -> B : zapisz{i + 1}()", f"S --> K : wynik{i + 1}"]
+    return "\n".join(lines + ["@enduml"])
+
+
+def _class_diagram(rng: random.Random) -> str:
+    names = [f"Klasa{i + 1}" for i in range(rng.randint(2, 4))]
+    lines = ["@startuml"]
+    for name in names:
+        lines += [f"class {name} {{", "  -id : int", "  +zapisz() : void", "}"]
+    lines += [f'{a} "1" --> "*" {b}' for a, b in zip(names, names[1:])]
+    return "\n".join(lines + ["@enduml"])
+
+
+def _component_diagram(rng: random.Random) -> str:
+    names = [f"Komponent{i + 1}" for i in range(rng.randint(2, 4))]
+    lines = ["@startuml", *(f"[{name}]" for name in names)]
+    lines += [f"[{a}] --> [{b}] : używa" for a, b in zip(names, names[1:])]
+    return "\n".join(lines + ["@enduml"])
+
+
+_PLANTUML_DIAGRAMS = {"activity": _activity_diagram, "sequence": _sequence_diagram, "class": _class_diagram,
+                      "component": _component_diagram}
+
+
+def _bpmn_process(size: int, rng: random.Random) -> Dict:
+    """Liniowy proces BPMN v2 JSON (dwie role, decyzja na końcu) z `size` zadaniami."""
+    pool, lanes = "pool_0", ("lane_0", "lane_1")
+    elements = [{"id": "start_0", "name": "Początek procesu", "type": "startEvent", "participant": pool,
+                 "lane": lanes[0]}]
+    flows: List[Dict] = []
+
+    def connect(source: str, target: str, **extra):
+        flows.append({"id": f"flow_{len(flows) + 1}", "source": source, "target": target, **extra})
+
+    previous = "start_0"
+    for i in range(max(1, size)):
+        lane = lanes[rng.randrange(2)]
+        element_type, task_type = ("userTask", "user") if lane == lanes[0] else ("serviceTask", "service")
+        elements.append({"id": f"task_{i + 1}", "name": f"Zadanie {i + 1}", "type": element_type,
+                         "participant": pool, "lane": lane, "task_type": task_type})
+        connect(previous, f"task_{i + 1}")
+        previous = f"task_{i + 1}"
+    elements += [
+        {"id": "gateway_1", "name": "Czy zaakceptowano?", "type": "exclusiveGateway", "participant": pool,
+         "lane": lanes[0], "gateway_type": "exclusive"},
+        {"id": "end_accepted", "name": "Proces zakończony", "type": "endEvent", "participant": pool, "lane": lanes[0]},
+        {"id": "end_rejected", "name": "Proces odrzucony", "type": "endEvent", "participant": pool, "lane": lanes[0]},
+    ]
+    connect(previous, "gateway_1")
+    connect("gateway_1", "end_accepted", name="Tak", condition="tak")
+    connect("gateway_1", "end_rejected", name="Nie", condition="nie")
+    return {
+        "process_name": f"Proces testowy ({len(elements) - 4} zadań)",
+        "participants": [{"id": pool, "name": "Organizacja", "type": "human",
+                          "lanes": [{"id": lanes[0], "name": "Pracownik"}, {"id": lanes[1], "name": "System"}]}],
+        "elements": elements,
+        "flows": flows,
+        "gateways": [{"id": "gateway_1", "conditions": [
+            {"target": "end_accepted", "condition": "tak", "is_default": False},
+            {"target": "end_rejected", "condition": "nie", "is_default": True}]}],
+    }
+
+
+def _embedded_json(prompt: str) -> Optional[Dict]:
+    start, end = prompt.find("{"), prompt.rfind("}")
+    if start < 0 or end <= start:
+        return None
+    try:
+        data = json.loads(prompt[start:end + 1])
+    except json.JSONDecodeError:
+        return None
+    return data if isinstance(data, dict) else None
+
+
+def _has_embedded_process(prompt: str) -> bool:
+    return '"elements"' in prompt and '"flows"' in prompt
+
+
+def _echo_embedded_process(prompt: str, rng: random.Random) -> Optional[str]:
+    """Prompt poprawki z procesem w treści: zwraca ten proces z nazwami dla elementów bez nazwy.
+
+    Proces przycięty w prompcie (niepoprawny JSON) - None, czyli następny szablon.
+    """
+    process = _embedded_json(prompt)
+    if not process or "elements" not in process:
+        return None
+    for element in process.get("elements", []):
+        if isinstance(element, dict) and not element.get("name"):
+            element["name"] = f"Element {element.get('id', '')}".strip()
+    return json.dumps(process, ensure_ascii=False, indent=2)
+
+
+def _pdf_analysis(prompt: str, rng: random.Random) -> str:
+    """Analiza dokumentu w sekcjach rozpoznawanych przez AIPDFAnalyzer.parse_ai_response."""
+    n = rng.randint(3, 6)
+    sections = [
+        ("Nazwa procesu", [f"Proces testowy {rng.randrange(1000)}"]),
+        ("Aktorzy i role", [f"Rola {i + 1}" for i in range(n)]),
+        ("Działania", [f"Krok procesu {i + 1}" for i in range(n * 2)]),
+        ("Decyzje", [f"Czy warunek {i + 1} jest spełniony?" for i in range(max(1, n // 2))]),
+        ("Systemy", [f"System {chr(65 + i)}" for i in range(max(1, n // 2))]),
+        ("Reguły biznesowe", [f"Reguła {i + 1}: limit {rng.randint(1, 100) * 100} PLN" for i in range(2)]),
+        ("Dane i dokumenty", [f"Dokument {i + 1}" for i in range(2)]),
+    ]
+    return "\n\n".join(f"{title}:\n" + "\n".join(f"- {item}" for item in items) for title, items in sections)
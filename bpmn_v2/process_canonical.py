@@ -0,0 +1,307 @@
+"""
+BPMN v2 - Process Canonicalization & Diff
+Postać kanoniczna, skróty i porównywanie procesów BPMN w formacie JSON
+
+Ten moduł:
+1. Sprowadza proces do postaci kanonicznej (posortowane klucze i listy obiektów z id)
+2. Liczy skrót treści (content_hash) - do pamięci podręcznych
+3. Liczy skrót struktury niezależny od id i nazw (structural_hash, Weisfeiler-Lehman)
+4. Porównuje dwie wersje procesu na poziomie elementów i przepływów (diff_processes)
+"""
+
+import hashlib
+import json
+from collections import Counter
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Tuple
+
+# Listy obiektów porównywane element po elemencie (dopasowanie po id)
+ITEM_COLLECTIONS = ('participants', 'elements', 'flows')
+
+# Atrybuty elementu wchodzące do etykiety węzła w skrócie strukturalnym
+STRUCTURAL_ELEMENT_FIELDS = ('type', 'task_type', 'gateway_type', 'event_type')
+
+DEFAULT_WL_ITERATIONS = 3
+
+
+def canonicalize(process: Any, sort_lists: bool = True) -> Any:
+    """
+    Zwraca kanoniczną kopię procesu
+
+    Klucze słowników są posortowane; przy sort_lists=True listy obiektów,
+    które wszystkie mają id (uczestnicy, tory, elementy, przepływy), są sortowane po id.
+    Pozostałe listy zachowują kolejność.
+    """
+    if isinstance(process, dict):
+        return {key: canonicalize(process[key], sort_lists) for key in sorted(process, key=str)}
+    if isinstance(process, (list, tuple)):
+        items = [canonicalize(item, sort_lists) for item in process]
+        if sort_lists and items and all(isinstance(item, dict) and 'id' in item for item in items):
+            items.sort(key=lambda item: str(item['id']))
+        return items
+    return process
+
+
+def canonical_json(process: Any, sort_lists: bool = True) -> str:
+    """Zwarta postać JSON procesu kanonicznego"""
+    if sort_lists:
+        process = canonicalize(process)
+    return json.dumps(process, sort_keys=True, ensure_ascii=False, separators=(',', ':'), default=str)
+
+
+def content_hash(process: Any, sort_lists: bool = True) -> str:
+    """
+    Skrót SHA-256 treści procesu
+
+    Kolejność kluczy nie ma znaczenia; przy sort_lists=True także kolejność
+    elementów, przepływów i uczestników. Każda zmiana nazwy, id czy atrybutu zmienia skrót.
+    """
+    return hashlib.sha256(canonical_json(process, sort_lists).encode('utf-8')).hexdigest()
+
+
+def _label(*parts: str) -> str:
+    return hashlib.blake2b('\x1f'.join(parts).encode('utf-8'), digest_size=8).hexdigest()
+
+
+def structural_hash(process: Dict, iterations: int = DEFAULT_WL_ITERATIONS,
+                    include_names: bool = False) -> str:
+    """
+    Skrót struktury procesu niezależny od id (haszowanie grafu metodą Weisfeilera-Lehmana)
+
+    Etykieta węzła to typ elementu (z task_type/gateway_type/event_type) i typ uczestnika;
+    krawędź niesie typ przepływu, informację o przekroczeniu granicy uczestnika/toru
+    i o warunku. Po `iterations` rundach etykiety węzłów są zastępowane skrótem
+    z posortowanych etykiet sąsiadów, a wynik to skrót histogramu wszystkich etykiet.
+    Procesy różniące się tylko id (i nazwami, gdy include_names=False) mają ten sam skrót.
+    """
+    participant_types = {
+        participant.get('id'): str(participant.get('type', ''))
+        for participant in process.get('participants', []) if isinstance(participant, dict)
+    }
+    elements = [element for element in process.get('elements', []) if isinstance(element, dict)]
+    index = {element.get('id'): position for position, element in enumerate(elements)}
+
+    labels = []
+    for element in elements:
+        parts = [str(element.get(name, '')) for name in STRUCTURAL_ELEMENT_FIELDS]
+        parts.append(participant_types.get(element.get('participant'), ''))
+        if include_names:
+            parts.append(str(element.get('name', '')))
+        labels.append(_label(*parts))
+
+    outgoing: List[List[Tuple[str, int]]] = [[] for _ in elements]
+    incoming: List[List[Tuple[str, int]]] = [[] for _ in elements]
+    dangling = []
+    for flow in process.get('flows', []):
+        if not isinstance(flow, dict):
+            continue
+        source = index.get(flow.get('source'))
+        target = index.get(flow.get('target'))
+        edge = _edge_label(flow, elements, source, target, include_names)
+        if source is None or target is None:
+            # Przepływ do nieistniejącego elementu - liczony jako cecha całego grafu
+            endpoint = target if source is None else source
+            dangling.append(edge + ('>' if source is None else '<') +
+                            (labels[endpoint] if endpoint is not None else ''))
+            continue
+        outgoing[source].append((edge, target))
+        incoming[target].append((edge, source))
+
+    histogram = Counter(labels)
+    classes = len(set(labels))
+    for _ in range(iterations):
+        labels = [
+            _label(
+                labels[node],
+                ','.join(sorted(edge + ':' + labels[target] for edge, target in outgoing[node])),
+                ','.join(sorted(edge + ':' + labels[source] for edge, source in incoming[node])),
+            )
+            for node in range(len(elements))
+        ]
+        histogram.update(labels)
+        refined = len(set(labels))
+        if refined == classes:
+            # Podział węzłów się ustabilizował - kolejne rundy nic nie rozróżnią
+            break
+        classes = refined
+
+    lanes = sorted(
+        len(participant.get('lanes', []) or [])
+        for participant in process.get('participants', []) if isinstance(participant, dict)
+    )
+    summary = {
+        'labels': sorted(histogram.items()),
+        'participants': sorted(participant_types.values()),
+        'lanes': lanes,
+        'dangling': sorted(dangling),
+    }
+    return hashlib.sha256(json.dumps(summary, separators=(',', ':')).encode('utf-8')).hexdigest()
+
+
+def _edge_label(flow: Dict, elements: List[Dict], source: Optional[int], target: Optional[int],
+                include_names: bool) -> str:
+    scope = ''
+    if source is not None and target is not None:
+        source_element, target_element = elements[source], elements[target]
+        if source_element.get('participant') != target_element.get('participant'):
+            scope = 'pool'
+        elif source_element.get('lane') != target_element.get('lane'):
+            scope = 'lane'
+    parts = [str(flow.get('type', 'sequence')), scope, 'c' if flow.get('condition') else '']
+    if include_names:
+        parts.append(str(flow.get('name', '')))
+    return '/'.join(parts)
+
+
+@dataclass
+class ItemChange:
+    """Zmiana obiektu obecnego w obu wersjach: {pole: (stara wartość, nowa wartość)}"""
+    id: str
+    fields: Dict[str, Tuple[Any, Any]]
+
+
+@dataclass
+class ProcessDiff:
+    """Różnice między dwiema wersjami procesu"""
+    process_fields: Dict[str, Tuple[Any, Any]] = field(default_factory=dict)
+    added: Dict[str, List[Dict]] = field(default_factory=dict)
+    removed: Dict[str, List[Dict]] = field(default_factory=dict)
+    changed: Dict[str, List[ItemChange]] = field(default_factory=dict)
+
+    @property
+    def is_empty(self) -> bool:
+        return not (self.process_fields or any(self.added.values())
+                    or any(self.removed.values()) or any(self.changed.values()))
+
+    def summary(self) -> Dict[str, Any]:
+        """Liczba zmian w każdej kolekcji"""
+        result = {'process_fields': sorted(self.process_fields)}
+        for collection in ITEM_COLLECTIONS:
+            result[collection] = {
+                'added': len(self.added.get(collection, [])),
+                'removed': len(self.removed.get(collection, [])),
+                'changed': len(self.changed.get(collection, [])),
+            }
+        return result
+
+    def describe(self) -> List[str]:
+        """Opis zmian czytelny dla użytkownika"""
+        messages = []
+        for name in self.process_fields:
+            if name == 'description':
+                messages.append("Dodano/poprawiono opis procesu")
+            else:
+                messages.append(f"Zmieniono pole procesu: {name}")
+
+        for participant in self.added.get('participants', []):
+            messages.append(f"Dodano uczestnika: {participant.get('id')}")
+        for participant in self.removed.get('participants', []):
+            messages.append(f"Usunięto uczestnika: {participant.get('id')}")
+        for change in self.changed.get('participants', []):
+            messages.append(f"Zmieniono uczestnika {change.id}: {', '.join(sorted(change.fields))}")
+
+        for element in self.added.get('elements', []):
+            messages.append(f"Dodano element: {element.get('id')} ({element.get('type')})")
+        for element in self.removed.get('elements', []):
+            messages.append(f"Usunięto element: {element.get('id')} ({element.get('type')})")
+        for change in self.changed.get('elements', []):
+            remaining = dict(change.fields)
+            if 'name' in remaining:
+                remaining.pop('name')
+                messages.append(f"Poprawiono nazwę elementu: {change.id}")
+            if 'type' in remaining:
+                old_type, new_type = remaining.pop('type')
+                messages.append(f"Poprawiono typ elementu {change.id}: {old_type} → {new_type}")
+            if remaining:
+                messages.append(f"Zmieniono atrybuty elementu {change.id}: {', '.join(sorted(remaining))}")
+
+        for flow in self.added.get('flows', []):
+            messages.append(f"Dodano przepływ: {flow.get('source')} → {flow.get('target')}")
+        for flow in self.removed.get('flows', []):
+            messages.append(f"Usunięto przepływ: {flow.get('source')} → {flow.get('target')}")
+        for change in self.changed.get('flows', []):
+            remaining = dict(change.fields)
+            if 'name' in remaining:
+                old_name, new_name = remaining.pop('name')
+                if not old_name and new_name:
+                    messages.append(f"Dodano nazwę przepływu: {new_name}")
+                else:
+                    messages.append(f"Poprawiono nazwę przepływu: {change.id}")
+            if 'source' in remaining or 'target' in remaining:
+                remaining.pop('source', None)
+                remaining.pop('target', None)
+                messages.append(f"Zmieniono połączenie przepływu: {change.id}")
+            if remaining:
+                messages.append(f"Zmieniono atrybuty przepływu {change.id}: {', '.join(sorted(remaining))}")
+        return messages
+
+
+def _item_key(item: Dict, position: int) -> str:
+    item_id = item.get('id')
+    return str(item_id) if item_id not in (None, '') else f"#{position}"
+
+
+def _field_changes(old: Dict, new: Dict) -> Dict[str, Tuple[Any, Any]]:
+    return {
+        name: (old.get(name), new.get(name))
+        for name in sorted(set(old) | set(new), key=str)
+        if old.get(name) != new.get(name)
+    }
+
+
+def _diff_items(old_items: List, new_items: List, collection: str,
+                diff: ProcessDiff) -> None:
+    old_by_key = {_item_key(item, i): item for i, item in enumerate(old_items) if isinstance(item, dict)}
+    new_by_key = {_item_key(item, i): item for i, item in enumerate(new_items) if isinstance(item, dict)}
+
+    added = [item for key, item in new_by_key.items() if key not in old_by_key]
+    removed = [item for key, item in old_by_key.items() if key not in new_by_key]
+    changed = []
+    for key, old_item in old_by_key.items():
+        new_item = new_by_key.get(key)
+        if new_item is not None and new_item != old_item:
+            changed.append(ItemChange(key, _field_changes(old_item, new_item)))
+
+    if collection == 'flows' and added and removed:
+        # Przepływy z nowym id, ale tym samym połączeniem traktujemy jako zmienione
+        endpoints: Dict[Tuple, List[Dict]] = {}
+        for flow in removed:
+            endpoints.setdefault((flow.get('source'), flow.get('target'), flow.get('type')), []).append(flow)
+        still_added = []
+        for flow in added:
+            candidates = endpoints.get((flow.get('source'), flow.get('target'), flow.get('type')))
+            if candidates:
+                old_flow = candidates.pop(0)
+                changed.append(ItemChange(str(old_flow.get('id')), _field_changes(old_flow, flow)))
+            else:
+                still_added.append(flow)
+        unmatched = {id(flow) for flows in endpoints.values() for flow in flows}
+        removed = [flow for flow in removed if id(flow) in unmatched]
+        added = still_added
+
+    diff.added[collection] = added
+    diff.removed[collection] = removed
+    diff.changed[collection] = changed
+
+
+def diff_processes(old: Dict, new: Dict) -> ProcessDiff:
+    """
+    Porównuje dwie wersje procesu
+
+    Uczestnicy, elementy i przepływy są dopasowywane po id (przepływy bez pary
+    także po źródle, celu i typie); pozostałe pola najwyższego poziomu porównywane są w całości.
+    Niezmienione obiekty kosztują jedno porównanie słowników.
+    """
+    diff = ProcessDiff()
+    old = old or {}
+    new = new or {}
+    for name in sorted(set(old) | set(new), key=str):
+        if name in ITEM_COLLECTIONS:
+            continue
+        old_value, new_value = old.get(name), new.get(name)
+        if old_value != new_value and canonicalize(old_value) != canonicalize(new_value):
+            diff.process_fields[name] = (old_value, new_value)
+
+    for collection in ITEM_COLLECTIONS:
+        _diff_items(old.get(collection) or [], new.get(collection) or [], collection, diff)
+    return diff
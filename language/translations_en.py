@@ -42,6 +42,11 @@ TRANSLATIONS = {
     "bpmn_quality_label": "Process quality:",
     "bpmn_iterations_label": "Max iterations:",
     "bpmn_process_type_label": "Process type:",
+    "metrics_expander": "Model metrics",
+    "metrics_no_data": "No measurements on this server yet.",
+    "metrics_slo_label": "Responses ≤ {threshold} ms",
+    "trace_expander": "Generation trace ({total_ms} ms)",
+    "trace_download_button": "Download trace (OTLP JSON)",
     "generate_bpmn_button": "Generate BPMN Process",
     "show_plantuml_dialog": "PlantUML Code",
     "edit_plantuml_code": "Edit PlantUML code:",
@@ -71,6 +76,16 @@ TRANSLATIONS = {
     "dialog_close_button": "Close",
     "save_xmi_button": "Save XMI",
     "dialog_save_xmi_title": "Save XMI",
+    "save_all_xmi_button": "Export all to XMI",
+    "dialog_save_all_xmi_title": "Export all diagrams to XMI",
+    "msg_merge_xmi_question": "Merge {count} diagrams into one XMI file (EA package)?\nNo - a separate file for each diagram.",
+    "msg_xmi_export_progress": "XMI export: {done}/{total} {title}",
+    "msg_conversion_in_progress": "Conversion in progress...",
+    "msg_conversion_cancelled": "Conversion has been cancelled.\n",
+    "stage_parse": "Parsing PlantUML code...",
+    "stage_generate": "Generating XMI...",
+    "stage_render": "Rendering diagram...",
+    "msg_no_valid_plantuml_to_convert": "No valid PlantUML code to convert.\n",
     "save_diagram_button": "Save diagram",
     "dialog_save_diagram_title": "Save diagram",
     "validate_input_button": "Validate process description",
@@ -42,6 +42,11 @@ TRANSLATIONS = {
     "bpmn_quality_label": "Jakość procesu:",
     "bpmn_iterations_label": "Maks. iteracji:",
     "bpmn_process_type_label": "Typ procesu:",
+    "metrics_expander": "Metryki modeli",
+    "metrics_no_data": "Brak pomiarów w tej sesji serwera.",
+    "metrics_slo_label": "Odpowiedzi ≤ {threshold} ms",
+    "trace_expander": "Ślad generowania ({total_ms} ms)",
+    "trace_download_button": "Pobierz ślad (OTLP JSON)",
     "generate_bpmn_button": "Generuj proces BPMN",
     "show_plantuml_dialog": "Kod PlantUML",
     "edit_plantuml_code": "Edytuj kod PlantUML:",
@@ -71,6 +76,16 @@ TRANSLATIONS = {
     "dialog_close_button": "Zamknij",
     "save_xmi_button": "Zapisz XMI",
     "dialog_save_xmi_title": "Zapisz XMI",
+    "save_all_xmi_button": "Eksportuj wszystkie do XMI",
+    "dialog_save_all_xmi_title": "Eksport wszystkich diagramów do XMI",
+    "msg_merge_xmi_question": "Połączyć {count} diagramów w jeden plik XMI (pakiet EA)?\nNie - osobny plik dla każdego diagramu.",
+    "msg_xmi_export_progress": "Eksport XMI: {done}/{total} {title}",
+    "msg_conversion_in_progress": "Konwersja w toku...",
+    "msg_conversion_cancelled": "Konwersja została anulowana.\n",
+    "stage_parse": "Parsowanie kodu PlantUML...",
+    "stage_generate": "Generowanie XMI...",
+    "stage_render": "Renderowanie diagramu...",
+    "msg_no_valid_plantuml_to_convert": "Brak poprawnego kodu PlantUML do konwersji.\n",
     "save_diagram_button": "Zapisz diagram",
     "dialog_save_diagram_title": "Zapisz diagram",
     "validate_input_button": "Sprawdź poprawność opisu procesu",
@@ -1381,4 +1381,5 @@ def get_diagram_specific_requirements(diagram_type):
         "object": object_requirements,  
         "state": state_requirements,
         # dodaj więcej typów według potrzeb
-    }
\ No newline at end of file
+    }
+    return requirements_map.get(diagram_type, "")
@@ -1890,3 +1890,4 @@ def get_diagram_specific_requirements(diagram_type):
         "state": state_requirements,
         # dodaj więcej typów według potrzeb
     }
+    return requirements_map.get(diagram_type, "")
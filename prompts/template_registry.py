@@ -0,0 +1,197 @@
+"""
+Rejestr szablonów promptów - leniwe ładowanie i prekompilacja.
+
+Moduły `prompt_templates_pl` / `prompt_templates_en` są importowane dopiero
+przy pierwszym użyciu danego języka. Szablon jest jednorazowo dzielony na
+fragmenty stałe i pola (`{process_description}` itd.), a dla wybranego typu
+diagramu pola statyczne (`diagram_type`, `diagram_specific_requirements`)
+są wstawiane z wyprzedzeniem - renderowanie promptu to już tylko złączenie
+kilku fragmentów z opisem procesu.
+
+Pomiar narzutu startu i renderowania:
+    python -m prompts.template_registry
+"""
+
+import importlib
+import string
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+SUPPORTED_LANGUAGES = ("pl", "en")
+DEFAULT_LANGUAGE = "pl"
+
+_FORMATTER = string.Formatter()
+
+
+class CompiledTemplate:
+    """Szablon rozbity na fragmenty stałe i nazwy pól.
+
+    Działa jak `str.format` dla pól nazwanych (brakujące pole -> KeyError,
+    nadmiarowe argumenty są ignorowane). Szablony ze specyfikatorami formatu
+    lub polami złożonymi są renderowane przez zwykłe `str.format`.
+    """
+
+    __slots__ = ("source", "parts", "fields", "_simple")
+
+    def __init__(self, source: str, parts: Optional[List[Tuple[str, Optional[str]]]] = None):
+        self.source = source
+        self._simple = True
+        if parts is None:
+            parts = []
+            for literal, field, spec, conversion in _FORMATTER.parse(source):
+                if field is not None and (spec or conversion or not field.isidentifier()):
+                    self._simple = False
+                parts.append((literal, field))
+        self.parts = parts
+        self.fields = frozenset(field for _, field in parts if field is not None)
+
+    def partial(self, **values: Any) -> "CompiledTemplate":
+        """Zwraca szablon z wstawionymi wartościami podanych pól (pozostałe pola zostają)."""
+        if not self._simple:
+            return self
+        parts: List[Tuple[str, Optional[str]]] = []
+        pending = ""
+        for literal, field in self.parts:
+            pending += literal
+            if field is None:
+                continue
+            if field in values:
+                pending += format(values[field])
+            else:
+                parts.append((pending, field))
+                pending = ""
+        if pending:
+            parts.append((pending, None))
+        return CompiledTemplate(self.source, parts)
+
+    def render(self, **values: Any) -> str:
+        """Renderuje szablon (odpowiednik `source.format(**values)`)."""
+        if not self._simple:
+            return self.source.format(**values)
+        chunks = []
+        for literal, field in self.parts:
+            chunks.append(literal)
+            if field is not None:
+                chunks.append(format(values[field]))
+        return "".join(chunks)
+
+    # Zgodność z dotychczasowym użyciem `template.format(...)`
+    format = render
+
+
+class TemplateRegistry:
+    """Leniwy rejestr szablonów promptów dla języków i typów diagramów."""
+
+    def __init__(self):
+        self._modules: Dict[str, Any] = {}
+        self._compiled: Dict[Tuple[str, str], CompiledTemplate] = {}
+        self._bound: Dict[Tuple[str, str, str], CompiledTemplate] = {}
+        self._requirements: Dict[Tuple[str, str], Any] = {}
+        self.load_times: Dict[str, float] = {}
+
+    @staticmethod
+    def _normalize_language(lang: Optional[str]) -> str:
+        return lang if lang in SUPPORTED_LANGUAGES else DEFAULT_LANGUAGE
+
+    def _module(self, lang: Optional[str]):
+        lang = self._normalize_language(lang)
+        module = self._modules.get(lang)
+        if module is None:
+            start = time.perf_counter()
+            module = importlib.import_module(f"prompts.prompt_templates_{lang}")
+            self.load_times[lang] = time.perf_counter() - start
+            self._modules[lang] = module
+        return module
+
+    def templates(self, lang: Optional[str]) -> Dict[str, Dict[str, Any]]:
+        """Słownik szablonów dla języka (ładowany przy pierwszym użyciu)."""
+        return self._module(lang).prompt_templates
+
+    def requirements(self, lang: Optional[str], diagram_type: str):
+        """Wymagania specyficzne dla typu diagramu (z cache)."""
+        key = (self._normalize_language(lang), diagram_type)
+        if key not in self._requirements:
+            self._requirements[key] = self._module(lang).get_diagram_specific_requirements(diagram_type)
+        return self._requirements[key]
+
+    def compile(self, lang: Optional[str], template_name: str) -> CompiledTemplate:
+        """Prekompilowany szablon o podanej nazwie."""
+        key = (self._normalize_language(lang), template_name)
+        compiled = self._compiled.get(key)
+        if compiled is None:
+            compiled = CompiledTemplate(self.templates(lang)[template_name]["template"])
+            self._compiled[key] = compiled
+        return compiled
+
+    def for_diagram(self, lang: Optional[str], template_name: str, diagram_type: str) -> CompiledTemplate:
+        """Szablon z wstawionym typem diagramu i jego wymaganiami."""
+        key = (self._normalize_language(lang), template_name, diagram_type)
+        bound = self._bound.get(key)
+        if bound is None:
+            bound = self.compile(lang, template_name).partial(
+                diagram_type=diagram_type,
+                diagram_specific_requirements=self.requirements(lang, diagram_type)
+            )
+            self._bound[key] = bound
+        return bound
+
+    def render(self, lang: Optional[str], template_name: str, diagram_type: str,
+               process_description: str, **values: Any) -> str:
+        """Renderuje prompt - tylko podstawienie opisu procesu (i ewentualnych dodatkowych pól)."""
+        return self.for_diagram(lang, template_name, diagram_type).render(
+            process_description=process_description, **values
+        )
+
+    def clear(self) -> None:
+        """Czyści skompilowane szablony (moduły językowe pozostają załadowane)."""
+        self._compiled.clear()
+        self._bound.clear()
+        self._requirements.clear()
+
+
+_registry: Optional[TemplateRegistry] = None
+
+
+def get_template_registry() -> TemplateRegistry:
+    """Zwraca współdzielony rejestr szablonów."""
+    global _registry
+    if _registry is None:
+        _registry = TemplateRegistry()
+    return _registry
+
+
+def _benchmark(iterations: int = 2000) -> None:
+    registry = TemplateRegistry()
+    for lang in SUPPORTED_LANGUAGES:
+        registry.templates(lang)
+        print(f"Ładowanie szablonów [{lang}]: {registry.load_times[lang] * 1000:.2f} ms")
+
+    description = "Klient składa wniosek kredytowy, analityk weryfikuje zdolność kredytową. " * 5
+    for lang in SUPPORTED_LANGUAGES:
+        templates = registry.templates(lang)
+        names = [name for name, data in templates.items()
+                 if CompiledTemplate(data["template"]).fields <= {"diagram_type", "process_description",
+                                                                  "diagram_specific_requirements"}]
+        module = registry._module(lang)
+
+        start = time.perf_counter()
+        for i in range(iterations):
+            name = names[i % len(names)]
+            templates[name]["template"].format(
+                diagram_type="activity",
+                process_description=description,
+                diagram_specific_requirements=module.get_diagram_specific_requirements("activity")
+            )
+        baseline = (time.perf_counter() - start) / iterations
+
+        start = time.perf_counter()
+        for i in range(iterations):
+            registry.render(lang, names[i % len(names)], "activity", description)
+        compiled = (time.perf_counter() - start) / iterations
+
+        print(f"Renderowanie [{lang}] ({len(names)} szablonów): str.format {baseline * 1e6:.1f} µs, "
+              f"rejestr {compiled * 1e6:.1f} µs")
+
+
+if __name__ == "__main__":
+    _benchmark()
@@ -0,0 +1,177 @@
+import sys
+import os
+import hashlib
+import threading
+from collections import OrderedDict
+
+# Add parent directory to path to access utils
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.logger_utils import log_debug, log_exception
+from PyQt5.QtCore import QObject, QRunnable, QThread, QThreadPool, pyqtSignal
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# Etapy raportowane przez zadania (klucze tłumaczeń)
+STAGE_PARSE = "stage_parse"
+STAGE_GENERATE = "stage_generate"
+STAGE_RENDER = "stage_render"
+
+
+class TaskCancelled(Exception):
+    """Zgłaszany w zadaniu, gdy użytkownik anulował konwersję."""
+
+
+def plantuml_hash(kind, plantuml_code):
+    """Klucz pamięci wyników: rodzaj zadania (np. typ eksportu) + skrót kodu PlantUML."""
+    return hashlib.sha256(f"{kind}\0{plantuml_code}".encode("utf-8")).hexdigest()
+
+
+class ConversionCache:
+    """Pamięć LRU wyników konwersji (bezpieczna wątkowo)."""
+
+    def __init__(self, maxsize=None):
+        if maxsize is None:
+            try:
+                maxsize = int(os.getenv("CONVERSION_CACHE_SIZE", "").strip() or 32)
+            except ValueError:
+                maxsize = 32
+        self.maxsize = maxsize
+        self._items = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            if key not in self._items:
+                return None
+            self._items.move_to_end(key)
+            return self._items[key]
+
+    def put(self, key, value):
+        if self.maxsize <= 0:
+            return
+        with self._lock:
+            self._items[key] = value
+            self._items.move_to_end(key)
+            while len(self._items) > self.maxsize:
+                self._items.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._items.clear()
+
+
+class WorkerSignals(QObject):
+    progress = pyqtSignal(int, str)   # Postęp (procent, etap)
+    result = pyqtSignal(object)       # Wynik zadania
+    error = pyqtSignal(str)           # Sygnalizuje błąd
+    cancelled = pyqtSignal()          # Zadanie anulowane
+    finished = pyqtSignal()           # Koniec zadania (zawsze, po result/error/cancelled)
+
+
+class ConversionTask(QRunnable):
+    """Zadanie w puli wątków: `fn(plantuml_code, task)` z postępem, anulowaniem i pamięcią wyników.
+
+    Anulowanie jest kooperacyjne - `fn` wywołuje `task.report(...)` między etapami,
+    a to zgłasza TaskCancelled; wynik zadania anulowanego w trakcie etapu jest odrzucany.
+    """
+
+    def __init__(self, fn, plantuml_code, cache=None, cache_key=None):
+        super().__init__()
+        self.setAutoDelete(False)
+        self.fn = fn
+        self.plantuml_code = plantuml_code
+        self.cache = cache
+        self.cache_key = cache_key
+        self.signals = WorkerSignals()
+        self._cancel = threading.Event()
+
+    def cancel(self):
+        self._cancel.set()
+
+    @property
+    def is_cancelled(self):
+        return self._cancel.is_set()
+
+    def check_cancelled(self):
+        if self._cancel.is_set():
+            raise TaskCancelled()
+
+    def report(self, percent, stage=""):
+        """Raportuje postęp i przerywa zadanie, jeśli zostało anulowane."""
+        self.check_cancelled()
+        self.signals.progress.emit(percent, stage)
+
+    def run(self):
+        try:
+            self.check_cancelled()
+            result = self.cache.get(self.cache_key) if self.cache is not None else None
+            if result is None:
+                result = self.fn(self.plantuml_code, self)
+                self.check_cancelled()
+                if self.cache is not None:
+                    self.cache.put(self.cache_key, result)
+            else:
+                log_debug(f"Wynik konwersji z pamięci: {self.cache_key[:12]}")
+            self.signals.progress.emit(100, "")
+            self.signals.result.emit(result)
+        except TaskCancelled:
+            self.signals.cancelled.emit()
+        except Exception as e:
+            log_exception(f"Błąd zadania konwersji: {e}")
+            self.signals.error.emit(str(e))
+        finally:
+            self.signals.finished.emit()
+
+
+class ConversionWorkerPool:
+    """Pula wątków (QThreadPool) dla konwersji PlantUML -> XMI i renderowania diagramów."""
+
+    def __init__(self, max_threads=None, cache=None):
+        self.pool = QThreadPool()
+        if max_threads is None:
+            try:
+                max_threads = int(os.getenv("CONVERSION_WORKER_THREADS", "").strip() or 0)
+            except ValueError:
+                max_threads = 0
+        self.pool.setMaxThreadCount(max_threads if max_threads > 0 else max(1, QThread.idealThreadCount()))
+        self.cache = cache if cache is not None else ConversionCache()
+        self._active = set()
+
+    def submit(self, kind, plantuml_code, fn, on_result=None, on_error=None, on_progress=None, on_cancelled=None):
+        """Uruchamia `fn(plantuml_code, task)` w tle; wynik zapamiętywany pod `plantuml_hash(kind, kod)`.
+
+        Returns:
+            ConversionTask (do anulowania przez `task.cancel()`)
+        """
+        task = ConversionTask(fn, plantuml_code, self.cache, plantuml_hash(kind, plantuml_code))
+        for signal, slot in ((task.signals.result, on_result), (task.signals.error, on_error),
+                             (task.signals.progress, on_progress), (task.signals.cancelled, on_cancelled)):
+            if slot is not None:
+                signal.connect(slot)
+        task.signals.finished.connect(lambda: self._active.discard(task))
+        self._active.add(task)
+        self.pool.start(task)
+        return task
+
+    def cancel_all(self):
+        for task in list(self._active):
+            task.cancel()
+
+    def shutdown(self, msecs=5000):
+        """Anuluje zadania i czeka na zakończenie wątków (przy zamykaniu aplikacji)."""
+        self.cancel_all()
+        return self.pool.waitForDone(msecs)
+
+
+def xmi_conversion_job(converter, diagram_type_name):
+    """Zadanie eksportu XMI: parsowanie i generowanie jako osobne etapy; wynik (xmi, tytuł)."""
+
+    def job(plantuml_code, task):
+        task.report(5, STAGE_PARSE)
+        kind, parsed, title = converter.parse(plantuml_code, diagram_type_name)
+        task.report(50, STAGE_GENERATE)
+        return converter.generate(kind, parsed, title), title
+
+    return job
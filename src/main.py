@@ -1,6 +1,9 @@
 
 import sys
 import os
+import time
+
+_PROCESS_START = time.perf_counter()
 
 # Add parent directory to path to access utils
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -11,7 +14,7 @@ import requests
 import traceback
 from PyQt5.QtGui import QTextCharFormat, QColor, QFont
 from PyQt5.QtCore import Qt, QTimer
-from PyQt5.QtWidgets import QApplication, QMainWindow, QVBoxLayout, QSplitter, QTextEdit, QPushButton, QWidget, QDialog, QLabel, QTabWidget, QComboBox, QCheckBox, QLabel, QGroupBox, QVBoxLayout, QHBoxLayout, QRadioButton, QButtonGroup, QMessageBox, QFileDialog, QMenu
+from PyQt5.QtWidgets import QApplication, QMainWindow, QVBoxLayout, QSplitter, QTextEdit, QPushButton, QWidget, QDialog, QLabel, QTabWidget, QComboBox, QCheckBox, QLabel, QGroupBox, QVBoxLayout, QHBoxLayout, QRadioButton, QButtonGroup, QMessageBox, QFileDialog, QMenu, QProgressDialog
 from PyQt5.QtSvg import QSvgWidget
 from xml.etree.ElementTree import fromstring, ParseError
 from datetime import datetime
@@ -27,35 +30,25 @@ try:
     from utils.xmi.xml_highlighter import XMLHighlighter
     from input_validator import validate_input_text
     from api_thread import APICallThread
+    from xmi_export_thread import XMIExportThread
+    from conversion_worker import ConversionWorkerPool, xmi_conversion_job, STAGE_RENDER
+    from utils.xmi.xmi_batch_export import ExportJob
+    from utils.xmi.xmi_conversion import XMIConverter, detect_xmi_kind
     from utils.plantuml.plantuml_utils import plantuml_encode, identify_plantuml_diagram_type, fetch_plantuml_svg_local, fetch_plantuml_svg_www
     from utils.logger_utils import setup_logger, log_info, log_error, log_exception
     from language.translations_pl import TRANSLATIONS as PL
     from language.translations_en import TRANSLATIONS as EN
-    from utils.plantuml.plantuml_sequance_parser import PlantUMLSequenceParser
-    from utils.xmi.xmi_sequance_generator import XMISequenceGenerator
-    from utils.plantuml.plantuml_class_parser import PlantUMLClassParser
-    from utils.xmi.xmi_class_generator import XMIClassGenerator
-    from utils.plantuml.improved_plantuml_activity_parser import ImprovedPlantUMLActivityParser as PlantUMLActivityParser
-    from utils.xmi.xmi_activity_generator import XMIActivityGenerator
-    from utils.plantuml.plantuml_component_parser import PlantUMLComponentParser
-    from utils.xmi.xmi_component_generator import XMIComponentGenerator
     from utils.metrics.model_response_metrics import  ModelResponseMetrics, measure_response_time
+    from prompts.template_registry import get_template_registry
+    from utils.lazy_import import LazyImport, module_available, get_import_times
+    from utils.db.interaction_log import log_ai_interaction, shutdown_interaction_log
+    from utils.db.history_store import ARTIFACT_PLANTUML, ARTIFACT_XMI, record_artifact, record_interaction
+    # Parsery i generatory XMI są ładowane przez XMIConverter dopiero przy pierwszej konwersji danego typu
     
-    # Try to import BPMN integration
-    try:
-        from bpmn_integration import create_bpmn_integration, display_bpmn_result, display_bpmn_validation
-        BPMN_AVAILABLE = True
-    except ImportError as e:
-        BPMN_AVAILABLE = False
-        print(f"BPMN integration not available: {e}")
-    
-    # PDF functionality import
-    try:
-        from utils.pdf.pdf_processor import PDFProcessor, enhance_prompt_with_pdf_context
-        PDF_SUPPORT = True
-    except ImportError:
-        PDF_SUPPORT = False
-        PDFProcessor = None
+    # PDF functionality - stos PDF (fitz, PyPDF2) importowany przy pierwszym użyciu
+    PDF_SUPPORT = module_available("fitz", "PyPDF2")
+    PDFProcessor = LazyImport("utils.pdf.pdf_processor", "PDFProcessor")
+    enhance_prompt_with_pdf_context = LazyImport("utils.pdf.pdf_processor", "enhance_prompt_with_pdf_context")
 except ImportError as e:
     MODULES_LOADED = False
     print(f"Error importing modules: {e}")
@@ -66,29 +59,43 @@ setup_logger("main_app.log")
 
 plantuml_jar_path = os.getenv("PLANTUML_JAR_PATH", "plantuml.jar")
 plantuml_generator_type = os.getenv("PLANTUML_GENERATOR_TYPE", "local")
-DB_PROVIDER = os.getenv("DB_PROVIDER", "")
 CHAT_URL = os.getenv("CHAT_URL", "http://localhost:1234//v1/chat/completions")
 API_KEY = os.getenv("API_KEY", "")
 API_DEFAULT_MODEL = os.getenv("API_DEFAULT_MODEL", "models/gemini-2.0-flash")
 MODEL_PROVIDER = os.getenv("MODEL_PROVIDER", "gemini")  # lub "gemini"
 
-# Initialize BPMN Integration if available
-bpmn_integration = None
-if BPMN_AVAILABLE and API_KEY and MODEL_PROVIDER:
+# BPMN Integration (BPMN v2 + klienci AI) jest tworzona przy pierwszym użyciu
+_bpmn_integration = None
+_bpmn_integration_loaded = False
+
+def get_bpmn_integration():
+    """Zwraca (tworząc leniwie) instancję BPMN Integration lub None, jeśli niedostępna."""
+    global _bpmn_integration, _bpmn_integration_loaded
+    if _bpmn_integration_loaded:
+        return _bpmn_integration
+    _bpmn_integration_loaded = True
+    if not (API_KEY and MODEL_PROVIDER):
+        return None
+    try:
+        from bpmn_integration import create_bpmn_integration
+    except ImportError as e:
+        print(f"BPMN integration not available: {e}")
+        return None
     try:
-        bpmn_integration = create_bpmn_integration(
+        _bpmn_integration = create_bpmn_integration(
             api_key=API_KEY,
             model_provider=MODEL_PROVIDER,
             chat_url=CHAT_URL,
             default_model=API_DEFAULT_MODEL
         )
-        if bpmn_integration:
+        if _bpmn_integration:
             print("✅ BPMN Integration initialized successfully")
         else:
             print("⚠️ BPMN Integration not available (configuration issue)")
     except Exception as e:
         print(f"❌ Failed to initialize BPMN Integration: {e}")
-        bpmn_integration = None
+        _bpmn_integration = None
+    return _bpmn_integration
 
 LANG = "pl"  # Domyślny język, można zmienić na "pl" dla polskiego
 
@@ -97,17 +104,16 @@ def tr(key):
 
 def update_language(new_lang):
     """Update language globally and reload prompt templates"""
-    global LANG, prompt_templates, get_diagram_specific_requirements
+    global LANG, prompt_templates
     LANG = new_lang
-    if LANG == "en":
-        from prompts.prompt_templates_en import prompt_templates, get_diagram_specific_requirements
-    else:
-        from prompts.prompt_templates_pl import prompt_templates, get_diagram_specific_requirements
+    prompt_templates = template_registry.templates(LANG)
 
-if LANG == "en":
-    from prompts.prompt_templates_en import prompt_templates, get_diagram_specific_requirements
-else:
-    from prompts.prompt_templates_pl import prompt_templates, get_diagram_specific_requirements
+def get_diagram_specific_requirements(diagram_type):
+    return template_registry.requirements(LANG, diagram_type)
+
+# Szablony ładowane leniwie - tylko dla wybranego języka
+template_registry = get_template_registry()
+prompt_templates = template_registry.templates(LANG)
 
 class AIApp(QMainWindow):
     API_URL = os.getenv("API_URL", "http://localhost:1234//v1/models")
@@ -122,13 +128,9 @@ class AIApp(QMainWindow):
         self.last_prompt_type = None 
         self.prompt_templates = prompt_templates  # Załaduj szablony z pliku
         
-        # Initialize PDF processor if available
-        if PDF_SUPPORT:
-            self.pdf_processor = PDFProcessor()
-            self.selected_pdf_files = []
-        else:
-            self.pdf_processor = None
-            self.selected_pdf_files = []
+        # PDF processor is created on first use (see pdf_processor property)
+        self._pdf_processor = None
+        self.selected_pdf_files = []
 
         # Grupa dla szablonu
         self.template_group = QGroupBox(tr("template_group"))
@@ -143,6 +145,11 @@ class AIApp(QMainWindow):
         # indeks zakładki -> kod PlantUML
         self.plantuml_codes = {}  
 
+        # Konwersje PlantUML -> XMI i renderowanie diagramów w puli wątków (z pamięcią wyników)
+        self.conversion_pool = ConversionWorkerPool()
+        # Konwerter bez stanu między diagramami (generator tworzony dla każdej konwersji) - wspólny dla zadań
+        self.xmi_converter = XMIConverter(author="195841")
+
         # Inicjalizacja listy modeli
         self.models = []
 
@@ -286,6 +293,9 @@ class AIApp(QMainWindow):
         self.save_xmi_button = QPushButton(tr("save_xmi_button"))
         self.save_xmi_button.setEnabled(False)
 
+        # Przycisk "Eksportuj wszystkie do XMI" - wszystkie zakładki równolegle, w tle
+        self.save_all_xmi_button = QPushButton(tr("save_all_xmi_button"))
+
         # Przycisk "Zapisz diagram" - w formie graficznej
         self.save_diagram_button = QPushButton(tr("save_diagram_button"))
         self.save_diagram_button.setEnabled(False)
@@ -311,6 +321,7 @@ class AIApp(QMainWindow):
         buttons_layout.addWidget(self.edit_plantuml_button)
         buttons_layout.addWidget(self.save_PlantUML_button)
         buttons_layout.addWidget(self.save_xmi_button)
+        buttons_layout.addWidget(self.save_all_xmi_button)
         buttons_layout.addWidget(self.save_diagram_button)
         left_layout.addLayout(buttons_layout)
 
@@ -335,6 +346,7 @@ class AIApp(QMainWindow):
 
         self.validate_input_button.clicked.connect(self.validate_input_button_pressed)
         self.save_xmi_button.clicked.connect(self.save_xmi)
+        self.save_all_xmi_button.clicked.connect(self.save_all_xmi)
         self.save_diagram_button.clicked.connect(self.save_active_diagram)
 
         # Eventy dla przycisków
@@ -345,6 +357,7 @@ class AIApp(QMainWindow):
 
         # Historia rozmowy
         self.conversation_history = []
+        self.history_ids = None  # Zapis ostatniego zapytania/odpowiedzi w historii (Future z identyfikatorami)
 
         # Połącz sygnał zmiany zakładki z tą metodą
         self.diagram_tabs.currentChanged.connect(self.on_tab_changed)
@@ -387,6 +400,7 @@ class AIApp(QMainWindow):
         self.edit_plantuml_button.setText(tr("edit_plantuml_button"))
         self.save_PlantUML_button.setText(tr("save_plantuml_button"))
         self.save_xmi_button.setText(tr("save_xmi_button"))
+        self.save_all_xmi_button.setText(tr("save_all_xmi_button"))
         self.save_diagram_button.setText(tr("save_diagram_button"))
         self.validate_input_button.setText(tr("validate_input_button"))
         
@@ -434,7 +448,8 @@ class AIApp(QMainWindow):
         
         # For BPMN, show BPMN integration status
         if selected_type == "BPMN":
-            if BPMN_AVAILABLE and bpmn_integration and bpmn_integration.is_available():
+            bpmn_integration = get_bpmn_integration()
+            if bpmn_integration and bpmn_integration.is_available():
                 self.template_selector.addItem("✅ BPMN Process Generation")
             else:
                 self.template_selector.addItem("❌ BPMN Not Available")
@@ -553,6 +568,7 @@ class AIApp(QMainWindow):
     @measure_response_time()
     def start_api_thread(self, prompt, model_name=None):
         self.prompt_text = prompt
+        self.api_started_at = time.perf_counter()
 
         if model_name is None:
             model_name = self.model_selector.currentText()
@@ -624,7 +640,8 @@ class AIApp(QMainWindow):
         self.waiting_timer.start(500)  # Aktualizuj co 500 ms
         
         # Handle BPMN v2 generation first (bypass old template logic)
-        if self.radio_bpmn.isChecked() and bpmn_integration and bpmn_integration.is_available():
+        bpmn_integration = get_bpmn_integration() if self.radio_bpmn.isChecked() else None
+        if bpmn_integration and bpmn_integration.is_available():
             self.handle_bpmn_generation(process_description)
             return
         
@@ -638,17 +655,9 @@ class AIApp(QMainWindow):
             output_format = self.get_output_format()      # np. "clean"
             domain = self.get_domain()                    # np. None lub "bankowość"
             if selected_template == tr("bpmn_template_basic"):
-                prompt = template_data["template"].format(
-                diagram_type=diagram_type,
-                process_description=process_description,
-                diagram_specific_requirements=get_diagram_specific_requirements(diagram_type)
-            )
+                prompt = template_registry.render(LANG, selected_template, diagram_type, process_description)
             elif selected_template == tr("bpmn_template_advanced"):
-                prompt = template_data["template"].format(
-                diagram_type=diagram_type,
-                process_description=process_description,
-                diagram_specific_requirements=get_diagram_specific_requirements(diagram_type)
-            )
+                prompt = template_registry.render(LANG, selected_template, diagram_type, process_description)
             elif selected_template == tr("bpmn_template_bank"):
                 prompt = template_data["template"].format(
                 process_description = process_description + tr("bpmn_bank_details").format(
@@ -663,16 +672,12 @@ class AIApp(QMainWindow):
 
 
         elif use_template:
-            prompt = template_data["template"].format(
-                diagram_type=diagram_type,
-                process_description=process_description,
-                diagram_specific_requirements=get_diagram_specific_requirements(diagram_type)
-            )
+            prompt = template_registry.render(LANG, selected_template, diagram_type, process_description)
         else:
             prompt = process_description
 
         # Enhance prompt with PDF context if available
-        prompt = self.enhance_prompt_with_pdf_context(prompt, diagram_type)
+        prompt = self.enhance_prompt_with_pdf_context(prompt, diagram_type, process_description)
 
         self.send_button.setEnabled(False)
         if not process_description:
@@ -760,7 +765,7 @@ class AIApp(QMainWindow):
             process_type = "business"
             
             # Generate BPMN using the new system
-            success, bpmn_result, metadata = bpmn_integration.generate_bpmn_process(
+            success, bpmn_result, metadata = get_bpmn_integration().generate_bpmn_process(
                 user_input=process_description,
                 process_type=process_type,
                 quality_target=quality_target,
@@ -808,14 +813,12 @@ class AIApp(QMainWindow):
         
         
         try:
-            if DB_PROVIDER == "mysql":
-                from utils.db.mysql_connector import log_ai_interaction
-                subprocess.Popen([ sys.executable, 'mysql_connector.py', self.prompt_text, response_content, model_name])    
-            elif DB_PROVIDER == "postgres":
-                from utils.db.PostgreSQL_connector import log_ai_interaction
-                subprocess.Popen([ sys.executable, 'postgres_connector.py', self.prompt_text, response_content, model_name])
-
-            #log_info(f"AI interaction logged in database successfully for model {model_name}")
+            # Zapis do ai_logs i historii w tle (kolejki + wątki zapisujące), bez blokowania interfejsu
+            latency_ms = int((time.perf_counter() - self.api_started_at) * 1000) if hasattr(self, "api_started_at") else None
+            log_ai_interaction(request=self.prompt_text, response=response_content, model_name=model_name,
+                               latency_ms=latency_ms)
+            self.history_ids = record_interaction(self.prompt_text, response_content, model_name,
+                                                  latency_ms=latency_ms, source="desktop")
         except Exception as e:
             tb = traceback.format_exc()
             log_error(f"Error logging AI interaction: {e}\n{tb}\n")
@@ -847,6 +850,8 @@ class AIApp(QMainWindow):
                 self.save_xmi_button.setEnabled(False)
             self.latest_plantuml = plantuml_blocks[-1]
             for block in plantuml_blocks:
+                record_artifact(ARTIFACT_PLANTUML, block, interaction=self.history_ids,
+                                diagram_type=diagram_type, model=model_name)
                 self.show_plantuml_diagram(block)
             return
 
@@ -1139,107 +1144,195 @@ class AIApp(QMainWindow):
             log_exception(error_msg)
 
     def save_xmi(self):
-        """Zapisuje kod XMI z aktywnej zakładki do pliku."""
+        """Zapisuje kod XMI z aktywnej zakładki do pliku (konwersja w tle)."""
         idx = self.diagram_tabs.currentIndex()
-        if idx in self.plantuml_codes:
-            plantuml_code = self.plantuml_codes[idx]
-            diagram_type = identify_plantuml_diagram_type(plantuml_code, LANG)
+        if idx not in self.plantuml_codes:
+            error_msg = tr("msg_no_valid_plantuml_to_convert")
+            self.append_to_chat("System", error_msg)
+            log_exception(error_msg)
+            return
+
+        plantuml_code = self.plantuml_codes[idx]
+        diagram_type = identify_plantuml_diagram_type(plantuml_code, LANG)
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        default_filename = f"{diagram_type.replace(' ', '_')}_{timestamp}.xmi"
+
+        # Otwórz okno dialogowe do wyboru pliku
+        filename, _ = QFileDialog.getSaveFileName(
+            self,
+            tr("dialog_save_xmi_title"),  # Tytuł okna
+            default_filename,  # Domyślna nazwa pliku
+            "XMI Files (*.xmi);;All Files (*)"  # Filtr plików
+        )
+
+        # Jeśli użytkownik anulował dialog, filename będzie pusty
+        if not filename:
+            return
+
+        def on_result(result):
+            xmi_code, _ = result
             try:
-                if diagram_type == ('Diagram klas' or 'Class diagram'):
-                    #xmi_code = plantuml_to_xmi(plantuml_code)
-                    parser = PlantUMLClassParser()
-                    parser.parse(plantuml_code)
-                    diagram_title = parser.title if hasattr(parser, 'title') and parser.title else diagram_type  # Use title if it exists or diagram_type
-                    xmi_code = XMIClassGenerator(autor = "195841").save_xmi(parser.classes, parser.relations, parser.enums, 
-                                    parser.notes, parser.primitive_types, diagram_name = diagram_title)
-                elif diagram_type == ('Diagram sekwencji' or 'Sequence diagram'):
-                    parser = PlantUMLSequenceParser(plantuml_code)
-                    parsed_data = parser.parse()
-                    diagram_title = parsed_data.get('title', diagram_type)
-                    xmi_code =XMISequenceGenerator(autor = "195841").generuj_diagram(
-                        nazwa_diagramu=diagram_title,
-                        dane=parsed_data
-                    )
-                elif diagram_type == ('Diagram aktywności' or 'Activity diagram'):
-                    parser = PlantUMLActivityParser(plantuml_code)
-                    parsed_data = parser.parse()
-                    diagram_title = parsed_data.get('title', diagram_type)
-                    xmi_code = XMIActivityGenerator(author = "195841").generate_activity_diagram(
-                        diagram_name=diagram_title,
-                        parsed_data=parsed_data
-                    )
-                elif diagram_type == ('Diagram komponentów' or 'Component diagram'):
-                    parser = PlantUMLComponentParser(plantuml_code)
-                    parsed_data = parser.parse()
-                    diagram_title = parsed_data.get('title', diagram_type)
-                    xmi_code = XMIComponentGenerator(author = "195841").generate_component_diagram(
-                        diagram_name=diagram_title,
-                        parsed_data=parsed_data  
-                    )
-                timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-                default_filename = f"{diagram_type.replace(' ', '_')}_{timestamp}.xmi"
-                
-                # Otwórz okno dialogowe do wyboru pliku
-                filename, _ = QFileDialog.getSaveFileName(
-                    self,
-                    tr("dialog_save_xmi_title"),  # Tytuł okna
-                    default_filename,  # Domyślna nazwa pliku
-                    "XMI Files (*.xmi);;All Files (*)"  # Filtr plików
-                )
-                
-                # Jeśli użytkownik anulował dialog, filename będzie pusty
-                if not filename:
-                    return
-                
-                # Zapisz plik
                 with open(filename, "w", encoding="utf-8") as file:
                     file.write(xmi_code)
-                
+                record_artifact(ARTIFACT_XMI, xmi_code, diagram_type=diagram_type, path=filename)
                 ok_msg = tr("msg_xmi_saved").format(filename=filename)
                 self.append_to_chat("System", ok_msg)
                 log_info(f"XMI saved: {filename}")
-                
             except Exception as e:
-                tb = traceback.format_exc()
-                error_msg = tr("msg_error_saving_xmi").format(error=e, traceback=tb)                
+                error_msg = tr("msg_error_saving_xmi").format(error=e, traceback=traceback.format_exc())
                 self.append_to_chat("System", error_msg)
                 log_exception(error_msg)
-        else:
-            error_msg = tr("msg_no_valid_plantuml_to_convert")
+
+        self.run_conversion_task(f"xmi:{diagram_type}", plantuml_code,
+                                 xmi_conversion_job(self.xmi_converter, diagram_type),
+                                 on_result, "msg_error_saving_xmi")
+
+    def run_conversion_task(self, kind, plantuml_code, job, on_result, error_key):
+        """Uruchamia konwersję w puli wątków z oknem postępu (z możliwością anulowania).
+
+        Wynik trafia do `on_result` w wątku GUI; ten sam kod PlantUML danego rodzaju
+        jest brany z pamięci wyników bez ponownej konwersji.
+        """
+        progress = QProgressDialog(tr("msg_conversion_in_progress"), tr("dialog_cancel_button"), 0, 100, self)
+        progress.setMinimumDuration(500)  # krótkie konwersje (np. z pamięci) bez migania okna
+        progress.setValue(0)
+
+        def on_progress(percent, stage):
+            if stage:
+                progress.setLabelText(tr(stage))
+            progress.setValue(percent)
+
+        def on_error(error):
+            error_msg = tr(error_key).format(error=error, traceback="")
+            self.append_to_chat("System", error_msg)
+            log_error(error_msg)
+
+        def on_cancelled():
+            self.append_to_chat("System", tr("msg_conversion_cancelled"))
+
+        task = self.conversion_pool.submit(kind, plantuml_code, job, on_result=on_result, on_error=on_error,
+                                           on_progress=on_progress, on_cancelled=on_cancelled)
+        progress.canceled.connect(task.cancel)
+        task.signals.finished.connect(progress.reset)
+        task.signals.finished.connect(progress.deleteLater)
+        return task
+
+    def save_all_xmi(self):
+        """Eksportuje do XMI wszystkie otwarte diagramy - równolegle, bez blokowania interfejsu."""
+        if getattr(self, 'xmi_export_thread', None) is not None and self.xmi_export_thread.isRunning():
+            return
+
+        jobs = []
+        for idx, plantuml_code in sorted(self.plantuml_codes.items()):
+            diagram_type = identify_plantuml_diagram_type(plantuml_code, LANG)
+            if detect_xmi_kind(diagram_type):
+                jobs.append(ExportJob(key=idx, plantuml_code=plantuml_code, diagram_type_name=diagram_type))
+        if not jobs:
+            error_msg = tr("msg_no_valid_xmi_to_save")
             self.append_to_chat("System", error_msg)
             log_exception(error_msg)
+            return
+
+        merge = len(jobs) > 1 and QMessageBox.question(
+            self,
+            tr("dialog_save_all_xmi_title"),
+            tr("msg_merge_xmi_question").format(count=len(jobs)),
+            QMessageBox.Yes | QMessageBox.No,
+        ) == QMessageBox.Yes
+
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        if merge:
+            output_path, _ = QFileDialog.getSaveFileName(
+                self,
+                tr("dialog_save_all_xmi_title"),
+                f"Eksport_XMI_{timestamp}.xmi",
+                "XMI Files (*.xmi);;All Files (*)"
+            )
+        else:
+            output_path = QFileDialog.getExistingDirectory(self, tr("dialog_save_all_xmi_title"))
+        if not output_path:
+            return
+
+        self.save_all_xmi_button.setEnabled(False)
+        self.xmi_export_progress = QProgressDialog(tr("msg_xmi_export_progress").format(done=0, total=len(jobs), title=""),
+                                                   None, 0, len(jobs), self)
+        self.xmi_export_progress.setWindowTitle(tr("dialog_save_all_xmi_title"))
+        self.xmi_export_progress.setMinimumDuration(0)
+        self.xmi_export_progress.setValue(0)
+
+        self.xmi_export_thread = XMIExportThread(jobs, output_path, merge=merge, package_name=f"Eksport_XMI_{timestamp}")
+        self.xmi_export_thread.progress.connect(self.on_xmi_export_progress)
+        self.xmi_export_thread.export_finished.connect(self.on_xmi_export_finished)
+        self.xmi_export_thread.error_occurred.connect(self.on_xmi_export_error)
+        self.xmi_export_thread.start()
+
+    def on_xmi_export_progress(self, done, total, title):
+        self.xmi_export_progress.setLabelText(tr("msg_xmi_export_progress").format(done=done, total=total, title=title))
+        self.xmi_export_progress.setValue(done)
+
+    def on_xmi_export_finished(self, paths, errors):
+        self.xmi_export_progress.close()
+        self.save_all_xmi_button.setEnabled(True)
+        for filename in paths:
+            self.append_to_chat("System", tr("msg_xmi_saved").format(filename=filename))
+            log_info(f"XMI saved: {filename}")
+        for error in errors:
+            error_msg = tr("msg_error_generating_xmi").format(error=error)
+            self.append_to_chat("System", error_msg)
+            log_error(error_msg)
+
+    def on_xmi_export_error(self, error):
+        self.xmi_export_progress.close()
+        self.save_all_xmi_button.setEnabled(True)
+        error_msg = tr("msg_error_generating_xmi").format(error=error)
+        self.append_to_chat("System", error_msg)
+        log_error(error_msg)
 
     def save_active_diagram(self):
+        """Zapisuje diagram z aktywnej zakładki jako SVG (renderowanie w tle)."""
         idx = self.diagram_tabs.currentIndex()
-        if idx in self.plantuml_codes:
-            plantuml_code = self.plantuml_codes[idx]
-            diagram_type = identify_plantuml_diagram_type(plantuml_code, LANG)
+        if idx not in self.plantuml_codes:
+            error_msg = tr("msg_no_valid_diagram_to_save")
+            self.append_to_chat("System", error_msg)
+            log_exception(error_msg)
+            return
+
+        plantuml_code = self.plantuml_codes[idx]
+        diagram_type = identify_plantuml_diagram_type(plantuml_code, LANG)
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        default_filename = f"{diagram_type.replace(' ', '_')}_{timestamp}.svg"
+
+        # Otwórz okno dialogowe do wyboru pliku
+        filename, _ = QFileDialog.getSaveFileName(
+            self,
+            tr("dialog_save_diagram_title"),  # Tytuł okna
+            default_filename,  # Domyślna nazwa pliku
+            "SVG Files (*.svg);;All Files (*)"  # Filtr plików
+        )
+
+        # Jeśli użytkownik anulował dialog, filename będzie pusty
+        if not filename:
+            return
+
+        generator_type = plantuml_generator_type
+
+        def render(code, task):
+            task.report(10, STAGE_RENDER)
+            if generator_type == "local":
+                svg_path, error_msg = fetch_plantuml_svg_local(code, plantuml_jar_path, LANG)
+                if not svg_path:
+                    raise RuntimeError(error_msg)
+                with open(svg_path, "rb") as f:
+                    return f.read()
+            svg_data, error_msg = fetch_plantuml_svg_www(code, LANG)
+            if not svg_data:
+                raise RuntimeError(error_msg)
+            return svg_data
+
+        def on_result(svg_data):
             try:
-                timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-                default_filename = f"{diagram_type.replace(' ', '_')}_{timestamp}.svg"
-                 
-                # Otwórz okno dialogowe do wyboru pliku
-                filename, _ = QFileDialog.getSaveFileName(
-                    self,
-                    tr("dialog_save_diagram_title"),  # Tytuł okna
-                    default_filename,  # Domyślna nazwa pliku
-                    "SVG Files (*.svg);;All Files (*)"  # Filtr plików
-                )
-                
-                # Jeśli użytkownik anulował dialog, filename będzie pusty
-                if not filename:
-                    return
-            
-                if plantuml_generator_type == "local":
-                    svg_path, error_msg = fetch_plantuml_svg_local(plantuml_code, plantuml_jar_path, LANG)
-                    with open(svg_path, "r", encoding="utf-8") as f:
-                        svg_data = f.read()
-                    with open(filename, "w", encoding="utf-8") as f:
-                        f.write(svg_data)
-                elif plantuml_generator_type == "www":
-                    svg_data, error_msg = fetch_plantuml_svg_www(plantuml_code, LANG)
-                    with open(filename, "wb") as f:
-                        f.write(svg_data)
+                with open(filename, "wb") as f:
+                    f.write(svg_data)
                 ok_msg = tr("msg_diagram_saved").format(filename=filename)
                 self.append_to_chat("System", ok_msg)
                 log_info(ok_msg)
@@ -1247,10 +1340,14 @@ class AIApp(QMainWindow):
                 error_msg = tr("msg_error_saving_diagram").format(error=e)
                 self.append_to_chat("System", error_msg)
                 log_exception(error_msg)
-        else:
-            error_msg = tr("msg_no_valid_diagram_to_save")
-            self.append_to_chat("System", error_msg)
-            log_exception(error_msg)
+
+        self.run_conversion_task(f"svg:{generator_type}", plantuml_code, render, on_result, "msg_error_saving_diagram")
+
+    def closeEvent(self, event):
+        """Anuluj konwersje w tle i zapisz zakolejkowane interakcje AI przed zamknięciem okna."""
+        self.conversion_pool.shutdown()
+        shutdown_interaction_log()
+        super().closeEvent(event)
 
     def append_to_chat(self, sender: str, message: str):
         """
@@ -1462,6 +1559,13 @@ class AIApp(QMainWindow):
         self.diagram_type_selector.setEnabled(use_template)
 
     # PDF handling methods
+    @property
+    def pdf_processor(self):
+        """PDFProcessor tworzony przy pierwszym użyciu (import stosu PDF tylko gdy potrzebny)."""
+        if self._pdf_processor is None and PDF_SUPPORT:
+            self._pdf_processor = PDFProcessor()
+        return self._pdf_processor
+
     def select_pdf_files(self):
         """Otwiera dialog wyboru plików PDF."""
         if not PDF_SUPPORT:
@@ -1508,8 +1612,8 @@ class AIApp(QMainWindow):
             self.pdf_files_label.setText(display_text)
             self.pdf_files_label.setStyleSheet("color: green; font-weight: bold;")
     
-    def enhance_prompt_with_pdf_context(self, original_prompt, diagram_type):
-        """Wzbogaca prompt o kontekst z plików PDF."""
+    def enhance_prompt_with_pdf_context(self, original_prompt, diagram_type, process_description=None):
+        """Wzbogaca prompt o kontekst z plików PDF (fragmenty dobierane do opisu procesu)."""
         if not PDF_SUPPORT or not self.selected_pdf_files or not self.pdf_processor:
             return original_prompt
             
@@ -1517,7 +1621,9 @@ class AIApp(QMainWindow):
             enhanced_prompt = enhance_prompt_with_pdf_context(
                 original_prompt, 
                 self.selected_pdf_files, 
-                diagram_type
+                diagram_type,
+                query=process_description,
+                model_name=self.model_selector.currentText() or None
             )
             
             if enhanced_prompt != original_prompt:
@@ -1539,6 +1645,11 @@ def main():
     app = QApplication(sys.argv)
     window = AIApp()
     window.show()
+    # Czas do pierwszego okna - mierzony po pierwszym obiegu pętli zdarzeń (okno narysowane)
+    QTimer.singleShot(0, lambda: log_info(
+        f"⏱️ Time to first window: {(time.perf_counter() - _PROCESS_START) * 1000:.0f} ms "
+        f"(lazy imports so far: {', '.join(get_import_times()) or '-'})"
+    ))
     sys.exit(app.exec_())
 
 if __name__ == "__main__":
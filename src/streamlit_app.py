@@ -1,9 +1,15 @@
+import time
+
+_RUN_START = time.perf_counter()
+
 import streamlit as st
 import requests
 import re
 from datetime import datetime
 import traceback
+import json
 import base64
+from contextlib import nullcontext
 from io import BytesIO
 import os
 import sys
@@ -15,12 +21,17 @@ from dotenv import load_dotenv
 from language.translations_pl import TRANSLATIONS as PL
 from language.translations_en import TRANSLATIONS as EN
 
-# Import PDF functionality
-try:
+# Import PDF functionality (the PDF stack itself is imported on first use)
+from utils.lazy_import import module_available
+from utils.db.interaction_log import log_ai_interaction
+from utils.db.history_store import record_interaction
+from utils.metrics.model_response_metrics import ModelResponseMetrics, measure_response_time
+from utils.metrics.metrics_registry import start_metrics_server
+from utils.metrics.tracing import NOOP_SPAN, get_tracer, render_flamegraph_svg
+PDF_SUPPORT = module_available("fitz", "PyPDF2")
+if PDF_SUPPORT:
     from utils.pdf.streamlit_pdf_integration import PDFUploadManager
-    PDF_SUPPORT = True
-except ImportError:
-    PDF_SUPPORT = False
+else:
     PDFUploadManager = None
 
 # Load environment variables
@@ -37,41 +48,30 @@ def tr(key):
 
 def update_language():
     """Update language and reinitialize prompt templates"""
-    global LANG, prompt_templates, get_diagram_specific_requirements
+    global LANG, prompt_templates
     LANG = st.session_state.current_language
-    if LANG == "en":
-        from prompts.prompt_templates_en import prompt_templates, get_diagram_specific_requirements
-    else:
-        from prompts.prompt_templates_pl import prompt_templates, get_diagram_specific_requirements
+    prompt_templates = template_registry.templates(LANG)
     st.rerun()
 
+def get_diagram_specific_requirements(diagram_type):
+    return template_registry.requirements(LANG, diagram_type)
+
 # Try to import custom modules with error handling
 try:
     from utils.extract_code_from_response import extract_xml, extract_plantuml, extract_plantuml_blocks, is_valid_xml
     from input_validator import validate_input_text
     from utils.plantuml.plantuml_utils import plantuml_encode, identify_plantuml_diagram_type, fetch_plantuml_svg_local, fetch_plantuml_svg_www
-    if LANG == "en":
-        from prompts.prompt_templates_en import prompt_templates, get_diagram_specific_requirements
-    else:
-        from prompts.prompt_templates_pl import prompt_templates, get_diagram_specific_requirements
+    # Szablony ładowane leniwie - tylko dla wybranego języka
+    from prompts.template_registry import get_template_registry
+    template_registry = get_template_registry()
+    prompt_templates = template_registry.templates(LANG)
     from utils.logger_utils import setup_logger, log_info, log_error, log_exception, log_debug
     #from plantuml_to_ea import plantuml_to_xmi
-    from utils.plantuml.plantuml_sequance_parser import PlantUMLSequenceParser
-    from utils.xmi.xmi_sequance_generator import XMISequenceGenerator
+    from utils.lazy_import import LazyImport, get_import_times
+    from utils.xmi.xmi_conversion import XMIConverter, detect_xmi_kind
     
-    # Try to import BPMN integration
-    try:
-        from bpmn_integration import create_bpmn_integration, display_bpmn_result, display_bpmn_validation
-        BPMN_AVAILABLE = True
-    except ImportError as e:
-        BPMN_AVAILABLE = False
-        print(f"BPMN integration not available: {e}")
-    from utils.plantuml.plantuml_class_parser import PlantUMLClassParser
-    from utils.xmi.xmi_class_generator import XMIClassGenerator
-    from utils.plantuml.improved_plantuml_activity_parser import ImprovedPlantUMLActivityParser as PlantUMLActivityParser
-    from utils.xmi.xmi_activity_generator import XMIActivityGenerator 
-    from utils.plantuml.plantuml_component_parser import PlantUMLComponentParser
-    from utils.xmi.xmi_component_generator import XMIComponentGenerator
+    # Parsery i generatory XMI są ładowane przez XMIConverter dopiero przy pierwszej konwersji danego typu
+    display_bpmn_result = LazyImport("bpmn_integration", "display_bpmn_result")
     MODULES_LOADED = True
 except ImportError as e:
     MODULES_LOADED = False
@@ -92,24 +92,36 @@ CHAT_URL = os.getenv("CHAT_URL", "http://localhost:1234/v1/chat/completions")
 API_KEY = os.getenv("API_KEY", "")
 API_DEFAULT_MODEL = os.getenv("API_DEFAULT_MODEL", "")
 MODEL_PROVIDER = os.getenv("MODEL_PROVIDER", "local")  # lub "gemini"
+METRICS_SLO_MS = int(os.getenv("METRICS_SLO_MS", "30000"))
 
-# Initialize BPMN Integration if available
-bpmn_integration = None
-if BPMN_AVAILABLE and API_KEY and MODEL_PROVIDER:
+# Initialize BPMN Integration if available - one shared instance per server process
+# (st.cache_resource), instead of rebuilding BPMN v2 and the AI client on every rerun
+@st.cache_resource(show_spinner=False)
+def get_bpmn_integration(api_key, model_provider, chat_url, default_model):
+    if not (api_key and model_provider):
+        return None
     try:
-        bpmn_integration = create_bpmn_integration(
-            api_key=API_KEY,
-            model_provider=MODEL_PROVIDER,
-            chat_url=CHAT_URL,
-            default_model=API_DEFAULT_MODEL
+        from bpmn_integration import create_bpmn_integration
+    except ImportError as e:
+        print(f"BPMN integration not available: {e}")
+        return None
+    try:
+        integration = create_bpmn_integration(
+            api_key=api_key,
+            model_provider=model_provider,
+            chat_url=chat_url,
+            default_model=default_model
         )
-        if bpmn_integration:
+        if integration:
             log_info("BPMN Integration initialized successfully")
         else:
             log_info("BPMN Integration not available (configuration issue)")
+        return integration
     except Exception as e:
         log_error(f"Failed to initialize BPMN Integration: {e}")
-        bpmn_integration = None
+        return None
+
+bpmn_integration = get_bpmn_integration(API_KEY, MODEL_PROVIDER, CHAT_URL, API_DEFAULT_MODEL)
 
 # Page configuration
 st.set_page_config(
@@ -214,8 +226,69 @@ def get_loaded_models(_model_provider=None, _api_key=None):
             safe_log_exception(error_msg)
             return None
 
+# Cached engines and pure computations. Streamlit re-executes this script on every
+# interaction, so stateless engines are shared (st.cache_resource) and results of
+# pure functions are memoized by their inputs (st.cache_data)
+@st.cache_resource(show_spinner=False)
+def get_xmi_converter():
+    """Współdzielony konwerter PlantUML -> XMI (nowy generator dla każdego diagramu)."""
+    return XMIConverter(author="195841")
+
+@st.cache_resource(show_spinner=False)
+def start_metrics_endpoint():
+    """Endpoint Prometheus /metrics (raz na proces serwera, port z METRICS_PORT)."""
+    ModelResponseMetrics.initialize()
+    return start_metrics_server()
+
+@st.cache_resource(show_spinner=False)
+def get_http_session():
+    """Współdzielona sesja HTTP (keep-alive) dla wywołań API modeli."""
+    return requests.Session()
+
+@st.cache_data(show_spinner=False, max_entries=256)
+def identify_diagram_type_cached(plantuml_code, lang):
+    """Typ diagramu PlantUML (cache po treści kodu)."""
+    return identify_plantuml_diagram_type(plantuml_code, LANG=lang)
+
+@st.cache_data(show_spinner=False, max_entries=64)
+def convert_plantuml_to_xmi_cached(plantuml_code, diagram_type_name):
+    """Konwersja PlantUML -> XMI (cache po treści kodu); zwraca (xmi, tytuł)."""
+    return get_xmi_converter().convert(plantuml_code, diagram_type_name)
+
+class PlantUMLRenderError(Exception):
+    """Błąd renderowania SVG - zgłaszany wyjątkiem, bo st.cache_data nie zapamiętuje wyjątków."""
+
+@st.cache_data(show_spinner=False, max_entries=128)
+def _render_plantuml_svg_cached(plantuml_code, generator_type, jar_path, lang):
+    """Renderuje diagram do SVG (bytes) - bez ponownego uruchamiania PlantUML przy każdym rerun."""
+    if generator_type == "www":
+        safe_log_info(tr("plantuml_code_display").format(code=plantuml_code))
+        svg_data, err_msg = fetch_plantuml_svg_www(plantuml_code, LANG=lang)
+        if err_msg:
+            raise PlantUMLRenderError(err_msg)
+        if not isinstance(svg_data, bytes):
+            raise PlantUMLRenderError(tr("msg_error_fetching_plantuml_log"))
+        return svg_data
+    svg_path, err_msg = fetch_plantuml_svg_local(plantuml_code, jar_path, LANG=lang)
+    if err_msg:
+        raise PlantUMLRenderError(err_msg)
+    if not os.path.exists(svg_path):
+        raise PlantUMLRenderError(f"Plik SVG nie został utworzony: {svg_path}")
+    with open(svg_path, "rb") as f:
+        return f.read()
+
+def render_plantuml_svg(plantuml_code, generator_type, jar_path, lang):
+    """Renderuje diagram do SVG: (bytes, błąd). Błędy nie trafiają do cache -
+    przejściowa awaria serwera PlantUML lub pliku jar nie zostaje zapamiętana dla tego kodu."""
+    try:
+        return _render_plantuml_svg_cached(plantuml_code, generator_type, jar_path, lang), None
+    except PlantUMLRenderError as e:
+        return None, str(e)
+
+@measure_response_time(model_arg_position=1)
 def call_api(prompt, model_name):
     """Wywołuje API z podanym promptem i modelem."""
+    started = time.perf_counter()
     if MODEL_PROVIDER == "gemini":
         try:
             import google.generativeai as genai
@@ -229,13 +302,10 @@ def call_api(prompt, model_name):
                 content = response.candidates[0].content.parts[0].text
             else:
                 content = str(response)
-            if os.getenv("DB_HOST") is not None:
-                if os.getenv("DB_PROVIDER") == "mysql":
-                    from utils.db.mysql_connector import log_ai_interaction
-                    log_ai_interaction(request=prompt, response=content, model_name=model_name, status_code=None)
-                elif os.getenv("DB_PROVIDER") == "postgresql":
-                    from utils.db.PostgreSQL_connector import log_ai_interaction
-                    log_ai_interaction(request=prompt, response=content, model_name=model_name, status_code=None)
+            latency_ms = int((time.perf_counter() - started) * 1000)
+            log_ai_interaction(request=prompt, response=content, model_name=model_name, status_code=None,
+                               latency_ms=latency_ms)
+            record_interaction(prompt, content, model_name, latency_ms=latency_ms, source="streamlit")
             return content
         except Exception as e:
             safe_log_exception(f"Gemini API error: {e}")
@@ -252,17 +322,15 @@ def call_api(prompt, model_name):
             "temperature": 0.7
         }
         try:
-            response = requests.post(CHAT_URL, json=payload, headers=headers)
+            response = get_http_session().post(CHAT_URL, json=payload, headers=headers)
             if response.status_code == 200:
                 result = response.json()
                 content = result['choices'][0]['message']['content']
-                if os.getenv("DB_HOST") is not None:
-                    if os.getenv("DB_PROVIDER") == "mysql":
-                        from utils.db.mysql_connector import log_ai_interaction
-                        log_ai_interaction(request=prompt, response=content, model_name=model_name, status_code=response.status_code)
-                    elif os.getenv("DB_PROVIDER") == "postgresql":
-                        from utils.db.PostgreSQL_connector import log_ai_interaction    
-                        log_ai_interaction(request=prompt, response=content, model_name=model_name, status_code=response.status_code)
+                latency_ms = int((time.perf_counter() - started) * 1000)
+                log_ai_interaction(request=prompt, response=content, model_name=model_name,
+                                   status_code=response.status_code, latency_ms=latency_ms)
+                record_interaction(prompt, content, model_name, status_code=response.status_code,
+                                   latency_ms=latency_ms, source="streamlit")
                 return content
             else:
                 return f"Błąd API: {response.status_code} - {response.text}"
@@ -325,84 +393,46 @@ def save_file(content, filename):
 def display_plantuml_diagram(plantuml_code):
     """Wyświetla diagram PlantUML."""
     try:
-        if plantuml_generator_type == "www":
-            if plantuml_code is not None:
-                safe_log_info(tr("plantuml_code_display").format(code=plantuml_code))
-                svg_data, err_msg = fetch_plantuml_svg_www(plantuml_code, LANG=LANG)
-                
-                # Sprawdź czy wystąpił błąd PlantUML
-                if err_msg:
-                    safe_log_error(f"PlantUML błąd (www): {err_msg}")
-                    st.error(f"Błąd PlantUML: {err_msg}")
-                    return False
-                
-            else:
-                error_msg = tr("msg_error_fetching_plantuml")
-                st.error(error_msg)
-                safe_log_error(error_msg + f": {plantuml_code}")
-                return False
-            
-            if isinstance(svg_data, bytes):
-                svg_str = svg_data.decode('utf-8')
-                
-                # Sprawdź czy SVG zawiera komunikat błędu
-                if _is_error_svg(svg_str):
-                    safe_log_error("SVG zawiera komunikat błędu PlantUML")
-                    st.error("Diagram zawiera błędy składniowe PlantUML")
-                    return False
-                
-                #resize SVG to fit the container
-                #svg_str = svg_str.replace('width="100%"', 'width="50%" height="600"')
-                #st.components.v1.html(svg_str, height=1000)
-                st.image(
-                    svg_str,
-                    width=None,
-                    use_container_width=True
-                )
-                return True
-                
-        elif plantuml_generator_type == "local":
-            svg_path, err_msg = fetch_plantuml_svg_local(plantuml_code, plantuml_jar_path, LANG=LANG)
-            
-            # Sprawdź czy wystąpił błąd PlantUML  
-            if err_msg:
-                safe_log_error(f"PlantUML błąd (local): {err_msg}")
-                st.error(f"Błąd PlantUML: {err_msg}")
-                return False
-                
-            # Sprawdź czy plik SVG istnieje
-            if not os.path.exists(svg_path):
-                safe_log_error(f"Plik SVG nie został utworzony: {svg_path}")
-                st.error("Nie udało się wygenerować diagramu SVG")
-                return False
-                
-            with open(svg_path, "r", encoding="utf-8") as f:
-                svg_str = f.read()  
-                
-                # Sprawdź czy SVG zawiera komunikat błędu
-                if _is_error_svg(svg_str):
-                    safe_log_error("SVG zawiera komunikat błędu PlantUML")
-                    st.error("Diagram zawiera błędy składniowe PlantUML") 
-                    return False
-                    
-                #resize SVG to fit the container
-                #svg_str = svg_str.replace('width="100%"', 'width="500%" height="600"')
-            #st.components.v1.html(svg_str, height=1000)
-                st.image(
-                    svg_str,
-                    width=None,
-                    use_container_width=True
-                )
-            return True
+        if plantuml_code is None:
+            error_msg = tr("msg_error_fetching_plantuml")
+            st.error(error_msg)
+            safe_log_error(error_msg + f": {plantuml_code}")
+            return False
+        
+        with trace_stage("render", generator=plantuml_generator_type, code_chars=len(plantuml_code)):
+            svg_data, err_msg = render_plantuml_svg(plantuml_code, plantuml_generator_type, plantuml_jar_path, LANG)
+        
+        # Sprawdź czy wystąpił błąd PlantUML
+        if err_msg:
+            safe_log_error(f"PlantUML błąd ({plantuml_generator_type}): {err_msg}")
+            st.error(f"Błąd PlantUML: {err_msg}")
+            return False
+        
+        if not svg_data:
+            safe_log_error("Plik SVG nie został utworzony")
+            st.error("Nie udało się wygenerować diagramu SVG")
+            return False
+        
+        svg_str = svg_data.decode('utf-8')
+        
+        # Sprawdź czy SVG zawiera komunikat błędu
+        if _is_error_svg(svg_str):
+            safe_log_error("SVG zawiera komunikat błędu PlantUML")
+            st.error("Diagram zawiera błędy składniowe PlantUML")
+            return False
+        
+        st.image(
+            svg_str,
+            width=None,
+            use_container_width=True
+        )
+        return True
             
     except Exception as e:
         error_msg = tr("msg_error_displaying_plantuml_exception").format(error=str(e))
         safe_log_exception(error_msg)
         st.error(error_msg)
         return False
-    
-    # Jeśli doszliśmy tutaj, coś poszło nie tak
-    return False
 
 def _is_error_svg(svg_content: str) -> bool:
     """Sprawdza czy SVG zawiera komunikat błędu PlantUML."""
@@ -454,6 +484,13 @@ if not st.session_state.models:
 # Main UI
 st.title(tr("setWindowTitle"))
 st.markdown((tr("app_description")))
+start_metrics_endpoint()
+tracer = get_tracer()
+
+def trace_stage(name, **attributes):
+    """Span etapu w bieżącym śladzie generowania (spany poza generowaniem nie są zbierane)."""
+    root = st.session_state.get("generation_span")
+    return tracer.span(name, parent=root, **attributes) if root is not None else nullcontext(NOOP_SPAN)
 
 # Sidebar configuration
 with st.sidebar:
@@ -574,6 +611,20 @@ with st.sidebar:
         domain = st.selectbox("Domena:", 
                               ["NONE", "banking", "insurance", "logistics", "healthcare", "e-commerce"])
 
+    # Model latency metrics (streaming aggregates, bounded memory)
+    with st.expander(tr("metrics_expander")):
+        stats = ModelResponseMetrics.get_statistics()
+        if stats["count"] == 0:
+            st.caption(tr("metrics_no_data"))
+        else:
+            st.table([
+                {"model": model, "n": row["count"], "p50 ms": round(row["p50_ms"]), "p95 ms": round(row["p95_ms"]),
+                 "p99 ms": round(row["p99_ms"])}
+                for model, row in stats["by_model"].items()
+            ])
+            slo = ModelResponseMetrics.slo_report(METRICS_SLO_MS)
+            st.metric(tr("metrics_slo_label").format(threshold=METRICS_SLO_MS), f"{slo['within_slo']:.1%}")
+
 # PDF Upload Section (if supported)
 if PDF_SUPPORT and 'pdf_manager' in st.session_state:
     st.session_state.pdf_manager.render_pdf_upload_section()
@@ -655,6 +706,11 @@ with col1:
             st.error(tr("error_sending_request_no_model"))
         else:
             with st.spinner(tr("msg_info_generating_response")):
+                # Root span of this generation; closed after the diagrams are rendered (next rerun)
+                st.session_state.generation_span = tracer.start_span(
+                    "generation", model=selected_model, diagram_type=diagram_type, template_type=template_type)
+                prompt_span = tracer.start_span("prompt_build", parent=st.session_state.generation_span,
+                                                template=selected_template or "")
                 # Prepare prompt
                 if use_template and selected_template in prompt_templates:
                     template_data = prompt_templates[selected_template]
@@ -662,17 +718,9 @@ with col1:
                     # Use old BPMN logic only if template_type is not "BPMN" (for backward compatibility)
                     if diagram_type.lower() in ["bpmn", "bpmn_flow", "bpmn_component"] and template_type != "BPMN":
                         if selected_template == tr("bpmn_template_basic"):
-                            prompt = template_data["template"].format(
-                                diagram_type=diagram_type,
-                                process_description=process_description,
-                                diagram_specific_requirements=get_diagram_specific_requirements(diagram_type)
-                            )
+                            prompt = template_registry.render(LANG, selected_template, diagram_type, process_description)
                         elif selected_template == tr("bpmn_template_advanced"):
-                            prompt = template_data["template"].format(
-                                diagram_type=diagram_type,
-                                process_description=process_description,
-                                diagram_specific_requirements=get_diagram_specific_requirements(diagram_type)
-                            )
+                            prompt = template_registry.render(LANG, selected_template, diagram_type, process_description)
                         elif selected_template == tr("bpmn_template_bank"):
                             complexity = get_complexity_level(complexity_level)
                             validation = get_validation_rule(validation_rule)
@@ -690,17 +738,18 @@ with col1:
                         else:
                             prompt = process_description
                     else:
-                        prompt = template_data["template"].format(
-                            diagram_type=diagram_type,
-                            process_description=process_description,
-                            diagram_specific_requirements=get_diagram_specific_requirements(diagram_type)
-                        )
+                        prompt = template_registry.render(LANG, selected_template, diagram_type, process_description)
                 else:
                     prompt = process_description
+                prompt_span.set_attribute("prompt_chars", len(prompt))
+                tracer.end_span(prompt_span)
                 
                 # Enhance prompt with PDF context if available
                 if PDF_SUPPORT and 'pdf_manager' in st.session_state:
-                    prompt = st.session_state.pdf_manager.get_enhanced_prompt(prompt, diagram_type)
+                    with trace_stage("pdf_context") as pdf_span:
+                        prompt = st.session_state.pdf_manager.get_enhanced_prompt(prompt, diagram_type, process_description,
+                                                                              model_name=selected_model)
+                        pdf_span.set_attribute("prompt_chars", len(prompt))
                 
                 # Handle BPMN generation using BPMN Integration
                 safe_log_info(f"Template type: {template_type}, BPMN integration available: {bpmn_integration is not None and bpmn_integration.is_available() if bpmn_integration else False}")
@@ -709,12 +758,15 @@ with col1:
                     safe_log_info("Starting BPMN generation...")
                     # DEBUG kommunikat usunięty dla czystości logów
                     # DEBUG komunik previewu usunięty dla czystości logów
-                    success, bpmn_result, metadata = bpmn_integration.generate_bpmn_process(
-                        user_input=process_description,  # Use raw process_description, not processed prompt!
-                        process_type=bpmn_process_type,
-                        quality_target=bpmn_quality,
-                        max_iterations=bpmn_iterations
-                    )
+                    with trace_stage("bpmn_generation", process_type=bpmn_process_type,
+                                     max_iterations=int(bpmn_iterations)) as bpmn_span:
+                        success, bpmn_result, metadata = bpmn_integration.generate_bpmn_process(
+                            user_input=process_description,  # Use raw process_description, not processed prompt!
+                            process_type=bpmn_process_type,
+                            quality_target=bpmn_quality,
+                            max_iterations=bpmn_iterations
+                        )
+                        bpmn_span.set_attribute("success", bool(success))
                     
                     safe_log_info(f"BPMN generation result: success={success}")
                     
@@ -734,7 +786,9 @@ with col1:
                 # Regular API call for PlantUML and other types
                 else:
                     # Call API
-                    response = call_api(prompt, selected_model)
+                    with trace_stage("llm_call", model=selected_model, provider=MODEL_PROVIDER) as llm_span:
+                        response = call_api(prompt, selected_model)
+                        llm_span.set_attribute("response_chars", len(response))
                     safe_log_info(f"Response from model: {response[:5000]}...")
                     
                     # Store response
@@ -742,16 +796,18 @@ with col1:
                     st.session_state.conversation_history.append({"role": "user", "content": prompt})
                     st.session_state.conversation_history.append({"role": "assistant", "content": response})
                     
-                    # Check for XML content
-                    xml_content = extract_xml(response)
-                    if xml_content and is_valid_xml(xml_content):
-                        st.session_state.latest_xml = xml_content
-                    
-                    # Check for PlantUML content
-                    plantuml_blocks = extract_plantuml_blocks(response)
-                    if plantuml_blocks:
-                        st.session_state.latest_plantuml = plantuml_blocks[-1]
-                        st.session_state.plantuml_diagrams = plantuml_blocks
+                    with trace_stage("code_extraction") as extraction_span:
+                        # Check for XML content
+                        xml_content = extract_xml(response)
+                        if xml_content and is_valid_xml(xml_content):
+                            st.session_state.latest_xml = xml_content
+                        
+                        # Check for PlantUML content
+                        plantuml_blocks = extract_plantuml_blocks(response)
+                        if plantuml_blocks:
+                            st.session_state.latest_plantuml = plantuml_blocks[-1]
+                            st.session_state.plantuml_diagrams = plantuml_blocks
+                        extraction_span.set_attribute("plantuml_blocks", len(plantuml_blocks))
                     
                     st.rerun()
 
@@ -775,19 +831,19 @@ if st.session_state.plantuml_diagrams:
     # Create tabs for each diagram
     if len(st.session_state.plantuml_diagrams) > 1:
 #        tabs = st.tabs([f"{identify_plantuml_diagram_type(st.session_state.plantuml_diagrams[i+1])}" for i in range(len(st.session_state.plantuml_diagrams))])
-        tabs = st.tabs([f"{identify_plantuml_diagram_type(p, LANG=LANG)}" for p in st.session_state.plantuml_diagrams])        
+        tabs = st.tabs([f"{identify_diagram_type_cached(p, LANG)}" for p in st.session_state.plantuml_diagrams])        
         for i, (tab, plantuml_code) in enumerate(zip(tabs, st.session_state.plantuml_diagrams)):
             with tab:
 
                 st.subheader(f"Diagram {i+1}")
-                diagram_type_identified = identify_plantuml_diagram_type(plantuml_code, LANG=LANG)
+                diagram_type_identified = identify_diagram_type_cached(plantuml_code, LANG)
                 st.subheader(tr("diagram_subheader_name") + f": {diagram_type_identified}")
                 diagrams = st.session_state.plantuml_diagrams
                 with st.expander(f"Diagram {i+1}"):
                     if plantuml_code is not None:
                         if not display_plantuml_diagram(plantuml_code):
                             # Weryfikacja kodu w przypadku błędów
-                            diagram_type = identify_plantuml_diagram_type(plantuml_code, LANG=LANG)
+                            diagram_type = identify_diagram_type_cached(plantuml_code, LANG)
                             safe_log_info(tr("msg_info_validation_error").format(plantuml_code=plantuml_code)) 
                             verification_template = prompt_templates[tr("verification_template")]["template"]
                             prompt = verification_template.format(plantuml_code=plantuml_code, diagram_type=diagram_type)
@@ -827,13 +883,7 @@ if st.session_state.plantuml_diagrams:
                 
                 with col3:
                     try:
-                        if plantuml_generator_type == "www":
-                            svg_data, err_msg  = fetch_plantuml_svg_www(plantuml_code, LANG=LANG)
-                             
-                        else:
-                            svg_path, err_msg  = fetch_plantuml_svg_local(plantuml_code, plantuml_jar_path, LANG=LANG)
-                            with open(svg_path, "rb") as f:
-                                svg_data = f.read()
+                        svg_data, err_msg = render_plantuml_svg(plantuml_code, plantuml_generator_type, plantuml_jar_path, LANG)
 
                         if st.download_button(
                             label=tr("download_svg_button"),
@@ -848,14 +898,10 @@ if st.session_state.plantuml_diagrams:
                         st.error(error_msg)
                 
                 with col4:
-                    
-                    if ("klas" in diagram_type_identified.lower()) or ("class" in diagram_type_identified.lower()):
+                    if detect_xmi_kind(diagram_type_identified):
                         try:
-                            parser = PlantUMLClassParser()
-                            parser.parse(plantuml_code)
-                            diagram_title = parser.title if hasattr(parser, 'title') and parser.title else diagram_type 
-                            xmi_content = XMIClassGenerator(autor = "195841").save_xmi(parser.classes, parser.relations, parser.enums, 
-                                                            parser.notes, parser.primitive_types, diagram_name = diagram_title)
+                            with trace_stage("xmi_export", diagram_type=diagram_type_identified):
+                                xmi_content, _ = convert_plantuml_to_xmi_cached(plantuml_code, diagram_type_identified)
                             if st.download_button(
                                 label=tr("download_xmi_button"),
                                 data=xmi_content,
@@ -868,85 +914,17 @@ if st.session_state.plantuml_diagrams:
                             safe_log_error(error_msg)   
                             st.error(error_msg)
 
-                    elif ("sekwencji" in diagram_type_identified.lower()) or ("sequence" in diagram_type_identified.lower()):
-                        
-                        try:
-                            parser = PlantUMLSequenceParser(plantuml_code)
-                            parsed_data = parser.parse()
-                            diagram_title = parsed_data.get('title', diagram_type)
-                            xmi_content = XMISequenceGenerator(autor = "195841").generuj_diagram(
-                                nazwa_diagramu=diagram_title,
-                                dane=parsed_data
-                            )
-                            #xmi_content = plantuml_to_xmi(plantuml_code)
-                            if st.download_button(
-                                label=tr("download_xmi_button"),
-                                data=xmi_content,
-                                file_name=f"{diagram_type}_{i+1}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.xmi",
-                                mime="application/xml"
-                            ):
-                                st.success(tr("msg_success_ready_for_downloading_XMI"))
-                        except Exception as e:
-                            error_msg = tr("msg_error_generating_xmi").format(error=str(e))
-                            safe_log_error(error_msg)   
-                            st.error(error_msg)
-                    elif ("aktywności" in diagram_type_identified.lower()) or ("activity" in diagram_type_identified.lower()):
-
-                        try:
-                            parser = PlantUMLActivityParser(plantuml_code)
-                            parsed_data = parser.parse()
-                            diagram_title = parsed_data.get('title', diagram_type)
-                            xmi_content = XMIActivityGenerator(author = "195841").generate_activity_diagram(
-                                nazwa_diagramu=diagram_title,
-                                dane=parsed_data
-                            )
-                            #xmi_content = plantuml_to_xmi(plantuml_code)
-                            if st.download_button(
-                                label=tr("download_xmi_button"),
-                                data=xmi_content,
-                                file_name=f"{diagram_type}_{i+1}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.xmi",
-                                mime="application/xml"
-                            ):
-                                st.success(tr("msg_success_ready_for_downloading_XMI"))
-                        except Exception as e:
-                            error_msg = tr("msg_error_generating_xmi").format(error=str(e))
-                            safe_log_error(error_msg)   
-                            st.error(error_msg)
-                    elif ("komponentów" in diagram_type_identified.lower()) or ("component" in diagram_type_identified.lower()):
-                        
-                        try:
-                            parser = PlantUMLComponentParser(plantuml_code)
-                            parsed_data = parser.parse()
-                            diagram_title = parsed_data.get('title', diagram_type)
-                            xmi_content = XMIComponentGenerator(author = "195841").generate_component_diagram(
-                                nazwa_diagramu=diagram_title,
-                                dane=parsed_data
-                            )
-                            #xmi_content = plantuml_to_xmi(plantuml_code)
-                            if st.download_button(
-                                label=tr("download_xmi_button"),
-                                data=xmi_content,
-                                file_name=f"{diagram_type}_{i+1}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.xmi",
-                                mime="application/xml"
-                            ):
-                                st.success(tr("msg_success_ready_for_downloading_XMI"))
-                        except Exception as e:
-                            error_msg = tr("msg_error_generating_xmi").format(error=str(e))
-                            safe_log_error(error_msg)   
-                            st.error(error_msg)
-                    
-
                     #else:
                         #st.button(f"Pobierz XMI {i+1}", disabled=True, help="XMI dostępne tylko dla diagramów klas", key=f"xmi_button_{i}")
     else:
         # Single diagram
         plantuml_code = st.session_state.plantuml_diagrams[0]
-        diagram_type_identified = identify_plantuml_diagram_type(plantuml_code, LANG=LANG)
+        diagram_type_identified = identify_diagram_type_cached(plantuml_code, LANG)
         st.subheader(tr("diagram_subheader_name") + f": {diagram_type_identified}")
         if not display_plantuml_diagram(plantuml_code):
             # Weryfikacja kodu w przypadku błędów
             safe_log_info(tr("msg_info_verifying_plantuml_code").format(plantuml_code=plantuml_code))
-            diagram_type = identify_plantuml_diagram_type(plantuml_code, LANG=LANG)
+            diagram_type = identify_diagram_type_cached(plantuml_code, LANG)
             verification_template = prompt_templates[tr("verification_template")]["template"]
             prompt = verification_template.format(plantuml_code=plantuml_code, diagram_type=diagram_type)
             info_msg = tr("msg_info_sending_code_for_verification_singele").format(plantuml_code=plantuml_code)
@@ -987,12 +965,7 @@ if st.session_state.plantuml_diagrams:
         
         with col3:
             try:
-                if plantuml_generator_type == "www":
-                    svg_data, err_msg  = fetch_plantuml_svg_www(plantuml_code, LANG=LANG)
-                else:
-                    svg_path, err_msg  = fetch_plantuml_svg_local(plantuml_code, plantuml_jar_path, LANG=LANG)
-                    with open(svg_path, "rb") as f:
-                        svg_data = f.read()
+                svg_data, err_msg = render_plantuml_svg(plantuml_code, plantuml_generator_type, plantuml_jar_path, LANG)
                 
                 if st.download_button(
                     label=tr("download_svg_button"),
@@ -1005,13 +978,10 @@ if st.session_state.plantuml_diagrams:
                 st.error(tr("msg_error_preparing_svg").format(error=str(e)))
         
         with col4:
-            if ("klas" in diagram_type_identified.lower()) or ("class" in diagram_type_identified.lower()):
+            if detect_xmi_kind(diagram_type_identified):
                 try:
-                    parser = PlantUMLClassParser()
-                    parser.parse(plantuml_code)
-                    diagram_title = parser.title if hasattr(parser, 'title') and parser.title else diagram_type_identified
-                    xmi_content = XMIClassGenerator(autor = "195841").save_xmi(parser.classes, parser.relations, parser.enums, 
-                                                    parser.notes, parser.primitive_types, diagram_name = diagram_title)
+                    with trace_stage("xmi_export", diagram_type=diagram_type_identified):
+                        xmi_content, _ = convert_plantuml_to_xmi_cached(plantuml_code, diagram_type_identified)
                     if st.download_button(
                         label=tr("download_xmi_button"),
                         data=xmi_content,
@@ -1019,71 +989,6 @@ if st.session_state.plantuml_diagrams:
                         mime="application/xml"
                     ):
                         st.success(tr("msg_success_ready_for_downloading_XMI"))
-                except Exception as e:
-                    st.error(tr("msg_error_generating_xmi").format(error=str(e)))
-            elif ("sekwencji" in diagram_type_identified.lower()) or ("sequence" in diagram_type_identified.lower()):
-                try:
-                    parser = PlantUMLSequenceParser(plantuml_code)
-                    parsed_data = parser.parse()
-                    diagram_title = parsed_data.get('title', diagram_type_identified)
-                    xmi_content = XMISequenceGenerator(autor = "195841").generuj_diagram(
-                        nazwa_diagramu=diagram_title,
-                        dane=parsed_data
-                    )
-                    #xmi_content = plantuml_to_xmi(plantuml_code)
-                    if st.download_button(
-                        label=tr("download_xmi_button"),
-                        data=xmi_content,
-                        file_name=f"{diagram_type}_{i+1}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.xmi",
-                        mime="application/xml"
-                    ):
-                        st.success(tr("msg_success_ready_for_downloading_XMI"))
-                except Exception as e:
-                    error_msg = tr("msg_error_generating_xmi").format(error=str(e))
-                    safe_log_error(error_msg)   
-                    st.error(error_msg)
-
-            elif ("aktywności" in diagram_type_identified.lower()) or ("activity" in diagram_type_identified.lower()):
-
-                try:
-                    parser = PlantUMLActivityParser(plantuml_code)
-                    parsed_data = parser.parse()
-                    diagram_title = parsed_data.get('title', diagram_type)
-                    xmi_content = XMIActivityGenerator(author = "195841").generate_activity_diagram(
-                        diagram_name=diagram_title,
-                        parsed_data=parsed_data
-                        )
-                        #xmi_content = plantuml_to_xmi(plantuml_code)
-                    if st.download_button(
-                        label=tr("download_xmi_button"),
-                        data=xmi_content,
-                        file_name=f"{diagram_type}_{i+1}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.xmi",
-                        mime="application/xml"
-                    ):
-                        st.success(tr("msg_success_ready_for_downloading_XMI"))
-                except Exception as e:
-                    error_msg = tr("msg_error_generating_xmi").format(error=str(e))
-                    safe_log_error(error_msg)   
-                    st.error(error_msg)
-
-            elif ("komponentów" in diagram_type_identified.lower()) or ("component" in diagram_type_identified.lower()):
-                        
-                try:
-                    parser = PlantUMLComponentParser(plantuml_code)
-                    parsed_data = parser.parse()
-                    diagram_title = parsed_data.get('title', diagram_type)
-                    xmi_content = XMIComponentGenerator(author = "195841").generate_component_diagram(
-                        diagram_name=diagram_title,
-                        parsed_data=parsed_data
-                    )
-                    #xmi_content = plantuml_to_xmi(plantuml_code)
-                    if st.download_button(
-                        label=tr("download_xmi_button"),
-                        data=xmi_content,
-                        file_name=f"{diagram_type}_{i+1}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.xmi",
-                        mime="application/xml"
-                    ):
-                        st.success(tr("msg_success_ready_for_downloading_XMI"))
                 except Exception as e:
                     error_msg = tr("msg_error_generating_xmi").format(error=str(e))
                     safe_log_error(error_msg)   
@@ -1111,7 +1016,9 @@ if st.session_state.latest_xml:
                 # Quality indicator
                 with st.spinner("Sprawdzanie jakości..."):
                     try:
-                        is_valid, quality_score, _ = bpmn_integration.validate_bpmn(st.session_state.latest_xml)
+                        with trace_stage("validation") as validation_span:
+                            is_valid, quality_score, _ = bpmn_integration.validate_bpmn(st.session_state.latest_xml)
+                            validation_span.set_attribute("quality_score", float(quality_score))
                         if quality_score > 0:
                             st.metric("Jakość BPMN", f"{quality_score:.2f}", delta=None)
                     except:
@@ -1136,10 +1043,10 @@ if st.session_state.show_plantuml_code and st.session_state.plantuml_diagrams:
     selected_index = st.session_state.get('selected_diagram_index', 0)
     if selected_index < len(st.session_state.plantuml_diagrams):
         plantuml_code = st.session_state.plantuml_diagrams[selected_index]
-        diagram_type = identify_plantuml_diagram_type(plantuml_code, LANG=LANG)
+        diagram_type = identify_diagram_type_cached(plantuml_code, LANG)
     else:
         plantuml_code = st.session_state.plantuml_diagrams[0]
-        diagram_type = identify_plantuml_diagram_type(plantuml_code, LANG=LANG)
+        diagram_type = identify_diagram_type_cached(plantuml_code, LANG)
     
     @st.dialog(tr("show_plantuml_dialog") + f" - {diagram_type}", width="large")
     def show_plantuml_modal():
@@ -1175,4 +1082,28 @@ if st.session_state.show_plantuml_code and st.session_state.plantuml_diagrams:
     if result is None:
         st.session_state.show_plantuml_code = False
 
+# Close the generation trace once its diagrams have been rendered and show where the time went
+if st.session_state.get("generation_span") is not None:
+    generation_span = st.session_state.pop("generation_span")
+    tracer.end_span(generation_span)
+    st.session_state.last_trace_id = generation_span.trace_id
+
+if st.session_state.get("last_trace_id"):
+    trace_spans = tracer.get_trace(st.session_state.last_trace_id)
+    if trace_spans:
+        with st.expander(tr("trace_expander").format(total_ms=f"{trace_spans[0].duration_ms:.0f}")):
+            st.markdown(render_flamegraph_svg(trace_spans), unsafe_allow_html=True)
+            st.dataframe([{"span": span.name, "ms": round(span.duration_ms, 1), "status": span.status,
+                           **span.attributes} for span in trace_spans], use_container_width=True)
+            st.download_button(tr("trace_download_button"),
+                               data=json.dumps(tracer.to_otlp(st.session_state.last_trace_id), indent=2),
+                               file_name=f"trace_{st.session_state.last_trace_id}.json",
+                               mime="application/json")
 
+# Time to first render (per session) and script run time (every rerun)
+_run_ms = (time.perf_counter() - _RUN_START) * 1000
+if 'first_render_ms' not in st.session_state:
+    st.session_state.first_render_ms = _run_ms
+    safe_log_info(f"⏱️ Time to first render: {_run_ms:.0f} ms (lazy imports so far: {', '.join(get_import_times()) or '-'})")
+else:
+    log_debug(f"Script rerun: {_run_ms:.0f} ms")
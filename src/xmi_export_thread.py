@@ -0,0 +1,52 @@
+import sys
+import os
+
+# Add parent directory to path to access utils
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.logger_utils import log_info, log_exception
+from utils.xmi.xmi_batch_export import export_diagrams, merge_xmi_documents, write_export_results
+from PyQt5.QtCore import QThread, pyqtSignal
+
+
+class XMIExportThread(QThread):
+    progress = pyqtSignal(int, int, str)      # Postęp eksportu (gotowe, wszystkie, tytuł/typ diagramu)
+    export_finished = pyqtSignal(list, list)  # Zapisane pliki, błędy ["typ: błąd", ...]
+    error_occurred = pyqtSignal(str)          # Sygnalizuje błąd całego eksportu
+
+    def __init__(self, jobs, output_path, merge=False, package_name="Eksport XMI"):
+        """
+        Args:
+            jobs: Lista ExportJob (po jednym na zakładkę)
+            output_path: Katalog (plik na diagram) albo ścieżka pliku przy `merge`
+            merge: Połącz diagramy w jeden pakiet EA
+            package_name: Nazwa pakietu nadrzędnego przy łączeniu
+        """
+        super().__init__()
+        self.jobs = jobs
+        self.output_path = output_path
+        self.merge = merge
+        self.package_name = package_name
+
+    def _on_progress(self, done, total, result):
+        self.progress.emit(done, total, result.title or result.diagram_type_name)
+
+    def run(self):
+        """Konwertuje diagramy w puli procesów i zapisuje wynik."""
+        log_info(f"Eksport XMI: {len(self.jobs)} diagramów -> {self.output_path}")
+        try:
+            results = export_diagrams(self.jobs, progress=self._on_progress)
+            errors = [f"{result.diagram_type_name}: {result.error}" for result in results if not result.ok]
+
+            if self.merge:
+                merged = merge_xmi_documents(results, self.package_name)
+                with open(self.output_path, "w", encoding="utf-8") as file:
+                    file.write(merged)
+                paths = [self.output_path]
+            else:
+                paths = write_export_results(results, self.output_path)
+
+            self.export_finished.emit(paths, errors)
+        except Exception as e:
+            log_exception(f"Błąd eksportu XMI: {e}")
+            self.error_occurred.emit(str(e))
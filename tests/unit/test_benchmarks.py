@@ -0,0 +1,68 @@
+import unittest
+import sys
+import os
+import time
+from unittest import mock
+
+# Dodaj katalog główny projektu do ścieżki, aby można było importować moduły
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from benchmarks.workloads import PLANTUML_WORKLOADS, bpmn_process
+from benchmarks.runner import compare, run_workload
+
+
+class TestBenchmarks(unittest.TestCase):
+
+    def test_workloads_are_deterministic(self):
+        for name, generator in PLANTUML_WORKLOADS.items():
+            with self.subTest(workload=name):
+                code = generator(50)
+                self.assertEqual(code, generator(50))
+                self.assertTrue(code.startswith("@startuml") and code.endswith("@enduml"))
+
+        process = bpmn_process(40, pools=2)
+        ids = {element["id"] for element in process["elements"]}
+        self.assertEqual(len([e for e in process["elements"] if e["type"].endswith("Task")]), 40)
+        self.assertTrue(all(flow["source"] in ids and flow["target"] in ids for flow in process["flows"]))
+        self.assertTrue(any(flow.get("type") == "message" for flow in process["flows"]))
+
+    def test_run_workload_measures_each_stage(self):
+        results = run_workload("bpmn", 20, repeat=2)
+        self.assertEqual(list(results), ["validate", "layout", "xml", "auto_fix"])
+        for result in results.values():
+            self.assertLessEqual(result["best_ms"], result["median_ms"])
+
+    def test_first_run_is_not_timed(self):
+        calls = []
+
+        def stage(ctx):
+            calls.append(1)
+            if len(calls) == 1:
+                time.sleep(0.2)  # zimny start - import modułów przy pierwszym wywołaniu
+
+        with mock.patch("benchmarks.runner._workload", return_value=({}, [("parse", stage)])):
+            results = run_workload("class", 10, repeat=2)
+        self.assertEqual(len(calls), 3)
+        self.assertLess(results["parse"]["median_ms"], 100)
+
+    def test_compare_flags_only_significant_regressions(self):
+        baseline = {"results": {
+            "class/parse/1000": {"best_ms": 100.0},
+            "class/xmi/1000": {"best_ms": 100.0},
+            "class/parse/10": {"best_ms": 1.0},
+            "class/identify/10": {"skipped": "ModuleNotFoundError"},
+        }}
+        current = {"results": {
+            "class/parse/1000": {"best_ms": 140.0},     # +40% - regresja
+            "class/xmi/1000": {"best_ms": 110.0},       # +10% - w granicach progu
+            "class/parse/10": {"best_ms": 3.0},         # x3, ale tylko 2 ms - szum
+            "class/identify/10": {"best_ms": 1.0},
+            "class/layout/1000": {"best_ms": 50.0},     # brak wartości bazowej
+        }}
+        regressions = compare(current, baseline, threshold=0.25, min_delta_ms=5.0)
+        self.assertEqual([r["key"] for r in regressions], ["class/parse/1000"])
+        self.assertEqual(regressions[0]["ratio"], 1.4)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,92 @@
+import unittest
+import sys
+import os
+
+# Dodaj katalog główny projektu i src do ścieżki, aby można było importować moduły
+ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, 'src'))
+
+from utils.lazy_import import module_available
+
+QT_AVAILABLE = module_available("PyQt5", "dotenv")
+if QT_AVAILABLE:
+    from conversion_worker import ConversionCache, ConversionTask, plantuml_hash, xmi_conversion_job
+    from utils.xmi.xmi_conversion import XMIConverter
+
+SEQUENCE_A = """@startuml
+actor "Klient" as K
+participant "Bank" as B
+K -> B : zlozWniosek()
+B --> K : decyzja
+@enduml"""
+
+SEQUENCE_B = """@startuml
+participant "Sklep" as S
+participant "Magazyn" as M
+S -> M : sprawdzStan()
+@enduml"""
+
+
+@unittest.skipUnless(QT_AVAILABLE, "PyQt5 nie jest zainstalowany")
+class TestConversionTask(unittest.TestCase):
+
+    def _run(self, task):
+        events = []
+        task.signals.result.connect(lambda result: events.append(('result', result)))
+        task.signals.error.connect(lambda error: events.append(('error', error)))
+        task.signals.cancelled.connect(lambda: events.append(('cancelled', None)))
+        task.run()
+        return events
+
+    def test_result_is_cached_by_plantuml_hash(self):
+        calls = []
+
+        def job(code, task):
+            calls.append(code)
+            task.report(50, "stage_generate")
+            return code.upper()
+
+        cache = ConversionCache(maxsize=4)
+        key = plantuml_hash("xmi", "@startuml\n@enduml")
+        first = self._run(ConversionTask(job, "@startuml\n@enduml", cache, key))
+        second = self._run(ConversionTask(job, "@startuml\n@enduml", cache, key))
+
+        self.assertEqual(first, [('result', "@STARTUML\n@ENDUML")])
+        self.assertEqual(second, first)
+        self.assertEqual(len(calls), 1)
+        self.assertNotEqual(key, plantuml_hash("svg", "@startuml\n@enduml"))
+
+    def test_cancel_between_stages(self):
+        def job(code, task):
+            task.cancel()
+            task.report(50, "stage_generate")
+            raise AssertionError("etap po anulowaniu nie powinien się wykonać")
+
+        cache = ConversionCache(maxsize=4)
+        events = self._run(ConversionTask(job, "kod", cache, "klucz"))
+        self.assertEqual(events, [('cancelled', None)])
+        self.assertIsNone(cache.get("klucz"))
+
+    def test_error_is_reported(self):
+        def job(code, task):
+            raise ValueError("zły diagram")
+
+        self.assertEqual(self._run(ConversionTask(job, "kod")), [('error', "zły diagram")])
+
+    def test_shared_converter_keeps_diagrams_separate(self):
+        # Jak w aplikacji: jeden konwerter dla wszystkich zapisów XMI
+        converter = XMIConverter(author="195841")
+        results = {}
+        for name, code in (('a', SEQUENCE_A), ('b', SEQUENCE_B)):
+            events = self._run(ConversionTask(xmi_conversion_job(converter, 'Diagram sekwencji'), code))
+            self.assertEqual(events[0][0], 'result')
+            results[name] = events[0][1][0]
+
+        self.assertEqual(results['a'].count('<connector '), 2)
+        self.assertEqual(results['b'].count('<connector '), 1)
+        self.assertNotIn('zlozWniosek', results['b'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,56 @@
+import unittest
+import sys
+import os
+
+# Dodaj katalog główny projektu do ścieżki, aby można było importować moduły
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from utils.xmi.graph_layout_manager import GraphLayoutManager, count_bilayer_crossings
+
+
+def _parsed_data(flow_ids, connections, swimlane=None):
+    flow = [{'id': node_id, 'type': 'activity', 'text': node_id, 'swimlane': swimlane} for node_id in flow_ids]
+    flow[0]['type'] = 'start'
+    return {
+        'flow': flow,
+        'logical_connections': [{'source_id': s, 'target_id': t} for s, t in connections],
+    }
+
+
+class TestGraphLayoutCrossings(unittest.TestCase):
+
+    def test_count_bilayer_crossings(self):
+        self.assertEqual(count_bilayer_crossings([(0, 0), (1, 1)], 2), 0)
+        self.assertEqual(count_bilayer_crossings([(0, 1), (1, 0)], 2), 1)
+        # Krawędzie ze wspólnym końcem się nie przecinają
+        self.assertEqual(count_bilayer_crossings([(0, 0), (0, 1), (1, 1)], 2), 0)
+        self.assertEqual(count_bilayer_crossings([(0, 2), (1, 1), (2, 0)], 3), 3)
+
+    def test_minimization_removes_crossings(self):
+        # a1 -> b2, a2 -> b1 w kolejności wejściowej daje przecięcie
+        data = _parsed_data(['s', 'a1', 'a2', 'b2', 'b1'],
+                            [('s', 'a1'), ('s', 'a2'), ('a1', 'b2'), ('a2', 'b1')])
+        manager = GraphLayoutManager()
+        positions, _ = manager.analyze_diagram_structure(data)
+
+        self.assertEqual(manager.edge_crossings, 0)
+        self.assertEqual(positions['a1']['x'] < positions['a2']['x'],
+                         positions['b2']['x'] < positions['b1']['x'])
+
+    def test_swimlane_nodes_stay_in_lane_without_overlap(self):
+        data = _parsed_data(['s', 'a', 'b', 'c', 'd'],
+                            [('s', 'a'), ('s', 'b'), ('s', 'c'), ('a', 'd'), ('b', 'd'), ('c', 'd')],
+                            swimlane='Tor')
+        manager = GraphLayoutManager()
+        positions, _ = manager.analyze_diagram_structure(data)
+
+        layer = sorted((positions[n] for n in ('a', 'b', 'c')), key=lambda p: p['x'])
+        for left, right in zip(layer, layer[1:]):
+            self.assertGreaterEqual(right['x'], left['x'] + left['width'])
+        # Blok s -> ... -> d wyrównany pionowo nad środkowym węzłem
+        self.assertAlmostEqual(positions['s']['x'] + positions['s']['width'] / 2,
+                               positions['d']['x'] + positions['d']['width'] / 2, delta=1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,138 @@
+import unittest
+import sys
+import os
+import tempfile
+import threading
+from unittest.mock import patch
+
+# Dodaj katalog główny projektu do ścieżki, aby można było importować moduły
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from utils.db import history_store
+from utils.db.history_store import ARTIFACT_PLANTUML, ARTIFACT_XMI, HistoryStore, HistoryWriter, content_hash
+
+
+class TestHistoryStore(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.store = HistoryStore("sqlite", os.path.join(self.tmp.name, "history.db"))
+
+    def tearDown(self):
+        self.store.close()
+        self.tmp.cleanup()
+
+    def test_interaction_and_artifact_dedup(self):
+        ids = self.store.record_interaction("Narysuj diagram klas", "```plantuml\n@startuml\n@enduml\n```",
+                                            "model-a", diagram_type="class", latency_ms=120)
+        code = "@startuml\nclass A\n@enduml"
+        artifact_id = self.store.record_artifact(ARTIFACT_PLANTUML, code, request_id=ids["request_id"],
+                                                 diagram_type="class", model="model-a")
+        self.store.record_artifact(ARTIFACT_XMI, "<xmi/>", diagram_type="class")
+
+        found = self.store.find_artifact(content=code)
+        self.assertEqual(found["id"], artifact_id)
+        self.assertEqual(found["content_hash"], content_hash(code))
+        self.assertIsNone(self.store.find_artifact(content=code, kind=ARTIFACT_XMI))
+        self.assertEqual(self.store.find_response("Narysuj diagram klas")["id"], ids["response_id"])
+        self.assertIsNone(self.store.find_response("Narysuj diagram klas", model="model-b"))
+
+    def test_dashboard_queries(self):
+        for model, latency in (("model-a", 100), ("model-a", 300), ("model-b", 50)):
+            self.store.record_interaction("prompt", "odpowiedź", model, latency_ms=latency)
+        stats = {row["model"]: row for row in self.store.model_stats()}
+        self.assertEqual(stats["model-a"]["count"], 2)
+        self.assertEqual(stats["model-a"]["avg_ms"], 200)
+        self.assertEqual(stats["model-b"]["max_ms"], 50)
+
+        artifact_id = self.store.record_artifact(ARTIFACT_PLANTUML, "@startuml\n@enduml", model="model-a")
+        self.store.record_quality(artifact_id, 80)
+        self.store.record_quality(artifact_id, 90)
+        quality = self.store.quality_stats()
+        self.assertEqual(quality[0]["avg_score"], 85)
+        self.assertEqual(self.store.stage_timings()[0]["count"], 3)
+        self.assertEqual(len(self.store.recent_requests(model="model-b")), 1)
+
+    def test_indexes_used(self):
+        plan = self.store._query("EXPLAIN QUERY PLAN SELECT * FROM artifacts WHERE content_hash = ?", ("x",))
+        self.assertIn("idx_artifacts_content_hash", " ".join(str(row["detail"]) for row in plan))
+
+
+    def test_writer_runs_in_background_and_links_artifacts(self):
+        writer = HistoryWriter(self.store, queue_size=10)
+        release = threading.Event()
+        writer.submit(lambda store: release.wait(5))
+
+        # Wątek zapisujący jest zajęty - zgłoszenie wraca od razu
+        pending = writer.submit(lambda store: store.record_interaction("prompt", "odpowiedź", "model-a"))
+        self.assertFalse(pending.done())
+        artifact = writer.submit(lambda store: store.record_artifact(
+            ARTIFACT_PLANTUML, "@startuml\n@enduml", request_id=pending.result()["request_id"]))
+        writer.submit(lambda store: 1 / 0)
+        after_error = writer.submit(lambda store: store.record_artifact(ARTIFACT_XMI, "<xmi/>"))
+
+        release.set()
+        self.assertTrue(writer.flush())
+        writer.close()
+        self.assertEqual(self.store.find_artifact(content="@startuml\n@enduml")["id"], artifact.result())
+        self.assertEqual(self.store.find_artifact(content="@startuml\n@enduml")["request_id"],
+                         pending.result()["request_id"])
+        self.assertIsNotNone(after_error.result())
+        self.assertEqual(writer.stats["errors"], 1)
+
+    def test_writer_drops_when_queue_full(self):
+        writer = HistoryWriter(self.store, queue_size=1)
+        release = threading.Event()
+        started = threading.Event()
+        writer.submit(lambda store: (started.set(), release.wait(5)))
+        started.wait(5)
+        self.assertIsNotNone(writer.submit(lambda store: None))
+        self.assertIsNone(writer.submit(lambda store: None))
+        release.set()
+        writer.close()
+        self.assertEqual(writer.stats["dropped"], 1)
+
+    def test_module_functions_link_interaction_and_artifact(self):
+        with patch.multiple(history_store, _store=self.store, _store_failed=False, _writer=None):
+            pending = history_store.record_interaction("prompt", "odpowiedź", "model-a", source="test")
+            artifact = history_store.record_artifact(ARTIFACT_PLANTUML, "@startuml\nclass A\n@enduml",
+                                                     interaction=pending, model="model-a")
+            history_store.shutdown_history()
+        row = self.store.find_artifact(content="@startuml\nclass A\n@enduml")
+        self.assertEqual(row["id"], artifact.result())
+        self.assertEqual((row["request_id"], row["response_id"]),
+                         (pending.result()["request_id"], pending.result()["response_id"]))
+
+    def test_history_is_opt_in(self):
+        with patch.dict(os.environ, {"HISTORY_DB_PROVIDER": ""}), \
+                patch.multiple(history_store, _store=None, _store_failed=False, _writer=None):
+            self.assertIsNone(history_store.get_history_store())
+            self.assertIsNone(history_store.record_interaction("prompt", "odpowiedź"))
+
+    def test_pipeline_records_quality_and_stage_timings(self):
+        try:
+            sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(
+                os.path.abspath(__file__)))), "bpmn_v2"))
+            from complete_pipeline import BPMNv2Pipeline
+            from ai_integration import AIConfig, AIProvider
+        except ImportError as e:
+            self.skipTest(f"Brak zależności: {e}")
+        pipeline = BPMNv2Pipeline(AIConfig(provider=AIProvider.MOCK, model="offline-llm"))
+        pipeline.ai_client.llm.config.time_scale = 0
+        with patch.multiple(history_store, _store=self.store, _store_failed=False, _writer=None):
+            result = pipeline.run_complete_pipeline("Klient składa wniosek, a pracownik banku go weryfikuje.",
+                                                    save_artifacts=False)
+            self.assertTrue(result['success'], result.get('error'))
+            pipeline.record_history(result['ai_prompt'], result['ai_response'], result['bpmn_xml'], {},
+                                    result['ai_latency_ms'], quality={'overall': 0.8, 'completeness': 0.5},
+                                    stage_timings=result['stage_timings'])
+            history_store.shutdown_history()
+
+        stages = {row["stage"] for row in self.store.stage_timings()}
+        self.assertLessEqual({"model_response", "analysis", "prompt", "parse", "validate", "bpmn_xml"}, stages)
+        quality = self.store.quality_stats(diagram_type="bpmn")
+        self.assertEqual([(row["kind"], row["avg_score"]) for row in quality], [("bpmn_xml", 0.8)])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,141 @@
+import unittest
+import sys
+import os
+import sqlite3
+import tempfile
+import threading
+import json
+from dataclasses import asdict
+
+# Dodaj katalog główny projektu do ścieżki, aby można było importować moduły
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from utils.db.interaction_log import AIInteraction, InteractionLogWriter, SQLiteBackend
+
+
+class FlakyBackend(SQLiteBackend):
+    """SQLite, który odrzuca zapisy, dopóki `available` nie zostanie ustawione."""
+
+    def __init__(self, path):
+        super().__init__(path)
+        self.available = threading.Event()
+        self.batches = []
+
+    def write_batch(self, rows):
+        if not self.available.is_set():
+            raise ConnectionError("baza niedostępna")
+        self.batches.append(len(rows))
+        super().write_batch(rows)
+
+
+class TestInteractionLogWriter(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.db_path = os.path.join(self.tmp.name, "ai_logs.db")
+        self.spill_path = os.path.join(self.tmp.name, "spill.jsonl")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def _count(self):
+        with sqlite3.connect(self.db_path) as conn:
+            return conn.execute("SELECT COUNT(*) FROM ai_logs").fetchone()[0]
+
+    def test_batched_sqlite_write_and_flush_on_close(self):
+        writer = InteractionLogWriter(SQLiteBackend(self.db_path), queue_size=100, batch_size=10,
+                                      flush_interval=60, spill_path=self.spill_path)
+        for i in range(25):
+            self.assertTrue(writer.log(AIInteraction(f"prompt {i}", "odpowiedź", "model", latency_ms=i)))
+        writer.close()
+
+        self.assertEqual(self._count(), 25)
+        self.assertEqual(writer.stats["written"], 25)
+        self.assertEqual(writer.stats["batches"], 3)
+
+    def test_spill_when_database_unavailable_and_replay(self):
+        backend = FlakyBackend(self.db_path)
+        writer = InteractionLogWriter(backend, queue_size=100, batch_size=10,
+                                      flush_interval=60, spill_path=self.spill_path)
+        for i in range(5):
+            writer.log(AIInteraction(f"prompt {i}", "odpowiedź"))
+        self.assertTrue(writer.flush())
+        self.assertEqual(writer.stats["spilled"], 5)
+        self.assertTrue(os.path.exists(self.spill_path))
+
+        backend.available.set()
+        writer.log(AIInteraction("po awarii", "odpowiedź"))
+        writer.close()
+
+        self.assertEqual(self._count(), 6)
+        self.assertEqual(writer.stats["replayed"], 5)
+        self.assertFalse(os.path.exists(self.spill_path))
+
+    def _write_spill(self, rows, tail=""):
+        with open(self.spill_path, "w", encoding="utf-8") as f:
+            for row in rows:
+                f.write(json.dumps(asdict(row), ensure_ascii=False) + "\n")
+            f.write(tail)
+
+    def test_corrupt_spill_lines_are_skipped(self):
+        # Linia z nieznanym polem i ucięta ostatnia linia (awaria w trakcie dopisywania)
+        self._write_spill([AIInteraction("odłożony 1", "odp"), AIInteraction("odłożony 2", "odp")],
+                          tail='{"request": "x", "nieznane": 1}\n{"request": "uci')
+        writer = InteractionLogWriter(SQLiteBackend(self.db_path), queue_size=100, batch_size=10,
+                                      flush_interval=60, spill_path=self.spill_path)
+        writer.log(AIInteraction("nowy", "odp"))
+        self.assertTrue(writer.flush())
+        self.assertEqual(writer.stats["corrupt"], 2)
+        self.assertEqual(writer.stats["replayed"], 2)
+        self.assertFalse(os.path.exists(self.spill_path + ".replay"))
+
+        # Wątek zapisujący nadal działa
+        writer.log(AIInteraction("kolejny", "odp"))
+        self.assertTrue(writer.flush())
+        writer.close()
+        self.assertEqual(self._count(), 4)
+
+    def test_failed_replay_keeps_remaining_rows(self):
+        backend = FlakyBackend(self.db_path)
+        backend.available.set()
+        original_write = backend.write_batch
+        failures = []
+
+        def write_batch(rows):
+            # Druga partia odłożonych wierszy zawodzi raz
+            if any(row.request == "odłożony 3" for row in rows) and not failures:
+                failures.append(len(rows))
+                raise ConnectionError("zerwane połączenie")
+            original_write(rows)
+
+        backend.write_batch = write_batch
+        self._write_spill([AIInteraction(f"odłożony {i}", "odp") for i in range(4)])
+        writer = InteractionLogWriter(backend, queue_size=100, batch_size=2,
+                                      flush_interval=60, spill_path=self.spill_path)
+        writer.log(AIInteraction("nowy", "odp"))
+        self.assertTrue(writer.flush())
+        replay_path = self.spill_path + ".replay"
+        self.assertTrue(os.path.exists(replay_path))
+        with open(replay_path, encoding="utf-8") as f:
+            self.assertEqual([json.loads(line)["request"] for line in f], ["odłożony 2", "odłożony 3"])
+
+        writer.log(AIInteraction("kolejny", "odp"))
+        writer.close()
+        self.assertFalse(os.path.exists(replay_path))
+        self.assertEqual(self._count(), 6)
+        self.assertEqual(writer.stats["replayed"], 4)
+
+    def test_drop_policy_when_queue_full(self):
+        backend = FlakyBackend(self.db_path)
+        writer = InteractionLogWriter(backend, queue_size=2, batch_size=10, flush_interval=60,
+                                      overflow="drop", spill_path=self.spill_path)
+        results = [writer.log(AIInteraction(f"prompt {i}", "odpowiedź")) for i in range(50)]
+        writer.close()
+
+        self.assertFalse(all(results))
+        self.assertEqual(writer.stats["dropped"], 50)
+        self.assertFalse(os.path.exists(self.spill_path))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,90 @@
+import unittest
+import sys
+import os
+
+# Dodaj katalog główny projektu do ścieżki, aby można było importować moduły
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from utils.xmi.graph_layout_manager import GraphLayoutManager
+from utils.xmi.layout_cache import HIT, INCREMENTAL, MISS, LayoutCache
+
+
+def _diagram(prefix, texts, connections):
+    """Diagram w formacie parsera; `prefix` udaje nowe identyfikatory z kolejnego parsowania."""
+    flow = [{'id': f'{prefix}{idx}', 'type': 'activity', 'text': text, 'swimlane': 'Tor'}
+            for idx, text in enumerate(texts)]
+    flow[0]['type'] = 'start'
+    return {
+        'flow': flow,
+        'logical_connections': [{'source_id': f'{prefix}{s}', 'target_id': f'{prefix}{t}'} for s, t in connections],
+    }
+
+
+TEXTS = ['start', 'A', 'B', 'C', 'D', 'E']
+EDGES = [(0, 1), (0, 2), (0, 3), (1, 4), (2, 5), (3, 4), (1, 5)]
+
+
+class TestLayoutCache(unittest.TestCase):
+
+    def setUp(self):
+        self.cache = LayoutCache(maxsize=8)
+
+    def _layout(self, data):
+        manager = GraphLayoutManager(cache=self.cache)
+        positions, _ = manager.analyze_diagram_structure(data)
+        return manager, positions
+
+    def _x_order(self, positions, prefix, indices):
+        return sorted(indices, key=lambda idx: positions[f'{prefix}{idx}']['x'])
+
+    def test_label_edit_with_new_ids_is_a_hit(self):
+        first, positions = self._layout(_diagram('a', TEXTS, EDGES))
+        second, reused = self._layout(_diagram('b', ['start', 'X', 'Y', 'Z', 'V', 'W'], EDGES))
+
+        self.assertEqual(first.cache_status, MISS)
+        self.assertEqual(second.cache_status, HIT)
+        self.assertEqual(second.edge_crossings, first.edge_crossings)
+        for idx in range(len(TEXTS)):
+            self.assertEqual(reused[f'b{idx}'], positions[f'a{idx}'])
+        self.assertEqual(self.cache.stats()[HIT], 1)
+
+    def test_dimension_change_reuses_layer_order(self):
+        first, positions = self._layout(_diagram('a', TEXTS, EDGES))
+        longer = list(TEXTS)
+        longer[2] = 'B - krok z opisem dłuższym niż czterdzieści znaków'
+        second, reused = self._layout(_diagram('b', longer, EDGES))
+
+        self.assertEqual(second.cache_status, INCREMENTAL)
+        self.assertEqual(second.edge_crossings, first.edge_crossings)
+        self.assertGreater(reused['b2']['width'], positions['a2']['width'])
+        self.assertEqual(self._x_order(reused, 'b', [1, 2, 3]), self._x_order(positions, 'a', [1, 2, 3]))
+
+    def test_inserted_node_keeps_existing_order(self):
+        _, positions = self._layout(_diagram('a', TEXTS, EDGES))
+        second, reused = self._layout(_diagram('b', TEXTS + ['Nowy'], EDGES + [(0, 6), (6, 5)]))
+
+        self.assertEqual(second.cache_status, INCREMENTAL)
+        self.assertIn('b6', reused)
+        self.assertEqual(self._x_order(reused, 'b', [1, 2, 3]), self._x_order(positions, 'a', [1, 2, 3]))
+
+    def test_previous_layout_is_reused_only_in_the_same_mode(self):
+        self._layout(_diagram('a', TEXTS, EDGES))
+        longer = list(TEXTS)
+        longer[2] = 'B - krok z opisem dłuższym niż czterdzieści znaków'
+
+        fast = GraphLayoutManager(fast=True, cache=self.cache)
+        fast.analyze_diagram_structure(_diagram('b', longer, EDGES))
+        self.assertEqual(fast.cache_status, MISS)
+
+        quality, _ = self._layout(_diagram('c', longer + ['Nowy'], EDGES + [(0, 6)]))
+        self.assertEqual(quality.cache_status, INCREMENTAL)
+
+    def test_disabled_cache(self):
+        manager = GraphLayoutManager(cache=LayoutCache(maxsize=0))
+        manager.analyze_diagram_structure(_diagram('a', TEXTS, EDGES))
+        self.assertIsNone(manager.cache_status)
+        self.assertEqual(len(manager.cache), 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,75 @@
+import unittest
+import sys
+import os
+from unittest import mock
+
+# Dodaj katalog główny projektu do ścieżki, aby można było importować moduły
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from utils.xmi.layout_engines import (
+    FAST, QUALITY, LayoutEngine, LayoutEngineRegistry, GraphLayoutEngine, LaneGridLayoutEngine,
+    count_overlaps, layout_registry, run_layout,
+)
+
+
+def _chain(n, lanes=2):
+    flow = [{'id': f'n{i}', 'type': 'activity', 'text': f'Krok {i}', 'swimlane': f'Tor{i % lanes}'} for i in range(n)]
+    flow[0]['type'] = 'start'
+    connections = [{'source_id': f'n{i}', 'target_id': f'n{i + 1}'} for i in range(n - 1)]
+    return {'flow': flow, 'logical_connections': connections, 'swimlanes': {f'Tor{k}': {} for k in range(lanes)}}
+
+
+class TestLayoutEngineRegistry(unittest.TestCase):
+
+    def test_auto_selection_by_node_count(self):
+        registry = LayoutEngineRegistry()
+        registry.register(GraphLayoutEngine, max_nodes=100)
+        registry.register(LaneGridLayoutEngine, priority=10)
+
+        self.assertEqual(registry.select('activity', 10, 'auto', 'auto'), ('graph', QUALITY))
+        self.assertEqual(registry.select('activity', 101, 'auto', 'auto'), ('lane_grid', QUALITY))
+        self.assertEqual(registry.select('activity', 10, 'graph', FAST), ('graph', FAST))
+        # Nieznany silnik -> wybór automatyczny
+        self.assertEqual(registry.select('activity', 10, 'brak', QUALITY)[0], 'graph')
+
+    def test_thresholds_are_read_on_each_selection(self):
+        with mock.patch.dict(os.environ, {'LAYOUT_GRID_NODE_THRESHOLD': '50', 'LAYOUT_FAST_NODE_THRESHOLD': '20'}):
+            self.assertEqual(layout_registry.select('activity', 30, 'auto', 'auto'), ('graph', FAST))
+            self.assertEqual(layout_registry.select('activity', 60, 'auto', 'auto'), ('lane_grid', QUALITY))
+        with mock.patch.dict(os.environ, {'LAYOUT_GRID_NODE_THRESHOLD': 'x', 'LAYOUT_FAST_NODE_THRESHOLD': '100'}):
+            self.assertEqual(layout_registry.select('activity', 60, 'auto', 'auto'), ('graph', QUALITY))
+
+    def test_engine_must_implement_layout(self):
+        class Incomplete(LayoutEngine):
+            name = 'incomplete'
+
+        with self.assertRaises(TypeError):
+            Incomplete()
+
+    def test_run_records_metrics(self):
+        data = _chain(12)
+        for engine in layout_registry.engines('activity'):
+            with self.subTest(engine=engine):
+                result = run_layout('activity', data, engine=engine, mode=FAST)
+                metrics = result.metrics
+                self.assertEqual(metrics.engine, engine)
+                self.assertEqual(metrics.node_count, 12)
+                self.assertEqual(set(result.positions), {f'n{i}' for i in range(12)})
+                self.assertEqual(metrics.overlaps, count_overlaps(result.positions))
+                self.assertGreater(metrics.canvas_area, 0)
+
+        self.assertEqual(run_layout('activity', data, engine='graph').metrics.crossings, 0)
+        self.assertEqual(layout_registry.metrics()[-1]['engine'], 'graph')
+
+    def test_count_overlaps_ignores_containment(self):
+        rects = {
+            'pakiet': {'x': 0, 'y': 0, 'width': 500, 'height': 300},
+            'a': {'x': 20, 'y': 20, 'width': 100, 'height': 60},
+            'b': {'x': 100, 'y': 40, 'width': 100, 'height': 60},
+        }
+        self.assertEqual(count_overlaps(rects), 3)
+        self.assertEqual(count_overlaps(rects, ignore_containment=True), 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,118 @@
+import unittest
+import sys
+import os
+import json
+import glob
+import tempfile
+from unittest.mock import patch
+
+# Dodaj katalog główny projektu do ścieżki, aby można było importować moduły
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from utils import logger_utils
+from utils.logger_utils import setup_logger, shutdown_logger, log_debug, log_info, debug_enabled
+
+
+class CountingArg:
+    """Argument zliczający formatowania - sprawdza leniwe wstawianie do komunikatu."""
+
+    def __init__(self):
+        self.calls = 0
+
+    def __str__(self):
+        self.calls += 1
+        return "arg"
+
+
+class TestLoggerUtils(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.log_file = os.path.join(self.directory.name, "app.log")
+
+    def tearDown(self):
+        shutdown_logger()
+        for handler in logger_utils.logger.handlers[:]:
+            logger_utils.logger.removeHandler(handler)
+            handler.close()
+        self.directory.cleanup()
+
+    def _setup(self, **env):
+        with patch.dict(os.environ, env):
+            setup_logger(self.log_file, console_level="CRITICAL")
+
+    def _read_lines(self):
+        shutdown_logger()
+        with open(self.log_file, encoding="utf-8") as f:
+            return f.read().splitlines()
+
+    def test_json_output_through_queue(self):
+        self._setup(LOG_FORMAT="json", LOG_LEVEL="DEBUG", LOG_ASYNC="1")
+        log_info("Wygenerowano %d elementów", 3, diagram="aktywności")
+
+        entry = json.loads(self._read_lines()[0])
+        self.assertEqual(entry["level"], "INFO")
+        self.assertEqual(entry["message"], "Wygenerowano 3 elementów")
+        self.assertEqual(entry["diagram"], "aktywności")
+        self.assertEqual(entry["module"], "test_logger_utils")
+
+    def test_disabled_debug_is_not_formatted(self):
+        self._setup(LOG_LEVEL="INFO", LOG_ASYNC="0")
+        arg = CountingArg()
+        log_debug("Przejście %s", arg)
+        self.assertFalse(debug_enabled())
+        self.assertEqual(arg.calls, 0)
+
+        log_info("Przejście %s", arg)
+        lines = self._read_lines()
+        self.assertEqual(len(lines), 1)
+        self.assertIn("Przejście arg", lines[0])
+
+    def test_arguments_are_formatted_on_calling_thread(self):
+        self._setup(LOG_LEVEL="DEBUG", LOG_ASYNC="1")
+        handler = next(h for h in logger_utils.logger.handlers if isinstance(h, logger_utils._DeferredQueueHandler))
+        elements = ["start"]
+        record = logger_utils.logger.makeRecord("test", 20, __file__, 1, "Elementy: %s", (elements,), None)
+        prepared = handler.prepare(record)
+        elements.append("koniec")
+        self.assertEqual(prepared.getMessage(), "Elementy: ['start']")
+        self.assertIsNone(prepared.args)
+        self.assertEqual(record.args, (elements,))
+
+        log_info("Elementy: %s", elements)
+        elements.clear()
+        self.assertIn("Elementy: ['start', 'koniec']", self._read_lines()[0])
+
+    def test_rotation(self):
+        self._setup(LOG_MAX_BYTES="2000", LOG_BACKUP_COUNT="2", LOG_ASYNC="1")
+        for i in range(200):
+            log_info("Wpis numer %d z wypełnieniem %s", i, "x" * 40)
+        shutdown_logger()
+
+        rotated = sorted(glob.glob(self.log_file + ".*"))
+        self.assertEqual(rotated, [self.log_file + ".1", self.log_file + ".2"])
+        for path in [self.log_file] + rotated:
+            # Rotacja po zapisie: plik może przekroczyć limit o niezapisany bufor tekstowy
+            self.assertLess(os.path.getsize(path), 2000 + 8192)
+        # Ostatni wpis jest w bieżącym pliku albo - gdy właśnie nastąpiła rotacja - w .1
+        newest = ""
+        for path in (self.log_file + ".1", self.log_file):
+            with open(path, encoding="utf-8") as f:
+                newest += f.read()
+        self.assertIn("Wpis numer 199", newest)
+
+    def test_async_handlers_are_closed_on_reconfigure(self):
+        self._setup(LOG_ASYNC="1")
+        log_info("Pierwsza konfiguracja")
+        handlers = list(logger_utils._listener.handlers)
+        file_handlers = [h for h in handlers if getattr(h, "baseFilename", None)]
+        self.assertTrue(file_handlers)
+
+        self._setup(LOG_ASYNC="1")
+        self.assertTrue(all(h.stream is None for h in file_handlers))
+        shutdown_logger()
+        self.assertIsNone(logger_utils._listener)
+
+
+if __name__ == '__main__':
+    unittest.main()
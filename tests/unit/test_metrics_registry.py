@@ -0,0 +1,154 @@
+import unittest
+import sys
+import os
+import random
+import tempfile
+import threading
+import time
+import urllib.request
+from unittest import mock
+
+# Dodaj katalog główny projektu do ścieżki, aby można było importować moduły
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from utils.metrics.metrics_registry import MetricsRegistry, StreamingHistogram, start_metrics_server, stop_metrics_server
+from utils.metrics.model_response_metrics import ModelResponseMetrics
+
+
+class TestStreamingHistogram(unittest.TestCase):
+
+    def test_percentiles_within_relative_accuracy(self):
+        rng = random.Random(7)
+        values = [rng.lognormvariate(7, 1) for _ in range(20000)]
+        histogram = StreamingHistogram(relative_accuracy=0.01)
+        for value in values:
+            histogram.observe(value)
+
+        values.sort()
+        for q in (50, 95, 99):
+            exact = values[int(q / 100 * (len(values) - 1))]
+            self.assertAlmostEqual(histogram.percentile(q) / exact, 1.0, delta=0.02)
+        self.assertLess(len(histogram.buckets), 1000)
+        self.assertAlmostEqual(histogram.fraction_below(values[len(values) // 2]), 0.5, delta=0.02)
+
+    def test_bucket_count_is_bounded(self):
+        histogram = StreamingHistogram(max_buckets=64)
+        for exponent in range(-20, 60):
+            histogram.observe(2.0 ** exponent)
+        self.assertLessEqual(len(histogram.buckets), 64)
+        self.assertEqual(histogram.count, 80)
+        self.assertAlmostEqual(histogram.percentile(100) / 2.0 ** 59, 1.0, delta=0.01)
+
+
+class TestMetricsRegistry(unittest.TestCase):
+
+    def test_series_limit_and_prometheus_export(self):
+        registry = MetricsRegistry(max_series=3)
+        for i in range(10):
+            registry.histogram("model_response_ms", model=f"m{i}").observe(100 + i)
+        registry.counter("model_responses_total", model="m0", status="SUCCESS").inc()
+
+        self.assertEqual(len(registry.histograms("model_response_ms")), 4)
+        other = registry.histogram("model_response_ms", model="other")
+        self.assertEqual(other.count, 7)
+
+        text = registry.to_prometheus()
+        self.assertIn('# TYPE model_response_ms summary', text)
+        self.assertIn('model_response_ms{model="m0",quantile="0.95"}', text)
+        self.assertIn('model_response_ms_count{model="other"} 7', text)
+        self.assertIn('model_responses_total{model="other",status="other"} 1', text)
+
+    def test_export_while_series_are_added(self):
+        registry = MetricsRegistry(max_series=100000)
+        errors = []
+
+        def add_series():
+            for i in range(3000):
+                registry.histogram("model_response_ms", model=f"m{i}").observe(i)
+                registry.counter("model_responses_total", model=f"m{i}").inc()
+
+        def export():
+            try:
+                while writer.is_alive():
+                    registry.to_prometheus(quantiles=())
+                    registry.counters("model_responses_total")
+            except RuntimeError as e:
+                errors.append(e)
+
+        writer = threading.Thread(target=add_series)
+        reader = threading.Thread(target=export)
+        writer.start()
+        reader.start()
+        writer.join()
+        reader.join()
+        self.assertEqual(errors, [])
+        self.assertEqual(len(registry.counters("model_responses_total")), 3000)
+
+    def test_metrics_endpoint(self):
+        registry = MetricsRegistry()
+        registry.counter("requests_total").inc(3)
+        server = start_metrics_server(0, host="127.0.0.1", registry=registry)
+        try:
+            url = f"http://127.0.0.1:{server.server_address[1]}/metrics"
+            body = urllib.request.urlopen(url, timeout=5).read().decode("utf-8")
+            self.assertIn("requests_total 3", body)
+        finally:
+            stop_metrics_server()
+
+
+class TestModelResponseMetrics(unittest.TestCase):
+
+    def test_statistics_and_batched_file(self):
+        registry, metrics_file = ModelResponseMetrics._registry, ModelResponseMetrics._metrics_file
+        self.addCleanup(setattr, ModelResponseMetrics, "_registry", registry)
+        self.addCleanup(setattr, ModelResponseMetrics, "_metrics_file", metrics_file)
+        with tempfile.TemporaryDirectory() as directory:
+            ModelResponseMetrics._registry = MetricsRegistry()
+            ModelResponseMetrics.initialize(os.path.join(directory, "metrics.jsonl"))
+            for i in range(1, 101):
+                ModelResponseMetrics.record("2025-01-01", "model-a", "call_api", "SUCCESS", i * 10, 500)
+            ModelResponseMetrics.flush()
+
+            stats = ModelResponseMetrics.get_statistics()
+            self.assertEqual(stats["count"], 100)
+            self.assertAlmostEqual(stats["by_model"]["model-a"]["p95_ms"], 950, delta=20)
+            self.assertEqual(stats["by_function"]["call_api"]["max_ms"], 1000)
+            self.assertAlmostEqual(ModelResponseMetrics.slo_report(500)["within_slo"], 0.5, delta=0.02)
+            with open(os.path.join(directory, "metrics.jsonl"), encoding="utf-8") as f:
+                self.assertEqual(len(f.readlines()), 100)
+
+    def test_record_leaves_file_writes_to_background_thread(self):
+        metrics_file = ModelResponseMetrics._metrics_file
+        self.addCleanup(setattr, ModelResponseMetrics, "_metrics_file", metrics_file)
+        flush = ModelResponseMetrics.flush
+        flushing_threads = []
+
+        def tracking_flush():
+            flushing_threads.append(threading.current_thread().name)
+            flush()
+
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "metrics.jsonl")
+            ModelResponseMetrics._metrics_file = path
+            with mock.patch.object(ModelResponseMetrics, "_registry", MetricsRegistry()), \
+                    mock.patch.object(ModelResponseMetrics, "_flush_batch", 5), \
+                    mock.patch.object(ModelResponseMetrics, "flush", side_effect=tracking_flush):
+                for i in range(20):
+                    ModelResponseMetrics.record("2025-01-01", "model-a", "call_api", "SUCCESS", i, 10)
+                deadline = time.monotonic() + 10
+                while time.monotonic() < deadline:
+                    if os.path.exists(path):
+                        with open(path, encoding="utf-8") as f:
+                            if len(f.readlines()) == 20:
+                                break
+                    time.sleep(0.02)
+            flush()
+
+            with open(path, encoding="utf-8") as f:
+                self.assertEqual(len(f.readlines()), 20)
+            self.assertTrue(flushing_threads)
+            self.assertNotIn(threading.current_thread().name, flushing_threads)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,120 @@
+import unittest
+import sys
+import os
+import tempfile
+from types import SimpleNamespace
+from unittest.mock import patch
+
+# Dodaj katalog główny projektu do ścieżki, aby można było importować moduły
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from utils.pdf.pdf_retrieval import (
+    NUMPY_AVAILABLE,
+    HashingEmbedder,
+    PDFChunkIndex,
+    build_retrieval_query,
+    chunk_text,
+    format_retrieved_context
+)
+
+
+class CountingEmbedder(HashingEmbedder):
+    """HashingEmbedder liczący wywołania wektoryzacji"""
+
+    def __init__(self):
+        super().__init__()
+        self.calls = 0
+
+    def embed(self, texts):
+        self.calls += 1
+        return super().embed(texts)
+
+    def embed_sparse(self, text):
+        self.calls += 1
+        return super().embed_sparse(text)
+
+
+class TestPDFRetrieval(unittest.TestCase):
+
+    def setUp(self):
+        relevant = "Klient składa wniosek kredytowy. Analityk weryfikuje zdolność kredytową i podejmuje decyzję."
+        noise = "Regulamin parkingu oraz zasady korzystania z kuchni firmowej dla pracowników biura."
+        pages = []
+        for page in range(1, 11):
+            paragraphs = [relevant if (page == 7 and i == 3) else f"{noise} Punkt {page}.{i}." for i in range(6)]
+            pages.append(f"\n--- Strona {page} ---\n" + "\n\n".join(paragraphs))
+        self.pdf_doc = SimpleNamespace(hash="test-doc", title="Procedura", text_content="".join(pages))
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.cache_dir = self.tmp.name
+
+    def test_chunk_text_keeps_pages_and_size(self):
+        """Fragmenty nie przekraczają zadanego rozmiaru i zachowują numer strony"""
+        chunks = chunk_text(self.pdf_doc.text_content, chunk_size=300, overlap=40)
+        self.assertTrue(chunks)
+        self.assertTrue(all(len(c['text']) <= 300 + 40 for c in chunks))
+        self.assertEqual({c['page'] for c in chunks}, set(range(1, 11)))
+
+    def test_hashing_embedder_is_normalized_and_deterministic(self):
+        """Wektor z HashingEmbedder jest znormalizowany i powtarzalny"""
+        embedder = HashingEmbedder(dim=256)
+        first = embedder.embed_sparse("Analityk weryfikuje wniosek kredytowy")
+        second = embedder.embed_sparse("Analityk weryfikuje wniosek kredytowy")
+        self.assertEqual(first, second)
+        self.assertAlmostEqual(sum(v * v for v in first.values()), 1.0, places=5)
+
+    def test_search_returns_relevant_fragment(self):
+        """Najlepszy fragment dotyczy opisu procesu, a nie szumu"""
+        index = PDFChunkIndex(cache_dir=self.cache_dir, chunk_size=300, overlap=40)
+        self.assertGreater(index.add_document(self.pdf_doc), 0)
+
+        results = index.search(build_retrieval_query("weryfikacja wniosku kredytowego", "aktywności"), top_k=1)
+        self.assertEqual(len(results), 1)
+        self.assertEqual(results[0].chunk.page, 7)
+        self.assertIn("wniosek kredytowy", results[0].chunk.text)
+
+        context = format_retrieved_context(results)
+        self.assertIn("[str. 7]", context)
+        self.assertLess(len(context), len(self.pdf_doc.text_content))
+
+    def test_index_uses_cache_on_second_load(self):
+        """Ponowne indeksowanie tego samego dokumentu korzysta z plików cache"""
+        first = CountingEmbedder()
+        PDFChunkIndex(embedder=first, cache_dir=self.cache_dir).add_document(self.pdf_doc)
+        self.assertGreater(first.calls, 0)
+        cached_files = os.listdir(self.cache_dir)
+        self.assertTrue(any(name.endswith(".json") for name in cached_files))
+        self.assertTrue(any(name.endswith(".npy" if NUMPY_AVAILABLE else ".sparse.json") for name in cached_files))
+
+        second = CountingEmbedder()
+        index = PDFChunkIndex(embedder=second, cache_dir=self.cache_dir)
+        with patch("utils.pdf.pdf_retrieval.chunk_text") as chunker:
+            self.assertGreater(index.add_document(self.pdf_doc), 0)
+        chunker.assert_not_called()
+        self.assertEqual(second.calls, 0)
+        self.assertEqual(index.add_document(self.pdf_doc), 0)
+
+        # Wyniki z cache takie same jak przy świeżym indeksowaniu
+        query = build_retrieval_query("weryfikacja wniosku kredytowego", "aktywności")
+        self.assertEqual(index.search(query, top_k=1)[0].chunk.page, 7)
+
+    def test_ai_analyzer_selects_text_by_user_query(self):
+        try:
+            from utils.pdf.ai_pdf_analyzer import AIPDFAnalyzer
+        except ImportError as e:
+            self.skipTest(f"Brak zależności analizatora AI: {e}")
+
+        analyzer = AIPDFAnalyzer.__new__(AIPDFAnalyzer)
+        make_index = lambda: PDFChunkIndex(embedder=HashingEmbedder(), cache_dir=self.cache_dir)
+        with patch("utils.pdf.pdf_retrieval.PDFChunkIndex", side_effect=make_index):
+            # Bez zapytania: tytuł i słowa kluczowe typu diagramu (decyzja, weryfikacja...)
+            fallback = analyzer._select_relevant_text(self.pdf_doc, "aktywności", max_chars=200)
+            selected = analyzer._select_relevant_text(self.pdf_doc, "aktywności", max_chars=200,
+                                                      query="regulamin parkingu i kuchni firmowej")
+
+        self.assertIn("zdolność kredytową", fallback)
+        self.assertIn("Regulamin parkingu", selected)
+        self.assertNotIn("zdolność kredytową", selected)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,81 @@
+import unittest
+import sys
+import os
+import io
+import contextlib
+
+# Dodaj katalog główny projektu do ścieżki, aby można było importować moduły
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from utils.plantuml.plantuml_class_parser import PlantUMLClassParser
+
+
+def generate_class_diagram(class_count):
+    """Diagram klas z łańcuchem asocjacji, dziedziczeniem i powtórzonymi relacjami."""
+    lines = ["@startuml", "interface Repozytorium"]
+    for i in range(class_count):
+        lines.append(f"class Klasa{i} {{")
+        lines.append("  -id : int")
+        lines.append(f"  +pobierz{i}() : String")
+        lines.append("}")
+    for i in range(1, class_count):
+        lines.append(f'Klasa{i} "1" --> "*" Klasa{i - 1} : ma')
+        lines.append(f'Klasa{i} "1" --> "*" Klasa{i - 1} : ma')      # duplikat
+        lines.append(f"Klasa{i} --> Klasa{i - 1} : zna")               # inna etykieta
+        lines.append(f"Klasa{i} ..|> Repozytorium : {i}")              # realizacja bez względu na etykietę
+    lines.append("@enduml")
+    return "\n".join(lines)
+
+
+class TestPlantUMLClassParser(unittest.TestCase):
+
+    def _parse(self, code, parser=None):
+        parser = parser or PlantUMLClassParser()
+        with contextlib.redirect_stdout(io.StringIO()):
+            parser.parse(code)
+        return parser
+
+    def test_relation_identity(self):
+        parser = self._parse("""@startuml
+class A {
+}
+class B {
+}
+A --> B : x
+A --> B : x
+A --> B : y
+A <|-- B
+B --|> A : etykieta
+@enduml""")
+        relations = [(r.source, r.target, r.relation_type, r.label) for r in parser.relations]
+        self.assertEqual(relations, [
+            ('A', 'B', 'association', 'x'),
+            ('A', 'B', 'association', 'y'),
+            ('B', 'A', 'inheritance', None),
+        ])
+
+    def test_aliases_resolved_in_relations(self):
+        parser = self._parse("""@startuml
+Zamowienie as Z
+class Klient {
+}
+Klient --> Z : składa
+@enduml""")
+        self.assertEqual(parser.relations[0].target, 'Zamowienie')
+        self.assertIn('Zamowienie', parser.classes)
+
+    def test_large_generated_diagram(self):
+        class_count = 2000
+        parser = self._parse(generate_class_diagram(class_count))
+        self.assertEqual(len(parser.classes), class_count + 1)
+        # Na każdą klasę (poza pierwszą): dwie asocjacje i jedna realizacja
+        self.assertEqual(len(parser.relations), 3 * (class_count - 1))
+        self.assertEqual(len(parser.relation_keys), len(parser.relations))
+
+        # Ponowne parsowanie tym samym parserem nie pozostawia starych kluczy
+        self._parse("@startuml\nA --> B\n@enduml", parser)
+        self.assertEqual(len(parser.relation_keys), 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,113 @@
+import unittest
+import sys
+import os
+import copy
+import random
+
+# Dodaj katalog główny projektu do ścieżki, aby można było importować moduły
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, ROOT_DIR)
+sys.path.append(os.path.join(ROOT_DIR, "bpmn_v2"))
+
+from benchmarks.workloads import bpmn_process
+from process_canonical import canonicalize, content_hash, diff_processes, structural_hash
+
+
+def _rename_ids(process, prefix):
+    """Kopia procesu z nowymi id elementów, przepływów i uczestników"""
+    renamed = copy.deepcopy(process)
+    mapping = {}
+    for collection in ('participants', 'elements', 'flows'):
+        for position, item in enumerate(renamed[collection]):
+            mapping[item['id']] = f"{prefix}_{collection}_{position}"
+            item['id'] = mapping[item['id']]
+    for element in renamed['elements']:
+        element['participant'] = mapping.get(element.get('participant'), element.get('participant'))
+    for flow in renamed['flows']:
+        flow['source'] = mapping.get(flow['source'], flow['source'])
+        flow['target'] = mapping.get(flow['target'], flow['target'])
+    renamed.pop('gateways', None)
+    return renamed
+
+
+class TestProcessCanonical(unittest.TestCase):
+
+    def setUp(self):
+        self.process = bpmn_process(40, pools=2)
+        self.process.pop('gateways', None)
+
+    def test_content_hash_ignores_key_and_list_order(self):
+        shuffled = copy.deepcopy(self.process)
+        random.Random(1).shuffle(shuffled['elements'])
+        shuffled['flows'].reverse()
+        shuffled = {key: shuffled[key] for key in reversed(list(shuffled))}
+
+        self.assertEqual(content_hash(self.process), content_hash(shuffled))
+        self.assertEqual(canonicalize(self.process), canonicalize(shuffled))
+        self.assertNotEqual(content_hash(self.process, sort_lists=False),
+                            content_hash(shuffled, sort_lists=False))
+
+        renamed = copy.deepcopy(self.process)
+        renamed['elements'][3]['name'] = 'Inna nazwa'
+        self.assertNotEqual(content_hash(self.process), content_hash(renamed))
+
+    def test_structural_hash_ignores_ids_and_names(self):
+        renamed = _rename_ids(self.process, 'x')
+        for element in renamed['elements']:
+            element['name'] = element['name'].upper()
+        random.Random(2).shuffle(renamed['elements'])
+
+        self.assertEqual(structural_hash(self.process), structural_hash(renamed))
+        self.assertNotEqual(structural_hash(self.process, include_names=True),
+                            structural_hash(renamed, include_names=True))
+
+    def test_structural_hash_detects_rewiring(self):
+        # Te same typy i liczności, inne połączenia
+        rewired = copy.deepcopy(self.process)
+        sequence = [flow for flow in rewired['flows'] if flow.get('type', 'sequence') == 'sequence']
+        sequence[0]['target'], sequence[-1]['target'] = sequence[-1]['target'], sequence[0]['target']
+        self.assertNotEqual(structural_hash(self.process), structural_hash(rewired))
+
+        retyped = copy.deepcopy(self.process)
+        task = next(e for e in retyped['elements'] if e['type'] == 'userTask')
+        task['type'] = 'serviceTask'
+        self.assertNotEqual(structural_hash(self.process), structural_hash(retyped))
+
+    def test_diff_reports_element_and_flow_changes(self):
+        improved = copy.deepcopy(self.process)
+        improved['description'] = 'Opis'
+        improved['elements'][1]['name'] = 'Nowa nazwa'
+        improved['elements'].append({'id': 'end_extra', 'name': 'Koniec', 'type': 'endEvent',
+                                     'participant': improved['elements'][0]['participant']})
+        removed = improved['elements'].pop(2)
+        improved['flows'][0]['name'] = 'tak'
+        # Nowe id przepływu przy tym samym połączeniu to zmiana, nie usunięcie + dodanie
+        old_flow_id = improved['flows'][1]['id']
+        improved['flows'][1]['id'] = 'flow_renamed'
+        improved['elements'].reverse()
+
+        diff = diff_processes(self.process, improved)
+        summary = diff.summary()
+        self.assertEqual(summary['process_fields'], ['description'])
+        self.assertEqual(summary['elements'], {'added': 1, 'removed': 1, 'changed': 1})
+        self.assertEqual(summary['flows'], {'added': 0, 'removed': 0, 'changed': 2})
+        self.assertEqual(diff.removed['elements'][0]['id'], removed['id'])
+        flow_change = next(c for c in diff.changed['flows'] if c.id == old_flow_id)
+        self.assertEqual(flow_change.fields, {'id': (old_flow_id, 'flow_renamed')})
+
+        messages = diff.describe()
+        self.assertIn("Dodano/poprawiono opis procesu", messages)
+        self.assertIn(f"Poprawiono nazwę elementu: {self.process['elements'][1]['id']}", messages)
+        self.assertIn("Dodano nazwę przepływu: tak", messages)
+        self.assertIn("Dodano element: end_extra (endEvent)", messages)
+
+    def test_diff_of_identical_processes_is_empty(self):
+        reordered = copy.deepcopy(self.process)
+        reordered['elements'].reverse()
+        diff = diff_processes(self.process, reordered)
+        self.assertTrue(diff.is_empty)
+        self.assertEqual(diff.describe(), [])
+
+
+if __name__ == '__main__':
+    unittest.main()
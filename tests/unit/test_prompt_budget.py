@@ -0,0 +1,64 @@
+import unittest
+import sys
+import os
+
+# Dodaj katalog główny projektu do ścieżki, aby można było importować moduły
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from utils.prompt_budget import PromptBudgeter, PromptSection, estimate_tokens, get_context_window, truncate_to_tokens
+
+
+class TestPromptBudget(unittest.TestCase):
+
+    def setUp(self):
+        self.sections = [
+            PromptSection("base", "Jesteś ekspertem BPMN. " * 20, priority=80),
+            PromptSection("examples", "Przykład: {\n  \"id\": \"a\"\n}\n" * 100, priority=20,
+                          compact="Przykład: {\"id\":\"a\"}", truncatable=False),
+            PromptSection("pdf", "\n".join(f"[str. {i}] Fragment dokumentu numer {i}." for i in range(200)), priority=30),
+            PromptSection("process", "Klient składa wniosek kredytowy.", required=True),
+        ]
+
+    def test_prompt_within_budget_is_unchanged(self):
+        """Prompt mieszczący się w budżecie nie jest modyfikowany"""
+        result = PromptBudgeter(budget=100_000).assemble(self.sections)
+        self.assertEqual(result.text, "\n\n".join(s.text for s in self.sections))
+        self.assertEqual(result.tokens_saved, 0)
+
+    def test_low_priority_sections_are_reduced_first(self):
+        """Przy przekroczeniu budżetu skracane są sekcje o najniższym priorytecie"""
+        result = PromptBudgeter(budget=600).assemble(self.sections)
+        self.assertTrue(result.fits)
+        self.assertIn("examples", result.compacted)
+        self.assertIn("pdf", result.truncated)
+        self.assertIn("Klient składa wniosek kredytowy.", result.text)
+        self.assertTrue(result.text.startswith("Jesteś ekspertem BPMN."))
+        self.assertGreater(result.tokens_saved, 0)
+
+    def test_required_sections_are_never_dropped(self):
+        """Sekcje wymagane zostają nawet przy zbyt małym budżecie"""
+        result = PromptBudgeter(budget=5).assemble(self.sections)
+        self.assertEqual(set(result.dropped), {"base", "examples", "pdf"})
+        self.assertEqual(result.text, "Klient składa wniosek kredytowy.")
+
+    def test_section_that_cannot_be_truncated_is_reported_dropped(self):
+        """Sekcja, z której po przycięciu nic nie zostaje, jest raportowana jako pominięta"""
+        one_line = PromptSection("pdf", "Fragment dokumentu " * 400, priority=30)
+        process = PromptSection("process", "Klient składa wniosek kredytowy.", required=True)
+        budget = estimate_tokens(one_line.text) // 2
+        self.assertEqual(truncate_to_tokens(one_line.text, budget), "")
+
+        result = PromptBudgeter(budget=budget).assemble([one_line, process])
+        self.assertEqual(result.dropped, ["pdf"])
+        self.assertEqual(result.truncated, [])
+        self.assertEqual(result.text, process.text)
+
+    def test_model_context_window_lookup(self):
+        """Okno kontekstu jest dobierane po nazwie modelu"""
+        self.assertEqual(get_context_window("google/gemma-3-4b"), 8192)
+        self.assertGreater(get_context_window("gemini-2.0-flash"), 100_000)
+        self.assertGreater(estimate_tokens("Zdolność kredytowa klienta"), 3)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,60 @@
+import unittest
+import sys
+import os
+import json
+from unittest.mock import patch
+
+# Dodaj katalog główny projektu do ścieżki, aby można było importować moduły
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, ROOT_DIR)
+sys.path.append(os.path.join(ROOT_DIR, "bpmn_v2"))
+
+from benchmarks.workloads import bpmn_process
+
+try:
+    from bpmn_v2.mcp_server_simple import EnhancedBPMNQualityChecker, process_hash
+    from bpmn_v2.json_prompt_template import ResponseValidator
+    IMPORT_ERROR = None
+except ImportError as e:
+    IMPORT_ERROR = e
+
+
+@unittest.skipIf(IMPORT_ERROR is not None, f"Brak zależności: {IMPORT_ERROR}")
+class TestQualityCache(unittest.TestCase):
+
+    def test_process_dict_validation_matches_response_validation(self):
+        validator = ResponseValidator()
+        process = bpmn_process(20, pools=2)
+        broken = dict(process, process_name="P", elements=process["elements"][1:])
+        for data in (process, broken):
+            is_valid, _, errors = validator.validate_response(json.dumps(data, ensure_ascii=False))
+            self.assertEqual(validator.validate_process(data), (is_valid, errors))
+
+    def test_malformed_cache_size_falls_back_to_default(self):
+        with patch.dict(os.environ, {'QUALITY_CACHE_SIZE': '64 wpisy'}):
+            with self.assertLogs('bpmn_v2.mcp_server_simple', level='WARNING'):
+                checker = EnhancedBPMNQualityChecker()
+        self.assertEqual(checker.cache_size, 64)
+
+    def test_unchanged_process_is_not_rescored(self):
+        checker = EnhancedBPMNQualityChecker(cache_size=8)
+        process = bpmn_process(30, pools=2)
+        validate = checker.compliance_validator.validate_bpmn_compliance
+        with patch.object(checker.compliance_validator, "validate_bpmn_compliance", side_effect=validate) as spy:
+            first = checker.check_process_quality(process, 2)
+            # Ta sama treść, inna kolejność kluczy - trafienie
+            reordered = json.loads(json.dumps(process, sort_keys=True))
+            first["bpmn_compliance"]["issues"].append({"zmodyfikowane": True})
+            second = checker.check_process_quality(reordered, 2)
+            self.assertEqual(spy.call_count, 1)
+            self.assertNotIn({"zmodyfikowane": True}, second["bpmn_compliance"]["issues"])
+
+            process["elements"][1]["name"] = "Zmieniona nazwa"
+            checker.check_process_quality(process, 2)
+            self.assertEqual(spy.call_count, 2)
+        self.assertEqual(checker.cache_stats, {"hits": 1, "misses": 2})
+        self.assertNotEqual(process_hash(process), process_hash(reordered))
+
+
+if __name__ == '__main__':
+    unittest.main()
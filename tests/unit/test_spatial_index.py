@@ -0,0 +1,62 @@
+import unittest
+import sys
+import os
+
+# Dodaj katalog główny projektu do ścieżki, aby można było importować moduły
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from utils.xmi.spatial_index import SpatialGrid, rects_overlap
+from utils.xmi.improved_layout_manager import ImprovedLayoutManager
+
+
+def _rect(x, y, width=100, height=60, row=0):
+    return {'x': x, 'y': y, 'width': width, 'height': height, 'grid_row': row}
+
+
+class TestSpatialGrid(unittest.TestCase):
+
+    def test_query_and_move(self):
+        rects = {'a': _rect(0, 0), 'b': _rect(50, 20), 'c': _rect(1000, 1000)}
+        index = SpatialGrid.for_rects(rects)
+
+        self.assertEqual(index.overlapping('a', rects), ['b'])
+        self.assertEqual(list(index.overlapping_pairs(rects)), [('a', 'b')])
+
+        rects['b']['x'] = 990
+        rects['b']['y'] = 980
+        index.move('b', rects['b'])
+        self.assertEqual(index.overlapping('a', rects), [])
+        self.assertEqual(index.overlapping('c', rects), ['b'])
+
+    def test_touching_edges_do_not_overlap(self):
+        self.assertFalse(rects_overlap(_rect(0, 0), _rect(100, 0)))
+
+
+class TestResolveOverlaps(unittest.TestCase):
+
+    def test_row_pile_up_is_spread_symmetrically(self):
+        manager = ImprovedLayoutManager()
+        manager.element_positions = {f'e{i}': _rect(500, 100) for i in range(5)}
+        manager.element_positions['far'] = _rect(2000, 100)
+
+        manager._resolve_overlaps()
+
+        positions = manager.element_positions
+        index = SpatialGrid.for_rects(positions)
+        self.assertEqual(list(index.overlapping_pairs(positions)), [])
+        xs = sorted(positions[f'e{i}']['x'] for i in range(5))
+        self.assertEqual(xs, [300, 400, 500, 600, 700])
+        self.assertEqual(positions['far']['x'], 2000)
+
+    def test_rows_overlap_pushes_lower_element_down(self):
+        manager = ImprovedLayoutManager()
+        manager.element_positions = {'top': _rect(0, 0, row=0), 'low': _rect(0, 40, row=1)}
+
+        manager._resolve_overlaps()
+
+        self.assertEqual(manager.element_positions['top']['y'], 0)
+        self.assertEqual(manager.element_positions['low']['y'], 60)
+
+
+if __name__ == '__main__':
+    unittest.main()
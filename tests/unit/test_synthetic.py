@@ -0,0 +1,72 @@
+import unittest
+import sys
+import os
+import io
+import contextlib
+
+# Dodaj katalog główny projektu do ścieżki, aby można było importować moduły
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from benchmarks.synthetic import SyntheticConfig, SyntheticModelGenerator
+from benchmarks.workloads import DIAGRAM_TYPE_NAMES
+
+
+class TestSyntheticModelGenerator(unittest.TestCase):
+
+    def setUp(self):
+        self.config = SyntheticConfig(size=120, branching=3, max_depth=3, decision_rate=0.2,
+                                      fork_rate=0.1, loop_rate=0.05, seed=11)
+
+    def test_deterministic_and_exact_size(self):
+        first, second = SyntheticModelGenerator(self.config), SyntheticModelGenerator(self.config)
+        self.assertEqual(first.bpmn_process(), second.bpmn_process())
+        # Kolejność wywołań nie wpływa na wynik
+        self.assertEqual(first.activity_diagram(), SyntheticModelGenerator(self.config).activity_diagram())
+
+        self.assertEqual(first.activity_diagram().count(":Krok "), 120)
+        self.assertIn("fork again", first.activity_diagram())
+        tasks = [e for e in first.bpmn_process()["elements"] if e["type"].endswith("Task")]
+        self.assertEqual(len(tasks), 120)
+
+    def test_bpmn_structure_is_valid(self):
+        generator = SyntheticModelGenerator(self.config)
+        self.assertTrue(generator.bpmn_diagram().validate()["is_valid"])
+
+        process = generator.bpmn_process()
+        ids = {element["id"] for element in process["elements"]}
+        self.assertEqual(len(ids), len(process["elements"]))
+        self.assertTrue(all(flow["source"] in ids and flow["target"] in ids for flow in process["flows"]))
+        self.assertEqual(len(process["participants"]), 3)
+        self.assertTrue(any(flow.get("type") == "message" for flow in process["flows"]))
+        self.assertTrue(any(e["type"] == "parallelGateway" for e in process["elements"]))
+        self.assertEqual(generator.injected_errors, [])
+
+    def test_error_injection(self):
+        generator = SyntheticModelGenerator(SyntheticConfig(size=200, error_rate=0.1, seed=3))
+        process = generator.bpmn_process()
+        kinds = {error.kind for error in generator.injected_errors}
+        self.assertIn("dangling_flow", kinds)
+        ids = {element["id"] for element in process["elements"]}
+        self.assertTrue(any(flow["target"] not in ids for flow in process["flows"]))
+
+        code = generator.activity_diagram()
+        self.assertTrue(generator.injected_errors)
+        for error in generator.injected_errors:
+            self.assertIn(error.kind, ("missing_endif", "malformed_action"))
+        self.assertNotEqual(code, SyntheticModelGenerator(SyntheticConfig(size=200, seed=3)).activity_diagram())
+
+    def test_plantuml_output_is_parsed(self):
+        try:
+            from utils.xmi.xmi_conversion import XMIConverter
+        except ImportError as e:
+            self.skipTest(f"Brak zależności: {e}")
+        converter = XMIConverter()
+        generator = SyntheticModelGenerator(SyntheticConfig(size=60, branching=3, seed=5))
+        for kind, type_name in DIAGRAM_TYPE_NAMES.items():
+            with self.subTest(kind=kind), contextlib.redirect_stdout(io.StringIO()):
+                code = getattr(generator, f"{kind}_diagram")()
+                self.assertIn("xmi:XMI", converter.generate(*converter.parse(code, type_name)))
+
+
+if __name__ == '__main__':
+    unittest.main()
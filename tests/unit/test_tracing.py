@@ -0,0 +1,63 @@
+import unittest
+import sys
+import os
+import json
+import tempfile
+
+# Dodaj katalog główny projektu do ścieżki, aby można było importować moduły
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from utils.metrics.tracing import Tracer, flamegraph_rows, render_flamegraph_svg
+
+
+class TestTracer(unittest.TestCase):
+
+    def test_nested_spans_and_explicit_parent(self):
+        tracer = Tracer()
+        root = tracer.start_span("generation", model="model-a")
+        with tracer.span("llm_call", parent=root) as llm:
+            with tracer.span("call_api"):
+                pass
+            llm.set_attribute("response_chars", 120)
+        with self.assertRaises(ValueError):
+            with tracer.span("render", parent=root):
+                raise ValueError("błąd renderowania")
+        tracer.end_span(root)
+
+        spans = tracer.get_trace(root.trace_id)
+        by_name = {span.name: span for span in spans}
+        self.assertEqual([span.name for span in spans], ["generation", "llm_call", "call_api", "render"])
+        self.assertEqual(by_name["call_api"].parent_id, by_name["llm_call"].span_id)
+        self.assertEqual(by_name["llm_call"].parent_id, root.span_id)
+        self.assertEqual(by_name["render"].status, "ERROR")
+        self.assertEqual([row["depth"] for row in flamegraph_rows(spans)], [0, 1, 2, 1])
+
+        svg = render_flamegraph_svg(spans)
+        self.assertTrue(svg.startswith("<svg"))
+        self.assertEqual(svg.count("<rect"), 4)
+
+    def test_otlp_export_and_bounded_store(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "traces.jsonl")
+            tracer = Tracer(max_traces=2, export_path=path)
+            for i in range(3):
+                with tracer.span("generation", iteration=i, fast=True):
+                    with tracer.span("prompt_build", chars=1.5):
+                        pass
+
+            self.assertEqual(len(tracer.recent_traces()), 2)
+            with open(path, encoding="utf-8") as f:
+                exported = [json.loads(line) for line in f]
+        self.assertEqual(len(exported), 3)
+        spans = exported[0]["resourceSpans"][0]["scopeSpans"][0]["spans"]
+        root = next(span for span in spans if "parentSpanId" not in span)
+        child = next(span for span in spans if span.get("parentSpanId") == root["spanId"])
+        self.assertEqual(len(root["traceId"]), 32)
+        self.assertEqual(child["attributes"], [{"key": "chars", "value": {"doubleValue": 1.5}}])
+        self.assertIn({"key": "iteration", "value": {"intValue": "0"}}, root["attributes"])
+        self.assertIn({"key": "fast", "value": {"boolValue": True}}, root["attributes"])
+        self.assertLessEqual(int(root["startTimeUnixNano"]), int(child["startTimeUnixNano"]))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,46 @@
+import unittest
+import sys
+import os
+
+# Dodaj katalog główny projektu do ścieżki, aby można było importować moduły
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from utils.xmi.xmi_activity_generator import TransitionRegistry
+
+
+def _transition(tid, source, target, name=''):
+    return {'id': tid, 'source_id': source, 'target_id': target, 'name': name}
+
+
+class TestTransitionRegistry(unittest.TestCase):
+
+    def setUp(self):
+        self.registry = TransitionRegistry()
+        self.registry.append(_transition('t1', 'A', 'B'))
+        self.registry.append(_transition('t2', 'B', 'C', 'tak'))
+        self.registry.append(_transition('t3', 'B', 'D', 'nie'))
+
+    def test_behaves_like_list(self):
+        self.assertEqual(len(self.registry), 3)
+        self.assertEqual([t['id'] for t in self.registry], ['t1', 't2', 't3'])
+
+    def test_indexes(self):
+        self.assertTrue(self.registry.has_edge('B', 'C'))
+        self.assertFalse(self.registry.has_edge('C', 'B'))
+        self.assertEqual(self.registry.out_degree('B'), 2)
+        self.assertEqual(self.registry.in_degree('A'), 0)
+        self.assertEqual(self.registry.successors('B'), ['C', 'D'])
+        self.assertEqual([t['id'] for t in self.registry.incoming('D')], ['t3'])
+
+    def test_removal_updates_indexes(self):
+        self.registry.discard_many([self.registry[1]])
+        self.assertFalse(self.registry.has_edge('B', 'C'))
+        self.assertEqual(self.registry.out_degree('B'), 1)
+
+        self.registry.remove(self.registry[0])
+        self.assertEqual(self.registry.in_degree('B'), 0)
+        self.assertEqual([t['id'] for t in self.registry], ['t3'])
+
+
+if __name__ == '__main__':
+    unittest.main()
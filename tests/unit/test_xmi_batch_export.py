@@ -0,0 +1,105 @@
+import unittest
+import sys
+import os
+import tempfile
+import xml.etree.ElementTree as ET
+from concurrent.futures import ProcessPoolExecutor
+from unittest import mock
+
+# Dodaj katalog główny projektu do ścieżki, aby można było importować moduły
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from utils.xmi import xmi_batch_export
+from utils.xmi.xmi_batch_export import (
+    UML_NS, XMI_NS, ExportJob, export_diagrams, merge_xmi_documents, write_export_results,
+)
+
+CLASS_DIAGRAM = """@startuml
+class Konto {
+  +saldo: decimal
+}
+class Klient
+Klient "1" -- "0..*" Konto : posiada
+@enduml"""
+
+ACTIVITY_DIAGRAM = """@startuml
+|Klient|
+start
+:Złóż wniosek;
+|Bank|
+:Oceń wniosek;
+stop
+@enduml"""
+
+SEQUENCE_DIAGRAM = """@startuml
+actor "Klient" as K
+participant "Bank" as B
+K -> B : zlozWniosek()
+B --> K : decyzja
+@enduml"""
+
+
+class TestXMIBatchExport(unittest.TestCase):
+
+    def setUp(self):
+        self.jobs = [
+            ExportJob('klasy', CLASS_DIAGRAM, 'Diagram klas'),
+            ExportJob('brak', 'skinparam x', 'Diagram przypadków użycia'),
+            ExportJob('aktywnosc', ACTIVITY_DIAGRAM, 'Diagram aktywności'),
+        ]
+
+    def test_process_pool_keeps_order_and_reports_progress(self):
+        progress = []
+        results = export_diagrams(self.jobs, max_workers=2,
+                                  progress=lambda done, total, result: progress.append((done, total)))
+
+        self.assertEqual([r.key for r in results], ['klasy', 'brak', 'aktywnosc'])
+        self.assertEqual([r.ok for r in results], [True, False, True])
+        self.assertIn('ValueError', results[1].error)
+        self.assertEqual(progress, [(1, 3), (2, 3), (3, 3)])
+        self.assertTrue(results[2].xmi.startswith('<?xml'))
+
+    def test_process_pool_uses_spawn(self):
+        # Eksport startuje z wątku Qt - fork procesu wielowątkowego może się zakleszczyć
+        contexts = []
+
+        def pool(*args, **kwargs):
+            contexts.append(kwargs.get('mp_context'))
+            return ProcessPoolExecutor(*args, **kwargs)
+
+        with mock.patch.object(xmi_batch_export, 'ProcessPoolExecutor', side_effect=pool):
+            results = export_diagrams(self.jobs[:1] * 2, max_workers=2)
+        self.assertTrue(all(r.ok for r in results))
+        self.assertEqual([c.get_start_method() for c in contexts], ['spawn'])
+
+    def test_merge_into_one_package(self):
+        results = export_diagrams(self.jobs, max_workers=1)
+        merged = ET.fromstring(merge_xmi_documents(results, 'Eksport').encode('utf-8'))
+
+        wrapper = merged.find(f'{{{UML_NS}}}Model')[0]
+        self.assertEqual(wrapper.get('name'), 'Eksport')
+        self.assertEqual(len(wrapper), 2)
+        extension = merged.find(f'{{{XMI_NS}}}Extension')
+        self.assertEqual(len(extension.find('diagrams')), 2)
+        # Pakiety diagramów podpięte pod pakiet nadrzędny
+        wrapper_id = wrapper.get(f'{{{XMI_NS}}}id')
+        for package in wrapper:
+            element = extension.find(f"elements/element[@{{{XMI_NS}}}idref='{package.get(f'{{{XMI_NS}}}id')}']")
+            self.assertEqual(element.find('model').get('package'), wrapper_id)
+
+    def test_repeated_diagram_exports_identically(self):
+        # Wspólny konwerter nie może przenosić komunikatów między zadaniami
+        jobs = [ExportJob(idx, SEQUENCE_DIAGRAM, 'Diagram sekwencji') for idx in range(3)]
+        results = export_diagrams(jobs, max_workers=1)
+        self.assertEqual([r.xmi.count('<connector ') for r in results], [2, 2, 2])
+
+    def test_write_export_results(self):
+        results = export_diagrams([self.jobs[0], self.jobs[0]], max_workers=1)
+        with tempfile.TemporaryDirectory() as directory:
+            paths = write_export_results(results, directory, timestamp='20250101_120000')
+            self.assertEqual([os.path.basename(p) for p in paths],
+                             ['Diagram_klas_20250101_120000.xmi', 'Diagram_klas_20250101_120000_2.xmi'])
+
+
+if __name__ == '__main__':
+    unittest.main()
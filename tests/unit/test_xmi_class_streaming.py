@@ -0,0 +1,78 @@
+import unittest
+import sys
+import os
+import io
+import re
+import xml.etree.ElementTree as ET
+
+# Dodaj katalog główny projektu do ścieżki, aby można było importować moduły
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from utils.plantuml.plantuml_class_parser import PlantUMLClassParser
+from utils.xmi.xmi_class_generator import XMIClassGenerator
+
+PLANTUML = """@startuml
+interface Repozytorium {
+  +zapisz() : void
+}
+enum Status {
+  NOWY
+  ZAMKNIETY
+}
+class Konto {
+  -numer : String
+  -status : Status
+  +saldo() : double
+}
+class KontoOszczednosciowe {
+  -oprocentowanie : double
+}
+class Klient {
+  -imie : String
+}
+KontoOszczednosciowe --|> Konto
+Klient "1" --> "*" Konto : posiada
+Konto ..|> Repozytorium
+@enduml
+"""
+
+
+def _canonical(xmi: str) -> str:
+    """Postać kanoniczna XMI z identyfikatorami numerowanymi wg kolejności wystąpienia."""
+    ids = {}
+    xmi = re.sub(r"EAID_[0-9A-Za-z_]+|DCLINK_[0-9A-F]+",
+                 lambda m: ids.setdefault(m.group(0), f"ID{len(ids)}"), xmi)
+    xmi = re.sub(r"\d{4}-\d\d-\d\d \d\d:\d\d:\d\d", "T", xmi)
+    xmi = re.sub(r"^<\?xml[^>]*\?>", "", xmi.strip())
+    return ET.canonicalize(xmi, strip_text=True)
+
+
+class TestXMIClassStreaming(unittest.TestCase):
+
+    def setUp(self):
+        self.parser = PlantUMLClassParser()
+        self.parser.parse(PLANTUML)
+        self.generator = XMIClassGenerator(autor="test")
+
+    def _args(self):
+        p = self.parser
+        return p.classes, p.relations, p.enums, p.notes, p.primitive_types
+
+    def test_streaming_matches_generate_xmi(self):
+        expected = self.generator.generate_xmi(*self._args(), diagram_name="Test")
+        buffer = io.StringIO()
+        counts = self.generator.write_xmi(buffer, *self._args(), diagram_name="Test")
+
+        self.assertEqual(_canonical(buffer.getvalue()), _canonical(expected))
+        self.assertEqual(counts['realizations'], 1)
+        self.assertEqual(counts['connectors'], len(self.parser.relations))
+
+    def test_output_has_qualified_root_elements(self):
+        xmi = self.generator.generate_xmi(*self._args(), diagram_name="Test")
+        self.assertTrue(xmi.startswith('<?xml version="1.0" encoding="UTF-8"?>'))
+        for tag in ("<xmi:XMI ", "<xmi:Documentation ", "<uml:Model ", "<xmi:Extension "):
+            self.assertIn(tag, xmi)
+
+
+if __name__ == '__main__':
+    unittest.main()
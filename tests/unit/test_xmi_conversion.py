@@ -0,0 +1,63 @@
+import unittest
+import sys
+import os
+import re
+from collections import Counter
+
+# Dodaj katalog główny projektu do ścieżki, aby można było importować moduły
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, ROOT_DIR)
+
+from benchmarks.workloads import component_diagram
+from utils.xmi.xmi_conversion import XMIConverter
+from utils.xmi.xmi_component_generator import XMIComponentGenerator
+from utils.plantuml.plantuml_component_parser import PlantUMLComponentParser
+
+SEQUENCE_A = """@startuml
+actor "Klient" as K
+participant "Bank" as B
+K -> B : zlozWniosek()
+B --> K : decyzja
+@enduml"""
+
+SEQUENCE_B = """@startuml
+participant "Sklep" as S
+participant "Magazyn" as M
+S -> M : sprawdzStan()
+@enduml"""
+
+
+def _tags(xmi):
+    """Liczba wystąpień każdego znacznika (id EA są losowe, więc porównujemy strukturę)"""
+    return Counter(re.findall(r'<([\w:]+)', xmi))
+
+
+class TestXMIConverterReuse(unittest.TestCase):
+
+    def test_sequence_messages_do_not_accumulate(self):
+        converter = XMIConverter()
+        counts = [converter.convert(SEQUENCE_A, 'Diagram sekwencji')[0].count('<connector ')
+                  for _ in range(3)]
+        self.assertEqual(counts, [2, 2, 2])
+
+        xmi, _ = converter.convert(SEQUENCE_B, 'Diagram sekwencji')
+        self.assertEqual(xmi.count('<connector '), 1)
+        self.assertNotIn('zlozWniosek', xmi)
+
+    def test_component_generator_reset_between_diagrams(self):
+        code = component_diagram(6)
+        first = XMIConverter().convert(code, 'Diagram komponentów')[0]
+        converter = XMIConverter()
+        converter.convert(code, 'Diagram komponentów')
+        self.assertEqual(_tags(converter.convert(code, 'Diagram komponentów')[0]), _tags(first))
+
+        # Ten sam generator użyty dwukrotnie bezpośrednio
+        parsed = PlantUMLComponentParser(code).parse()
+        generator = XMIComponentGenerator()
+        once = generator.generate_component_diagram('Komponenty', parsed)
+        twice = generator.generate_component_diagram('Komponenty', parsed)
+        self.assertEqual(_tags(twice), _tags(once))
+
+
+if __name__ == '__main__':
+    unittest.main()
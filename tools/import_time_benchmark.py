@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+"""
+Benchmark czasu importu (cold start) aplikacji - `python -X importtime`.
+
+Dla każdego modułu docelowego uruchamia świeży interpreter, parsuje wynik
+`-X importtime` i raportuje łączny czas importu (mediana z kilku prób) oraz
+najcięższe moduły. Wynik można zapisać jako bazowy i wykrywać regresje:
+
+    python tools/import_time_benchmark.py --update-baseline
+    python tools/import_time_benchmark.py              # exit code 1 przy regresji, 2 bez wyniku bazowego
+
+Domyślnie mierzony jest moduł aplikacji desktopowej (src/main.py - bez
+tworzenia okna). `--target streamlit_app` mierzy skrypt Streamlit
+uruchomiony w trybie "bare" (bez serwera).
+"""
+
+import argparse
+import json
+import os
+import re
+import statistics
+import subprocess
+import sys
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SRC_DIR = os.path.join(PROJECT_ROOT, "src")
+DEFAULT_BASELINE = os.path.join(PROJECT_ROOT, "tools", "import_time_baseline.json")
+DEFAULT_TARGETS = ["main"]
+
+_IMPORTTIME_LINE = re.compile(r"^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)")
+
+
+def measure_import(target: str):
+    """Importuje moduł w nowym procesie; zwraca (łączny czas [ms], {moduł: czas własny [ms]})."""
+    env = dict(os.environ)
+    env["PYTHONPATH"] = os.pathsep.join([SRC_DIR, PROJECT_ROOT, env.get("PYTHONPATH", "")])
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {target}"],
+        cwd=SRC_DIR, env=env, capture_output=True, text=True
+    )
+    if result.returncode != 0:
+        last_line = (result.stderr.strip().splitlines() or ["?"])[-1]
+        raise RuntimeError(f"Import {target} nie powiódł się: {last_line}")
+
+    total_us = 0
+    self_times = {}
+    for line in result.stderr.splitlines():
+        match = _IMPORTTIME_LINE.match(line)
+        if not match:
+            continue
+        self_us, cumulative_us, indent, module = match.groups()
+        self_times[module] = int(self_us) / 1000
+        if len(indent) == 1:  # moduły najwyższego poziomu
+            total_us += int(cumulative_us)
+    return total_us / 1000, self_times
+
+
+def run_benchmark(targets, repeats: int):
+    results = {}
+    for target in targets:
+        totals = []
+        heaviest = {}
+        for _ in range(repeats):
+            total_ms, self_times = measure_import(target)
+            totals.append(total_ms)
+            heaviest = self_times
+        results[target] = {
+            "median_ms": round(statistics.median(totals), 1),
+            "min_ms": round(min(totals), 1),
+            "top_modules": dict(sorted(heaviest.items(), key=lambda item: item[1], reverse=True)[:10]),
+        }
+    return results
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Benchmark czasu importu aplikacji (python -X importtime)")
+    parser.add_argument("--target", action="append", help="Moduł do zmierzenia (domyślnie: main)")
+    parser.add_argument("--repeats", type=int, default=5, help="Liczba prób (mediana)")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE, help="Plik z wynikiem bazowym (JSON)")
+    parser.add_argument("--threshold", type=float, default=0.2,
+                        help="Dopuszczalny wzrost względem bazowego (0.2 = 20%%)")
+    parser.add_argument("--update-baseline", action="store_true", help="Zapisz wynik jako bazowy")
+    args = parser.parse_args()
+
+    targets = args.target or DEFAULT_TARGETS
+    try:
+        results = run_benchmark(targets, args.repeats)
+    except RuntimeError as e:
+        print(f"❌ {e}")
+        return 2
+
+    baseline = {}
+    if os.path.exists(args.baseline):
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+    missing = [target for target in targets if not baseline.get(target, {}).get("median_ms")]
+
+    regressions = []
+    for target, result in results.items():
+        print(f"⏱️ {target}: mediana {result['median_ms']} ms (min {result['min_ms']} ms, {args.repeats} prób)")
+        for module, ms in result["top_modules"].items():
+            print(f"    {ms:8.1f} ms  {module}")
+        reference = baseline.get(target, {}).get("median_ms")
+        if reference:
+            change = (result["median_ms"] - reference) / reference
+            print(f"    bazowy: {reference} ms ({change:+.0%})")
+            if change > args.threshold:
+                regressions.append(target)
+
+    if args.update_baseline:
+        baseline.update({target: {"median_ms": r["median_ms"]} for target, r in results.items()})
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump(baseline, f, indent=2)
+        print(f"💾 Zapisano wynik bazowy: {args.baseline}")
+        return 0
+
+    if missing:
+        # Bez wyniku bazowego nie da się wykryć regresji - nie zgłaszaj sukcesu
+        print(f"❌ Brak wyniku bazowego dla: {', '.join(missing)} ({args.baseline}) - uruchom z --update-baseline")
+        return 2
+    if regressions:
+        print(f"❌ Regresja czasu importu (> {args.threshold:.0%}): {', '.join(regressions)}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,455 @@
+"""
+Historia zapytań, odpowiedzi i artefaktów (PlantUML, BPMN XML, XMI) w jednej bazie.
+
+Historia jest włączana jawnie (HISTORY_DB_PROVIDER; domyślnie none), bo zapisuje
+pełne treści promptów i odpowiedzi. Lokalny plik SQLite (HISTORY_DB_PATH) nie
+wymaga konfiguracji; MySQL/PostgreSQL korzystają z DB_HOST/DB_PORT/...
+Tabele są indeksowane po modelu, typie diagramu, czasie i skrócie treści, więc
+panele statystyk i wyszukiwanie duplikatów to zapytania na indeksach, a nie
+przeglądanie plików JSONL:
+
+    store = get_history_store()
+    request_id = store.record_request(prompt, model="gpt-4o", diagram_type="class")
+    response_id = store.record_response(request_id, content, latency_ms=1830)
+    artifact_id = store.record_artifact("plantuml", code, request_id=request_id)
+    store.record_quality(artifact_id, 87.5)
+    store.find_artifact(content=code)          # deduplikacja po skrócie
+    store.model_stats()                        # liczba / średni czas per model
+
+Funkcje modułu (`record_interaction`, `record_artifact`, `submit_history_job`)
+używane przez GUI i ścieżki obsługi zapytań nie czekają na bazę: zapisy trafiają
+do ograniczonej kolejki obsługiwanej przez wątek w tle (HistoryWriter), a wynik
+jest dostępny jako Future. Artefakt może wskazywać interakcję, która jeszcze
+nie została zapisana - identyfikatory są uzupełniane w wątku zapisującym:
+
+    pending = record_interaction(prompt, response, model)
+    record_artifact("plantuml", code, interaction=pending)
+
+Konfiguracja (.env): HISTORY_DB_PROVIDER (sqlite, mysql, postgresql, none),
+HISTORY_DB_PATH, HISTORY_QUEUE_SIZE.
+"""
+
+import atexit
+import hashlib
+import os
+import queue
+import sqlite3
+import threading
+from concurrent.futures import Future
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional
+
+from utils.logger_utils import log_debug, log_warning
+
+ARTIFACT_PLANTUML = "plantuml"
+ARTIFACT_BPMN_XML = "bpmn_xml"
+ARTIFACT_BPMN_JSON = "bpmn_json"
+ARTIFACT_XMI = "xmi"
+
+# Typy kolumn per dialekt: id, krótki klucz (indeksowany), skrót, długi tekst
+_DIALECTS = {
+    "sqlite": {"id": "INTEGER PRIMARY KEY AUTOINCREMENT", "key": "TEXT", "hash": "TEXT", "text": "TEXT",
+               "placeholder": "?"},
+    "mysql": {"id": "BIGINT AUTO_INCREMENT PRIMARY KEY", "key": "VARCHAR(255)", "hash": "CHAR(64)",
+              "text": "LONGTEXT", "placeholder": "%s"},
+    "postgresql": {"id": "BIGSERIAL PRIMARY KEY", "key": "VARCHAR(255)", "hash": "CHAR(64)", "text": "TEXT",
+                   "placeholder": "%s"},
+}
+
+_TABLES = {
+    "requests": """
+        id {id},
+        created_at {key} NOT NULL,
+        model {key},
+        diagram_type {key},
+        source {key},
+        prompt {text} NOT NULL,
+        prompt_hash {hash} NOT NULL""",
+    "responses": """
+        id {id},
+        request_id BIGINT,
+        created_at {key} NOT NULL,
+        model {key},
+        content {text} NOT NULL,
+        content_hash {hash} NOT NULL,
+        status_code INTEGER,
+        latency_ms INTEGER""",
+    "artifacts": """
+        id {id},
+        request_id BIGINT,
+        response_id BIGINT,
+        created_at {key} NOT NULL,
+        kind {key} NOT NULL,
+        diagram_type {key},
+        model {key},
+        content {text} NOT NULL,
+        content_hash {hash} NOT NULL,
+        path {text}""",
+    "quality_scores": """
+        id {id},
+        artifact_id BIGINT,
+        created_at {key} NOT NULL,
+        metric {key} NOT NULL,
+        score REAL NOT NULL,
+        details {text}""",
+    "timings": """
+        id {id},
+        request_id BIGINT,
+        created_at {key} NOT NULL,
+        stage {key} NOT NULL,
+        model {key},
+        diagram_type {key},
+        elapsed_ms REAL NOT NULL""",
+}
+
+_INDEXES = [
+    ("requests", "model"), ("requests", "diagram_type"), ("requests", "created_at"), ("requests", "prompt_hash"),
+    ("responses", "request_id"), ("responses", "model"), ("responses", "created_at"), ("responses", "content_hash"),
+    ("artifacts", "kind"), ("artifacts", "diagram_type"), ("artifacts", "model"), ("artifacts", "created_at"),
+    ("artifacts", "content_hash"), ("artifacts", "request_id"),
+    ("quality_scores", "artifact_id"), ("quality_scores", "created_at"),
+    ("timings", "stage"), ("timings", "model"), ("timings", "created_at"),
+]
+
+
+def content_hash(content: str) -> str:
+    """Skrót SHA-256 treści (klucz deduplikacji)."""
+    return hashlib.sha256(content.encode("utf-8")).hexdigest()
+
+
+def _now() -> str:
+    return datetime.now().isoformat(sep=" ", timespec="milliseconds")
+
+
+def _connect(provider: str, path: Optional[str]):
+    if provider == "sqlite":
+        conn = sqlite3.connect(path or os.getenv("HISTORY_DB_PATH", "").strip() or "history.db",
+                               check_same_thread=False)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        return conn
+    if provider == "mysql":
+        import mysql.connector
+        return mysql.connector.connect(host=os.getenv("DB_HOST"), port=int(os.getenv("DB_PORT") or 3306),
+                                       database=os.getenv("DB_NAME"), user=os.getenv("DB_USER"),
+                                       password=os.getenv("DB_PASSWORD"))
+    import psycopg2
+    return psycopg2.connect(host=os.getenv("DB_HOST"), port=int(os.getenv("DB_PORT") or 5432),
+                            database=os.getenv("DB_NAME"), user=os.getenv("DB_USER"),
+                            password=os.getenv("DB_PASSWORD"))
+
+
+class HistoryStore:
+    """Indeksowana historia generowania; jedno połączenie chronione blokadą."""
+
+    def __init__(self, provider: str = "sqlite", path: Optional[str] = None):
+        provider = "postgresql" if provider == "postgres" else provider
+        if provider not in _DIALECTS:
+            raise ValueError(f"Nieobsługiwany dostawca historii: {provider}")
+        self.provider = provider
+        self.dialect = _DIALECTS[provider]
+        self._lock = threading.RLock()
+        self._conn = _connect(provider, path)
+        self._create_schema()
+
+    # -- schemat ------------------------------------------------------------
+
+    def _create_schema(self):
+        with self._lock:
+            cursor = self._conn.cursor()
+            for table, columns in _TABLES.items():
+                cursor.execute(f"CREATE TABLE IF NOT EXISTS {table} ({columns.format(**self.dialect)})")
+            for table, column in _INDEXES:
+                name = f"idx_{table}_{column}"
+                if self.provider == "mysql":
+                    # MySQL nie obsługuje CREATE INDEX IF NOT EXISTS
+                    try:
+                        cursor.execute(f"CREATE INDEX {name} ON {table} ({column})")
+                    except Exception:
+                        pass
+                else:
+                    cursor.execute(f"CREATE INDEX IF NOT EXISTS {name} ON {table} ({column})")
+            self._conn.commit()
+            cursor.close()
+
+    # -- zapis --------------------------------------------------------------
+
+    def _insert(self, table: str, values: Dict[str, Any]) -> int:
+        columns = ", ".join(values)
+        placeholders = ", ".join([self.dialect["placeholder"]] * len(values))
+        query = f"INSERT INTO {table} ({columns}) VALUES ({placeholders})"
+        if self.provider == "postgresql":
+            query += " RETURNING id"
+        with self._lock:
+            cursor = self._conn.cursor()
+            try:
+                cursor.execute(query, tuple(values.values()))
+                row_id = cursor.fetchone()[0] if self.provider == "postgresql" else cursor.lastrowid
+                self._conn.commit()
+            except Exception:
+                self._conn.rollback()
+                raise
+            finally:
+                cursor.close()
+        return row_id
+
+    def record_request(self, prompt: str, model: Optional[str] = None, diagram_type: Optional[str] = None,
+                       source: Optional[str] = None) -> int:
+        return self._insert("requests", {
+            "created_at": _now(), "model": model, "diagram_type": diagram_type, "source": source,
+            "prompt": prompt, "prompt_hash": content_hash(prompt),
+        })
+
+    def record_response(self, request_id: Optional[int], content: str, model: Optional[str] = None,
+                        status_code: Optional[int] = None, latency_ms: Optional[int] = None) -> int:
+        return self._insert("responses", {
+            "request_id": request_id, "created_at": _now(), "model": model, "content": content,
+            "content_hash": content_hash(content), "status_code": status_code, "latency_ms": latency_ms,
+        })
+
+    def record_artifact(self, kind: str, content: str, request_id: Optional[int] = None,
+                        response_id: Optional[int] = None, diagram_type: Optional[str] = None,
+                        model: Optional[str] = None, path: Optional[str] = None) -> int:
+        return self._insert("artifacts", {
+            "request_id": request_id, "response_id": response_id, "created_at": _now(), "kind": kind,
+            "diagram_type": diagram_type, "model": model, "content": content,
+            "content_hash": content_hash(content), "path": path,
+        })
+
+    def record_quality(self, artifact_id: Optional[int], score: float, metric: str = "overall",
+                       details: Optional[str] = None) -> int:
+        return self._insert("quality_scores", {
+            "artifact_id": artifact_id, "created_at": _now(), "metric": metric, "score": float(score),
+            "details": details,
+        })
+
+    def record_timing(self, stage: str, elapsed_ms: float, request_id: Optional[int] = None,
+                      model: Optional[str] = None, diagram_type: Optional[str] = None) -> int:
+        return self._insert("timings", {
+            "request_id": request_id, "created_at": _now(), "stage": stage, "model": model,
+            "diagram_type": diagram_type, "elapsed_ms": float(elapsed_ms),
+        })
+
+    def record_interaction(self, prompt: str, response: str, model: Optional[str] = None,
+                           diagram_type: Optional[str] = None, status_code: Optional[int] = None,
+                           latency_ms: Optional[int] = None, source: Optional[str] = None) -> Dict[str, int]:
+        """Zapytanie + odpowiedź (+ czas odpowiedzi modelu) jednym wywołaniem."""
+        request_id = self.record_request(prompt, model, diagram_type, source)
+        response_id = self.record_response(request_id, response, model, status_code, latency_ms)
+        if latency_ms is not None:
+            self.record_timing("model_response", latency_ms, request_id, model, diagram_type)
+        return {"request_id": request_id, "response_id": response_id}
+
+    # -- zapytania ----------------------------------------------------------
+
+    def _query(self, query: str, params: tuple = ()) -> List[Dict[str, Any]]:
+        query = query.replace("?", self.dialect["placeholder"])
+        with self._lock:
+            cursor = self._conn.cursor()
+            try:
+                cursor.execute(query, params)
+                columns = [description[0] for description in cursor.description]
+                return [dict(zip(columns, row)) for row in cursor.fetchall()]
+            finally:
+                cursor.close()
+
+    @staticmethod
+    def _where(filters: Dict[str, Any]) -> tuple:
+        clauses, params = [], []
+        for clause, value in filters.items():
+            if value is not None:
+                clauses.append(clause)
+                params.append(value)
+        return (" WHERE " + " AND ".join(clauses) if clauses else ""), tuple(params)
+
+    def find_artifact(self, content: Optional[str] = None, content_hash_value: Optional[str] = None,
+                      kind: Optional[str] = None) -> Optional[Dict[str, Any]]:
+        """Najnowszy artefakt o tej samej treści (None, gdy brak)."""
+        digest = content_hash_value or content_hash(content or "")
+        where, params = self._where({"content_hash = ?": digest, "kind = ?": kind})
+        rows = self._query(f"SELECT * FROM artifacts{where} ORDER BY id DESC LIMIT 1", params)
+        return rows[0] if rows else None
+
+    def find_response(self, prompt: str, model: Optional[str] = None) -> Optional[Dict[str, Any]]:
+        """Najnowsza odpowiedź na identyczny prompt (opcjonalnie tego samego modelu)."""
+        where, params = self._where({"q.prompt_hash = ?": content_hash(prompt), "r.model = ?": model})
+        rows = self._query(
+            f"SELECT r.* FROM responses r JOIN requests q ON q.id = r.request_id{where} ORDER BY r.id DESC LIMIT 1",
+            params)
+        return rows[0] if rows else None
+
+    def recent_requests(self, limit: int = 20, model: Optional[str] = None,
+                        diagram_type: Optional[str] = None) -> List[Dict[str, Any]]:
+        where, params = self._where({"model = ?": model, "diagram_type = ?": diagram_type})
+        return self._query(f"SELECT * FROM requests{where} ORDER BY created_at DESC LIMIT {int(limit)}", params)
+
+    def model_stats(self, since: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Liczba odpowiedzi i czasy (śr./min/max, ms) per model, opcjonalnie od `since` (ISO)."""
+        where, params = self._where({"created_at >= ?": since})
+        return self._query(
+            "SELECT model, COUNT(*) AS count, AVG(latency_ms) AS avg_ms, MIN(latency_ms) AS min_ms, "
+            f"MAX(latency_ms) AS max_ms FROM responses{where} GROUP BY model ORDER BY count DESC", params)
+
+    def quality_stats(self, diagram_type: Optional[str] = None, metric: str = "overall") -> List[Dict[str, Any]]:
+        """Średnia ocena jakości artefaktów per model i rodzaj artefaktu."""
+        where, params = self._where({"s.metric = ?": metric, "a.diagram_type = ?": diagram_type})
+        return self._query(
+            "SELECT a.model, a.kind, COUNT(*) AS count, AVG(s.score) AS avg_score "
+            f"FROM quality_scores s JOIN artifacts a ON a.id = s.artifact_id{where} "
+            "GROUP BY a.model, a.kind ORDER BY a.model", params)
+
+    def stage_timings(self, since: Optional[str] = None) -> List[Dict[str, Any]]:
+        where, params = self._where({"created_at >= ?": since})
+        return self._query(
+            "SELECT stage, COUNT(*) AS count, AVG(elapsed_ms) AS avg_ms, MAX(elapsed_ms) AS max_ms "
+            f"FROM timings{where} GROUP BY stage ORDER BY stage", params)
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+class HistoryWriter:
+    """Ograniczona kolejka zapisów historii wykonywanych przez wątek w tle (w kolejności zgłoszenia)."""
+
+    def __init__(self, store: HistoryStore, queue_size: Optional[int] = None):
+        self.store = store
+        if queue_size is None:
+            try:
+                queue_size = int(os.getenv("HISTORY_QUEUE_SIZE", "").strip() or 1000)
+            except ValueError:
+                queue_size = 1000
+        self.stats: Dict[str, int] = {"queued": 0, "written": 0, "dropped": 0, "errors": 0}
+        self._queue: "queue.Queue" = queue.Queue(maxsize=max(1, queue_size))
+        self._stopping = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="history-writer", daemon=True)
+        self._thread.start()
+
+    def submit(self, job: Callable[[HistoryStore], Any]) -> Optional[Future]:
+        """Kolejkuje `job(store)` bez blokowania; None, gdy kolejka jest pełna (zapis odrzucony)."""
+        future: Future = Future()
+        try:
+            self._queue.put_nowait((job, future))
+        except queue.Full:
+            self.stats["dropped"] += 1
+            log_warning("Kolejka zapisów historii jest pełna - zapis odrzucony")
+            return None
+        self.stats["queued"] += 1
+        return future
+
+    def flush(self, timeout: Optional[float] = 10.0) -> bool:
+        """Czeka, aż zapisy zgłoszone do tej chwili zostaną wykonane."""
+        if not self._thread.is_alive():
+            return False
+        future: Future = Future()
+        self._queue.put((None, future))
+        try:
+            future.result(timeout)
+            return True
+        except Exception:
+            return False
+
+    def close(self, timeout: Optional[float] = 10.0):
+        """Wykonuje zakolejkowane zapisy i zatrzymuje wątek."""
+        if self._thread.is_alive():
+            self._stopping.set()
+            self._thread.join(timeout)
+
+    def _run(self):
+        while True:
+            try:
+                job, future = self._queue.get(timeout=0.2)
+            except queue.Empty:
+                if self._stopping.is_set():
+                    return
+                continue
+            if job is None:
+                future.set_result(True)
+                continue
+            try:
+                future.set_result(job(self.store))
+                self.stats["written"] += 1
+            except Exception as e:
+                # Zależne zapisy (artefakty interakcji) dostają None zamiast wyjątku
+                self.stats["errors"] += 1
+                log_warning(f"Zapis historii nie powiódł się: {e}")
+                future.set_result(None)
+
+
+_store: Optional[HistoryStore] = None
+_store_lock = threading.Lock()
+_store_failed = False
+_writer: Optional[HistoryWriter] = None
+
+
+def get_history_store() -> Optional[HistoryStore]:
+    """Wspólny magazyn historii wg HISTORY_DB_PROVIDER (domyślnie none); None, gdy wyłączony."""
+    global _store, _store_failed
+    if _store is None and not _store_failed:
+        with _store_lock:
+            if _store is None and not _store_failed:
+                provider = os.getenv("HISTORY_DB_PROVIDER", "").strip().lower() or "none"
+                if provider == "none":
+                    _store_failed = True
+                    return None
+                try:
+                    _store = HistoryStore(provider)
+                    log_debug(f"Historia generowania: {provider}")
+                except Exception as e:
+                    _store_failed = True
+                    log_warning(f"Historia generowania niedostępna ({provider}): {e}")
+    return _store
+
+
+def get_history_writer() -> Optional[HistoryWriter]:
+    """Wspólny wątek zapisujący historię (leniwie tworzony); None, gdy historia jest wyłączona."""
+    global _writer
+    if _writer is None:
+        store = get_history_store()
+        if store is None:
+            return None
+        with _store_lock:
+            if _writer is None:
+                _writer = HistoryWriter(store)
+                atexit.register(shutdown_history)
+    return _writer
+
+
+def submit_history_job(job: Callable[[HistoryStore], Any]) -> Optional[Future]:
+    """Wykonuje `job(store)` w wątku zapisującym historii; None, gdy historia jest wyłączona."""
+    writer = get_history_writer()
+    if writer is None:
+        return None
+    return writer.submit(job)
+
+
+def _resolve(value):
+    # Future zgłoszony wcześniej w tej samej kolejce jest już rozstrzygnięty
+    return value.result() if isinstance(value, Future) else value
+
+
+def record_interaction(prompt: str, response: str, model: Optional[str] = None, **kwargs) -> Optional[Future]:
+    """Kolejkuje `HistoryStore.record_interaction`; Future z {"request_id", "response_id"} (lub None)."""
+    return submit_history_job(lambda store: store.record_interaction(prompt, response, model, **kwargs))
+
+
+def record_artifact(kind: str, content: str, interaction: Optional[Future] = None, **kwargs) -> Optional[Future]:
+    """Kolejkuje `HistoryStore.record_artifact`; `interaction` (wynik `record_interaction`)
+    uzupełnia request_id/response_id po zapisaniu interakcji."""
+
+    def job(store: HistoryStore):
+        ids = _resolve(interaction) or {}
+        kwargs.setdefault("request_id", ids.get("request_id"))
+        kwargs.setdefault("response_id", ids.get("response_id"))
+        return store.record_artifact(kind, content, **kwargs)
+
+    return submit_history_job(job)
+
+
+def shutdown_history(timeout: Optional[float] = 10.0):
+    """Wykonuje zakolejkowane zapisy historii (wywoływane też przez atexit)."""
+    global _writer
+    with _store_lock:
+        writer, _writer = _writer, None
+    if writer is not None:
+        writer.close(timeout)
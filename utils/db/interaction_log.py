@@ -0,0 +1,437 @@
+"""
+Asynchroniczny zapis interakcji z modelami AI (tabela `ai_logs`).
+
+`log_ai_interaction(...)` tylko wstawia wiersz do ograniczonej kolejki w pamięci
+i natychmiast wraca - wątek zapisujący zbiera wiersze w partie i zapisuje je
+jednym wielowierszowym INSERT-em przez pulę połączeń danego dostawcy:
+
+    mysql       - mysql.connector.pooling, executemany (INSERT ... VALUES (...), (...))
+    postgresql  - psycopg2.pool, execute_values
+    sqlite      - lokalny plik bez konfiguracji (domyślnie ai_logs.db)
+
+Gdy baza jest niedostępna albo kolejka jest pełna, wiersze trafiają do pliku
+JSONL (AI_LOG_SPILL_PATH) i są dopisywane do bazy po jej powrocie; przy
+AI_LOG_OVERFLOW=drop nadmiarowe wiersze są odrzucane (i liczone). Przy
+zamykaniu procesu kolejka jest opróżniana (atexit).
+
+Konfiguracja (.env): DB_PROVIDER, DB_HOST, DB_PORT, DB_NAME, DB_USER,
+DB_PASSWORD, AI_LOG_SQLITE_PATH, AI_LOG_POOL_SIZE, AI_LOG_QUEUE_SIZE,
+AI_LOG_BATCH_SIZE, AI_LOG_FLUSH_INTERVAL, AI_LOG_OVERFLOW, AI_LOG_SPILL_PATH.
+"""
+
+import atexit
+import json
+import os
+import queue
+import sqlite3
+import threading
+import time
+from dataclasses import asdict, dataclass, field
+from datetime import datetime
+from typing import Dict, List, Optional, Sequence
+
+from utils.logger_utils import log_debug, log_warning
+
+COLUMNS = ("timestamp", "request", "response", "model_name", "user_id", "status_code", "latency_ms")
+
+OVERFLOW_DROP = "drop"
+OVERFLOW_SPILL = "spill"
+
+
+@dataclass
+class AIInteraction:
+    """Wiersz tabeli `ai_logs`."""
+    request: str
+    response: str
+    model_name: Optional[str] = None
+    user_id: Optional[str] = None
+    status_code: Optional[int] = None
+    latency_ms: Optional[int] = None
+    timestamp: str = field(default_factory=lambda: datetime.now().isoformat(sep=" ", timespec="seconds"))
+
+    def values(self) -> tuple:
+        return tuple(getattr(self, column) for column in COLUMNS)
+
+
+def _env_int(name: str, default: int) -> int:
+    try:
+        return int(os.getenv(name, "").strip() or default)
+    except ValueError:
+        return default
+
+
+def _env_float(name: str, default: float) -> float:
+    try:
+        return float(os.getenv(name, "").strip() or default)
+    except ValueError:
+        return default
+
+
+# ---------------------------------------------------------------------------
+# Backendy
+# ---------------------------------------------------------------------------
+
+class SQLiteBackend:
+    """Lokalna baza SQLite; tabela tworzona przy pierwszym połączeniu."""
+
+    name = "sqlite"
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = path or os.getenv("AI_LOG_SQLITE_PATH", "").strip() or "ai_logs.db"
+        self._conn: Optional[sqlite3.Connection] = None
+
+    def _connection(self) -> sqlite3.Connection:
+        # Używane wyłącznie z wątku zapisującego
+        if self._conn is None:
+            self._conn = sqlite3.connect(self.path, check_same_thread=False)
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS ai_logs (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    timestamp TEXT DEFAULT CURRENT_TIMESTAMP,
+                    request TEXT NOT NULL,
+                    response TEXT NOT NULL,
+                    model_name TEXT,
+                    user_id TEXT,
+                    status_code INTEGER,
+                    latency_ms INTEGER
+                )""")
+            self._conn.commit()
+        return self._conn
+
+    def write_batch(self, rows: Sequence[AIInteraction]):
+        conn = self._connection()
+        with conn:
+            conn.executemany(
+                f"INSERT INTO ai_logs ({', '.join(COLUMNS)}) VALUES ({', '.join('?' * len(COLUMNS))})",
+                [row.values() for row in rows])
+
+    def close(self):
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+
+
+class MySQLBackend:
+    """MySQL przez pulę połączeń mysql.connector; executemany składa wielowierszowy INSERT."""
+
+    name = "mysql"
+
+    def __init__(self, pool_size: Optional[int] = None):
+        self.pool_size = pool_size or _env_int("AI_LOG_POOL_SIZE", 2)
+        self._pool = None
+
+    def _connection(self):
+        if self._pool is None:
+            from mysql.connector import pooling
+            self._pool = pooling.MySQLConnectionPool(
+                pool_name="ai_logs",
+                pool_size=self.pool_size,
+                host=os.getenv("DB_HOST"),
+                port=int(os.getenv("DB_PORT") or 3306),
+                database=os.getenv("DB_NAME"),
+                user=os.getenv("DB_USER"),
+                password=os.getenv("DB_PASSWORD"),
+            )
+        return self._pool.get_connection()
+
+    def write_batch(self, rows: Sequence[AIInteraction]):
+        conn = self._connection()
+        try:
+            cursor = conn.cursor()
+            cursor.executemany(
+                f"INSERT INTO ai_logs ({', '.join(COLUMNS)}) VALUES ({', '.join(['%s'] * len(COLUMNS))})",
+                [row.values() for row in rows])
+            conn.commit()
+            cursor.close()
+        finally:
+            conn.close()  # zwraca połączenie do puli
+
+    def close(self):
+        self._pool = None
+
+
+class PostgreSQLBackend:
+    """PostgreSQL przez psycopg2.pool; partia zapisywana jednym execute_values."""
+
+    name = "postgresql"
+
+    def __init__(self, pool_size: Optional[int] = None):
+        self.pool_size = pool_size or _env_int("AI_LOG_POOL_SIZE", 2)
+        self._pool = None
+
+    def write_batch(self, rows: Sequence[AIInteraction]):
+        from psycopg2.extras import execute_values
+        if self._pool is None:
+            from psycopg2 import pool
+            self._pool = pool.ThreadedConnectionPool(
+                1, self.pool_size,
+                host=os.getenv("DB_HOST"),
+                port=int(os.getenv("DB_PORT") or 5432),
+                database=os.getenv("DB_NAME"),
+                user=os.getenv("DB_USER"),
+                password=os.getenv("DB_PASSWORD"),
+            )
+        conn = self._pool.getconn()
+        try:
+            with conn.cursor() as cursor:
+                execute_values(cursor, f"INSERT INTO ai_logs ({', '.join(COLUMNS)}) VALUES %s",
+                               [row.values() for row in rows])
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            self._pool.putconn(conn)
+
+    def close(self):
+        if self._pool is not None:
+            self._pool.closeall()
+            self._pool = None
+
+
+BACKENDS = {
+    "sqlite": SQLiteBackend,
+    "mysql": MySQLBackend,
+    "postgresql": PostgreSQLBackend,
+    "postgres": PostgreSQLBackend,
+}
+
+
+def create_backend(provider: Optional[str] = None):
+    """Backend dla DB_PROVIDER (None, gdy zapis interakcji jest wyłączony)."""
+    provider = (provider if provider is not None else os.getenv("DB_PROVIDER", "")).strip().lower()
+    if not provider or provider == "none":
+        return None
+    backend_class = BACKENDS.get(provider)
+    if backend_class is None:
+        log_warning(f"Nieznany DB_PROVIDER={provider!r} - interakcje AI nie będą zapisywane")
+        return None
+    return backend_class()
+
+
+# ---------------------------------------------------------------------------
+# Kolejka i wątek zapisujący
+# ---------------------------------------------------------------------------
+
+class InteractionLogWriter:
+    """Ograniczona kolejka interakcji opróżniana partiami przez wątek w tle."""
+
+    def __init__(self, backend, queue_size: Optional[int] = None, batch_size: Optional[int] = None,
+                 flush_interval: Optional[float] = None, overflow: Optional[str] = None,
+                 spill_path: Optional[str] = None):
+        self.backend = backend
+        self.batch_size = max(1, batch_size or _env_int("AI_LOG_BATCH_SIZE", 50))
+        self.flush_interval = flush_interval if flush_interval is not None else _env_float("AI_LOG_FLUSH_INTERVAL", 2.0)
+        self.overflow = (overflow or os.getenv("AI_LOG_OVERFLOW", "").strip().lower() or OVERFLOW_SPILL)
+        self.spill_path = spill_path or os.getenv("AI_LOG_SPILL_PATH", "").strip() or "ai_logs_spill.jsonl"
+        self.stats: Dict[str, int] = {"queued": 0, "written": 0, "batches": 0, "dropped": 0,
+                                      "spilled": 0, "replayed": 0, "corrupt": 0, "errors": 0}
+
+        self._queue: "queue.Queue[AIInteraction]" = queue.Queue(maxsize=queue_size or _env_int("AI_LOG_QUEUE_SIZE", 1000))
+        self._flush_requests: "queue.Queue[threading.Event]" = queue.Queue()
+        self._spill_lock = threading.Lock()
+        self._stopping = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="ai-log-writer", daemon=True)
+        self._thread.start()
+
+    def log(self, interaction: AIInteraction) -> bool:
+        """Dodaje interakcję do kolejki bez blokowania; False, gdy kolejka była pełna."""
+        try:
+            self._queue.put_nowait(interaction)
+            self.stats["queued"] += 1
+            return True
+        except queue.Full:
+            if self.overflow == OVERFLOW_SPILL:
+                self._spill([interaction])
+            else:
+                self.stats["dropped"] += 1
+            return False
+
+    def flush(self, timeout: Optional[float] = 10.0) -> bool:
+        """Czeka, aż wiersze zakolejkowane do tej chwili zostaną zapisane (lub odłożone na dysk)."""
+        if not self._thread.is_alive():
+            return False
+        done = threading.Event()
+        self._flush_requests.put(done)
+        return done.wait(timeout)
+
+    def close(self, timeout: Optional[float] = 10.0):
+        """Opróżnia kolejkę i zatrzymuje wątek zapisujący."""
+        if self._thread.is_alive():
+            self._stopping.set()
+            self._thread.join(timeout)
+        if self.backend is not None:
+            try:
+                self.backend.close()
+            except Exception as e:
+                log_debug(f"Zamykanie backendu ai_logs: {e}")
+
+    def _take_batch(self, timeout: float) -> List[AIInteraction]:
+        batch = []
+        try:
+            batch.append(self._queue.get(timeout=timeout))
+            while len(batch) < self.batch_size:
+                batch.append(self._queue.get_nowait())
+        except queue.Empty:
+            pass
+        return batch
+
+    def _run(self):
+        deadline = time.monotonic() + self.flush_interval
+        pending: List[AIInteraction] = []
+        while True:
+            stopping = self._stopping.is_set()
+            flush_events = []
+            while not self._flush_requests.empty():
+                flush_events.append(self._flush_requests.get_nowait())
+            draining = stopping or bool(flush_events)
+
+            pending.extend(self._take_batch(0 if draining else min(0.2, max(0.0, deadline - time.monotonic()))))
+            while draining and not self._queue.empty():
+                pending.extend(self._take_batch(0))
+
+            if pending and (draining or len(pending) >= self.batch_size or time.monotonic() >= deadline):
+                for start in range(0, len(pending), self.batch_size):
+                    try:
+                        self._write(pending[start:start + self.batch_size])
+                    except Exception as e:
+                        # Wątek zapisujący nie może zginąć - kolejne interakcje i flush() czekają na niego
+                        self.stats["errors"] += 1
+                        log_warning(f"Nieoczekiwany błąd zapisu interakcji AI: {e}")
+                pending = []
+            if time.monotonic() >= deadline or draining:
+                deadline = time.monotonic() + self.flush_interval
+
+            for event in flush_events:
+                event.set()
+            if stopping:
+                return
+
+    def _write(self, rows: List[AIInteraction]):
+        try:
+            self.backend.write_batch(rows)
+        except Exception as e:
+            self.stats["errors"] += 1
+            log_warning(f"Zapis {len(rows)} interakcji AI do bazy nie powiódł się: {e}")
+            if self.overflow == OVERFLOW_SPILL:
+                self._spill(rows)
+            else:
+                self.stats["dropped"] += len(rows)
+            return
+        self.stats["written"] += len(rows)
+        self.stats["batches"] += 1
+        self._replay_spill()
+
+    def _spill(self, rows: Sequence[AIInteraction]):
+        with self._spill_lock:
+            try:
+                with open(self.spill_path, "a", encoding="utf-8") as f:
+                    for row in rows:
+                        f.write(json.dumps(asdict(row), ensure_ascii=False) + "\n")
+                self.stats["spilled"] += len(rows)
+            except OSError as e:
+                self.stats["dropped"] += len(rows)
+                log_warning(f"Nie można zapisać interakcji AI do {self.spill_path}: {e}")
+
+    def _replay_spill(self):
+        """Po udanym zapisie dopisuje do bazy wiersze odłożone wcześniej na dysk.
+
+        Plik jest najpierw przenoszony do `<spill>.replay`; plik .replay pozostawiony
+        przez przerwany zapis (awaria bazy, zamknięcie procesu) jest wznawiany w pierwszej
+        kolejności. Uszkodzone linie (np. ucięta ostatnia linia po awarii) są pomijane
+        i liczone w stats["corrupt"].
+        """
+        replay_path = self.spill_path + ".replay"
+        with self._spill_lock:
+            if not os.path.exists(replay_path):
+                if not os.path.exists(self.spill_path):
+                    return
+                try:
+                    os.replace(self.spill_path, replay_path)
+                except OSError:
+                    return
+
+        rows: List[AIInteraction] = []
+        corrupt = 0
+        try:
+            with open(replay_path, encoding="utf-8", errors="replace") as f:
+                for line in f:
+                    if not line.strip():
+                        continue
+                    try:
+                        rows.append(AIInteraction(**json.loads(line)))
+                    except (ValueError, TypeError):
+                        corrupt += 1
+        except OSError as e:
+            log_warning(f"Nie można odczytać odłożonych interakcji AI z {replay_path}: {e}")
+            return
+        if corrupt:
+            self.stats["corrupt"] += corrupt
+            log_warning(f"Pominięto {corrupt} uszkodzonych linii w {replay_path}")
+
+        written = 0
+        try:
+            for start in range(0, len(rows), self.batch_size):
+                batch = rows[start:start + self.batch_size]
+                self.backend.write_batch(batch)
+                written += len(batch)
+        except Exception as e:
+            log_warning(f"Ponowny zapis odłożonych interakcji AI nie powiódł się: {e}")
+            # Plik .replay zostaje (tylko z niezapisanymi wierszami) - kolejna próba go wznowi
+            self._rewrite_replay(replay_path, rows[written:])
+        else:
+            try:
+                os.remove(replay_path)
+            except OSError as e:
+                log_warning(f"Nie można usunąć {replay_path}: {e}")
+        self.stats["replayed"] += written
+        log_debug(f"Dopisano do bazy {written} odłożonych interakcji AI")
+
+    def _rewrite_replay(self, replay_path: str, rows: Sequence[AIInteraction]):
+        temp_path = replay_path + ".tmp"
+        try:
+            with open(temp_path, "w", encoding="utf-8") as f:
+                for row in rows:
+                    f.write(json.dumps(asdict(row), ensure_ascii=False) + "\n")
+            os.replace(temp_path, replay_path)
+        except OSError as e:
+            # Pozostaje pełny plik .replay - wiersze już zapisane mogą zostać dopisane ponownie
+            log_warning(f"Nie można zaktualizować {replay_path}: {e}")
+
+
+_writer: Optional[InteractionLogWriter] = None
+_writer_lock = threading.Lock()
+
+
+def get_interaction_log_writer() -> Optional[InteractionLogWriter]:
+    """Wspólny (leniwie tworzony) zapis interakcji dla DB_PROVIDER; None, gdy wyłączony."""
+    global _writer
+    if _writer is None:
+        with _writer_lock:
+            if _writer is None:
+                backend = create_backend()
+                if backend is None:
+                    return None
+                _writer = InteractionLogWriter(backend)
+                atexit.register(shutdown_interaction_log)
+                log_debug(f"Zapis interakcji AI: backend {backend.name}")
+    return _writer
+
+
+def log_ai_interaction(request: str, response: str, model_name: str = None,
+                       user_id: str = None, status_code: int = None,
+                       latency_ms: int = None) -> bool:
+    """Kolejkuje interakcję do zapisu w `ai_logs` (nie blokuje wywołującego)."""
+    writer = get_interaction_log_writer()
+    if writer is None:
+        return False
+    return writer.log(AIInteraction(request, response, model_name, user_id, status_code, latency_ms))
+
+
+def shutdown_interaction_log(timeout: Optional[float] = 10.0):
+    """Zapisuje zakolejkowane interakcje i zamyka połączenia (wywoływane też przez atexit)."""
+    global _writer
+    with _writer_lock:
+        writer, _writer = _writer, None
+    if writer is not None:
+        writer.close(timeout)
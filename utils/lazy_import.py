@@ -0,0 +1,88 @@
+"""
+Leniwe importy - odroczone ładowanie ciężkich podsystemów.
+
+Aplikacje (desktop i Streamlit) potrzebują parserów PlantUML, generatorów XMI,
+obsługi PDF (fitz, PyPDF2) czy BPMN v2 dopiero przy konkretnej akcji
+użytkownika, a zwykle tylko dla jednego typu diagramu. `LazyImport` zastępuje
+import na poziomie modułu obiektem-pełnomocnikiem: moduł jest importowany przy
+pierwszym wywołaniu lub odczycie atrybutu, a czas importu jest zapisywany.
+
+Przykład:
+    PlantUMLClassParser = LazyImport("utils.plantuml.plantuml_class_parser", "PlantUMLClassParser")
+    parser = PlantUMLClassParser()   # import następuje dopiero tutaj
+"""
+
+import importlib
+import importlib.util
+import sys
+import threading
+import time
+from typing import Any, Dict, Optional
+
+from utils.logger_utils import log_debug
+
+_import_times: Dict[str, float] = {}
+_lock = threading.RLock()
+
+
+def module_available(*module_names: str) -> bool:
+    """Sprawdza bez importowania, czy wszystkie moduły są zainstalowane."""
+    for name in module_names:
+        try:
+            if importlib.util.find_spec(name) is None:
+                return False
+        except (ImportError, ValueError):
+            return False
+    return True
+
+
+def load_module(module_name: str):
+    """Importuje moduł (raz) i zapamiętuje czas pierwszego importu."""
+    module = sys.modules.get(module_name)
+    if module is not None:
+        return module
+    with _lock:
+        start = time.perf_counter()
+        module = importlib.import_module(module_name)
+        elapsed = time.perf_counter() - start
+        _import_times.setdefault(module_name, elapsed)
+    log_debug(f"Lazy import {module_name}: {elapsed * 1000:.1f} ms")
+    return module
+
+
+def get_import_times() -> Dict[str, float]:
+    """Czasy (w sekundach) leniwie zaimportowanych modułów."""
+    return dict(_import_times)
+
+
+class LazyImport:
+    """Pełnomocnik obiektu (klasy, funkcji) z modułu importowanego przy pierwszym użyciu."""
+
+    __slots__ = ("_module_name", "_attr", "_target")
+
+    def __init__(self, module_name: str, attr: Optional[str] = None):
+        self._module_name = module_name
+        self._attr = attr
+        self._target = None
+
+    def load(self) -> Any:
+        """Importuje moduł i zwraca wskazany obiekt (ImportError propaguje się do wywołującego)."""
+        if self._target is None:
+            module = load_module(self._module_name)
+            self._target = getattr(module, self._attr) if self._attr else module
+        return self._target
+
+    @property
+    def loaded(self) -> bool:
+        return self._target is not None
+
+    def __call__(self, *args, **kwargs):
+        return self.load()(*args, **kwargs)
+
+    def __getattr__(self, name: str):
+        return getattr(self.load(), name)
+
+    def __repr__(self) -> str:
+        state = "loaded" if self.loaded else "not loaded"
+        target = f"{self._module_name}.{self._attr}" if self._attr else self._module_name
+        return f"<LazyImport {target} ({state})>"
@@ -1,70 +1,229 @@
+import atexit
+import copy
+import json
 import logging
+import logging.handlers
 import os
+import queue
 import traceback
 from datetime import datetime
 # Globalny logger
 logger = None
+# Wątek zapisujący rekordy z kolejki do handlerów (tryb asynchroniczny)
+_listener = None
+
+TEXT_FORMAT = '%(asctime)s [%(levelname)s] %(message)s'
+DATE_FORMAT = '%Y-%m-%d %H:%M:%S'
+
+
+class JsonFormatter(logging.Formatter):
+    """Formatuje rekord jako jedną linię JSON (pola przekazane do log_* trafiają do obiektu)."""
+
+    def format(self, record):
+        entry = {
+            "time": datetime.fromtimestamp(record.created).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "module": record.module,
+            "line": record.lineno,
+            "thread": record.threadName,
+            "message": record.getMessage(),
+        }
+        for key, value in (getattr(record, "fields", None) or {}).items():
+            entry.setdefault(key, value)
+        if record.exc_info:
+            entry["exception"] = self.formatException(record.exc_info)
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+class _RotatingFileHandler(logging.handlers.RotatingFileHandler):
+    """RotatingFileHandler sprawdzający rozmiar po zapisie (pozycja bufora pliku).
+
+    Standardowa implementacja przed każdym wpisem formatuje rekord drugi raz
+    i wywołuje stat() na pliku; tu rotacja następuje po przekroczeniu maxBytes.
+    Przy `flush_each=False` bufor opróżnia wywołujący flush() (QueueListener
+    robi to, gdy kolejka jest pusta), a nie każdy wpis - limit może wtedy zostać
+    przekroczony o rozmiar bufora tekstowego (8 KB).
+    """
+
+    def __init__(self, *args, flush_each=True, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.flush_each = flush_each
+
+    def emit(self, record):
+        try:
+            if self.stream is None:
+                self.stream = self._open()
+            self.stream.write(self.format(record) + self.terminator)
+            if self.flush_each:
+                self.flush()
+            if self.maxBytes > 0 and self.stream.buffer.tell() >= self.maxBytes:
+                self.doRollover()
+        except RecursionError:
+            raise
+        except Exception:
+            self.handleError(record)
+
+
+class _FlushingQueueListener(logging.handlers.QueueListener):
+    """QueueListener opróżniający bufory handlerów dopiero po obsłużeniu zaległych wpisów."""
+
+    def dequeue(self, block):
+        if block:
+            try:
+                return self.queue.get_nowait()
+            except queue.Empty:
+                for handler in self.handlers:
+                    handler.flush()
+        return self.queue.get(block)
+
+
+class _DeferredQueueHandler(logging.handlers.QueueHandler):
+    """QueueHandler przekazujący rekord do wątku QueueListener.
+
+    Argumenty `%` są wstawiane do komunikatu w wątku wywołującym (jak w
+    `QueueHandler.prepare`) - zmiana mutowalnego argumentu po powrocie z `log_*`
+    nie zmienia wpisu. Formatowanie wg formatera (tekst/JSON), wyjątki i zapis do
+    pliku odbywają się w wątku w tle; wyłączone poziomy nie docierają tutaj
+    dzięki sprawdzaniu `isEnabledFor` w `log_*`.
+    """
+
+    def prepare(self, record):
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        return record
+
+
+def _env_int(name, default):
+    try:
+        return int(os.getenv(name, "").strip() or default)
+    except ValueError:
+        return default
+
+
+def _env_level(name, default):
+    level = os.getenv(name, "").strip().upper() or default
+    return getattr(logging, level, getattr(logging, default))
+
+
+def _stop_listener():
+    global _listener
+    if _listener is not None:
+        _listener.stop()  # opróżnia kolejkę przed zakończeniem
+        # Handlery należą do listenera, nie do loggera - zamknij je tutaj (deskryptor pliku logu)
+        for handler in _listener.handlers:
+            handler.close()
+        _listener = None
+
 
 def setup_logger(log_file="app.log", console_level="INFO", file_level="DEBUG"):
-    """Konfiguruje globalny logger z obsługą pliku i konsoli."""
+    """Konfiguruje globalny logger z obsługą pliku i konsoli.
+
+    Konfiguracja (.env):
+      LOG_LEVEL, LOG_CONSOLE_LEVEL - nadpisują poziom pliku i konsoli z argumentów,
+      LOG_FORMAT=json - plik jako linie JSON (konsola pozostaje tekstowa),
+      LOG_MAX_BYTES, LOG_BACKUP_COUNT - rotacja pliku logu,
+      LOG_ASYNC=0 - zapis synchroniczny zamiast kolejki i wątku w tle.
+    """
     global logger
-    
+
     # Usuń poprzednie handlery, jeśli istnieją
     if logger:
+        _stop_listener()
         for handler in logger.handlers[:]:
             logger.removeHandler(handler)
-    
-    # Utwórz logger
+            handler.close()
+
+    console_level = _env_level("LOG_CONSOLE_LEVEL", console_level)
+    file_level = _env_level("LOG_LEVEL", file_level)
+
+    # Utwórz logger - poziom loggera to najniższy z poziomów handlerów,
+    # dzięki czemu isEnabledFor(DEBUG) jest fałszywe, gdy nikt nie zapisuje DEBUG
     logger = logging.getLogger("xmi_generator")
-    logger.setLevel(logging.DEBUG)  # Najniższy poziom logowania
-    
+    logger.setLevel(min(console_level, file_level))
+
     # Formatowanie wiadomości
-    formatter = logging.Formatter('%(asctime)s [%(levelname)s] %(message)s', '%Y-%m-%d %H:%M:%S')
-    
+    formatter = logging.Formatter(TEXT_FORMAT, DATE_FORMAT)
+
     # Handler dla konsoli
     console_handler = logging.StreamHandler()
-    console_handler.setLevel(getattr(logging, console_level))
+    console_handler.setLevel(console_level)
     console_handler.setFormatter(formatter)
-    
-    # Handler dla pliku
-    file_handler = logging.FileHandler(log_file, encoding='utf-8')
-    file_handler.setLevel(getattr(logging, file_level))
-    file_handler.setFormatter(formatter)
-    
-    # Dodaj handlery
-    logger.addHandler(console_handler)
-    logger.addHandler(file_handler)
-    
+
+    # Handler dla pliku (z rotacją, aby log nie rósł bez ograniczeń)
+    use_queue = os.getenv("LOG_ASYNC", "1").strip().lower() not in ("0", "false", "no")
+    file_handler = _RotatingFileHandler(
+        log_file,
+        maxBytes=_env_int("LOG_MAX_BYTES", 10 * 1024 * 1024),
+        backupCount=_env_int("LOG_BACKUP_COUNT", 5),
+        encoding='utf-8',
+        flush_each=not use_queue,
+    )
+    file_handler.setLevel(file_level)
+    if os.getenv("LOG_FORMAT", "text").strip().lower() == "json":
+        file_handler.setFormatter(JsonFormatter())
+    else:
+        file_handler.setFormatter(formatter)
+
+    # Dodaj handlery - w trybie asynchronicznym przez kolejkę obsługiwaną w wątku w tle
+    if not use_queue:
+        logger.addHandler(console_handler)
+        logger.addHandler(file_handler)
+    else:
+        global _listener
+        log_queue = queue.SimpleQueue()
+        logger.addHandler(_DeferredQueueHandler(log_queue))
+        _listener = _FlushingQueueListener(
+            log_queue, console_handler, file_handler, respect_handler_level=True)
+        _listener.start()
+
     return logger
 
-# Funkcje pomocnicze do różnych poziomów logowania
-def log_debug(message):
-    """Loguje wiadomość na poziomie DEBUG."""
-    global logger
+
+def shutdown_logger():
+    """Zapisuje zaległe wpisy z kolejki i zamyka handlery."""
+    _stop_listener()
     if logger:
-        logger.debug(message)
+        for handler in logger.handlers[:]:
+            handler.flush()
+
+
+atexit.register(shutdown_logger)
 
-def log_info(message):
+
+def debug_enabled():
+    """Czy wpisy DEBUG są zapisywane - do pomijania kosztownego budowania komunikatów."""
+    return logger is not None and logger.isEnabledFor(logging.DEBUG)
+
+
+def _log(level, message, args, fields):
+    # stacklevel=3: moduł i linia wywołującego log_*, nie tej funkcji
+    if logger is not None and logger.isEnabledFor(level):
+        logger.log(level, message, *args, extra={"fields": fields} if fields else None, stacklevel=3)
+
+# Funkcje pomocnicze do różnych poziomów logowania.
+# Argumenty pozycyjne są wstawiane leniwie (log_debug("Węzeł %s", node_id)) - tylko
+# gdy poziom jest włączony; argumenty nazwane trafiają jako pola do logu JSON.
+def log_debug(message, *args, **fields):
+    """Loguje wiadomość na poziomie DEBUG."""
+    _log(logging.DEBUG, message, args, fields)
+
+def log_info(message, *args, **fields):
     """Loguje wiadomość na poziomie INFO."""
-    global logger
-    if logger:
-        logger.info(message)
+    _log(logging.INFO, message, args, fields)
 
-def log_warning(message):
+def log_warning(message, *args, **fields):
     """Loguje wiadomość na poziomie WARNING."""
-    global logger
-    if logger:
-        logger.warning(message)
+    _log(logging.WARNING, message, args, fields)
 
-def log_error(message):
+def log_error(message, *args, **fields):
     """Loguje wiadomość na poziomie ERROR."""
-    global logger
-    if logger:
-        logger.error(message)
+    _log(logging.ERROR, message, args, fields)
 
 def log_exception(e, message="Wystąpił wyjątek"):
     """Loguje wyjątek wraz z pełnym traceback."""
     global logger
     if logger:
         logger.error(f"{message}: {str(e)}")
-        logger.error(traceback.format_exc())
\ No newline at end of file
+        logger.error(traceback.format_exc())
@@ -0,0 +1,307 @@
+"""
+Rejestr metryk w procesie: liczniki i histogramy strumieniowe o stałej pamięci.
+
+Histogram to szkic z kubełkami logarytmicznymi (jak DDSketch/HDR): każda
+obserwacja trafia do kubełka o względnej szerokości ~2 * `relative_accuracy`,
+więc percentyle (p50/p95/p99) mają gwarantowany błąd względny, a liczba
+kubełków jest ograniczona (`max_buckets`) niezależnie od liczby obserwacji.
+Liczba serii (nazwa + etykiety) też jest ograniczona - nadmiarowe kombinacje
+etykiet trafiają do serii z wartościami "other".
+
+    registry = get_registry()
+    registry.histogram("model_response_ms", model="gpt-4o").observe(1830)
+    registry.counter("model_responses_total", model="gpt-4o", status="SUCCESS").inc()
+    registry.histogram("model_response_ms", model="gpt-4o").percentile(95)
+    registry.to_prometheus()                 # format tekstowy Prometheus
+    start_metrics_server(9108)               # GET /metrics
+
+Konfiguracja (.env): METRICS_MAX_SERIES, METRICS_PORT.
+"""
+
+import math
+import os
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from utils.logger_utils import log_info, log_warning
+
+DEFAULT_QUANTILES = (0.5, 0.95, 0.99)
+
+LabelKey = Tuple[Tuple[str, str], ...]
+
+
+def _env_int(name: str, default: int) -> int:
+    try:
+        return int(os.getenv(name, "").strip() or default)
+    except ValueError:
+        return default
+
+
+class Counter:
+    """Licznik monotoniczny."""
+
+    def __init__(self):
+        self.value = 0.0
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1.0):
+        with self._lock:
+            self.value += amount
+
+
+class StreamingHistogram:
+    """Histogram z kubełkami logarytmicznymi: stała pamięć, percentyle z błędem względnym."""
+
+    def __init__(self, relative_accuracy: float = 0.01, max_buckets: int = 2048):
+        self.relative_accuracy = relative_accuracy
+        self.gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self._log_gamma = math.log(self.gamma)
+        self.max_buckets = max_buckets
+        self.buckets: Dict[int, int] = {}
+        self.zero_count = 0   # obserwacje <= 0
+        self.count = 0
+        self.sum = 0.0
+        self.min = math.inf
+        self.max = -math.inf
+        self._lock = threading.Lock()
+
+    def _index(self, value: float) -> int:
+        return math.ceil(math.log(value) / self._log_gamma)
+
+    def _value(self, index: int) -> float:
+        # Środek kubełka (gamma^(i-1), gamma^i] z błędem względnym <= relative_accuracy
+        return 2 * self.gamma ** index / (self.gamma + 1)
+
+    def observe(self, value: float):
+        with self._lock:
+            self.count += 1
+            self.sum += value
+            self.min = min(self.min, value)
+            self.max = max(self.max, value)
+            if value <= 0:
+                self.zero_count += 1
+                return
+            index = self._index(value)
+            self.buckets[index] = self.buckets.get(index, 0) + 1
+            if len(self.buckets) > self.max_buckets:
+                self._collapse()
+
+    def _collapse(self):
+        # Scal najniższe kubełki - dokładność zachowana dla wysokich percentyli (opóźnienia)
+        indexes = sorted(self.buckets)
+        excess = len(indexes) - self.max_buckets + 1
+        target = indexes[excess]
+        for index in indexes[:excess]:
+            self.buckets[target] += self.buckets.pop(index)
+
+    def percentile(self, q: float) -> Optional[float]:
+        """Percentyl `q` (0-100); None, gdy brak obserwacji."""
+        with self._lock:
+            if self.count == 0:
+                return None
+            rank = q / 100 * (self.count - 1)
+            if rank < self.zero_count:
+                return 0.0 if self.min >= 0 else self.min
+            seen = self.zero_count
+            for index in sorted(self.buckets):
+                seen += self.buckets[index]
+                if seen > rank:
+                    return min(max(self._value(index), self.min), self.max)
+            return self.max
+
+    def fraction_below(self, threshold: float) -> Optional[float]:
+        """Udział obserwacji <= `threshold` (np. spełnienie SLO opóźnienia)."""
+        with self._lock:
+            if self.count == 0:
+                return None
+            if threshold <= 0:
+                return self.zero_count / self.count if threshold == 0 else 0.0
+            limit = self._index(threshold)
+            below = self.zero_count + sum(n for index, n in self.buckets.items() if index <= limit)
+            return below / self.count
+
+    @property
+    def mean(self) -> Optional[float]:
+        return self.sum / self.count if self.count else None
+
+    def summary(self, quantiles: Iterable[float] = DEFAULT_QUANTILES) -> Dict[str, Optional[float]]:
+        result = {"count": self.count, "sum": self.sum, "avg": self.mean,
+                  "min": self.min if self.count else None, "max": self.max if self.count else None}
+        for q in quantiles:
+            result[f"p{int(q * 100)}"] = self.percentile(q * 100)
+        return result
+
+
+class MetricsRegistry:
+    """Rejestr serii metryk (nazwa + etykiety) z ograniczoną liczbą serii."""
+
+    def __init__(self, max_series: Optional[int] = None):
+        self.max_series = max_series or _env_int("METRICS_MAX_SERIES", 1000)
+        self._counters: Dict[str, Dict[LabelKey, Counter]] = {}
+        self._histograms: Dict[str, Dict[LabelKey, StreamingHistogram]] = {}
+        self._help: Dict[str, str] = {}
+        self._series = 0
+        self._lock = threading.Lock()
+
+    def _get(self, family: Dict, factory, name: str, labels: Dict[str, object]):
+        key: LabelKey = tuple(sorted((k, str(v)) for k, v in labels.items()))
+        series = family.get(name)
+        if series is not None and key in series:
+            return series[key]
+        with self._lock:
+            series = family.setdefault(name, {})
+            if key not in series:
+                if self._series >= self.max_series:
+                    key = tuple((k, "other") for k, _ in key)
+                    if key in series:
+                        return series[key]
+                self._series += 1
+                series[key] = factory()
+            return series[key]
+
+    def counter(self, name: str, **labels) -> Counter:
+        return self._get(self._counters, Counter, name, labels)
+
+    def histogram(self, name: str, **labels) -> StreamingHistogram:
+        return self._get(self._histograms, StreamingHistogram, name, labels)
+
+    def describe(self, name: str, help_text: str):
+        self._help[name] = help_text
+
+    def histograms(self, name: str) -> Dict[LabelKey, StreamingHistogram]:
+        with self._lock:
+            return dict(self._histograms.get(name, {}))
+
+    def counters(self, name: str) -> Dict[LabelKey, Counter]:
+        with self._lock:
+            return dict(self._counters.get(name, {}))
+
+    def _snapshot(self, family: Dict) -> List[Tuple[str, List[Tuple[LabelKey, object]]]]:
+        # Kopia pod blokadą - _get może dodawać serie z innych wątków
+        with self._lock:
+            return [(name, list(series.items())) for name, series in sorted(family.items())]
+
+    def merged_histogram(self, name: str, **labels) -> Optional[StreamingHistogram]:
+        """Histogram zsumowany po seriach pasujących do podanych etykiet."""
+        wanted = {k: str(v) for k, v in labels.items()}
+        merged = None
+        for key, histogram in self.histograms(name).items():
+            if any(dict(key).get(k) != v for k, v in wanted.items()):
+                continue
+            if merged is None:
+                merged = StreamingHistogram(histogram.relative_accuracy, histogram.max_buckets)
+            with histogram._lock:
+                merged.count += histogram.count
+                merged.sum += histogram.sum
+                merged.min = min(merged.min, histogram.min)
+                merged.max = max(merged.max, histogram.max)
+                merged.zero_count += histogram.zero_count
+                for index, n in histogram.buckets.items():
+                    merged.buckets[index] = merged.buckets.get(index, 0) + n
+        return merged
+
+    def reset(self):
+        with self._lock:
+            self._counters.clear()
+            self._histograms.clear()
+            self._series = 0
+
+    def to_prometheus(self, quantiles: Iterable[float] = DEFAULT_QUANTILES) -> str:
+        """Eksport w formacie tekstowym Prometheus (histogramy jako `summary`)."""
+        lines: List[str] = []
+        for name, series in self._snapshot(self._counters):
+            if name in self._help:
+                lines.append(f"# HELP {name} {self._help[name]}")
+            lines.append(f"# TYPE {name} counter")
+            for key, counter in series:
+                lines.append(f"{name}{_labels(key)} {_number(counter.value)}")
+        for name, series in self._snapshot(self._histograms):
+            if name in self._help:
+                lines.append(f"# HELP {name} {self._help[name]}")
+            lines.append(f"# TYPE {name} summary")
+            for key, histogram in series:
+                for q in quantiles:
+                    value = histogram.percentile(q * 100)
+                    lines.append(f"{name}{_labels(key + (('quantile', str(q)),))} {_number(value)}")
+                lines.append(f"{name}_sum{_labels(key)} {_number(histogram.sum)}")
+                lines.append(f"{name}_count{_labels(key)} {histogram.count}")
+        return "\n".join(lines) + "\n"
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(key: LabelKey) -> str:
+    if not key:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in key) + "}"
+
+
+def _number(value: Optional[float]) -> str:
+    if value is None:
+        return "NaN"
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+_registry = MetricsRegistry()
+
+
+def get_registry() -> MetricsRegistry:
+    """Wspólny rejestr metryk procesu."""
+    return _registry
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    registry: MetricsRegistry = _registry
+
+    def do_GET(self):
+        if self.path.split("?")[0] != "/metrics":
+            self.send_error(404)
+            return
+        body = self.registry.to_prometheus().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+_server: Optional[ThreadingHTTPServer] = None
+
+
+def start_metrics_server(port: Optional[int] = None, host: str = "0.0.0.0",
+                         registry: Optional[MetricsRegistry] = None) -> Optional[ThreadingHTTPServer]:
+    """Uruchamia (raz) endpoint `/metrics` w wątku w tle.
+
+    Bez `port` używany jest METRICS_PORT (brak lub 0 - endpoint wyłączony);
+    jawne `port=0` wybiera wolny port.
+    """
+    global _server
+    if _server is not None:
+        return _server
+    if port is None:
+        port = _env_int("METRICS_PORT", 0)
+        if port <= 0:
+            return None
+    handler = type("MetricsHandler", (_MetricsHandler,), {"registry": registry or _registry})
+    try:
+        _server = ThreadingHTTPServer((host, port), handler)
+    except OSError as e:
+        log_warning(f"Nie można uruchomić endpointu /metrics na porcie {port}: {e}")
+        return None
+    threading.Thread(target=_server.serve_forever, name="metrics-server", daemon=True).start()
+    log_info(f"Metryki Prometheus: http://{host}:{_server.server_address[1]}/metrics")
+    return _server
+
+
+def stop_metrics_server():
+    global _server
+    if _server is not None:
+        _server.shutdown()
+        _server.server_close()
+        _server = None
@@ -1,9 +1,32 @@
 import time
 import functools
+import atexit
+import threading
+from collections import deque
 from datetime import datetime
 import json
 import os
 from utils.logger_utils import log_info, log_error
+from utils.metrics.metrics_registry import get_registry
+from utils.metrics.tracing import get_tracer
+
+RESPONSE_TIME_METRIC = "model_response_ms"
+RESPONSE_SIZE_METRIC = "model_response_size"
+RESPONSES_TOTAL_METRIC = "model_responses_total"
+
+
+def _env_int(name, default):
+    try:
+        return int(os.getenv(name, "").strip() or default)
+    except ValueError:
+        return default
+
+
+def _env_float(name, default):
+    try:
+        return float(os.getenv(name, "").strip() or default)
+    except ValueError:
+        return default
 
 def measure_response_time(func=None, measure_result=True, model_arg_position=None):
     """Dekorator do pomiaru czasu odpowiedzi modelu AI
@@ -60,7 +83,9 @@ def measure_response_time(func=None, measure_result=True, model_arg_position=Non
             result = None
             error = None
             try:
-                result = func(*args, **kwargs)
+                # Span w bieżącym śladzie (jeśli jest) - metryka i ślad dotyczą tego samego wywołania
+                with get_tracer().span(function_name, model=model_name):
+                    result = func(*args, **kwargs)
             except Exception as e:
                 error = e
                 raise
@@ -152,7 +177,9 @@ def measure_response_time(func=None, measure_result=True, model_arg_position=Non
             result = None
             error = None
             try:
-                result = inner_func(*args, **kwargs)
+                # Span w bieżącym śladzie (jeśli jest) - metryka i ślad dotyczą tego samego wywołania
+                with get_tracer().span(function_name, model=model_name):
+                    result = inner_func(*args, **kwargs)
             except Exception as e:
                 error = e
                 raise
@@ -201,9 +228,25 @@ def measure_response_time(func=None, measure_result=True, model_arg_position=Non
     return decorator
 
 class ModelResponseMetrics:
+    """Metryki odpowiedzi modeli: histogramy/liczniki w rejestrze + buforowany zapis JSONL.
+
+    Pamięć jest stała (histogramy strumieniowe zamiast listy wszystkich pomiarów).
+    `record()` tylko dopisuje do bufora - plik JSONL dopisuje partiami wątek w tle
+    (METRICS_FLUSH_BATCH / METRICS_FLUSH_INTERVAL), a resztę bufora atexit przy
+    zamknięciu procesu. Bufor jest ograniczony (METRICS_BUFFER_SIZE) - gdy zapis się
+    nie udaje, najstarsze wpisy są odrzucane.
+    """
     _metrics_file = "model_metrics.jsonl"
-    _metrics = []
     _is_initialized = False
+    _registry = get_registry()
+    _buffer = deque(maxlen=_env_int("METRICS_BUFFER_SIZE", 10000))
+    _flush_batch = _env_int("METRICS_FLUSH_BATCH", 50)
+    _flush_interval = _env_float("METRICS_FLUSH_INTERVAL", 5.0)
+    _lock = threading.Lock()
+    _write_lock = threading.Lock()
+    _wakeup = threading.Event()
+    _flusher = None
+    _atexit_registered = False
     
     @classmethod
     def initialize(cls, metrics_file=None):
@@ -215,7 +258,10 @@ class ModelResponseMetrics:
         metrics_dir = os.path.dirname(cls._metrics_file)
         if metrics_dir and not os.path.exists(metrics_dir):
             os.makedirs(metrics_dir, exist_ok=True)
-            
+        
+        cls._registry.describe(RESPONSE_TIME_METRIC, "Czas odpowiedzi modelu AI (ms)")
+        cls._registry.describe(RESPONSE_SIZE_METRIC, "Rozmiar odpowiedzi modelu AI (znaki)")
+        cls._registry.describe(RESPONSES_TOTAL_METRIC, "Liczba odpowiedzi modelu AI wg statusu")
         cls._is_initialized = True
     
     @classmethod
@@ -230,60 +276,98 @@ class ModelResponseMetrics:
             "response_size": response_size
         }
         
-        # Dodaj do pamięci
-        cls._metrics.append(metric)
+        # Agregaty strumieniowe (stała pamięć)
+        cls._registry.histogram(RESPONSE_TIME_METRIC, model=model, function=function).observe(elapsed_ms)
+        cls._registry.histogram(RESPONSE_SIZE_METRIC, model=model, function=function).observe(response_size)
+        cls._registry.counter(RESPONSES_TOTAL_METRIC, model=model, function=function, status=metric["status"]).inc()
         
-        # Zapisz do pliku
-        try:
-            with open(cls._metrics_file, "a", encoding="utf-8") as f:
-                f.write(json.dumps(metric) + "\n")
-        except Exception as e:
-            log_error(f"Error saving metric: {str(e)}")
+        # Zapis do pliku partiami - w wątku w tle, nie w wątku wywołującym
+        with cls._lock:
+            cls._buffer.append(metric)
+            if cls._flusher is None or not cls._flusher.is_alive():
+                cls._start_flusher()
+            full = len(cls._buffer) >= cls._flush_batch
+        if full:
+            cls._wakeup.set()
+    
+    @classmethod
+    def _start_flusher(cls):
+        # Wywoływane pod cls._lock
+        if not cls._atexit_registered:
+            atexit.register(cls.flush)
+            cls._atexit_registered = True
+        cls._flusher = threading.Thread(target=cls._run_flusher, name="metrics-flusher", daemon=True)
+        cls._flusher.start()
+    
+    @classmethod
+    def _run_flusher(cls):
+        while True:
+            cls._wakeup.wait(cls._flush_interval)
+            cls._wakeup.clear()
+            cls.flush()
+    
+    @classmethod
+    def flush(cls):
+        """Dopisuje zbuforowane metryki do pliku JSONL."""
+        # Osobna blokada zapisu: record() nie czeka na plik, a partie trafiają do pliku w kolejności
+        with cls._write_lock:
+            with cls._lock:
+                if not cls._buffer:
+                    return
+                batch = list(cls._buffer)
+                cls._buffer.clear()
+            try:
+                with open(cls._metrics_file, "a", encoding="utf-8") as f:
+                    f.write("".join(json.dumps(metric) + "\n" for metric in batch))
+            except Exception as e:
+                # Bufor jest ograniczony - przy kolejnych błędach najstarsze wpisy wypadną
+                with cls._lock:
+                    cls._buffer.extendleft(reversed(batch))
+                log_error(f"Error saving metric: {str(e)}")
+    
+    @classmethod
+    def _group_stats(cls, label):
+        grouped = {}
+        for key in cls._registry.histograms(RESPONSE_TIME_METRIC):
+            value = dict(key).get(label)
+            if value is not None and value not in grouped:
+                histogram = cls._registry.merged_histogram(RESPONSE_TIME_METRIC, **{label: value})
+                summary = histogram.summary()
+                grouped[value] = {
+                    "count": summary["count"],
+                    "avg_ms": summary["avg"],
+                    "min_ms": summary["min"],
+                    "max_ms": summary["max"],
+                    "p50_ms": summary["p50"],
+                    "p95_ms": summary["p95"],
+                    "p99_ms": summary["p99"],
+                }
+        return grouped
     
     @classmethod
     def get_statistics(cls):
-        """Zwraca podstawowe statystyki"""
-        if not cls._metrics:
+        """Zwraca podstawowe statystyki (z percentylami) z agregatów strumieniowych"""
+        total = cls._registry.merged_histogram(RESPONSE_TIME_METRIC)
+        if total is None or total.count == 0:
             return {"count": 0}
-            
-        by_model = {}
-        by_function = {}
-        
-        for m in cls._metrics:
-            # Statystyki według modelu
-            model = m["model"]
-            if model not in by_model:
-                by_model[model] = []
-            by_model[model].append(m["elapsed_ms"])
-            
-            # Statystyki według funkcji
-            function = m["function"]
-            if function not in by_function:
-                by_function[function] = []
-            by_function[function].append(m["elapsed_ms"])
         
-        stats = {
-            "count": len(cls._metrics), 
-            "by_model": {},
-            "by_function": {}
+        return {
+            "count": total.count,
+            "by_model": cls._group_stats("model"),
+            "by_function": cls._group_stats("function"),
+        }
+    
+    @classmethod
+    def slo_report(cls, threshold_ms, model=None):
+        """Udział odpowiedzi szybszych niż `threshold_ms` (SLO opóźnienia), opcjonalnie dla modelu."""
+        labels = {"model": model} if model else {}
+        histogram = cls._registry.merged_histogram(RESPONSE_TIME_METRIC, **labels)
+        if histogram is None or histogram.count == 0:
+            return {"count": 0, "threshold_ms": threshold_ms, "within_slo": None}
+        return {
+            "count": histogram.count,
+            "threshold_ms": threshold_ms,
+            "within_slo": histogram.fraction_below(threshold_ms),
+            "p95_ms": histogram.percentile(95),
+            "p99_ms": histogram.percentile(99),
         }
-        
-        # Statystyki według modelu
-        for model, times in by_model.items():
-            stats["by_model"][model] = {
-                "count": len(times),
-                "avg_ms": sum(times) / len(times),
-                "min_ms": min(times),
-                "max_ms": max(times)
-            }
-        
-        # Statystyki według funkcji
-        for function, times in by_function.items():
-            stats["by_function"][function] = {
-                "count": len(times),
-                "avg_ms": sum(times) / len(times),
-                "min_ms": min(times),
-                "max_ms": max(times)
-            }
-        
-        return stats
\ No newline at end of file
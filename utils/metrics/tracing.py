@@ -0,0 +1,274 @@
+"""
+Śledzenie (tracing) etapów generowania: zagnieżdżone spany z czasami i atrybutami.
+
+Span to nazwany odcinek pracy (budowa promptu, kontekst PDF, wywołanie LLM,
+ekstrakcja kodu, renderowanie, walidacja, eksport XMI). Spany otwarte wewnątrz
+innego spanu (w tym samym wątku/kontekście) stają się jego dziećmi; span bez
+rodzica rozpoczyna nowy ślad. Rodzica można też podać jawnie - np. span
+generowania zapamiętany w sesji Streamlit między kolejnymi przebiegami skryptu.
+
+    tracer = get_tracer()
+    with tracer.span("generation", model=model_name) as root:
+        with tracer.span("prompt_build"):
+            ...
+        with tracer.span("llm_call", model=model_name) as llm:
+            llm.set_attribute("response_chars", len(content))
+    tracer.to_otlp(root.trace_id)              # JSON zgodny z OpenTelemetry (OTLP)
+    render_flamegraph_svg(tracer.get_trace(root.trace_id))
+
+Zakończone ślady są trzymane w pamięci (ograniczona liczba, TRACE_MAX_TRACES)
+i - gdy ustawiono TRACE_EXPORT_PATH - dopisywane jako linie OTLP JSON.
+"""
+
+import contextvars
+import functools
+import json
+import os
+import secrets
+import threading
+import time
+import zlib
+from collections import OrderedDict
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from html import escape
+from typing import Any, Dict, List, Optional
+
+from utils.logger_utils import log_debug, log_warning
+
+SERVICE_NAME = "ai-diagram-generator"
+
+_current_span: contextvars.ContextVar = contextvars.ContextVar("current_span", default=None)
+
+
+@dataclass
+class Span:
+    """Odcinek pracy w śladzie; czasy w nanosekundach (czas epoki)."""
+    name: str
+    trace_id: str
+    span_id: str
+    parent_id: Optional[str] = None
+    start_ns: int = 0
+    end_ns: Optional[int] = None
+    attributes: Dict[str, Any] = field(default_factory=dict)
+    status: str = "OK"
+    error: Optional[str] = None
+
+    def set_attribute(self, key: str, value: Any):
+        self.attributes[key] = value
+
+    @property
+    def duration_ms(self) -> float:
+        end = self.end_ns if self.end_ns is not None else time.time_ns()
+        return (end - self.start_ns) / 1e6
+
+
+class _NoopSpan:
+    """Zastępczy span, gdy śledzenie jest nieaktywne (atrybuty są ignorowane)."""
+
+    def set_attribute(self, key: str, value: Any):
+        pass
+
+
+NOOP_SPAN = _NoopSpan()
+
+
+def _env_int(name: str, default: int) -> int:
+    try:
+        return int(os.getenv(name, "").strip() or default)
+    except ValueError:
+        return default
+
+
+class Tracer:
+    """Tworzy spany i przechowuje zakończone ślady (LRU po śladach)."""
+
+    def __init__(self, max_traces: Optional[int] = None, export_path: Optional[str] = None):
+        self.max_traces = max_traces or _env_int("TRACE_MAX_TRACES", 100)
+        self.export_path = export_path if export_path is not None else os.getenv("TRACE_EXPORT_PATH", "").strip()
+        self._traces: "OrderedDict[str, List[Span]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def start_span(self, name: str, parent: Optional[Span] = None, **attributes) -> Span:
+        """Otwiera span (rodzic: jawny, bieżący z kontekstu albo brak - nowy ślad)."""
+        parent = parent or _current_span.get()
+        return Span(
+            name=name,
+            trace_id=parent.trace_id if parent else secrets.token_hex(16),
+            span_id=secrets.token_hex(8),
+            parent_id=parent.span_id if parent else None,
+            start_ns=time.time_ns(),
+            attributes=dict(attributes),
+        )
+
+    def end_span(self, span: Span, error: Optional[BaseException] = None):
+        """Zamyka span; zamknięcie spanu bez rodzica kończy (i eksportuje) ślad."""
+        if span.end_ns is not None:
+            return
+        span.end_ns = time.time_ns()
+        if error is not None:
+            span.status = "ERROR"
+            span.error = f"{type(error).__name__}: {error}"
+        with self._lock:
+            spans = self._traces.setdefault(span.trace_id, [])
+            spans.append(span)
+            self._traces.move_to_end(span.trace_id)
+            while len(self._traces) > self.max_traces:
+                self._traces.popitem(last=False)
+        if span.parent_id is None:
+            log_debug(f"Ślad {span.name}: {span.duration_ms:.1f} ms, {len(spans)} spanów")
+            if self.export_path:
+                self._export(span.trace_id)
+
+    @contextmanager
+    def span(self, name: str, parent: Optional[Span] = None, **attributes):
+        """Span jako menedżer kontekstu; spany otwarte wewnątrz stają się jego dziećmi."""
+        span = self.start_span(name, parent, **attributes)
+        token = _current_span.set(span)
+        try:
+            yield span
+        except BaseException as e:
+            self.end_span(span, e)
+            raise
+        finally:
+            _current_span.reset(token)
+            self.end_span(span)
+
+    def traced(self, name: Optional[str] = None, **attributes):
+        """Dekorator: wywołanie funkcji jako span (nazwa domyślnie = nazwa funkcji)."""
+        def decorator(func):
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                with self.span(name or func.__name__, **attributes):
+                    return func(*args, **kwargs)
+            return wrapper
+        return decorator
+
+    def get_trace(self, trace_id: str) -> List[Span]:
+        """Zakończone spany śladu w kolejności rozpoczęcia."""
+        with self._lock:
+            return sorted(self._traces.get(trace_id, []), key=lambda span: span.start_ns)
+
+    def recent_traces(self, limit: int = 20) -> List[List[Span]]:
+        """Ostatnie ślady (najnowszy pierwszy)."""
+        with self._lock:
+            trace_ids = list(self._traces)[-limit:]
+        return [self.get_trace(trace_id) for trace_id in reversed(trace_ids)]
+
+    def clear(self):
+        with self._lock:
+            self._traces.clear()
+
+    def to_otlp(self, trace_id: str) -> Dict[str, Any]:
+        return spans_to_otlp(self.get_trace(trace_id))
+
+    def _export(self, trace_id: str):
+        try:
+            with open(self.export_path, "a", encoding="utf-8") as f:
+                f.write(json.dumps(self.to_otlp(trace_id), ensure_ascii=False) + "\n")
+        except OSError as e:
+            log_warning(f"Nie można zapisać śladu do {self.export_path}: {e}")
+
+
+def _otlp_value(value: Any) -> Dict[str, Any]:
+    if isinstance(value, bool):
+        return {"boolValue": value}
+    if isinstance(value, int):
+        return {"intValue": str(value)}
+    if isinstance(value, float):
+        return {"doubleValue": value}
+    return {"stringValue": str(value)}
+
+
+def spans_to_otlp(spans: List[Span], service_name: str = SERVICE_NAME) -> Dict[str, Any]:
+    """Spany w formacie OTLP/JSON (ExportTraceServiceRequest) - do importu w Jaeger/Tempo/collectorze."""
+    return {
+        "resourceSpans": [{
+            "resource": {"attributes": [{"key": "service.name", "value": {"stringValue": service_name}}]},
+            "scopeSpans": [{
+                "scope": {"name": "utils.metrics.tracing"},
+                "spans": [{
+                    "traceId": span.trace_id,
+                    "spanId": span.span_id,
+                    **({"parentSpanId": span.parent_id} if span.parent_id else {}),
+                    "name": span.name,
+                    "kind": 1,  # SPAN_KIND_INTERNAL
+                    "startTimeUnixNano": str(span.start_ns),
+                    "endTimeUnixNano": str(span.end_ns or span.start_ns),
+                    "attributes": [{"key": key, "value": _otlp_value(value)}
+                                   for key, value in span.attributes.items()],
+                    "status": ({"code": 2, "message": span.error or ""} if span.status == "ERROR"
+                               else {"code": 1}),
+                } for span in spans],
+            }],
+        }],
+    }
+
+
+def _span_depths(spans: List[Span]) -> Dict[str, int]:
+    by_id = {span.span_id: span for span in spans}
+    depths: Dict[str, int] = {}
+
+    def depth(span: Span) -> int:
+        if span.span_id not in depths:
+            parent = by_id.get(span.parent_id) if span.parent_id else None
+            depths[span.span_id] = depth(parent) + 1 if parent else 0
+        return depths[span.span_id]
+
+    for span in spans:
+        depth(span)
+    return depths
+
+
+def flamegraph_rows(spans: List[Span]) -> List[Dict[str, Any]]:
+    """Wiersze wykresu płomieniowego: nazwa, głębokość, przesunięcie i czas trwania (ms)."""
+    if not spans:
+        return []
+    origin = min(span.start_ns for span in spans)
+    depths = _span_depths(spans)
+    return [{
+        "name": span.name,
+        "depth": depths[span.span_id],
+        "start_ms": (span.start_ns - origin) / 1e6,
+        "duration_ms": span.duration_ms,
+        "status": span.status,
+        "attributes": span.attributes,
+    } for span in spans]
+
+
+_PALETTE = ("#f28e2b", "#e15759", "#edc948", "#59a14f", "#76b7b2", "#4e79a7", "#b07aa1", "#ff9da7")
+
+
+def render_flamegraph_svg(spans: List[Span], width: int = 900, row_height: int = 22) -> str:
+    """Wykres płomieniowy (ikiclowy: korzeń u góry) śladu jako SVG; dymki z czasem i atrybutami."""
+    rows = flamegraph_rows(spans)
+    if not rows:
+        return ""
+    total = max(row["start_ms"] + row["duration_ms"] for row in rows) or 1.0
+    height = (max(row["depth"] for row in rows) + 1) * row_height
+    parts = [f'<svg xmlns="http://www.w3.org/2000/svg" width="{width}" height="{height}" '
+             f'font-family="monospace" font-size="11">']
+    for row in rows:
+        x = row["start_ms"] / total * width
+        w = max(row["duration_ms"] / total * width, 1.0)
+        y = row["depth"] * row_height
+        color = "#d62728" if row["status"] == "ERROR" else _PALETTE[zlib.crc32(row["name"].encode("utf-8")) % len(_PALETTE)]
+        details = "".join(f"\n{key}: {value}" for key, value in row["attributes"].items())
+        label = f'{row["name"]} ({row["duration_ms"]:.1f} ms)'
+        parts.append(f'<g><title>{escape(label + details)}</title>'
+                     f'<rect x="{x:.1f}" y="{y}" width="{w:.1f}" height="{row_height - 2}" '
+                     f'fill="{color}" rx="2"/>')
+        if w > 7 * 4:
+            visible = label[:int(w / 7) - 1]
+            parts.append(f'<text x="{x + 3:.1f}" y="{y + row_height - 8}">{escape(visible)}</text>')
+        parts.append('</g>')
+    parts.append('</svg>')
+    return "".join(parts)
+
+
+_tracer = Tracer()
+
+
+def get_tracer() -> Tracer:
+    """Wspólny tracer procesu."""
+    return _tracer
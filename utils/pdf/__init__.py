@@ -5,19 +5,38 @@ Umożliwia wykorzystanie dokumentów PDF jako źródła kontekstu biznesowego
 dla generowania bardziej precyzyjnych i kompletnych diagramów.
 """
 
-from .pdf_processor import (
-    PDFProcessor,
-    PDFDocument, 
-    ProcessContext,
-    enhance_prompt_with_pdf_context
-)
-
-try:
-    from .streamlit_pdf_integration import PDFUploadManager
-    STREAMLIT_INTEGRATION_AVAILABLE = True
-except ImportError:
-    PDFUploadManager = None
-    STREAMLIT_INTEGRATION_AVAILABLE = False
+import importlib
+
+# Eksporty są ładowane leniwie (PEP 562) - import podmodułu, np.
+# utils.pdf.pdf_retrieval, nie pociąga za sobą fitz/PyPDF2 ani streamlit
+_LAZY_EXPORTS = {
+    'PDFProcessor': '.pdf_processor',
+    'PDFDocument': '.pdf_processor',
+    'ProcessContext': '.pdf_processor',
+    'enhance_prompt_with_pdf_context': '.pdf_processor',
+    'PDFChunkIndex': '.pdf_retrieval',
+    'HashingEmbedder': '.pdf_retrieval',
+}
+
+
+def __getattr__(name):
+    if name in _LAZY_EXPORTS:
+        value = getattr(importlib.import_module(_LAZY_EXPORTS[name], __name__), name)
+    elif name in ('PDFUploadManager', 'STREAMLIT_INTEGRATION_AVAILABLE'):
+        try:
+            from .streamlit_pdf_integration import PDFUploadManager
+            available = True
+        except ImportError:
+            PDFUploadManager = None
+            available = False
+        globals()['PDFUploadManager'] = PDFUploadManager
+        globals()['STREAMLIT_INTEGRATION_AVAILABLE'] = available
+        return globals()[name]
+    else:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    globals()[name] = value
+    return value
+
 
 __version__ = "1.0.0"
 __author__ = "GD_python Team"
@@ -27,6 +46,8 @@ __all__ = [
     'PDFDocument', 
     'ProcessContext',
     'enhance_prompt_with_pdf_context',
+    'PDFChunkIndex',
+    'HashingEmbedder',
     'PDFUploadManager',
     'STREAMLIT_INTEGRATION_AVAILABLE'
 ]
\ No newline at end of file
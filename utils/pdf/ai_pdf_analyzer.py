@@ -662,8 +662,12 @@ Skup się na wyciągnięciu konkretnych, implementowalnych elementów zamiast ab
         
         return merged
     
-    def get_enhanced_context_for_diagram(self, pdf_doc: PDFDocument, diagram_type: str, progress_callback=None) -> str:
-        """Zwraca wzbogacony kontekst dla konkretnego typu diagramu - z inteligentnym wyborem metody."""
+    def get_enhanced_context_for_diagram(self, pdf_doc: PDFDocument, diagram_type: str, progress_callback=None,
+                                         query: Optional[str] = None) -> str:
+        """Zwraca wzbogacony kontekst dla konkretnego typu diagramu - z inteligentnym wyborem metody.
+
+        `query` (prompt użytkownika / opis procesu) wybiera fragmenty dokumentu w trybie text extraction.
+        """
         
         # Smart method selection z informacjami o postępie
         if progress_callback:
@@ -692,7 +696,7 @@ Skup się na wyciągnięciu konkretnych, implementowalnych elementów zamiast ab
         if progress_callback:
             progress_callback("📝 Używanie metody: Text Extraction + AI")
             
-        return self._analyze_with_text_extraction(pdf_doc, diagram_type, progress_callback)
+        return self._analyze_with_text_extraction(pdf_doc, diagram_type, progress_callback, query)
     
     def _analyze_with_direct_pdf(self, pdf_doc: PDFDocument, diagram_type: str, progress_callback=None) -> str:
         """Analiza przez bezpośrednie przesłanie PDF."""
@@ -764,14 +768,15 @@ Skup się na wyciągnięciu konkretnych, implementowalnych elementów zamiast ab
                 progress_callback(f"❌ Błąd analizy PDF: {str(e)}")
             raise e
     
-    def _analyze_with_text_extraction(self, pdf_doc: PDFDocument, diagram_type: str, progress_callback=None) -> str:
+    def _analyze_with_text_extraction(self, pdf_doc: PDFDocument, diagram_type: str, progress_callback=None,
+                                      query: Optional[str] = None) -> str:
         """Analiza przez text extraction."""
         
         if progress_callback:
             progress_callback("Przygotowywanie promptu z tekstu...")
             
-        # Przygotuj prompt z ekstraktowanym tekstem
-        prompt = self.get_analysis_prompt(pdf_doc.text_content[:5000], diagram_type)
+        # Przygotuj prompt z fragmentów najbardziej istotnych dla zapytania i typu diagramu
+        prompt = self.get_analysis_prompt(self._select_relevant_text(pdf_doc, diagram_type, query=query), diagram_type)
         
         if progress_callback:
             progress_callback(f"Analiza przez AI ({self.model})...")
@@ -801,6 +806,29 @@ Skup się na wyciągnięciu konkretnych, implementowalnych elementów zamiast ab
                 progress_callback(f"❌ Błąd analizy AI: {metadata.get('error', 'Unknown')}")
             raise Exception(f"AI analysis failed: {metadata.get('error', 'Unknown')}")
     
+    def _select_relevant_text(self, pdf_doc: PDFDocument, diagram_type: str, max_chars: int = 5000,
+                              query: Optional[str] = None) -> str:
+        """Wybiera fragmenty dokumentu istotne dla zapytania (zamiast pierwszych max_chars znaków).
+
+        Zapytaniem wektorowym jest `query` (prompt użytkownika / opis procesu); bez niego
+        - tytuł dokumentu ze słowami kluczowymi typu diagramu.
+        """
+        if len(pdf_doc.text_content) <= max_chars:
+            return pdf_doc.text_content
+        try:
+            from utils.pdf.pdf_retrieval import PDFChunkIndex, build_retrieval_query, format_retrieved_context
+
+            index = PDFChunkIndex()
+            index.add_document(pdf_doc)
+            results = index.search(build_retrieval_query(query or pdf_doc.title, diagram_type),
+                                   top_k=len(index.chunks), max_chars=max_chars)
+            if results:
+                log_debug(f"PDF retrieval: {len(results)}/{len(index.chunks)} fragmentów dla {diagram_type}")
+                return format_retrieved_context(results)
+        except Exception as e:
+            log_error(f"PDF retrieval failed, using text prefix: {e}")
+        return pdf_doc.text_content[:max_chars]
+
     def _format_context_by_type(self, context: ProcessContext, pdf_doc: PDFDocument, result: AIAnalysisResult, diagram_type: str) -> str:
         """Formatuje kontekst dla określonego typu diagramu."""
         
@@ -14,6 +14,14 @@ import hashlib
 import json
 from datetime import datetime
 
+from utils.pdf.pdf_retrieval import (
+    PDFChunkIndex,
+    build_retrieval_query,
+    format_retrieved_context,
+    DEFAULT_TOP_K
+)
+from utils.prompt_budget import PromptBudgeter, PromptSection
+
 @dataclass
 class PDFDocument:
     """Klasa reprezentująca dokument PDF z wyekstraktowanym kontekstem."""
@@ -396,13 +404,19 @@ class PDFProcessor:
         
         return pdf_doc
     
-    def get_context_for_diagram_type(self, pdf_doc: PDFDocument, diagram_type: str, progress_callback=None) -> str:
-        """Zwraca kontekst dostosowany do typu diagramu - z wyborem trybu AI lub lokalnego."""
+    def get_context_for_diagram_type(self, pdf_doc: PDFDocument, diagram_type: str, progress_callback=None,
+                                     query: Optional[str] = None) -> str:
+        """Zwraca kontekst dostosowany do typu diagramu - z wyborem trybu AI lub lokalnego.
+
+        `query` (prompt użytkownika / opis procesu) trafia do analizy AI jako zapytanie
+        wybierające istotne fragmenty dokumentu.
+        """
         
         # Jeśli tryb AI i analyzer dostępny
         if self.analysis_mode == "ai" and self._ai_analyzer:
             try:
-                return self._ai_analyzer.get_enhanced_context_for_diagram(pdf_doc, diagram_type, progress_callback)
+                return self._ai_analyzer.get_enhanced_context_for_diagram(pdf_doc, diagram_type, progress_callback,
+                                                                     query=query)
             except Exception as e:
                 if progress_callback:
                     progress_callback(f"⚠️ AI analysis failed: {e}, przełączanie na tryb lokalny")
@@ -560,8 +574,17 @@ Dokument zawiera szczegółowe informacje biznesowe, które mogą być użyte ja
 """
 
 # Funkcje pomocnicze dla integracji z istniejącym kodem
-def enhance_prompt_with_pdf_context(original_prompt: str, pdf_files: List[str], diagram_type: str, progress_callback=None) -> str:
-    """Wzbogaca prompt o kontekst z plików PDF - z obsługą AI analysis i progress tracking."""
+def enhance_prompt_with_pdf_context(original_prompt: str, pdf_files: List[str], diagram_type: str, progress_callback=None,
+                                    query: Optional[str] = None, model_name: Optional[str] = None) -> str:
+    """Wzbogaca prompt o kontekst z plików PDF - z obsługą AI analysis i progress tracking.
+
+    W trybie lokalnym z PDF_CONTEXT_MODE=retrieval (domyślnie) do promptu trafia tylko
+    top-k fragmentów dokumentów najbardziej zbliżonych do `query` (opisu procesu;
+    domyślnie całego promptu) i typu diagramu - zamiast pełnych sekcji z każdego pliku.
+
+    Jeśli podano `model_name`, kontekst PDF jest przycinany tak, aby cały prompt
+    zmieścił się w budżecie tokenów modelu (oryginalny prompt nie jest skracany).
+    """
     
     if not pdf_files:
         return original_prompt
@@ -571,6 +594,12 @@ def enhance_prompt_with_pdf_context(original_prompt: str, pdf_files: List[str],
     
     # Sprawdzenie czy AI mode jest włączony
     analysis_mode = processor.analysis_mode
+    context_mode = os.getenv("PDF_CONTEXT_MODE", "retrieval").lower()
+    
+    chunk_index = None
+    if analysis_mode != "ai" and context_mode == "retrieval":
+        chunk_index = PDFChunkIndex()
+        analysis_mode = "local-retrieval"
     
     if progress_callback:
         progress_callback(f"🔍 Analiza {len(pdf_files)} plików PDF w trybie: {analysis_mode.upper()}")
@@ -582,8 +611,13 @@ def enhance_prompt_with_pdf_context(original_prompt: str, pdf_files: List[str],
                 
             pdf_doc = processor.process_pdf(pdf_file)
             
+            if chunk_index is not None:
+                chunk_index.add_document(pdf_doc)
+                continue
+            
             # Używaj AI analyzer jeśli dostępny, w przeciwnym razie lokalny
-            context = processor.get_context_for_diagram_type(pdf_doc, diagram_type, progress_callback)
+            context = processor.get_context_for_diagram_type(pdf_doc, diagram_type, progress_callback,
+                                                             query=query or original_prompt)
             
             # Dodaj informację o trybie analizy
             mode_info = f"\n[Metoda analizy: {analysis_mode.upper()}]"
@@ -596,6 +630,16 @@ def enhance_prompt_with_pdf_context(original_prompt: str, pdf_files: List[str],
                 progress_callback(f"❌ {error_msg}")
             print(error_msg)
     
+    if chunk_index is not None and chunk_index.chunks:
+        retrieval_query = build_retrieval_query(query or original_prompt, diagram_type)
+        results = chunk_index.search(retrieval_query, top_k=DEFAULT_TOP_K)
+        if results:
+            context = format_retrieved_context(results)
+            pdf_contexts.append(context + f"\n[Metoda analizy: {analysis_mode.upper()}]")
+            if progress_callback:
+                progress_callback(f"📉 Wybrano {len(results)}/{len(chunk_index.chunks)} fragmentów "
+                                  f"({len(context)} z {chunk_index.total_chars} znaków)")
+    
     if pdf_contexts:
         if progress_callback:
             progress_callback("✅ Finalizowanie wzbogaconego promptu...")
@@ -606,6 +650,10 @@ def enhance_prompt_with_pdf_context(original_prompt: str, pdf_files: List[str],
         else:
             instruction = "**INSTRUKCJA:** Wykorzystaj powyższy kontekst z dokumentów PDF do wzbogacenia diagramu o dodatkowe szczegóły, aktorów, systemy i procesy, które mogą być istotne dla kompletnego przedstawienia."
         
+        if model_name:
+            return _assemble_budgeted_pdf_prompt(original_prompt, chr(10).join(pdf_contexts), instruction,
+                                                 model_name, progress_callback)
+        
         enhanced_prompt = f"""
 {original_prompt}
 
@@ -620,4 +668,28 @@ def enhance_prompt_with_pdf_context(original_prompt: str, pdf_files: List[str],
             
         return enhanced_prompt
     
-    return original_prompt
\ No newline at end of file
+    return original_prompt
+
+
+def _assemble_budgeted_pdf_prompt(original_prompt: str, pdf_context: str, instruction: str,
+                                  model_name: str, progress_callback=None) -> str:
+    """Składa prompt z kontekstem PDF w budżecie tokenów modelu."""
+    budgeted = PromptBudgeter(model_name).assemble([
+        PromptSection("prompt", "\n" + original_prompt, required=True),
+        PromptSection("pdf_context", f"**DODATKOWY KONTEKST Z DOKUMENTÓW PDF:**\n\n{pdf_context}", priority=30),
+        PromptSection("instruction", instruction + "\n", priority=40, truncatable=False),
+    ])
+    
+    # Instrukcja bez kontekstu nie ma sensu - wtedy zwracamy oryginalny prompt
+    if "pdf_context" in budgeted.dropped:
+        if progress_callback:
+            progress_callback(f"⚠️ Brak miejsca na kontekst PDF w budżecie {budgeted.budget} tokenów ({model_name})")
+        return original_prompt
+    
+    if progress_callback:
+        if budgeted.tokens_saved > 0:
+            progress_callback(f"📉 Kontekst PDF przycięty do budżetu: {budgeted.total_tokens}/{budgeted.budget} tokenów "
+                              f"(zaoszczędzono {budgeted.tokens_saved})")
+        progress_callback("🎯 Prompt wzbogacony o kontekst PDF")
+    
+    return budgeted.text
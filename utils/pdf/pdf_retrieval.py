@@ -0,0 +1,336 @@
+"""
+Lokalne wyszukiwanie semantyczne fragmentów dokumentów PDF.
+
+Zamiast doklejać do promptu całe sekcje wyekstraktowane z PDF, dokument jest
+dzielony na fragmenty (chunki), które są wektoryzowane lokalnie na CPU i
+zapisywane w indeksie NumPy (mapowanym w pamięci). Do promptu trafia tylko
+top-k fragmentów najbardziej zbliżonych do opisu procesu i typu diagramu.
+
+Wektoryzacja:
+- domyślnie "hashing vectorizer" (bez zależności, deterministyczny),
+- opcjonalnie lokalny model sentence-transformers (PDF_EMBEDDING_MODEL).
+"""
+
+import os
+import re
+import json
+import math
+import hashlib
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from utils.logger_utils import log_warning
+
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:
+    np = None
+    NUMPY_AVAILABLE = False
+
+DEFAULT_CHUNK_SIZE = int(os.getenv("PDF_RETRIEVAL_CHUNK_SIZE", "800"))
+DEFAULT_CHUNK_OVERLAP = int(os.getenv("PDF_RETRIEVAL_CHUNK_OVERLAP", "120"))
+DEFAULT_TOP_K = int(os.getenv("PDF_RETRIEVAL_TOP_K", "6"))
+
+# Słowa kluczowe dokładane do zapytania w zależności od typu diagramu
+DIAGRAM_QUERY_HINTS = {
+    'activity': "proces krok etap czynność działanie decyzja warunek przepływ rola odpowiedzialny "
+                "process step activity action decision condition flow role",
+    'sequence': "uczestnik system komunikat wywołanie żądanie odpowiedź interfejs integracja "
+                "participant message request response call interface integration",
+    'class': "encja obiekt atrybut dane dokument formularz relacja klasa pole "
+             "entity object attribute data document form relation class field",
+    'component': "komponent moduł system aplikacja serwis interfejs baza danych architektura "
+                 "component module system application service interface database architecture",
+    'bpmn': "proces zadanie zdarzenie bramka decyzja uczestnik dział termin "
+            "process task event gateway decision participant department deadline",
+}
+
+_DIAGRAM_TYPE_ALIASES = {
+    'aktywności': 'activity',
+    'sekwencji': 'sequence',
+    'klas': 'class',
+    'komponentów': 'component',
+}
+
+_PAGE_MARKER = re.compile(r'\n--- Strona (\d+) ---\n')
+_TOKEN_PATTERN = re.compile(r'\w+', re.UNICODE)
+
+
+@dataclass
+class TextChunk:
+    """Fragment dokumentu PDF przygotowany do indeksowania."""
+    chunk_id: int
+    text: str
+    page: int
+    doc_title: str
+    doc_hash: str
+
+
+@dataclass
+class RetrievedChunk:
+    """Fragment dokumentu zwrócony przez wyszukiwanie wraz z oceną podobieństwa."""
+    chunk: TextChunk
+    score: float
+
+
+def chunk_text(text: str, chunk_size: int = DEFAULT_CHUNK_SIZE,
+               overlap: int = DEFAULT_CHUNK_OVERLAP) -> List[Dict]:
+    """Dzieli tekst dokumentu na fragmenty z zachowaniem numerów stron.
+
+    Fragmenty są budowane z akapitów; zbyt długie akapity są cięte na granicach
+    słów. Sąsiednie fragmenty w obrębie strony zachodzą na siebie o `overlap` znaków.
+    """
+    overlap = min(overlap, chunk_size // 4)
+    parts = _PAGE_MARKER.split(text)
+    # split zwraca [przed_pierwszą_stroną, nr, tekst, nr, tekst, ...]
+    pages = []
+    if parts[0].strip():
+        pages.append((1, parts[0]))
+    for i in range(1, len(parts) - 1, 2):
+        pages.append((int(parts[i]), parts[i + 1]))
+
+    chunks = []
+    for page_num, page_text in pages:
+        paragraphs = [re.sub(r'\s+', ' ', p).strip() for p in re.split(r'\n\s*\n', page_text)]
+        buffer = ""
+        for paragraph in filter(None, paragraphs):
+            while len(paragraph) > chunk_size:
+                cut = paragraph.rfind(' ', 0, chunk_size)
+                cut = cut if cut > chunk_size // 2 else chunk_size
+                head, paragraph = paragraph[:cut], paragraph[max(cut - overlap, 0):].lstrip()
+                if buffer:
+                    chunks.append({'text': buffer, 'page': page_num})
+                    buffer = ""
+                chunks.append({'text': head.strip(), 'page': page_num})
+            if buffer and len(buffer) + len(paragraph) + 1 > chunk_size:
+                chunks.append({'text': buffer, 'page': page_num})
+                tail = buffer[-overlap:] if overlap else ""
+                buffer = tail[tail.find(' ') + 1:] if ' ' in tail else tail
+            buffer = f"{buffer} {paragraph}".strip() if buffer else paragraph
+        if buffer:
+            chunks.append({'text': buffer, 'page': page_num})
+
+    return [c for c in chunks if len(c['text']) > 20]
+
+
+class HashingEmbedder:
+    """Wektoryzator oparty o haszowanie cech (bez modelu, działa offline).
+
+    Cechy: słowa, prefiksy słów (przybliżenie rdzenia dla odmiany w języku
+    polskim) oraz bigramy słów. Wagi: 1 + log(tf), wektor normalizowany L2.
+    """
+
+    def __init__(self, dim: int = 1024, prefix_len: int = 6):
+        self.dim = dim
+        self.prefix_len = prefix_len
+        self.name = f"hashing-{dim}"
+
+    def _features(self, text: str) -> List[str]:
+        tokens = [t for t in _TOKEN_PATTERN.findall(text.lower()) if len(t) > 2 and not t.isdigit()]
+        features = list(tokens)
+        features.extend(f"p:{t[:self.prefix_len]}" for t in tokens if len(t) > self.prefix_len)
+        features.extend(f"b:{a}_{b}" for a, b in zip(tokens, tokens[1:]))
+        return features
+
+    def embed_sparse(self, text: str) -> Dict[int, float]:
+        """Zwraca rzadki, znormalizowany wektor {indeks: waga}."""
+        counts: Dict[int, float] = {}
+        for feature in self._features(text):
+            digest = hashlib.md5(feature.encode('utf-8')).digest()
+            index = int.from_bytes(digest[:4], 'little') % self.dim
+            sign = 1.0 if digest[4] & 1 else -1.0
+            counts[index] = counts.get(index, 0.0) + sign
+
+        vector = {i: math.copysign(1.0 + math.log(abs(v)), v) for i, v in counts.items() if v}
+        norm = math.sqrt(sum(v * v for v in vector.values()))
+        if norm == 0:
+            return {}
+        return {i: v / norm for i, v in vector.items()}
+
+    def embed(self, texts: List[str]):
+        """Zwraca macierz float32 (len(texts), dim) - wymaga NumPy."""
+        matrix = np.zeros((len(texts), self.dim), dtype=np.float32)
+        for row, text in enumerate(texts):
+            for index, value in self.embed_sparse(text).items():
+                matrix[row, index] = value
+        return matrix
+
+
+class SentenceTransformerEmbedder:
+    """Wektoryzator używający małego lokalnego modelu sentence-transformers na CPU."""
+
+    def __init__(self, model_name: str):
+        from sentence_transformers import SentenceTransformer
+        self.model = SentenceTransformer(model_name, device="cpu")
+        self.name = "st-" + re.sub(r'[^A-Za-z0-9_.-]', '_', model_name)
+
+    def embed(self, texts: List[str]):
+        vectors = self.model.encode(texts, batch_size=32, normalize_embeddings=True,
+                                    show_progress_bar=False)
+        return np.asarray(vectors, dtype=np.float32)
+
+
+def get_default_embedder():
+    """Zwraca model z PDF_EMBEDDING_MODEL jeśli jest dostępny, w przeciwnym razie HashingEmbedder."""
+    model_name = os.getenv("PDF_EMBEDDING_MODEL", "").strip()
+    if model_name and NUMPY_AVAILABLE:
+        try:
+            return SentenceTransformerEmbedder(model_name)
+        except Exception as e:
+            log_warning(f"Model wektorowy {model_name} niedostępny ({e}) - używany HashingEmbedder")
+    return HashingEmbedder()
+
+
+def build_retrieval_query(query: str, diagram_type: str) -> str:
+    """Łączy opis procesu ze słowami kluczowymi typowymi dla danego typu diagramu."""
+    diagram_key = (diagram_type or "").lower()
+    diagram_key = _DIAGRAM_TYPE_ALIASES.get(diagram_key, diagram_key)
+    hints = DIAGRAM_QUERY_HINTS.get(diagram_key, "")
+    return f"{query}\n{hints}".strip()
+
+
+class PDFChunkIndex:
+    """Indeks wektorowy fragmentów dokumentów PDF z cache na dysku.
+
+    Dla każdego dokumentu (klucz: hash pliku + nazwa wektoryzatora) w katalogu
+    cache zapisywane są fragmenty (.json) oraz macierz wektorów (.npy), którą
+    przy kolejnych użyciach wczytuje się jako memory-map (bez NumPy - wektory
+    rzadkie w .sparse.json).
+    """
+
+    def __init__(self, embedder=None, cache_dir: str = "cache/pdf_index",
+                 chunk_size: int = DEFAULT_CHUNK_SIZE, overlap: int = DEFAULT_CHUNK_OVERLAP):
+        self.embedder = embedder or get_default_embedder()
+        self.cache_dir = Path(cache_dir)
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self.chunk_size = chunk_size
+        self.overlap = overlap
+        self.chunks: List[TextChunk] = []
+        self._matrices = []        # macierze NumPy (po jednej na dokument)
+        self._sparse_vectors = []  # wektory rzadkie gdy brak NumPy
+        self._indexed_hashes = set()
+
+    def _cache_base(self, doc_hash: str) -> Path:
+        return self.cache_dir / f"{doc_hash}_{self.embedder.name}_{self.chunk_size}"
+
+    def add_document(self, pdf_doc) -> int:
+        """Indeksuje dokument (PDFDocument); zwraca liczbę fragmentów."""
+        doc_hash = pdf_doc.hash or hashlib.md5(pdf_doc.text_content.encode('utf-8')).hexdigest()
+        if doc_hash in self._indexed_hashes:
+            return 0
+
+        base = self._cache_base(doc_hash)
+        chunks_path = base.with_suffix(".json")
+        vectors_path = base.with_suffix(".npy")
+
+        raw_chunks = None
+        if chunks_path.exists():
+            try:
+                with open(chunks_path, 'r', encoding='utf-8') as f:
+                    raw_chunks = json.load(f)
+            except Exception:
+                raw_chunks = None
+        if raw_chunks is None:
+            raw_chunks = chunk_text(pdf_doc.text_content, self.chunk_size, self.overlap)
+            with open(chunks_path, 'w', encoding='utf-8') as f:
+                json.dump(raw_chunks, f, ensure_ascii=False)
+
+        offset = len(self.chunks)
+        doc_chunks = [
+            TextChunk(chunk_id=offset + i, text=c['text'], page=c['page'],
+                      doc_title=pdf_doc.title, doc_hash=doc_hash)
+            for i, c in enumerate(raw_chunks)
+        ]
+
+        if NUMPY_AVAILABLE:
+            matrix = None
+            if vectors_path.exists():
+                try:
+                    matrix = np.load(vectors_path, mmap_mode='r')
+                    if matrix.shape[0] != len(doc_chunks):
+                        matrix = None
+                except Exception:
+                    matrix = None
+            if matrix is None:
+                matrix = self.embedder.embed([c.text for c in doc_chunks])
+                np.save(vectors_path, matrix)
+                matrix = np.load(vectors_path, mmap_mode='r')
+            self._matrices.append(matrix)
+        else:
+            sparse_path = base.with_suffix(".sparse.json")
+            vectors = None
+            if sparse_path.exists():
+                try:
+                    with open(sparse_path, 'r', encoding='utf-8') as f:
+                        vectors = [{int(i): v for i, v in pairs} for pairs in json.load(f)]
+                    if len(vectors) != len(doc_chunks):
+                        vectors = None
+                except Exception:
+                    vectors = None
+            if vectors is None:
+                vectors = [self.embedder.embed_sparse(c.text) for c in doc_chunks]
+                with open(sparse_path, 'w', encoding='utf-8') as f:
+                    json.dump([sorted(v.items()) for v in vectors], f)
+            self._sparse_vectors.extend(vectors)
+
+        self.chunks.extend(doc_chunks)
+        self._indexed_hashes.add(doc_hash)
+        return len(doc_chunks)
+
+    def _scores(self, query: str) -> List[float]:
+        if NUMPY_AVAILABLE:
+            if not self._matrices:
+                return []
+            query_vector = self.embedder.embed([query])[0]
+            return np.concatenate([m @ query_vector for m in self._matrices]).tolist()
+
+        query_vector = self.embedder.embed_sparse(query)
+        return [sum(value * query_vector.get(i, 0.0) for i, value in vector.items())
+                for vector in self._sparse_vectors]
+
+    def search(self, query: str, top_k: int = DEFAULT_TOP_K, max_chars: Optional[int] = None) -> List[RetrievedChunk]:
+        """Zwraca top-k fragmentów najbardziej podobnych do zapytania.
+
+        Wynik jest uporządkowany wg dokumentu i kolejności w dokumencie, żeby
+        model dostawał fragmenty w naturalnym porządku. `max_chars` ogranicza
+        łączną długość zwróconych fragmentów.
+        """
+        scores = self._scores(query)
+        ranked = sorted(range(len(scores)), key=lambda i: scores[i], reverse=True)
+
+        selected = []
+        total_chars = 0
+        for i in ranked[:max(top_k, 0)]:
+            if scores[i] <= 0:
+                break
+            if max_chars is not None and total_chars + len(self.chunks[i].text) > max_chars and selected:
+                break
+            selected.append(RetrievedChunk(chunk=self.chunks[i], score=float(scores[i])))
+            total_chars += len(self.chunks[i].text)
+
+        selected.sort(key=lambda r: r.chunk.chunk_id)
+        return selected
+
+    @property
+    def total_chars(self) -> int:
+        """Łączna długość wszystkich zaindeksowanych fragmentów."""
+        return sum(len(c.text) for c in self.chunks)
+
+
+def format_retrieved_context(results: List[RetrievedChunk]) -> str:
+    """Formatuje wybrane fragmenty jako sekcję kontekstu do promptu."""
+    if not results:
+        return ""
+
+    lines = []
+    current_title = None
+    for result in results:
+        chunk = result.chunk
+        if chunk.doc_title != current_title:
+            current_title = chunk.doc_title
+            lines.append(f"\n**FRAGMENTY DOKUMENTU PDF: {current_title}**")
+        lines.append(f"[str. {chunk.page}] {chunk.text}")
+    return "\n".join(lines).strip()
+
@@ -7,13 +7,42 @@ import tempfile
 import os
 from typing import List, Optional
 from pathlib import Path
-from utils.pdf.pdf_processor import PDFProcessor, enhance_prompt_with_pdf_context
+from utils.lazy_import import LazyImport
+
+# Stos PDF (fitz, PyPDF2) jest importowany dopiero przy przetwarzaniu pierwszego pliku
+PDFProcessor = LazyImport("utils.pdf.pdf_processor", "PDFProcessor")
+enhance_prompt_with_pdf_context = LazyImport("utils.pdf.pdf_processor", "enhance_prompt_with_pdf_context")
+
+
+@st.cache_resource(show_spinner=False)
+def get_pdf_processor():
+    """Współdzielony PDFProcessor (jedna instancja na proces serwera Streamlit)."""
+    return PDFProcessor()
+
+
+def _file_stamp(path: str) -> tuple:
+    """Znacznik zawartości pliku do klucza cache (ścieżka, rozmiar, czas modyfikacji)."""
+    try:
+        stat = os.stat(path)
+        return (path, stat.st_size, stat.st_mtime_ns)
+    except OSError:
+        return (path, None, None)
+
+
+@st.cache_data(show_spinner=False, max_entries=32)
+def _cached_enhanced_prompt(original_prompt: str, file_stamps: tuple, diagram_type: str,
+                            query: Optional[str], model_name: Optional[str]) -> str:
+    """Prompt z kontekstem PDF - cache po treści promptu, plikach i typie diagramu."""
+    pdf_files = [stamp[0] for stamp in file_stamps]
+    return enhance_prompt_with_pdf_context(original_prompt, pdf_files, diagram_type, query=query,
+                                           model_name=model_name)
+
 
 class PDFUploadManager:
     """Manager do obsługi uploadu i przetwarzania plików PDF w Streamlit."""
     
     def __init__(self):
-        self.processor = PDFProcessor()
+        self._processor = None
         
         # Inicjalizacja session state
         if 'uploaded_pdfs' not in st.session_state:
@@ -21,6 +50,13 @@ class PDFUploadManager:
         if 'pdf_contexts' not in st.session_state:
             st.session_state.pdf_contexts = {}
     
+    @property
+    def processor(self):
+        """PDFProcessor tworzony przy pierwszym użyciu."""
+        if self._processor is None:
+            self._processor = get_pdf_processor()
+        return self._processor
+    
     def render_pdf_upload_section(self) -> None:
         """Renderuje sekcję uploadu plików PDF."""
         
@@ -173,8 +209,9 @@ class PDFUploadManager:
         
         st.success("✅ Analiza została odświeżona")
     
-    def get_enhanced_prompt(self, original_prompt: str, diagram_type: str) -> str:
-        """Zwraca prompt wzbogacony o kontekst z plików PDF."""
+    def get_enhanced_prompt(self, original_prompt: str, diagram_type: str, query: Optional[str] = None,
+                            model_name: Optional[str] = None) -> str:
+        """Zwraca prompt wzbogacony o kontekst z plików PDF (fragmenty dobierane do `query`, w budżecie tokenów `model_name`)."""
         
         if not st.session_state.uploaded_pdfs:
             return original_prompt
@@ -186,8 +223,8 @@ class PDFUploadManager:
             return original_prompt
         
         try:
-            enhanced = enhance_prompt_with_pdf_context(original_prompt, pdf_files, diagram_type)
-            return enhanced
+            file_stamps = tuple(_file_stamp(path) for path in pdf_files)
+            return _cached_enhanced_prompt(original_prompt, file_stamps, diagram_type, query, model_name)
         except Exception as e:
             st.warning(f"Nie udało się użyć kontekstu PDF: {str(e)}")
             return original_prompt
@@ -3,7 +3,7 @@ import sys
 
 try:
     from utils.plantuml.plantuml_model import UMLClass, UMLRelation, UMLEnum, UMLNote
-    from utils.logger_utils import setup_logger, log_info, log_error, log_debug, log_exception
+    from utils.logger_utils import setup_logger, log_info, log_error, log_debug, log_exception, debug_enabled
 except ImportError as e:
     print(f"❌ Krytyczny błąd importu podstawowych modułów: {e}")
     sys.exit(1)
@@ -11,12 +11,59 @@ except ImportError as e:
 
 setup_logger('plantuml_class_parser.log')
 
+# Wyrażenia regularne kompilowane raz na moduł (parsowanie dużych diagramów linia po linii)
+CLASS_PATTERN = re.compile(r'(?:abstract\s+)?class\s+(\w+)(?:\s+extends\s+(\w+))?(?:\s+implements\s+(\w+(?:\s*,\s*\w+)*))?(?:\s*<<([^>]+)>>)?(?:\s*\{?)')
+CLASS_FALLBACK_PATTERN = re.compile(r'(?:abstract\s+)?class\s+(\w+)(?:\s*<<([^>]+)>>)?(?:\s*\{?)')
+MEMBER_MODIFIER_PATTERN = re.compile(r'\{(\w+)\}')
+MEMBER_MODIFIER_STRIP_PATTERN = re.compile(r'\s*\{[^}]+\}')
+ATTRIBUTE_TYPE_PATTERN = re.compile(r':\s*(\w+)')
+INHERITANCE_PATTERN = re.compile(r'(\w+)\s*<\|--\s*(\w+)|(\w+)\s*--\|>\s*(\w+)')
+RELATION_LABEL_STRIP_PATTERN = re.compile(r':\s*.*$')
+RELATION_MULTIPLICITY_STRIP_PATTERN = re.compile(r'"[0-9*\.]+"\s*')
+MULTIPLICITY_PATTERN = re.compile(r'"([0-9*\.]+)"')
+RELATION_LABEL_PATTERN = re.compile(r':\s*(?:(?:")([^"]+)(?:")|([^\s:]+))')
+RELATION_SYMBOLS = ('-->', '<--', '--|>', '<|--', '..|>', '<|..', '*--', 'o--', '--')
+
+# (wzorzec, typ relacji, czy odwrócony kierunek) - kolejność ma znaczenie
+RELATION_PATTERNS = [(re.compile(pattern), rel_type, reversed_) for pattern, rel_type, reversed_ in (
+    # Specyficzne wzorce dla złożonych relacji
+    (r'(\w+)\s*\*\-\-o\s*(\w+)', 'composition_aggregation_left', False),
+    (r'(\w+)\s*o\-\-\*\s*(\w+)', 'aggregation_composition_left', False),
+
+    # Dziedziczenie
+    (r'(\w+)\s*<\|\-\-\s*(\w+)', 'inheritance', True),
+    (r'(\w+)\s*\-\-\|\>\s*(\w+)', 'inheritance', False),
+    (r'(\w+)\s*\|\>\s*(\w+)', 'inheritance', False),
+    (r'(\w+)\s*<\|\s*(\w+)', 'inheritance', True),
+
+    # Realizacja/Implementacja
+    (r'(\w+)\s*<\|\.\.\s*(\w+)', 'realization', True),
+    (r'(\w+)\s*\.\.\|\>\s*(\w+)', 'realization', False),
+
+    # Kompozycja
+    (r'(\w+)\s*\*\-\-\s*(\w+)', 'composition', False),
+    (r'(\w+)\s*\-\-\*\s*(\w+)', 'composition', True),
+
+    # Agregacja
+    (r'(\w+)\s*o\-\-\s*(\w+)', 'aggregation', False),
+    (r'(\w+)\s*\-\-o\s*(\w+)', 'aggregation', True),
+
+    # Asocjacja
+    (r'(\w+)\s*\-\->\s*(\w+)', 'association', False),
+    (r'(\w+)\s*<\-\-\s*(\w+)', 'association', True),
+    (r'(\w+)\s*\-\-\s*(\w+)', 'association', False),
+)]
+
+# Relacje, dla których etykieta nie rozróżnia duplikatów
+UNLABELED_RELATION_TYPES = ('inheritance', 'realization')
+
 class PlantUMLClassParser:
     """Parser dla kodu PlantUML - poprawiona wersja z eliminacją duplikatów"""
     
     def __init__(self, debug_options=None):
         self.classes = {}
         self.relations = []
+        self.relation_keys = set()  # Klucze tożsamości relacji (patrz _relation_key)
         self.enums = {}  
         self.notes = []
         self.primitive_types = set() 
@@ -41,6 +88,7 @@ class PlantUMLClassParser:
         # Wyczyść dane przed parsowaniem
         self.classes.clear()
         self.relations.clear()
+        self.relation_keys.clear()
         self.enums.clear()
         self.notes.clear()
         self.primitive_types.clear() 
@@ -48,7 +96,7 @@ class PlantUMLClassParser:
         for line in lines:
             line = line.strip()
             if self.debug_options.get('parsing'):
-                log_debug(f"Przetwarzanie linii: {line}")
+                log_debug("Przetwarzanie linii: %s", line)
                 print(f"Przetwarzanie linii: {line}")
             # Pomiń puste linie, komentarze i znaczniki
             if not line or line.startswith("'") or line.startswith("@"):
@@ -90,7 +138,7 @@ class PlantUMLClassParser:
             
             # Jeśli nic nie dopasowano, może to być błąd lub nieobsługiwany element
             print(f"DEBUG: Unrecognized line: {line}")
-            log_debug(f"Unrecognized line: {line}")
+            log_debug("Unrecognized line: %s", line)
         
         # Po zakończeniu parsowania wypisz statystyki relacji
         self._print_relation_stats()
@@ -99,26 +147,26 @@ class PlantUMLClassParser:
         log_debug(f"Wykryte typy pierwotne: {', '.join(sorted(self.primitive_types))}")
         print(f"Wykryte typy pierwotne: {', '.join(sorted(self.primitive_types))}")
 
+    @staticmethod
+    def _relation_key(relation: UMLRelation) -> tuple:
+        """
+        Klucz tożsamości relacji: (źródło, cel, typ[, etykieta]).
+        Dziedziczenie i realizacja są unikalne niezależnie od etykiety.
+        """
+        if relation.relation_type in UNLABELED_RELATION_TYPES:
+            return (relation.source, relation.target, relation.relation_type)
+        return (relation.source, relation.target, relation.relation_type, relation.label)
+
     def _add_relation_if_not_exists(self, new_relation: UMLRelation) -> bool:
         """
         Dodaje relację tylko jeśli nie istnieje już taka sama.
         Zwraca True jeśli relacja została dodana, False jeśli już istniała.
         """
-        for rel in self.relations:
-            # Sprawdź czy relacja tego samego typu łącząca te same klasy już istnieje
-            if (rel.source == new_relation.source and 
-                rel.target == new_relation.target and 
-                rel.relation_type == new_relation.relation_type):
-                
-                # Dla dziedziczenia i realizacji nie potrzebujemy duplikatów
-                if rel.relation_type in ['inheritance', 'realization']:
-                    return False
-                
-                # Dla innych typów relacji sprawdź etykietę
-                if rel.label == new_relation.label:
-                    return False
-        
-        # Jeśli nie znaleziono duplikatu, dodaj relację
+        key = self._relation_key(new_relation)
+        if key in self.relation_keys:
+            return False
+
+        self.relation_keys.add(key)
         self.relations.append(new_relation)
         return True
 
@@ -196,8 +244,7 @@ class PlantUMLClassParser:
             return False
             
         # Rozszerzony wzorzec dla klasy z extends/implements i stereotypami w różnych formatach
-        pattern = r'(?:abstract\s+)?class\s+(\w+)(?:\s+extends\s+(\w+))?(?:\s+implements\s+(\w+(?:\s*,\s*\w+)*))?(?:\s*<<([^>]+)>>)?(?:\s*\{?)'
-        match = re.match(pattern, line)
+        match = CLASS_PATTERN.match(line)
         
         if match:
             name = match.group(1)
@@ -260,7 +307,7 @@ class PlantUMLClassParser:
             return True
         
         # Fallback - stary wzorzec bez extends/implements
-        match = re.match(r'(?:abstract\s+)?class\s+(\w+)(?:\s*<<([^>]+)>>)?(?:\s*\{?)', line)
+        match = CLASS_FALLBACK_PATTERN.match(line)
         if match:
             name = match.group(1)
             stereotype = match.group(2)
@@ -364,8 +411,8 @@ class PlantUMLClassParser:
             return
 
         # Rozpoznaj modyfikatory {static}, {abstract} itp.
-        modifiers = re.findall(r'\{(\w+)\}', line)
-        clean_line = re.sub(r'\s*\{[^}]+\}', '', line)
+        modifiers = MEMBER_MODIFIER_PATTERN.findall(line)
+        clean_line = MEMBER_MODIFIER_STRIP_PATTERN.sub('', line)
 
         if '(' in clean_line and ')' in clean_line:
             # Metoda
@@ -377,7 +424,7 @@ class PlantUMLClassParser:
             self.current_class.attributes.append(attr_info)
             
             # Wykryj i zapisz typ atrybutu do typów pierwotnych
-            attr_type_match = re.search(r':\s*(\w+)', clean_line)
+            attr_type_match = ATTRIBUTE_TYPE_PATTERN.search(clean_line)
             if attr_type_match:
                 attr_type = attr_type_match.group(1)
                 
@@ -385,7 +432,7 @@ class PlantUMLClassParser:
                 if attr_type not in self.classes and attr_type not in self.enums:
                     # Dodaj do zbioru typów pierwotnych
                     self.primitive_types.add(attr_type)
-                    log_debug(f"Znaleziono typ pierwotny: {attr_type}")
+                    log_debug("Znaleziono typ pierwotny: %s", attr_type)
 
     def _parse_method(self, line: str, modifiers: list) -> dict:
         """Parsuje metodę"""
@@ -410,11 +457,10 @@ class PlantUMLClassParser:
     
     def _parse_relation(self, line: str) -> bool:
         """Parsuje relacje między klasami z odpowiednią obsługą multiplikatorów"""
-        log_debug(f"DEBUG: Parsowanie linii relacji: {line}")
+        log_debug("DEBUG: Parsowanie linii relacji: %s", line)
 
         # Rozpoznaj dziedziczenie (<|-- lub --|>)
-        inheritance_pattern = r'(\w+)\s*<\|--\s*(\w+)|(\w+)\s*--\|>\s*(\w+)'
-        inheritance_match = re.search(inheritance_pattern, line)
+        inheritance_match = INHERITANCE_PATTERN.search(line)
 
         if inheritance_match:
             if inheritance_match.group(1) and inheritance_match.group(2):
@@ -449,48 +495,18 @@ class PlantUMLClassParser:
             return True
 
         # Sprawdź czy linia zawiera symbol relacji
-        relation_symbols = ['-->', '<--', '--|>', '<|--', '--|>', '..|>', '<|..', '*--', 'o--', '--']
-        if not any(rel_sym in line for rel_sym in relation_symbols):
+        if not any(rel_sym in line for rel_sym in RELATION_SYMBOLS):
             return False
         
         # Wyciągnij surowe stringi liczności i etykietę
         raw_multiplicities, label = self._extract_multiplicity_and_label(line)
                 
         # Usuń etykietę i liczności z linii
-        line_clean = re.sub(r':\s*.*$', '', line.strip())
-        line_clean = re.sub(r'"[0-9*\.]+"\s*', '', line_clean)
+        line_clean = RELATION_LABEL_STRIP_PATTERN.sub('', line.strip())
+        line_clean = RELATION_MULTIPLICITY_STRIP_PATTERN.sub('', line_clean)
         
-        patterns = [
-            # Specyficzne wzorce dla złożonych relacji
-            (r'(\w+)\s*\*\-\-o\s*(\w+)', 'composition_aggregation_left', False), 
-            (r'(\w+)\s*o\-\-\*\s*(\w+)', 'aggregation_composition_left', False), 
-            
-            # Dziedziczenie
-            (r'(\w+)\s*<\|\-\-\s*(\w+)', 'inheritance', True),
-            (r'(\w+)\s*\-\-\|\>\s*(\w+)', 'inheritance', False),
-            (r'(\w+)\s*\|\>\s*(\w+)', 'inheritance', False),
-            (r'(\w+)\s*<\|\s*(\w+)', 'inheritance', True),
-            
-            # Realizacja/Implementacja
-            (r'(\w+)\s*<\|\.\.\s*(\w+)', 'realization', True),
-            (r'(\w+)\s*\.\.\|\>\s*(\w+)', 'realization', False),
-            
-            # Kompozycja
-            (r'(\w+)\s*\*\-\-\s*(\w+)', 'composition', False),
-            (r'(\w+)\s*\-\-\*\s*(\w+)', 'composition', True),
-            
-            # Agregacja
-            (r'(\w+)\s*o\-\-\s*(\w+)', 'aggregation', False),
-            (r'(\w+)\s*\-\-o\s*(\w+)', 'aggregation', True),
-            
-            # Asocjacja
-            (r'(\w+)\s*\-\->\s*(\w+)', 'association', False),
-            (r'(\w+)\s*<\-\-\s*(\w+)', 'association', True),
-            (r'(\w+)\s*\-\-\s*(\w+)', 'association', False),
-        ]
-        
-        for pattern, rel_type, reversed_ in patterns:
-            match = re.match(pattern, line_clean)
+        for pattern, rel_type, reversed_ in RELATION_PATTERNS:
+            match = pattern.match(line_clean)
             if match:
                 if reversed_:
                     source, target = match.group(2), match.group(1)
@@ -541,7 +557,8 @@ class PlantUMLClassParser:
                     )
                     
                     if self._add_relation_if_not_exists(new_relation):
-                        log_debug(f"DEBUG: Found complex relation: {source} --composition--> {target} (label: {label}) (source_mult: {source_mult}, target_mult: {target_mult})")
+                        log_debug("DEBUG: Found complex relation: %s --composition--> %s (label: %s) (source_mult: %s, target_mult: %s)",
+                                  source, target, label, source_mult, target_mult)
                     return True
 
                 elif rel_type == 'aggregation_composition_left':
@@ -555,7 +572,8 @@ class PlantUMLClassParser:
                     )
                     
                     if self._add_relation_if_not_exists(new_relation):
-                        log_debug(f"DEBUG: Found complex relation: {source} --aggregation--> {target} (label: {label}) (source_mult: {source_mult}, target_mult: {target_mult})")
+                        log_debug("DEBUG: Found complex relation: %s --aggregation--> %s (label: %s) (source_mult: %s, target_mult: %s)",
+                                  source, target, label, source_mult, target_mult)
                     return True
 
                 # Standardowa obsługa
@@ -569,10 +587,11 @@ class PlantUMLClassParser:
                 )
                 
                 if self._add_relation_if_not_exists(new_relation):
-                    log_debug(f"DEBUG: Found relation: {source} --{rel_type}--> {target} (label: {label}) (source_mult: {source_mult}, target_mult: {target_mult})")
+                    log_debug("DEBUG: Found relation: %s --%s--> %s (label: %s) (source_mult: %s, target_mult: %s)",
+                              source, rel_type, target, label, source_mult, target_mult)
                 return True
         
-        log_debug(f"DEBUG: Relation not found: {line_clean!r}")
+        log_debug("DEBUG: Relation not found: %r", line_clean)
         return False
 
     def _print_relation_stats(self):
@@ -596,6 +615,11 @@ class PlantUMLClassParser:
             print(f"- {rel_type}: {count}")
             log_debug(f"- {rel_type}: {count}")
         
+        # Lista relacji (po jednej linii na relację) tylko przy debugowaniu relacji
+        # - dla dużych diagramów jej wypisywanie kosztuje więcej niż samo parsowanie
+        if not (self.debug_options.get('relations') or debug_enabled()):
+            return
+        
         # Dodaj sekcję wyświetlającą wszystkie multiplikatory
         log_debug("\nMULTIPLIKATORY W RELACJACH:")
         print("\nMULTIPLIKATORY W RELACJACH:")
@@ -679,13 +703,12 @@ class PlantUMLClassParser:
     def _extract_multiplicity_and_label(self, line: str) -> tuple[list[str], str]:
         """Wyciąga surowe stringi liczności i etykietę z linii relacji PlantUML."""
         # Wzorzec na liczności w cudzysłowach
-        mult_pattern = r'"([0-9*\.]+)"'
-        multiplicities = re.findall(mult_pattern, line)
+        multiplicities = MULTIPLICITY_PATTERN.findall(line)
 
         # Usunięcie liczności z linii
-        line_without_mult = re.sub(mult_pattern, '', line)
+        line_without_mult = MULTIPLICITY_PATTERN.sub('', line)
 
-        label_match = re.search(r':\s*(?:(?:")([^"]+)(?:")|([^\s:]+))', line_without_mult)
+        label_match = RELATION_LABEL_PATTERN.search(line_without_mult)
         
         label = None
         if label_match:
@@ -0,0 +1,229 @@
+"""
+Budżetowanie promptów - składanie promptu z sekcji w limicie tokenów modelu.
+
+Prompt jest budowany z sekcji o różnych priorytetach (szablon, schema,
+przykłady, kontekst PDF, opis procesu). Jeśli całość przekracza budżet
+modelu, sekcje o najniższym priorytecie są najpierw zastępowane wersją
+skróconą (np. kompaktowy JSON), potem przycinane, a na końcu pomijane.
+Sekcje wymagane (opis procesu, instrukcja wyjścia) nigdy nie są usuwane.
+
+Liczba tokenów jest liczona dokładnie przez `tiktoken` (jeśli jest dostępny),
+a w przeciwnym razie przybliżana heurystyką.
+"""
+
+import os
+import re
+import math
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional
+
+from utils.logger_utils import log_info, log_debug
+
+try:
+    import tiktoken
+    TIKTOKEN_AVAILABLE = True
+except ImportError:
+    tiktoken = None
+    TIKTOKEN_AVAILABLE = False
+
+# Okna kontekstowe (w tokenach) - dopasowanie po fragmencie nazwy modelu,
+# sprawdzane w kolejności (bardziej szczegółowe wzorce najpierw)
+MODEL_CONTEXT_WINDOWS = [
+    ("gemma-3-4b", 8192),
+    ("gemma", 8192),
+    ("gemini-1.5-pro", 2_000_000),
+    ("gemini", 1_000_000),
+    ("gpt-4o", 128_000),
+    ("gpt-4-turbo", 128_000),
+    ("gpt-4", 8192),
+    ("gpt-3.5-turbo", 16_385),
+    ("claude", 200_000),
+    ("codellama", 16_384),
+    ("mistral", 8192),
+    ("llama2", 4096),
+    ("llama", 8192),
+    ("qwen", 32_768),
+]
+DEFAULT_CONTEXT_WINDOW = 8192
+DEFAULT_RESERVED_OUTPUT_TOKENS = int(os.getenv("PROMPT_RESERVED_OUTPUT_TOKENS", "2048"))
+
+_TOKEN_PIECES = re.compile(r"\w+|[^\w\s]", re.UNICODE)
+_ENCODINGS = {}
+
+
+def _get_encoding(model_name: Optional[str]):
+    """Zwraca (z cache) enkoder tiktoken dla modelu lub None."""
+    if not TIKTOKEN_AVAILABLE:
+        return None
+    key = model_name or ""
+    if key not in _ENCODINGS:
+        try:
+            _ENCODINGS[key] = tiktoken.encoding_for_model(key)
+        except Exception:
+            _ENCODINGS[key] = tiktoken.get_encoding("cl100k_base")
+    return _ENCODINGS[key]
+
+
+def estimate_tokens(text: str, model_name: Optional[str] = None) -> int:
+    """Szacuje liczbę tokenów tekstu.
+
+    Przybliżenie (gdy brak tiktoken): każde słowo to ceil(len/4) tokenów -
+    długie polskie słowa z odmianą dzielą się na kilka tokenów - a każdy
+    znak interpunkcyjny, emoji i symbol to osobny token.
+    """
+    if not text:
+        return 0
+    encoding = _get_encoding(model_name)
+    if encoding is not None:
+        return len(encoding.encode(text, disallowed_special=()))
+    return sum(math.ceil(len(piece) / 4) for piece in _TOKEN_PIECES.findall(text))
+
+
+def get_context_window(model_name: Optional[str]) -> int:
+    """Zwraca rozmiar okna kontekstowego modelu (w tokenach)."""
+    name = (model_name or "").lower()
+    for pattern, window in MODEL_CONTEXT_WINDOWS:
+        if pattern in name:
+            return window
+    return DEFAULT_CONTEXT_WINDOW
+
+
+def get_prompt_budget(model_name: Optional[str], reserved_output_tokens: Optional[int] = None) -> int:
+    """Budżet tokenów promptu dla modelu: PROMPT_TOKEN_BUDGET lub okno kontekstu minus rezerwa na odpowiedź."""
+    env_budget = os.getenv("PROMPT_TOKEN_BUDGET", "").strip()
+    if env_budget.isdigit():
+        return int(env_budget)
+    reserved = DEFAULT_RESERVED_OUTPUT_TOKENS if reserved_output_tokens is None else reserved_output_tokens
+    return max(get_context_window(model_name) - reserved, 512)
+
+
+def truncate_to_tokens(text: str, max_tokens: int, model_name: Optional[str] = None,
+                       marker: str = "\n[...]") -> str:
+    """Przycina tekst do max_tokens na granicach linii (zachowując początek)."""
+    if estimate_tokens(text, model_name) <= max_tokens:
+        return text
+    budget = max_tokens - estimate_tokens(marker, model_name)
+    kept = []
+    used = 0
+    for line in text.splitlines():
+        line_tokens = estimate_tokens(line, model_name) + 1
+        if used + line_tokens > budget:
+            break
+        kept.append(line)
+        used += line_tokens
+    body = "\n".join(kept).rstrip()
+    # Same puste linie nie są treścią - wtedy nic nie zostaje
+    return body + marker if body.strip() else ""
+
+
+@dataclass
+class PromptSection:
+    """Sekcja promptu.
+
+    priority: wyższy = ważniejszy (sekcje o niższym priorytecie są skracane pierwsze)
+    required: sekcja nie może zostać pominięta ani przycięta
+    compact: opcjonalna krótsza wersja sekcji o tym samym znaczeniu (np. JSON bez wcięć)
+    truncatable: czy sekcję można przyciąć, zanim zostanie pominięta
+    """
+    name: str
+    text: str
+    priority: int = 50
+    required: bool = False
+    compact: Optional[str] = None
+    truncatable: bool = True
+
+
+@dataclass
+class BudgetedPrompt:
+    """Wynik składania promptu w budżecie."""
+    text: str
+    model_name: Optional[str]
+    budget: int
+    original_tokens: int
+    total_tokens: int
+    section_tokens: Dict[str, int] = field(default_factory=dict)
+    compacted: List[str] = field(default_factory=list)
+    truncated: List[str] = field(default_factory=list)
+    dropped: List[str] = field(default_factory=list)
+
+    @property
+    def tokens_saved(self) -> int:
+        return self.original_tokens - self.total_tokens
+
+    @property
+    def fits(self) -> bool:
+        return self.total_tokens <= self.budget
+
+
+class PromptBudgeter:
+    """Składa prompt z sekcji tak, aby zmieścił się w budżecie tokenów modelu."""
+
+    def __init__(self, model_name: Optional[str] = None, budget: Optional[int] = None,
+                 reserved_output_tokens: Optional[int] = None, separator: str = "\n\n"):
+        self.model_name = model_name
+        self.budget = budget if budget is not None else get_prompt_budget(model_name, reserved_output_tokens)
+        self.separator = separator
+
+    def count(self, text: str) -> int:
+        return estimate_tokens(text, self.model_name)
+
+    def assemble(self, sections: List[PromptSection]) -> BudgetedPrompt:
+        """Zwraca prompt złożony z sekcji (w oryginalnej kolejności) mieszczący się w budżecie."""
+        texts = {s.name: s.text for s in sections}
+        tokens = {s.name: self.count(s.text) for s in sections}
+        separator_tokens = self.count(self.separator)
+
+        def total() -> int:
+            present = [name for name in tokens if texts[name]]
+            return sum(tokens[name] for name in present) + separator_tokens * max(len(present) - 1, 0)
+
+        original_tokens = total()
+        result = BudgetedPrompt(text="", model_name=self.model_name, budget=self.budget,
+                                original_tokens=original_tokens, total_tokens=original_tokens)
+
+        # Kolejność redukcji: najpierw sekcje o najniższym priorytecie
+        candidates = sorted((s for s in sections if not s.required), key=lambda s: s.priority)
+
+        # 1. Wersje kompaktowe
+        for section in candidates:
+            if total() <= self.budget:
+                break
+            if section.compact is not None:
+                texts[section.name] = section.compact
+                tokens[section.name] = self.count(section.compact)
+                result.compacted.append(section.name)
+
+        # 2. Przycinanie, 3. pomijanie
+        for section in candidates:
+            overflow = total() - self.budget
+            if overflow <= 0:
+                break
+            remaining = tokens[section.name] - overflow
+            truncated = ""
+            if section.truncatable and remaining >= 64:
+                truncated = truncate_to_tokens(texts[section.name], remaining, self.model_name)
+            if truncated:
+                texts[section.name] = truncated
+                tokens[section.name] = self.count(truncated)
+                result.truncated.append(section.name)
+            else:
+                # Przycięcie nic by nie zostawiło (np. jedna długa linia) - sekcja jest pomijana
+                texts[section.name] = ""
+                tokens[section.name] = 0
+                result.dropped.append(section.name)
+
+        result.text = self.separator.join(texts[s.name] for s in sections if texts[s.name])
+        result.total_tokens = total()
+        result.section_tokens = {name: count for name, count in tokens.items()}
+        self._report(result)
+        return result
+
+    def _report(self, result: BudgetedPrompt) -> None:
+        if result.tokens_saved > 0:
+            log_info(f"📉 Prompt budget ({result.model_name or 'default'}): {result.original_tokens} → "
+                     f"{result.total_tokens}/{result.budget} tokenów (zaoszczędzono {result.tokens_saved}); "
+                     f"compact={result.compacted}, truncated={result.truncated}, dropped={result.dropped}")
+        else:
+            log_debug(f"Prompt budget ({result.model_name or 'default'}): {result.total_tokens}/{result.budget} tokenów")
+        if not result.fits:
+            log_info(f"⚠️ Sekcje wymagane przekraczają budżet promptu: {result.total_tokens}/{result.budget} tokenów")
@@ -1,6 +1,6 @@
 import sys
 import os
-from typing import Dict, List, Tuple, Set, Optional
+from typing import Dict, Hashable, List, Tuple, Set, Optional
 from collections import deque, defaultdict
 import math
 
@@ -16,6 +16,9 @@ except ImportError:
     def log_error(msg): print(f"ERROR: {msg}")
     def log_warning(msg): print(f"WARNING: {msg}")
 
+from utils.xmi.layout_cache import (FAST, HIT, INCREMENTAL, MISS, QUALITY, CachedLayout, LayoutCache,
+                                    layout_cache, structure_hash)
+
 
 class Node:
     """Reprezentacja węzła grafu dla własnego algorytmu Sugiyamy"""
@@ -281,11 +284,152 @@ class Swimlane:
         return self.x_start + self.width
 
 
+def count_bilayer_crossings(edges: List[Tuple[int, int]], lower_size: int) -> int:
+    """Liczba przecięć krawędzi między dwiema sąsiednimi warstwami w czasie O(E log V).
+
+    Args:
+        edges: pary (pozycja w warstwie górnej, pozycja w warstwie dolnej)
+        lower_size: liczba węzłów w warstwie dolnej
+
+    Krawędzie sortowane są po pozycji górnej, a przecięcia to inwersje pozycji
+    dolnych - zliczane drzewem Fenwicka (Barth, Jünger, Mutzel).
+    """
+    tree = [0] * (lower_size + 1)
+    crossings = 0
+    inserted = 0
+    for _, lower in sorted(edges):
+        # Ile wcześniej wstawionych krawędzi kończy się na pozycji <= lower
+        idx = lower + 1
+        not_crossing = 0
+        while idx > 0:
+            not_crossing += tree[idx]
+            idx -= idx & -idx
+        crossings += inserted - not_crossing
+        
+        idx = lower + 1
+        while idx <= lower_size:
+            tree[idx] += 1
+            idx += idx & -idx
+        inserted += 1
+    return crossings
+
+
+def _bk_align(layers: List[List[Node]], neighbours: Dict[Node, List[Node]]):
+    """Wyrównanie pionowe Brandes–Köpf: węzeł tworzy blok z medianowym sąsiadem z poprzedniej warstwy."""
+    root = {}
+    align = {}
+    position = {}
+    for layer in layers:
+        for idx, node in enumerate(layer):
+            root[node] = node
+            align[node] = node
+            position[node] = idx
+
+    for layer in layers[1:]:
+        last_aligned = -1
+        for node in layer:
+            adjacent = sorted(neighbours[node], key=position.__getitem__)
+            count = len(adjacent)
+            if not count:
+                continue
+            for median in sorted({(count - 1) // 2, count // 2}):
+                if align[node] is not node:
+                    break
+                candidate = adjacent[median]
+                # Bloki nie mogą się krzyżować z wcześniej wyrównanymi w tej warstwie
+                if last_aligned < position[candidate]:
+                    align[candidate] = node
+                    root[node] = root[candidate]
+                    align[node] = root[node]
+                    last_aligned = position[candidate]
+    return root
+
+
+def _bk_compact(layers: List[List[Node]], root: Dict[Node, Node], separation) -> Optional[Dict[Node, float]]:
+    """Kompaktowanie poziome: najdłuższa ścieżka w grafie ograniczeń między blokami (do lewej)."""
+    constraints = defaultdict(list)
+    in_degree = {block: 0 for block in set(root.values())}
+    for layer in layers:
+        for left, right in zip(layer, layer[1:]):
+            constraints[root[left]].append((root[right], separation(left, right)))
+            in_degree[root[right]] += 1
+
+    block_x = {block: 0.0 for block in in_degree}
+    queue = deque(block for block, degree in in_degree.items() if degree == 0)
+    processed = 0
+    while queue:
+        block = queue.popleft()
+        processed += 1
+        for next_block, distance in constraints[block]:
+            if block_x[block] + distance > block_x[next_block]:
+                block_x[next_block] = block_x[block] + distance
+            in_degree[next_block] -= 1
+            if in_degree[next_block] == 0:
+                queue.append(next_block)
+
+    if processed < len(block_x):
+        return None  # Cykl w ograniczeniach - nie powinien wystąpić przy poprawnym wyrównaniu
+    return {node: block_x[block] for node, block in root.items()}
+
+
+def brandes_kopf_coordinates(layers: List[List[Node]], upper: Dict[Node, List[Node]],
+                             lower: Dict[Node, List[Node]], separation) -> Optional[Dict[Node, float]]:
+    """Współrzędne X (środki węzłów) metodą Brandes–Köpf.
+
+    Cztery warianty wyrównania (do sąsiadów powyżej/poniżej, kompaktowanie
+    w lewo/prawo) są wyrównywane do najwęższego, a wynik to średnia dwóch
+    median - zachowuje kolejność w warstwach i minimalne odstępy `separation(lewy, prawy)`.
+
+    Args:
+        layers: uporządkowane warstwy (mogą być puste)
+        upper/lower: sąsiedzi węzła w warstwie bezpośrednio powyżej/poniżej
+
+    Returns:
+        {węzeł: x} względem lewego skraju lub None, gdy układu nie da się wyznaczyć
+    """
+    layouts = []
+    for vertical_layers, neighbours in ((layers, upper), (layers[::-1], lower)):
+        for to_right in (False, True):
+            variant = [layer[::-1] for layer in vertical_layers] if to_right else vertical_layers
+            root = _bk_align(variant, neighbours)
+            xs = _bk_compact(variant, root, (lambda a, b: separation(b, a)) if to_right else separation)
+            if xs is None:
+                return None
+            if to_right:
+                xs = {node: -value for node, value in xs.items()}
+            layouts.append((xs, to_right))
+
+    if not layouts[0][0]:
+        return {}
+
+    def extent(xs):
+        return min(xs.values()), max(xs.values())
+
+    narrowest = min((xs for xs, _ in layouts), key=lambda xs: extent(xs)[1] - extent(xs)[0])
+    narrow_min, narrow_max = extent(narrowest)
+    aligned = []
+    for xs, to_right in layouts:
+        low, high = extent(xs)
+        shift = narrow_max - high if to_right else narrow_min - low
+        aligned.append(xs if shift == 0 else {node: value + shift for node, value in xs.items()})
+
+    result = {}
+    for node in aligned[0]:
+        values = sorted(xs[node] for xs in aligned)
+        result[node] = (values[1] + values[2]) / 2
+    return result
+
+
 class GraphLayoutManager:
     """WŁASNY ALGORYTM SUGIYAMY - specjalnie dla diagramów aktywności UML"""
     
-    def __init__(self, debug: bool = False):
+    def __init__(self, debug: bool = False, fast: bool = False, cache: Optional[LayoutCache] = None):
         self.debug = debug
+        # Tryb szybki: jeden przebieg mediany bez transpozycji, równomierny rozkład w torach
+        self.fast = fast
+        # Pamięć podręczna układów (domyślnie wspólna dla procesu)
+        self.cache = cache if cache is not None else layout_cache
+        self.cache_status: Optional[str] = None
         
         # Struktura grafu
         self.nodes: Dict[str, Node] = {}
@@ -304,10 +448,19 @@ class GraphLayoutManager:
         self.node_spacing = 150   
         self.intra_lane_spacing = 80  # dodatkowy margines w obrębie jednego toru
         self.swimlane_gap = 100       # odstęp pomiędzy torami (≈ szerokość aktywności)
+        self.crossing_max_iterations = 24  # maks. liczba przebiegów minimalizacji przecięć
+        self.crossing_patience = 2         # przebiegi bez poprawy przed zakończeniem
         
         # Wyniki
         self.element_positions = {}
         self._lane_layouts: Dict[str, int] = {}
+        self._lane_relative_x: Dict[str, Dict[Node, float]] = {}
+        self.edge_crossings = 0
+        
+        # Identyfikacja węzłów między wersjami diagramu (dla pamięci podręcznej)
+        self._flow_nodes: List[Node] = []
+        self._content_keys: Tuple = ()
+        self._virtual_origin: Dict[str, Tuple[str, str, int]] = {}
     
     def analyze_diagram_structure(self, parsed_data):
         """🎯 GŁÓWNA METODA: Własny algorytm Sugiyamy krok po kroku"""
@@ -318,16 +471,31 @@ class GraphLayoutManager:
             
             # 🔧 KROK 1: Reprezentacja diagramu jako grafu
             self._build_graph_representation(parsed_data)
-            
+
+            # 💾 Ten sam graf (z dokładnością do etykiet i identyfikatorów) był już układany
+            key, topology_key = self._structure_keys()
+            use_cache = self.cache.enabled
+            cached = self.cache.get(key) if use_cache else None
+            if cached is not None:
+                return self._restore_cached_layout(cached)
+
             # 🏗️ KROK 2: Przypisanie węzłów do warstw (Ranking)
             self._assign_nodes_to_layers()
-            
+
             # ➕ KROK 2.5: Dodaj węzły wirtualne dla długich krawędzi
             self._insert_virtual_nodes()
-            
+
             # 🔀 KROK 3: Minimalizacja przecięć krawędzi (Crossing Reduction)
-            self._minimize_edge_crossings()
-            
+            #    albo uporządkowanie warstw z poprzedniej wersji diagramu
+            previous, same_topology = (self.cache.find_previous(topology_key, self._content_keys, self._layout_mode)
+                                       if use_cache else (None, False))
+            if previous is not None and self._reuse_previous_order(previous, same_topology):
+                self.cache_status = INCREMENTAL
+            else:
+                self._minimize_edge_crossings()
+                self.cache_status = MISS if use_cache else None
+            layer_order = self._layer_order_slots()
+
             # 📐 Dostosuj wymiary płótna do liczby warstw i szerokości torów
             self._adjust_canvas_dimensions()
 
@@ -339,7 +507,20 @@ class GraphLayoutManager:
             
             # 📊 Tworzenie wyników
             grid_info = self._calculate_grid_info()
-            
+
+            if use_cache:
+                self.cache.record(self.cache_status)
+                self.cache.put(CachedLayout(
+                    key=key,
+                    topology_key=topology_key,
+                    content_keys=self._content_keys,
+                    positions=[dict(self.element_positions[node.id]) for node in self._flow_nodes],
+                    grid=dict(grid_info),
+                    crossings=self.edge_crossings,
+                    order=layer_order,
+                    mode=self._layout_mode,
+                ))
+
             if self.debug:
                 log_debug(f"✅ Własny Sugiyama: {len(self.element_positions)} pozycji")
                 log_debug(f"📊 Hierarchia: {len(self.layers)} warstw")
@@ -669,13 +850,14 @@ class GraphLayoutManager:
         if self.debug:
             log_debug("➕ KROK 2.5: Wstawianie węzłów wirtualnych")
         
-        edges_to_virtualize = []
-        
         # Znajdź krawędzie przechodzące przez więcej niż jedną warstwę
-        for edge in self.edges[:]:  # ✅ SKOPIUJ listę żeby uniknąć modyfikacji podczas iteracji
-            layer_diff = edge.target.layer - edge.source.layer
-            if layer_diff > 1:
-                edges_to_virtualize.append(edge)
+        edges_to_virtualize = [edge for edge in self.edges if edge.target.layer - edge.source.layer > 1]
+        if not edges_to_virtualize:
+            return
+        
+        # ✅ Usuń oryginalne krawędzie jednym przebiegiem (zamiast list.remove per krawędź - O(E²))
+        virtualized = {id(edge) for edge in edges_to_virtualize}
+        self.edges = [edge for edge in self.edges if id(edge) not in virtualized]
         
         virtual_node_counter = 0
         
@@ -684,110 +866,230 @@ class GraphLayoutManager:
             target = edge.target
             label = edge.label
             
-            # ✅ SPRAWDŹ czy krawędź nadal istnieje przed usunięciem
-            if edge in self.edges:
-                # Usuń oryginalną krawędź
-                self.edges.remove(edge)
+            # Usuń z węzłów tylko jeśli istnieją
+            if target in source.successors:
+                source.successors.remove(target)
+            if source in target.predecessors:
+                target.predecessors.remove(source)
+            
+            current_node = source
+            
+            for layer in range(source.layer + 1, target.layer):
+                virtual_id = f"virtual_{virtual_node_counter}"
+                virtual_node = Node(virtual_id, "virtual", "", source.swimlane)
+                virtual_node.is_virtual = True
+                virtual_node.layer = layer
+                virtual_node.width = 10
+                virtual_node.height = 10
                 
-                # Usuń z węzłów tylko jeśli istnieją
-                if target in source.successors:
-                    source.successors.remove(target)
-                if source in target.predecessors:
-                    target.predecessors.remove(source)
+                self.nodes[virtual_id] = virtual_node
+                self._virtual_origin[virtual_id] = (source.id, target.id, layer - source.layer)
                 
-                # Reszta kodu bez zmian...
-                current_node = source
+                # ✅ BEZPIECZNE DODANIE do warstwy
+                if layer < len(self.layers):
+                    self.layers[layer].append(virtual_node)
                 
-                for layer in range(source.layer + 1, target.layer):
-                    virtual_id = f"virtual_{virtual_node_counter}"
-                    virtual_node = Node(virtual_id, "virtual", "", source.swimlane)
-                    virtual_node.is_virtual = True
-                    virtual_node.layer = layer
-                    virtual_node.width = 10
-                    virtual_node.height = 10
-                    
-                    self.nodes[virtual_id] = virtual_node
-                    
-                    # ✅ BEZPIECZNE DODANIE do warstwy
-                    if layer < len(self.layers):
-                        self.layers[layer].append(virtual_node)
-                    
-                    virtual_edge = Edge(current_node, virtual_node)
-                    self.edges.append(virtual_edge)
-                    current_node.add_successor(virtual_node)
-                    
-                    current_node = virtual_node
-                    virtual_node_counter += 1
+                virtual_edge = Edge(current_node, virtual_node)
+                self.edges.append(virtual_edge)
+                current_node.add_successor(virtual_node)
                 
-                # Połącz ostatni wirtualny węzeł z celem
-                final_edge = Edge(current_node, target, label)
-                self.edges.append(final_edge)
-                current_node.add_successor(target, label)
+                current_node = virtual_node
+                virtual_node_counter += 1
+            
+            # Połącz ostatni wirtualny węzeł z celem
+            final_edge = Edge(current_node, target, label)
+            self.edges.append(final_edge)
+            current_node.add_successor(target, label)
         
-        if self.debug and edges_to_virtualize:
+        if self.debug:
             log_debug(f"   ➕ Dodano {virtual_node_counter} węzłów wirtualnych dla {len(edges_to_virtualize)} krawędzi")
     
     # ===== 🔀 KROK 3: MINIMALIZACJA PRZECIĘĆ =====
     
     def _minimize_edge_crossings(self):
-        """Minimalizuj przecięcia krawędzi metodą barycentrum"""
+        """Minimalizuj przecięcia krawędzi: heurystyka mediany + transpozycje.
+
+        Przebiegi w dół i w górę są naprzemienne; po każdym liczona jest
+        liczba przecięć (drzewo Fenwicka) i zapamiętywane najlepsze uporządkowanie.
+        Pętla kończy się, gdy przez `crossing_patience` iteracji nie było poprawy.
+        Przy swimlanes węzły w warstwie pozostają pogrupowane według torów.
+        """
         
         if self.debug:
             log_debug("🔀 KROK 3: Minimalizacja przecięć krawędzi")
         
-        iterations = 5  # Liczba iteracji optymalizacji
+        upper, lower = self._layer_neighbours()
+        lane_rank = self._lane_ranks()
         
-        for iteration in range(iterations):
-            improved = False
-            
-            # 3A. W dół - optymalizuj na podstawie poprzedników
+        # Początkowe uporządkowanie: grupowanie według torów (stabilnie), pozycje = indeksy
+        for layer in self.layers:
+            layer.sort(key=lambda n: lane_rank(n))
+            self._renumber_layer(layer)
+        
+        if self.fast:
             for layer_idx in range(1, len(self.layers)):
-                layer = self.layers[layer_idx]
-                
-                # Oblicz barycenter dla każdego węzła
-                for node in layer:
-                    if node.predecessors:
-                        positions = [pred.position_in_layer for pred in node.predecessors]
-                        node.barycenter = sum(positions) / len(positions)
-                    else:
-                        node.barycenter = node.position_in_layer
-                
-                # Sortuj węzły według barycenter
-                old_order = [(node.position_in_layer, node.id) for node in layer]
-                layer.sort(key=lambda n: n.barycenter)
-                
-                # Zaktualizuj pozycje w warstwie
-                for i, node in enumerate(layer):
-                    node.position_in_layer = i
-                
-                new_order = [(node.position_in_layer, node.id) for node in layer]
-                if old_order != new_order:
-                    improved = True
+                self._reorder_layer(self.layers[layer_idx], upper, lane_rank)
+            self.edge_crossings = self._count_total_crossings(lower)
+            if self.debug:
+                log_debug(f"   🔀 Minimalizacja przecięć (tryb szybki): {self.edge_crossings}")
+            return
+        
+        self._transpose_layers(upper, lower, lane_rank)
+        best_crossings = self._count_total_crossings(lower)
+        initial_crossings = best_crossings
+        best_order = [list(layer) for layer in self.layers]
+        
+        iterations = 0
+        stale = 0
+        while best_crossings > 0 and iterations < self.crossing_max_iterations and stale < self.crossing_patience:
+            if iterations % 2 == 0:
+                # 3A. W dół - mediana pozycji sąsiadów z warstwy powyżej
+                for layer_idx in range(1, len(self.layers)):
+                    self._reorder_layer(self.layers[layer_idx], upper, lane_rank)
+            else:
+                # 3B. W górę - mediana pozycji sąsiadów z warstwy poniżej
+                for layer_idx in range(len(self.layers) - 2, -1, -1):
+                    self._reorder_layer(self.layers[layer_idx], lower, lane_rank)
             
-            # 3B. W górę - optymalizuj na podstawie następników
-            for layer_idx in range(len(self.layers) - 2, -1, -1):
-                layer = self.layers[layer_idx]
-                
-                # Oblicz barycenter dla każdego węzła
-                for node in layer:
-                    if node.successors:
-                        positions = [succ.position_in_layer for succ in node.successors]
-                        node.barycenter = sum(positions) / len(positions)
-                    else:
-                        node.barycenter = node.position_in_layer
-                
-                # Sortuj węzły według barycenter
-                layer.sort(key=lambda n: n.barycenter)
-                
-                # Zaktualizuj pozycje w warstwie
-                for i, node in enumerate(layer):
-                    node.position_in_layer = i
+            self._transpose_layers(upper, lower, lane_rank)
+            iterations += 1
             
-            if not improved:
-                break
+            crossings = self._count_total_crossings(lower)
+            if crossings < best_crossings:
+                best_crossings = crossings
+                best_order = [list(layer) for layer in self.layers]
+                stale = 0
+            else:
+                stale += 1
+        
+        # Przywróć najlepsze uporządkowanie (w miejscu - kolejne kroki trzymają referencje do warstw)
+        for layer, order in zip(self.layers, best_order):
+            layer[:] = order
+            self._renumber_layer(layer)
+        
+        self.edge_crossings = best_crossings
         
         if self.debug:
-            log_debug(f"   🔀 Minimalizacja przecięć: {iterations} iteracji")
+            log_debug(f"   🔀 Minimalizacja przecięć: {initial_crossings} → {best_crossings} ({iterations} iteracji)")
+    
+    def _layer_neighbours(self) -> Tuple[Dict[Node, List[Node]], Dict[Node, List[Node]]]:
+        """Sąsiedzi każdego węzła w warstwie powyżej i poniżej (krawędzie w obu kierunkach)."""
+        
+        upper: Dict[Node, List[Node]] = {}
+        lower: Dict[Node, List[Node]] = {}
+        for layer in self.layers:
+            for node in layer:
+                upper[node] = []
+                lower[node] = []
+        
+        for node in upper:
+            for succ in node.successors:
+                if succ not in upper:
+                    continue
+                if succ.layer == node.layer + 1:
+                    lower[node].append(succ)
+                    upper[succ].append(node)
+                elif succ.layer == node.layer - 1:
+                    upper[node].append(succ)
+                    lower[succ].append(node)
+        return upper, lower
+    
+    def _lane_ranks(self):
+        """Funkcja: węzeł -> indeks toru (węzły bez toru za wszystkimi torami)."""
+        
+        lanes = {name: idx for idx, name in enumerate(self.swimlanes)}
+        no_lane = len(lanes)
+        ranks = {node: lanes.get(node.swimlane, no_lane) for layer in self.layers for node in layer}
+        return ranks.__getitem__
+    
+    @staticmethod
+    def _renumber_layer(layer: List[Node]):
+        for idx, node in enumerate(layer):
+            node.position_in_layer = idx
+    
+    @staticmethod
+    def _median_position(positions: List[int]) -> float:
+        """Ważona mediana pozycji sąsiadów (wariant Gansnera i in. używany w dot)."""
+        
+        positions.sort()
+        count = len(positions)
+        middle = count // 2
+        if count % 2 == 1:
+            return positions[middle]
+        if count == 2:
+            return (positions[0] + positions[1]) / 2
+        left = positions[middle - 1] - positions[0]
+        right = positions[-1] - positions[middle]
+        if left + right == 0:
+            return (positions[middle - 1] + positions[middle]) / 2
+        return (positions[middle - 1] * right + positions[middle] * left) / (left + right)
+    
+    def _reorder_layer(self, layer: List[Node], neighbours: Dict[Node, List[Node]], lane_rank):
+        """Posortuj warstwę według mediany sąsiadów; węzły bez sąsiadów zachowują pozycję."""
+        
+        for node in layer:
+            adjacent = neighbours[node]
+            if adjacent:
+                node.barycenter = self._median_position([n.position_in_layer for n in adjacent])
+            else:
+                node.barycenter = node.position_in_layer
+        
+        layer.sort(key=lambda n: (lane_rank(n), n.barycenter))
+        self._renumber_layer(layer)
+    
+    @staticmethod
+    def _pair_crossings(left: Node, right: Node, neighbours: Dict[Node, List[Node]]) -> Tuple[int, int]:
+        """Przecięcia krawędzi `left` i `right` z jedną warstwą sąsiednią: (przy left przed right, po zamianie)."""
+        
+        right_positions = [n.position_in_layer for n in neighbours[right]]
+        current = swapped = 0
+        if right_positions:
+            for adjacent in neighbours[left]:
+                position = adjacent.position_in_layer
+                for other in right_positions:
+                    if position > other:
+                        current += 1
+                    elif position < other:
+                        swapped += 1
+        return current, swapped
+    
+    def _transpose_layers(self, upper, lower, lane_rank, max_passes: int = 4):
+        """Zamieniaj sąsiednie węzły (w tym samym torze), jeśli zmniejsza to liczbę przecięć.
+
+        Kolejny przebieg sprawdza tylko warstwy, w których lub obok których coś się zmieniło.
+        """
+        
+        dirty = set(range(len(self.layers)))
+        for _ in range(max_passes):
+            changed = set()
+            for layer_idx in sorted(dirty):
+                layer = self.layers[layer_idx]
+                for idx in range(len(layer) - 1):
+                    left, right = layer[idx], layer[idx + 1]
+                    if lane_rank(left) != lane_rank(right):
+                        continue
+                    up_current, up_swapped = self._pair_crossings(left, right, upper)
+                    down_current, down_swapped = self._pair_crossings(left, right, lower)
+                    if up_swapped + down_swapped < up_current + down_current:
+                        layer[idx], layer[idx + 1] = right, left
+                        right.position_in_layer = idx
+                        left.position_in_layer = idx + 1
+                        changed.add(layer_idx)
+            if not changed:
+                break
+            dirty = {idx for layer_idx in changed for idx in (layer_idx - 1, layer_idx, layer_idx + 1)
+                     if 0 <= idx < len(self.layers)}
+    
+    def _count_total_crossings(self, lower: Dict[Node, List[Node]]) -> int:
+        """Suma przecięć między wszystkimi parami sąsiednich warstw."""
+        
+        total = 0
+        for layer_idx in range(len(self.layers) - 1):
+            edges = [(node.position_in_layer, succ.position_in_layer)
+                     for node in self.layers[layer_idx] for succ in lower[node]]
+            if len(edges) > 1:
+                total += count_bilayer_crossings(edges, len(self.layers[layer_idx + 1]))
+        return total
     
     # ===== 📍 KROK 4: PRZYPISANIE WSPÓŁRZĘDNYCH =====
 
@@ -814,6 +1116,7 @@ class GraphLayoutManager:
             lane_padding = 40
             min_lane_width = 240
             lane_layouts: Dict[str, int] = {}
+            self._lane_relative_x = {} if self.fast else self._compute_lane_coordinates()
 
             for name, swimlane in self.swimlanes.items():
                 lane_nodes = [node for node in swimlane.nodes if not node.is_virtual and isinstance(node.layer, int) and node.layer >= 0]
@@ -835,7 +1138,7 @@ class GraphLayoutManager:
                         max_layer_width = span
 
                 max_node_width = max(node.width for node in lane_nodes)
-                base_width = max(max_node_width, max_layer_width)
+                base_width = max(max_node_width, max_layer_width, self._lane_span(name))
                 lane_required = max(min_lane_width, base_width + 2 * lane_padding)
                 lane_layouts[name] = lane_required
 
@@ -867,6 +1170,37 @@ class GraphLayoutManager:
                     self.canvas_width = required_width
 
             self._lane_layouts = {}
+            self._lane_relative_x = {}
+    
+    def _node_separation(self, left: Node, right: Node) -> float:
+        """Minimalna odległość środków sąsiednich węzłów w torze."""
+        spacing = self.intra_lane_spacing // 2 if left.is_virtual or right.is_virtual else self.intra_lane_spacing
+        return (left.width + right.width) / 2 + spacing
+    
+    def _compute_lane_coordinates(self) -> Dict[str, Dict[Node, float]]:
+        """Względne współrzędne X w każdym torze (Brandes–Köpf na węzłach toru)."""
+        
+        upper, lower = self._layer_neighbours()
+        lane_coordinates = {}
+        for name in self.swimlanes:
+            lane_layers = [[node for node in layer if node.swimlane == name] for layer in self.layers]
+            lane_upper = {node: [n for n in upper[node] if n.swimlane == name]
+                          for layer in lane_layers for node in layer}
+            lane_lower = {node: [n for n in lower[node] if n.swimlane == name]
+                          for layer in lane_layers for node in layer}
+            coordinates = brandes_kopf_coordinates(lane_layers, lane_upper, lane_lower, self._node_separation)
+            if coordinates:
+                lane_coordinates[name] = coordinates
+        return lane_coordinates
+    
+    def _lane_span(self, name: str) -> float:
+        """Szerokość układu toru wyznaczonego metodą Brandes–Köpf (0 gdy brak)."""
+        coordinates = self._lane_relative_x.get(name)
+        if not coordinates:
+            return 0
+        left = min(x - node.width / 2 for node, x in coordinates.items())
+        right = max(x + node.width / 2 for node, x in coordinates.items())
+        return right - left
     
     def _assign_coordinates(self):
         """Przypisz współrzędne - z obsługą swimlanes"""
@@ -958,7 +1292,19 @@ class GraphLayoutManager:
             for node in layer:
                 node.y = y
         
-        # Przypisz X dla węzłów w torach
+        # Przypisz X dla węzłów w torach: układ Brandes–Köpf wyśrodkowany w torze
+        placed_lanes = set()
+        for swimlane_name, coordinates in self._lane_relative_x.items():
+            pos = swimlane_positions.get(swimlane_name)
+            span = self._lane_span(swimlane_name)
+            if pos is None or span > pos['content_width']:
+                continue
+            left = min(x - node.width / 2 for node, x in coordinates.items())
+            offset = pos['x_start'] + swimlane_margin + (pos['content_width'] - span) / 2 - left
+            for node, x in coordinates.items():
+                node.x = x + offset
+            placed_lanes.add(swimlane_name)
+        
         for layer_idx, layer in enumerate(self.layers):
             if not layer:
                 continue
@@ -979,8 +1325,10 @@ class GraphLayoutManager:
             if self.debug and layer_idx < 3:
                 log_debug(f"   📍 Warstwa {layer_idx}: {len(nodes_by_swimlane)} torów, {len(nodes_without_swimlane)} bez toru")
             
-            # Pozycjonuj węzły w każdym torze
+            # Tory bez układu Brandes–Köpf: rozłóż węzły równomiernie w torze
             for swimlane_name, nodes in nodes_by_swimlane.items():
+                if swimlane_name in placed_lanes:
+                    continue
                 pos = swimlane_positions[swimlane_name]
                 
                 if len(nodes) == 1:
@@ -1158,6 +1506,136 @@ class GraphLayoutManager:
         if self.debug:
             log_debug(f"   🏊 Swimlanes: {len(self.swimlanes)} torów @ {swimlane_width}px każdy")
     
+    # ===== 💾 PAMIĘĆ PODRĘCZNA UKŁADU =====
+
+    @property
+    def _layout_mode(self) -> str:
+        return FAST if self.fast else QUALITY
+
+    def _structure_keys(self) -> Tuple[str, str]:
+        """Klucze kanoniczne grafu: (pełny - z wymiarami i parametrami, topologia w danym trybie).
+
+        Węzły są identyfikowane kolejnością w przepływie, tory - kolejnością
+        pojawienia się; identyfikatory z parsera i etykiety nie wchodzą do kluczy.
+        """
+
+        self._flow_nodes = list(self.nodes.values())
+        index = {node: idx for idx, node in enumerate(self._flow_nodes)}
+        lanes = {name: idx for idx, name in enumerate(self.swimlanes)}
+
+        topology = tuple((node.type, node.role, node.action, lanes.get(node.swimlane, -1))
+                         for node in self._flow_nodes)
+        edges = tuple((index[edge.source], index[edge.target]) for edge in self.edges)
+        dimensions = tuple((node.width, node.height) for node in self._flow_nodes)
+        params = (self.fast, self.canvas_width, self.canvas_height, self.margin_x, self.margin_y,
+                  self.layer_spacing, self.node_spacing, self.intra_lane_spacing, self.swimlane_gap,
+                  self.crossing_max_iterations, self.crossing_patience)
+
+        # Klucz treści: rozpoznanie węzła w zmienionej wersji diagramu (powtórzenia numerowane)
+        occurrences = defaultdict(int)
+        content_keys = []
+        for node in self._flow_nodes:
+            base = (node.type, node.swimlane, node.name)
+            content_keys.append(base + (occurrences[base],))
+            occurrences[base] += 1
+        self._content_keys = tuple(content_keys)
+
+        topology_key = structure_hash(self._layout_mode, topology, edges)
+        return structure_hash(topology_key, dimensions, params), topology_key
+
+    def _node_slots(self) -> Dict[Node, Hashable]:
+        """Węzeł -> slot w bieżącej wersji (indeks; dla wirtualnych pochodzenie z krawędzi)."""
+
+        slots: Dict[Node, Hashable] = {node: idx for idx, node in enumerate(self._flow_nodes)}
+        for virtual_id, (source_id, target_id, step) in self._virtual_origin.items():
+            slots[self.nodes[virtual_id]] = ('v', slots[self.nodes[source_id]], slots[self.nodes[target_id]], step)
+        return slots
+
+    @staticmethod
+    def _relative_position(node: Node, layer_size: int) -> float:
+        return node.position_in_layer / (layer_size - 1) if layer_size > 1 else 0.5
+
+    def _layer_order_slots(self) -> Dict[Hashable, Tuple[int, float]]:
+        """Uporządkowanie warstw do zapamiętania: slot -> (warstwa, względna pozycja)."""
+
+        slots = self._node_slots()
+        return {slots[node]: (layer_idx, self._relative_position(node, len(layer)))
+                for layer_idx, layer in enumerate(self.layers) for node in layer}
+
+    def _restore_cached_layout(self, cached: CachedLayout):
+        """Trafienie dokładne: zapamiętane pozycje przepisane na identyfikatory z bieżącego parsowania."""
+
+        self.element_positions = {node.id: dict(position)
+                                  for node, position in zip(self._flow_nodes, cached.positions)}
+        self.edge_crossings = cached.crossings
+        self.cache_status = HIT
+        self.cache.record(HIT)
+
+        if self.debug:
+            log_debug(f"💾 Układ z pamięci podręcznej: {len(self.element_positions)} pozycji")
+
+        return self.element_positions, dict(cached.grid)
+
+    def _reuse_previous_order(self, previous: CachedLayout, same_topology: bool) -> bool:
+        """Uporządkuj warstwy jak w poprzedniej wersji diagramu i dołóż tylko nowe węzły.
+
+        Węzły rozpoznane w poprzedniej wersji (ta sama topologia - po indeksie,
+        w przeciwnym razie po kluczu treści) zachowują względną pozycję w warstwie;
+        nowe trafiają na medianę pozycji sąsiadów z warstwy powyżej. Zwraca False,
+        gdy rozpoznano za mało węzłów i trzeba wykonać pełną minimalizację przecięć.
+        """
+
+        if same_topology:
+            matched = {node: idx for idx, node in enumerate(self._flow_nodes)}
+        else:
+            previous_index = previous.content_index()
+            matched = {node: previous_index[key] for node, key in zip(self._flow_nodes, self._content_keys)
+                       if key in previous_index}
+            if len(matched) < self.cache.min_match_ratio * len(self._flow_nodes):
+                return False
+
+        for virtual_id, (source_id, target_id, step) in self._virtual_origin.items():
+            source = matched.get(self.nodes[source_id])
+            target = matched.get(self.nodes[target_id])
+            if source is not None and target is not None:
+                matched[self.nodes[virtual_id]] = ('v', source, target, step)
+
+        lane_rank = self._lane_ranks()
+        new_nodes = set()
+        for layer in self.layers:
+            for node in layer:
+                previous_order = previous.order.get(matched.get(node))
+                if previous_order is None:
+                    new_nodes.add(node)
+                else:
+                    node.barycenter = previous_order[1]
+
+        upper, lower = self._layer_neighbours() if new_nodes or not same_topology else (None, None)
+
+        for layer_idx, layer in enumerate(self.layers):
+            layer_new = [node for node in layer if node in new_nodes]
+            if layer_new:
+                layer.sort(key=lambda n: lane_rank(n))
+                self._renumber_layer(layer)
+                upper_size = len(self.layers[layer_idx - 1]) if layer_idx > 0 else 0
+                for node in layer_new:
+                    if upper[node]:
+                        node.barycenter = self._median_position(
+                            [self._relative_position(n, upper_size) for n in upper[node]])
+                    else:
+                        node.barycenter = self._relative_position(node, len(layer))
+
+            layer.sort(key=lambda n: (lane_rank(n), n.barycenter))
+            self._renumber_layer(layer)
+
+        # Ta sama topologia daje te same warstwy i kolejność, więc i liczbę przecięć
+        self.edge_crossings = previous.crossings if lower is None else self._count_total_crossings(lower)
+
+        if self.debug:
+            log_debug(f"💾 Uporządkowanie z poprzedniej wersji: {len(new_nodes)} nowych węzłów, "
+                      f"przecięcia {self.edge_crossings}")
+        return True
+
     # ===== 📊 POMOCNICZE METODY =====
     
     def _calculate_grid_info(self):
@@ -1,12 +1,14 @@
 import os
 import sys
 import math
+import heapq
 from typing import Dict, List, Tuple, Any
 
 parent_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..'))
 sys.path.append(parent_dir)
 
 from utils.logger_utils import log_debug, log_info, log_error, log_warning, log_exception
+from utils.xmi.spatial_index import SpatialGrid, rects_overlap
 
 class ImprovedLayoutManager:
     """
@@ -21,11 +23,12 @@ class ImprovedLayoutManager:
     6. Wyrównanie diagramu i optymalizacja
     """
     
-    def __init__(self, canvas_width=1800, canvas_height=1600, debug=False):
+    def __init__(self, canvas_width=1800, canvas_height=1600, debug=False, fast=False):
         # Podstawowa konfiguracja
         self.canvas_width = canvas_width
         self.canvas_height = canvas_height
         self.debug = debug
+        self.fast = fast  # tryb szybki: bez kroku 5 (weryfikacja logiki)
         
         # Margines canvas
         self.margin_x = 80
@@ -75,7 +78,8 @@ class ImprovedLayoutManager:
             self._resolve_overlaps()
             
             # Krok 5: Weryfikacja logiki diagramu
-            self._verify_diagram_logic()
+            if not self.fast:
+                self._verify_diagram_logic()
             
             # Krok 6: Wyrównanie i optymalizacja przestrzeni
             self._align_diagram()
@@ -266,25 +270,63 @@ class ImprovedLayoutManager:
                 self._assign_positions_recursive(start_id, visited, 1)
     
     def _resolve_overlaps(self):
-        """Wykrywa i rozwiązuje nakładające się elementy"""
+        """Wykrywa i rozwiązuje nakładające się elementy.
+
+        Każda iteracja najpierw rozsuwa w poziomie całe grupy elementów z tego
+        samego wiersza (`_spread_row`), a pozostałe kolizje (między wierszami)
+        rozwiązuje parami regułami `_resolve_single_overlap`. Kandydaci do kolizji
+        pochodzą z indeksu przestrzennego (`SpatialGrid`) aktualizowanego po
+        każdym przesunięciu, więc iteracja kosztuje O(n·k) zamiast O(n²).
+        """
+        if not self.element_positions:
+            return
+        
         overlaps_found = True
         iterations = 0
         max_iterations = 50
         
+        positioned_elements = list(self.element_positions.items())
+        order = {element_id: idx for idx, (element_id, _) in enumerate(positioned_elements)}
+        
         while overlaps_found and iterations < max_iterations:
             overlaps_found = False
             iterations += 1
             
-            # Sprawdź wszystkie pary elementów
-            positioned_elements = list(self.element_positions.items())
+            # Elementy tego samego wiersza (wspólny środek w pionie) rozsuwane są hurtowo
+            rows = {}
+            for _, pos in positioned_elements:
+                rows.setdefault((pos.get("grid_row", 0), pos["y"] + pos["height"] / 2), []).append(pos)
+            for row_elements in rows.values():
+                if len(row_elements) > 1:
+                    self._spread_row(row_elements)
             
+            index = SpatialGrid.for_rects(self.element_positions)
             for i, (id1, pos1) in enumerate(positioned_elements):
-                for j, (id2, pos2) in enumerate(positioned_elements[i+1:], i+1):
-                    # Sprawdź czy nakładają się
-                    if self._elements_overlap(pos1, pos2):
-                        overlaps_found = True
-                        # Rozwiąż nakładanie się - przesuń jeden z elementów
-                        self._resolve_single_overlap(id1, id2)
+                # Kolejka kandydatów o indeksie większym niż i (jak w pętli po parach)
+                candidates = [order[other] for other in index.query(pos1) if order[other] > i]
+                if not candidates:
+                    continue
+                heapq.heapify(candidates)
+                queued = set(candidates)
+                
+                while candidates:
+                    j = heapq.heappop(candidates)
+                    id2, pos2 = positioned_elements[j]
+                    if not self._elements_overlap(pos1, pos2):
+                        continue
+                    
+                    overlaps_found = True
+                    # Rozwiąż nakładanie się - przesuń jeden z elementów
+                    self._resolve_single_overlap(id1, id2)
+                    index.move(id1, pos1)
+                    index.move(id2, pos2)
+                    
+                    # Element id1 mógł wejść na kolejnych sąsiadów
+                    for other in index.query(pos1):
+                        k = order[other]
+                        if k > j and k not in queued:
+                            queued.add(k)
+                            heapq.heappush(candidates, k)
             
             if self.debug and overlaps_found:
                 log_debug(f"Iteracja {iterations}: znaleziono nakładania, rozwiązuję...")
@@ -292,6 +334,32 @@ class ImprovedLayoutManager:
         if iterations == max_iterations and overlaps_found:
             log_warning(f"Osiągnięto maksymalną liczbę iteracji ({max_iterations}), mogą pozostać nakładania")
 
+    def _spread_row(self, row_elements):
+        """Rozsuwa w poziomie nakładające się elementy jednego wiersza.
+
+        Uogólnienie reguły z `_resolve_single_overlap` (oba elementy przesuwane
+        o połowę nakładania) na całe grupy: kolejność w wierszu jest zachowana,
+        a każda grupa stykających się elementów jest wyśrodkowana względem
+        średniej ich pierwotnych pozycji.
+        """
+        # Bloki: [lewa krawędź, szerokość, elementy, suma(x - przesunięcie w bloku), liczność]
+        blocks = []
+        for pos in sorted(row_elements, key=lambda p: p["x"]):
+            block = [pos["x"], pos["width"], [(pos, 0)], pos["x"], 1]
+            while blocks and blocks[-1][0] + blocks[-1][1] > block[0]:
+                previous = blocks.pop()
+                offset = previous[1]
+                members = previous[2] + [(p, o + offset) for p, o in block[2]]
+                desired = previous[3] + block[3] - offset * block[4]
+                count = previous[4] + block[4]
+                block = [desired / count, previous[1] + block[1], members, desired, count]
+            blocks.append(block)
+        
+        for left, _, members, _, count in blocks:
+            if count > 1:
+                for pos, offset in members:
+                    pos["x"] = left + offset
+
     def update_swimlane_geometry(self):
         """Aktualizuje geometrię torów na podstawie pozycji elementów"""
         if not self.swimlanes:
@@ -586,13 +654,7 @@ class ImprovedLayoutManager:
 
     def _elements_overlap(self, pos1, pos2):
         """Sprawdza czy dwa elementy nakładają się"""
-        # Sprawdź nakładanie się prostokątów
-        return not (
-            pos1["x"] + pos1["width"] <= pos2["x"] or
-            pos1["x"] >= pos2["x"] + pos2["width"] or
-            pos1["y"] + pos1["height"] <= pos2["y"] or
-            pos1["y"] >= pos2["y"] + pos2["height"]
-        )
+        return rects_overlap(pos1, pos2)
 
     def _resolve_single_overlap(self, id1, id2):
         """Rozwiązuje pojedyncze nakładanie się elementów"""
@@ -837,14 +899,17 @@ class ImprovedLayoutManager:
             self.layers.append(current_layer)
             assigned_nodes.update(current_layer)
             
-            # Przejdź do następnej warstwy
+            # Przejdź do następnej warstwy (bez duplikatów - wspólny następnik kilku węzłów
+            # trafiałby do warstwy wielokrotnie, a liczba kopii rosłaby wykładniczo)
             next_layer = []
+            queued = set()
             for node in current_layer:
                 for successor in self.forward_graph[node]:
                     # Dodaj do następnej warstwy tylko jeśli wszystkie poprzedniki już przypisane
-                    if successor not in assigned_nodes and all(pred in assigned_nodes 
-                                                            for pred in self.backward_graph[successor]):
+                    if successor not in assigned_nodes and successor not in queued and all(
+                            pred in assigned_nodes for pred in self.backward_graph[successor]):
                         next_layer.append(successor)
+                        queued.add(successor)
             
             current_layer = next_layer
             layer_index += 1
@@ -0,0 +1,154 @@
+"""
+Pamięć podręczna układów warstwowych (GraphLayoutManager) kluczowana strukturą grafu.
+
+Parser nadaje elementom nowe, losowe identyfikatory przy każdym parsowaniu,
+więc klucz nie może ich zawierać. Węzły są identyfikowane kolejnością w
+przepływie, a klucz to skrót postaci kanonicznej grafu: typ, rola, akcja i tor
+(indeks) każdego węzła, jego wymiary, krawędzie jako pary indeksów oraz
+parametry układu. Etykiety nie wchodzą do klucza - zmiana samego tekstu, która
+nie zmienia wymiarów węzła, daje trafienie, a zapamiętane pozycje są
+przepisywane na nowe identyfikatory.
+
+Każdy wpis przechowuje też kolejność węzłów w warstwach. Gdy klucz się nie
+zgadza, ale w pamięci jest poprzednia wersja diagramu w tym samym trybie układu
+(ta sama topologia albo większość węzłów rozpoznana po treści), układ odtwarza
+z niej uporządkowanie warstw zamiast minimalizować przecięcia od zera i dokłada
+tylko nowe węzły. Układ szybki i jakościowy nie podsuwają sobie nawzajem kolejności.
+
+    entry = layout_cache.get(key)                       # trafienie dokładne
+    previous, same_topology = layout_cache.find_previous(topology_key, content_keys, mode)
+    layout_cache.put(CachedLayout(...))
+
+Konfiguracja (.env): LAYOUT_CACHE_SIZE (liczba wpisów, 0 wyłącza pamięć podręczną).
+"""
+
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Any, Dict, Hashable, List, Optional, Sequence, Tuple
+
+HIT = "hit"
+INCREMENTAL = "incremental"
+MISS = "miss"
+
+QUALITY = "quality"
+FAST = "fast"
+
+DEFAULT_CACHE_SIZE = 32
+DEFAULT_MIN_MATCH_RATIO = 0.5
+
+
+def structure_hash(*parts: Any) -> str:
+    """Skrót postaci kanonicznej (krotki napisów i liczb mają deterministyczne repr)."""
+    return hashlib.sha1(repr(parts).encode('utf-8')).hexdigest()
+
+
+@dataclass
+class CachedLayout:
+    """Wynik układu jednej wersji diagramu; węzły indeksowane kolejnością w przepływie."""
+    key: str
+    topology_key: str
+    content_keys: Tuple[Hashable, ...]
+    positions: List[Dict[str, Any]]
+    grid: Dict[str, Any]
+    crossings: int
+    # slot węzła -> (warstwa, względna pozycja w warstwie 0..1); slot to indeks węzła
+    # albo ('v', indeks źródła, indeks celu, krok) dla węzła wirtualnego
+    order: Dict[Hashable, Tuple[int, float]]
+    mode: str = QUALITY
+    _content_index: Optional[Dict[Hashable, int]] = field(default=None, repr=False)
+
+    def content_index(self) -> Dict[Hashable, int]:
+        """Klucz treści węzła -> jego indeks w tej wersji."""
+        if self._content_index is None:
+            self._content_index = {key: idx for idx, key in enumerate(self.content_keys)}
+        return self._content_index
+
+
+class LayoutCache:
+    """Bezpieczna wątkowo pamięć LRU wyników układu."""
+
+    def __init__(self, maxsize: Optional[int] = None, min_match_ratio: float = DEFAULT_MIN_MATCH_RATIO):
+        self._maxsize = maxsize
+        self.min_match_ratio = min_match_ratio
+        self._entries: "OrderedDict[str, CachedLayout]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._stats = {HIT: 0, INCREMENTAL: 0, MISS: 0}
+
+    @property
+    def maxsize(self) -> int:
+        if self._maxsize is not None:
+            return self._maxsize
+        try:
+            return int(os.getenv("LAYOUT_CACHE_SIZE", "").strip() or DEFAULT_CACHE_SIZE)
+        except ValueError:
+            return DEFAULT_CACHE_SIZE
+
+    @property
+    def enabled(self) -> bool:
+        return self.maxsize > 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: str) -> Optional[CachedLayout]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+            return entry
+
+    def put(self, entry: CachedLayout) -> None:
+        maxsize = self.maxsize
+        if maxsize <= 0:
+            return
+        with self._lock:
+            self._entries[entry.key] = entry
+            self._entries.move_to_end(entry.key)
+            while len(self._entries) > maxsize:
+                self._entries.popitem(last=False)
+
+    def find_previous(self, topology_key: str, content_keys: Sequence[Hashable],
+                      mode: str = QUALITY) -> Tuple[Optional[CachedLayout], bool]:
+        """Najbliższa zapamiętana wersja diagramu w trybie `mode`: (wpis, czy ta sama topologia).
+
+        Najpierw najnowszy wpis o tej samej topologii; w przeciwnym razie wpis
+        dzielący najwięcej kluczy treści, o ile pokrywa co najmniej
+        `min_match_ratio` węzłów nowej wersji.
+        """
+        with self._lock:
+            entries = [entry for entry in reversed(self._entries.values()) if entry.mode == mode]
+        for entry in entries:
+            if entry.topology_key == topology_key:
+                return entry, True
+
+        if not content_keys:
+            return None, False
+        wanted = set(content_keys)
+        best, best_shared = None, 0
+        for entry in entries:
+            shared = len(wanted.intersection(entry.content_index()))
+            if shared > best_shared:
+                best, best_shared = entry, shared
+        if best is None or best_shared < self.min_match_ratio * len(content_keys):
+            return None, False
+        return best, False
+
+    def record(self, status: str) -> None:
+        with self._lock:
+            self._stats[status] = self._stats.get(status, 0) + 1
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return dict(self._stats, size=len(self._entries))
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._stats = {HIT: 0, INCREMENTAL: 0, MISS: 0}
+
+
+# Wspólna pamięć procesu używana domyślnie przez GraphLayoutManager
+layout_cache = LayoutCache()
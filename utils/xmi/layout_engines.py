@@ -0,0 +1,380 @@
+"""
+Rejestr silników układu (layoutu) diagramów z pomiarem czasu i jakości.
+
+Ścieżka diagramów aktywności ma kilka menedżerów układu - warstwowy
+`GraphLayoutManager` (Sugiyama), `ImprovedLayoutManager` (siatka z regułami)
+i awaryjną siatkę torów z `LayoutManagerAdapter` - a ścieżka komponentów
+własny `LayoutManager`. Rejestr daje im wspólny interfejs
+(`LayoutEngine.layout(data) -> LayoutResult`), mierzy każde uruchomienie
+(`LayoutMetrics`: czas, nakładania, przecięcia krawędzi, pole płótna) i dobiera
+silnik oraz tryb do liczby węzłów diagramu.
+
+Tryby:
+    quality - pełne przebiegi optymalizacji
+    fast    - pomija kosztowne przebiegi (iteracyjną minimalizację przecięć,
+              współrzędne Brandes–Köpf, weryfikację logiki)
+    auto    - fast powyżej LAYOUT_FAST_NODE_THRESHOLD węzłów
+
+    result = run_layout("activity", parsed_data)                  # silnik i tryb wg rozmiaru
+    result = run_layout("activity", parsed_data, engine="graph", mode="fast")
+    result.positions, result.grid, result.metrics.as_dict()
+
+Silnik "graph" korzysta z pamięci podręcznej układów (`layout_cache`);
+`LayoutMetrics.cache` mówi, czy wynik pochodził z pamięci (hit), z
+uporządkowania poprzedniej wersji (incremental) czy z pełnego układu (miss).
+
+Konfiguracja (.env): LAYOUT_ENGINE, LAYOUT_MODE, LAYOUT_FAST_NODE_THRESHOLD,
+LAYOUT_GRID_NODE_THRESHOLD, LAYOUT_CACHE_SIZE.
+"""
+
+import os
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import deque
+from dataclasses import asdict, dataclass, field
+from typing import Any, Dict, List, Mapping, Optional, Tuple, Type
+
+from utils.logger_utils import log_debug, log_warning
+from utils.xmi.spatial_index import SpatialGrid
+
+AUTO = "auto"
+QUALITY = "quality"
+FAST = "fast"
+LAYOUT_MODES = (AUTO, QUALITY, FAST)
+
+DEFAULT_FAST_NODE_THRESHOLD = 300
+DEFAULT_GRID_NODE_THRESHOLD = 5000
+
+
+def _env_int(name: str, default: int) -> int:
+    try:
+        return int(os.getenv(name, "").strip() or default)
+    except ValueError:
+        return default
+
+
+@dataclass
+class LayoutMetrics:
+    """Pomiar jednego uruchomienia silnika układu."""
+    engine: str
+    kind: str
+    mode: str
+    node_count: int
+    elapsed_ms: float
+    overlaps: int
+    crossings: Optional[int]
+    canvas_area: int
+    cache: Optional[str] = None
+
+    def as_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+
+@dataclass
+class LayoutResult:
+    """Wynik silnika: pozycje {id: {'x', 'y', 'width', 'height', ...}} i informacje o siatce."""
+    positions: Dict[str, Dict[str, Any]]
+    grid: Dict[str, Any] = field(default_factory=dict)
+    crossings: Optional[int] = None
+    raw: Any = None
+    metrics: Optional[LayoutMetrics] = None
+    cache: Optional[str] = None
+
+
+def count_overlaps(rects: Mapping[str, Mapping], ignore_containment: bool = False) -> int:
+    """Liczba par nakładających się prostokątów (opcjonalnie bez par zagnieżdżonych, np. pakiet-komponent)."""
+    if len(rects) < 2:
+        return 0
+    index = SpatialGrid.for_rects(rects)
+    count = 0
+    for key, other in index.overlapping_pairs(rects):
+        if ignore_containment and (_contains(rects[key], rects[other]) or _contains(rects[other], rects[key])):
+            continue
+        count += 1
+    return count
+
+
+def _contains(outer: Mapping, inner: Mapping) -> bool:
+    return (outer["x"] <= inner["x"] and outer["y"] <= inner["y"]
+            and inner["x"] + inner["width"] <= outer["x"] + outer["width"]
+            and inner["y"] + inner["height"] <= outer["y"] + outer["height"])
+
+
+def canvas_area(rects: Mapping[str, Mapping]) -> int:
+    """Pole prostokąta obejmującego wszystkie elementy."""
+    if not rects:
+        return 0
+    left = min(r["x"] for r in rects.values())
+    top = min(r["y"] for r in rects.values())
+    right = max(r["x"] + r["width"] for r in rects.values())
+    bottom = max(r["y"] + r["height"] for r in rects.values())
+    return int((right - left) * (bottom - top))
+
+
+def lane_grid_positions(flow: List[Dict[str, Any]], lane_order: List[str]) -> Tuple[Dict[str, Dict], Dict[str, Any]]:
+    """Najprostszy układ: kolumna na tor, elementy jeden pod drugim w kolejności przepływu.
+
+    `lane_order` jest uzupełniana o tory napotkane w przepływie.
+    """
+    positions = {}
+    grid_rows = 0
+    lane_offsets = {lane: 0 for lane in lane_order}
+    lane_index_of = {lane: idx for idx, lane in enumerate(lane_order)}
+
+    for item in flow:
+        parser_id = item.get('id')
+        if not parser_id:
+            continue
+
+        lane_name = item.get('swimlane')
+        if lane_name not in lane_offsets:
+            lane_offsets[lane_name] = 0
+            lane_index_of[lane_name] = len(lane_order)
+            lane_order.append(lane_name)
+
+        lane_index = lane_index_of.get(lane_name, 0)
+        lane_offset = lane_offsets[lane_name]
+        lane_offsets[lane_name] = lane_offset + 1
+
+        positions[parser_id] = {
+            'x': 130 + lane_index * 280,
+            'y': 120 + lane_offset * 160,
+            'width': 140,
+            'height': 60,
+            'row': lane_offset,
+            'column': lane_index,
+        }
+        grid_rows = max(grid_rows, lane_offset + 1)
+
+    return positions, {
+        'rows': grid_rows,
+        'columns': max(1, len(lane_order)),
+        'width': 1400,
+        'height': max(800, grid_rows * 160 + 200),
+    }
+
+
+# ===== Silniki =====
+
+class LayoutEngine(ABC):
+    """Wspólny interfejs silników układu."""
+
+    name = ""
+    kind = ""
+    supports_fast = False
+    nested = False  # czy elementy mogą się zawierać (pakiety) - nie liczone jako nakładania
+
+    def __init__(self, mode: str = QUALITY, debug: bool = False, **options):
+        self.mode = mode
+        self.debug = debug
+        self.options = options
+
+    @property
+    def fast(self) -> bool:
+        return self.mode == FAST
+
+    @staticmethod
+    def count_nodes(data) -> int:
+        return len(data.get('flow', [])) if isinstance(data, dict) else 0
+
+    @abstractmethod
+    def layout(self, data) -> LayoutResult:
+        """Układ diagramu `data` (dane parsera albo generator - zależnie od rodzaju)."""
+
+
+class GraphLayoutEngine(LayoutEngine):
+    """Warstwowy algorytm Sugiyamy (GraphLayoutManager)."""
+
+    name = "graph"
+    kind = "activity"
+    supports_fast = True
+
+    def layout(self, data) -> LayoutResult:
+        from utils.xmi.graph_layout_manager import GraphLayoutManager
+
+        manager = GraphLayoutManager(debug=self.debug, fast=self.fast)
+        positions, grid = manager.analyze_diagram_structure(data)
+        return LayoutResult(positions or {}, grid or {}, crossings=manager.edge_crossings, raw=manager,
+                            cache=manager.cache_status)
+
+
+class ImprovedLayoutEngine(LayoutEngine):
+    """Siatka z regułami pozycjonowania (ImprovedLayoutManager)."""
+
+    name = "improved"
+    kind = "activity"
+    supports_fast = True
+
+    def layout(self, data) -> LayoutResult:
+        from utils.xmi.improved_layout_manager import ImprovedLayoutManager
+
+        # ImprovedLayoutManager oczekuje połączeń z kluczami source/target
+        payload = dict(data)
+        payload['logical_connections'] = [
+            {**conn,
+             'source': conn.get('source') or conn.get('source_id') or conn.get('from'),
+             'target': conn.get('target') or conn.get('target_id') or conn.get('to')}
+            for conn in data.get('logical_connections', [])
+        ]
+        manager = ImprovedLayoutManager(debug=self.debug, fast=self.fast)
+        positions, grid = manager.analyze_diagram_structure(payload)
+        return LayoutResult(positions or {}, grid or {}, raw=manager)
+
+
+class LaneGridLayoutEngine(LayoutEngine):
+    """Kolumna na tor bez optymalizacji - awaryjny układ LayoutManagerAdapter, O(n)."""
+
+    name = "lane_grid"
+    kind = "activity"
+
+    def layout(self, data) -> LayoutResult:
+        lane_order = self.options.get('lane_order')
+        if lane_order is None:
+            lane_order = list(data.get('swimlanes') or [])
+        positions, grid = lane_grid_positions(data.get('flow', []), lane_order)
+        return LayoutResult(positions, grid)
+
+
+class ComponentLayoutEngine(LayoutEngine):
+    """Układ pakietów i komponentów (LayoutManager z xmi_component_generator); dane = generator."""
+
+    name = "component"
+    kind = "component"
+    nested = True
+
+    @staticmethod
+    def count_nodes(generator) -> int:
+        parsed = getattr(generator, 'parsed_data', None) or {}
+        return sum(len(parsed.get(key) or ()) for key in ('packages', 'components', 'interfaces', 'notes'))
+
+    def layout(self, generator) -> LayoutResult:
+        from utils.xmi.xmi_component_generator import LayoutManager
+
+        manager = LayoutManager(generator, self.options.get('log_callback') or log_debug)
+        layout_data = manager.layout()
+        positions = {}
+        for xmi_id, geometry in layout_data['positions'].items():
+            box = manager._parse_geometry(geometry)
+            positions[xmi_id] = {'x': box['left'], 'y': box['top'],
+                                 'width': box['right'] - box['left'], 'height': box['bottom'] - box['top']}
+        return LayoutResult(positions, raw=layout_data)
+
+
+# ===== Rejestr =====
+
+@dataclass
+class EngineSpec:
+    engine_class: Type[LayoutEngine]
+    auto: bool = True               # czy bierze udział w wyborze automatycznym
+    max_nodes: Optional[int] = None  # górna granica liczby węzłów przy wyborze automatycznym
+    priority: int = 0               # niższy = preferowany
+    max_nodes_env: Optional[str] = None  # zmienna nadpisująca max_nodes (czytana przy każdym wyborze)
+
+    def node_limit(self) -> Optional[int]:
+        if self.max_nodes_env:
+            return _env_int(self.max_nodes_env, self.max_nodes)
+        return self.max_nodes
+
+
+class LayoutEngineRegistry:
+    """Silniki układu pogrupowane według rodzaju diagramu, z historią pomiarów."""
+
+    def __init__(self, history_size: int = 100):
+        self._engines: Dict[str, Dict[str, EngineSpec]] = {}
+        self._lock = threading.Lock()
+        self.history = deque(maxlen=history_size)
+
+    def register(self, engine_class: Type[LayoutEngine], auto: bool = True,
+                 max_nodes: Optional[int] = None, priority: int = 0,
+                 max_nodes_env: Optional[str] = None) -> None:
+        self._engines.setdefault(engine_class.kind, {})[engine_class.name] = EngineSpec(
+            engine_class, auto=auto, max_nodes=max_nodes, priority=priority, max_nodes_env=max_nodes_env)
+
+    def engines(self, kind: str) -> List[str]:
+        return list(self._engines.get(kind, {}))
+
+    def _specs(self, kind: str) -> Dict[str, EngineSpec]:
+        specs = self._engines.get(kind)
+        if not specs:
+            raise ValueError(f"Brak silników układu dla rodzaju diagramu: {kind}")
+        return specs
+
+    def select(self, kind: str, node_count: int, engine: Optional[str] = None,
+               mode: Optional[str] = None) -> Tuple[str, str]:
+        """Wybiera (silnik, tryb); None = wartości z LAYOUT_ENGINE / LAYOUT_MODE.
+
+        Progi (LAYOUT_GRID_NODE_THRESHOLD, LAYOUT_FAST_NODE_THRESHOLD) są czytane przy każdym wyborze."""
+        specs = self._specs(kind)
+        engine = (engine or os.getenv("LAYOUT_ENGINE") or AUTO).strip().lower()
+        mode = (mode or os.getenv("LAYOUT_MODE") or AUTO).strip().lower()
+
+        if engine != AUTO and engine not in specs:
+            log_warning(f"Nieznany silnik układu '{engine}' dla diagramu {kind} - wybór automatyczny")
+            engine = AUTO
+        if engine == AUTO:
+            candidates = sorted((name for name, spec in specs.items() if spec.auto),
+                                key=lambda name: specs[name].priority) or list(specs)
+            limits = {name: specs[name].node_limit() for name in candidates}
+            engine = next((name for name in candidates if limits[name] is None or node_count <= limits[name]),
+                          candidates[-1])
+
+        if not specs[engine].engine_class.supports_fast:
+            mode = QUALITY
+        elif mode not in (QUALITY, FAST):
+            threshold = _env_int("LAYOUT_FAST_NODE_THRESHOLD", DEFAULT_FAST_NODE_THRESHOLD)
+            mode = FAST if node_count > threshold else QUALITY
+        return engine, mode
+
+    def run(self, kind: str, data, engine: Optional[str] = None, mode: Optional[str] = None,
+            debug: bool = False, **options) -> LayoutResult:
+        """Uruchamia wybrany (lub dobrany automatycznie) silnik i zapisuje metryki w `result.metrics`."""
+        specs = self._specs(kind)
+        node_count = next(iter(specs.values())).engine_class.count_nodes(data)
+        engine, mode = self.select(kind, node_count, engine, mode)
+        instance = specs[engine].engine_class(mode=mode, debug=debug, **options)
+
+        start = time.perf_counter()
+        result = instance.layout(data)
+        elapsed_ms = (time.perf_counter() - start) * 1000
+
+        result.metrics = LayoutMetrics(
+            engine=engine,
+            kind=kind,
+            mode=mode,
+            node_count=node_count,
+            elapsed_ms=round(elapsed_ms, 2),
+            overlaps=count_overlaps(result.positions, ignore_containment=instance.nested),
+            crossings=result.crossings,
+            canvas_area=canvas_area(result.positions),
+            cache=result.cache,
+        )
+        with self._lock:
+            self.history.append(result.metrics)
+        log_debug(f"Layout {kind}/{engine} ({mode}): {node_count} węzłów, {elapsed_ms:.1f} ms, "
+                  f"nakładania={result.metrics.overlaps}, przecięcia={result.crossings}")
+        return result
+
+    def metrics(self) -> List[Dict[str, Any]]:
+        """Historia pomiarów (najnowsze na końcu)."""
+        with self._lock:
+            return [m.as_dict() for m in self.history]
+
+
+layout_registry = LayoutEngineRegistry()
+layout_registry.register(GraphLayoutEngine, max_nodes=DEFAULT_GRID_NODE_THRESHOLD,
+                         max_nodes_env="LAYOUT_GRID_NODE_THRESHOLD")
+layout_registry.register(LaneGridLayoutEngine, priority=10)
+layout_registry.register(ImprovedLayoutEngine, auto=False)
+layout_registry.register(ComponentLayoutEngine)
+
+
+def run_layout(kind: str, data, engine: Optional[str] = None, mode: Optional[str] = None,
+               debug: bool = False, **options) -> LayoutResult:
+    """Skrót do `layout_registry.run`."""
+    return layout_registry.run(kind, data, engine=engine, mode=mode, debug=debug, **options)
+
+
+def get_layout_metrics() -> List[Dict[str, Any]]:
+    """Metryki ostatnich uruchomień silników układu."""
+    return layout_registry.metrics()
@@ -0,0 +1,110 @@
+"""
+Indeks przestrzenny (siatka jednorodna) dla prostokątów elementów diagramu.
+
+Prostokąty mają format słowników pozycji używany przez menedżery układu
+(`{'x', 'y', 'width', 'height', ...}`). Każdy element jest zapisany we
+wszystkich komórkach, które przecina, więc zapytanie o kolizje dotyka tylko
+komórek sąsiadujących z pytanym prostokątem, a przesunięcie elementu
+aktualizuje jedynie jego komórki.
+
+    index = SpatialGrid(cell_size=200)
+    for element_id, pos in positions.items():
+        index.insert(element_id, pos)
+    candidates = index.query(positions["a"])   # nadzbiór elementów nakładających się
+    index.move("a", positions["a"])            # po zmianie pozycji
+"""
+
+import math
+from collections import defaultdict
+from typing import Dict, Hashable, Iterable, List, Mapping, Set, Tuple
+
+Cell = Tuple[int, int]
+
+
+def rects_overlap(rect1: Mapping, rect2: Mapping) -> bool:
+    """Czy prostokąty mają wspólne wnętrze (stykające się krawędzie nie są nakładaniem)."""
+    return not (
+        rect1["x"] + rect1["width"] <= rect2["x"] or
+        rect1["x"] >= rect2["x"] + rect2["width"] or
+        rect1["y"] + rect1["height"] <= rect2["y"] or
+        rect1["y"] >= rect2["y"] + rect2["height"]
+    )
+
+
+class SpatialGrid:
+    """Siatka jednorodna: komórka -> klucze elementów, których prostokąt ją przecina."""
+
+    def __init__(self, cell_size: float = 200):
+        if cell_size <= 0:
+            raise ValueError("cell_size musi być dodatni")
+        self.cell_size = cell_size
+        self._cells: Dict[Cell, Set[Hashable]] = defaultdict(set)
+        self._element_cells: Dict[Hashable, List[Cell]] = {}
+
+    @classmethod
+    def for_rects(cls, rects: Mapping[Hashable, Mapping]) -> "SpatialGrid":
+        """Indeks z rozmiarem komórki dopasowanym do największego elementu, wypełniony prostokątami."""
+        cell_size = max((max(r["width"], r["height"]) for r in rects.values()), default=0)
+        index = cls(cell_size or 200)
+        for key, rect in rects.items():
+            index.insert(key, rect)
+        return index
+
+    def __len__(self) -> int:
+        return len(self._element_cells)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._element_cells
+
+    def _cells_for(self, rect: Mapping) -> List[Cell]:
+        size = self.cell_size
+        x0 = math.floor(rect["x"] / size)
+        y0 = math.floor(rect["y"] / size)
+        x1 = math.floor((rect["x"] + rect["width"]) / size)
+        y1 = math.floor((rect["y"] + rect["height"]) / size)
+        return [(cx, cy) for cx in range(x0, x1 + 1) for cy in range(y0, y1 + 1)]
+
+    def insert(self, key: Hashable, rect: Mapping) -> None:
+        if key in self._element_cells:
+            self.remove(key)
+        cells = self._cells_for(rect)
+        self._element_cells[key] = cells
+        for cell in cells:
+            self._cells[cell].add(key)
+
+    def remove(self, key: Hashable) -> None:
+        for cell in self._element_cells.pop(key, ()):
+            bucket = self._cells[cell]
+            bucket.discard(key)
+            if not bucket:
+                del self._cells[cell]
+
+    def move(self, key: Hashable, rect: Mapping) -> None:
+        """Aktualizuje komórki elementu po zmianie jego pozycji lub wymiarów."""
+        cells = self._cells_for(rect)
+        if cells == self._element_cells.get(key):
+            return
+        self.insert(key, rect)
+
+    def query(self, rect: Mapping) -> Set[Hashable]:
+        """Klucze elementów z komórek przecinanych przez prostokąt (nadzbiór kolizji)."""
+        found: Set[Hashable] = set()
+        cells = self._cells
+        for cell in self._cells_for(rect):
+            bucket = cells.get(cell)
+            if bucket:
+                found |= bucket
+        return found
+
+    def overlapping(self, key: Hashable, rects: Mapping[Hashable, Mapping]) -> List[Hashable]:
+        """Elementy, których prostokąt faktycznie nakłada się na prostokąt `key`."""
+        rect = rects[key]
+        return [other for other in self.query(rect) if other != key and rects_overlap(rect, rects[other])]
+
+    def overlapping_pairs(self, rects: Mapping[Hashable, Mapping]) -> Iterable[Tuple[Hashable, Hashable]]:
+        """Wszystkie pary nakładających się elementów (każda para raz)."""
+        order = {key: idx for idx, key in enumerate(rects)}
+        for key in rects:
+            for other in self.overlapping(key, rects):
+                if order[other] > order[key]:
+                    yield key, other
@@ -1,7 +1,6 @@
 import xml.etree.ElementTree as ET
 import uuid
 from datetime import datetime
-import xml.dom.minidom
 import sys
 import re
 import os
@@ -10,9 +9,118 @@ from utils.logger_utils import log_debug, log_info, log_error, log_exception, lo
 from utils.plantuml.improved_plantuml_activity_parser import (
         ImprovedPlantUMLActivityParser as PlantUMLActivityParser,
     )
-from utils.xmi.graph_layout_manager import GraphLayoutManager
+from utils.xmi.layout_engines import lane_grid_positions, run_layout
+from utils.xmi.xml_writer import sanitize_attributes, serialize_element_tree
 
 setup_logger()
+
+
+class TransitionRegistry(list):
+    """
+    Lista przejść (słowniki source_id/target_id/name/...) z indeksami haszującymi.
+
+    Zachowuje interfejs i kolejność zwykłej listy (iteracja, len, append,
+    remove), a dodatkowo utrzymuje licznik par (source_id, target_id) oraz
+    listy sąsiedztwa wejść/wyjść węzłów, dzięki czemu sprawdzenie duplikatu,
+    stopnia węzła czy jego następników kosztuje O(1) zamiast przeglądania
+    wszystkich przejść.
+    """
+
+    def __init__(self, transitions=()):
+        super().__init__()
+        self._reset_index()
+        self.extend(transitions)
+
+    def _reset_index(self):
+        self._pairs = {}
+        self._outgoing = {}
+        self._incoming = {}
+
+    def _index(self, transition):
+        key = (transition['source_id'], transition['target_id'])
+        self._pairs[key] = self._pairs.get(key, 0) + 1
+        self._outgoing.setdefault(key[0], []).append(transition)
+        self._incoming.setdefault(key[1], []).append(transition)
+
+    def _reindex(self):
+        self._reset_index()
+        for transition in self:
+            self._index(transition)
+
+    # --- modyfikacje listy (indeksy aktualizowane na bieżąco) ---
+
+    def append(self, transition):
+        super().append(transition)
+        self._index(transition)
+
+    def extend(self, transitions):
+        for transition in transitions:
+            self.append(transition)
+
+    def __iadd__(self, transitions):
+        self.extend(transitions)
+        return self
+
+    def insert(self, index, transition):
+        super().insert(index, transition)
+        self._index(transition)
+
+    def remove(self, transition):
+        super().remove(transition)
+        self._reindex()
+
+    def pop(self, index=-1):
+        transition = super().pop(index)
+        self._reindex()
+        return transition
+
+    def clear(self):
+        super().clear()
+        self._reset_index()
+
+    def __setitem__(self, index, value):
+        super().__setitem__(index, value)
+        self._reindex()
+
+    def __delitem__(self, index):
+        super().__delitem__(index)
+        self._reindex()
+
+    def discard_many(self, transitions):
+        """Usuwa wskazane obiekty przejść jednym przebiegiem (zamiast wielokrotnego remove)."""
+        to_remove = {id(transition) for transition in transitions}
+        if not to_remove:
+            return
+        kept = [transition for transition in self if id(transition) not in to_remove]
+        super().clear()
+        super().extend(kept)
+        self._reindex()
+
+    # --- zapytania ---
+
+    def has_edge(self, source_id, target_id):
+        """Czy istnieje przejście source_id -> target_id."""
+        return (source_id, target_id) in self._pairs
+
+    def outgoing(self, node_id):
+        """Przejścia wychodzące z węzła (w kolejności dodania)."""
+        return tuple(self._outgoing.get(node_id, ()))
+
+    def incoming(self, node_id):
+        """Przejścia wchodzące do węzła (w kolejności dodania)."""
+        return tuple(self._incoming.get(node_id, ()))
+
+    def out_degree(self, node_id):
+        return len(self._outgoing.get(node_id, ()))
+
+    def in_degree(self, node_id):
+        return len(self._incoming.get(node_id, ()))
+
+    def successors(self, node_id):
+        """Identyfikatory celów przejść wychodzących z węzła."""
+        return [transition['target_id'] for transition in self._outgoing.get(node_id, ())]
+
+
 class LayoutManagerAdapter:
     """Adapter zapewniający jednolity interfejs layoutu z wieloma fallbackami."""
 
@@ -23,6 +131,8 @@ class LayoutManagerAdapter:
         transitions=None,
         id_map=None,
         debug_positioning=False,
+        layout_engine=None,
+        layout_mode=None,
     ):
         self.swimlane_ids = swimlane_ids or {}
         self.parsed_data = parsed_data or {}
@@ -33,32 +143,47 @@ class LayoutManagerAdapter:
         self.grid = {'rows': 0, 'columns': 0}
         self.swimlanes_geometry = {}
         self._parser_mapping = {}
+        self._xmi_to_parser = {}
+        self._xmi_to_parser_size = -1
         self._lane_order = list(self.swimlane_ids.keys())
-        self._graph_manager = (
-            GraphLayoutManager(debug=debug_positioning)
-        )
+        # Silnik i tryb layoutu (None = LAYOUT_ENGINE / LAYOUT_MODE, domyślnie dobór wg liczby węzłów)
+        self.layout_engine = layout_engine
+        self.layout_mode = layout_mode
+        self.layout_metrics = None
 
     def set_parser_mapping(self, parser_mapping):
         self._parser_mapping = parser_mapping or {}
+        self._xmi_to_parser_size = -1
+
+    def _parser_id_for(self, xmi_id):
+        """Odwrotne mapowanie xmi_id -> parser_id (odbudowywane, gdy mapowanie urosło)."""
+        if self._xmi_to_parser_size != len(self._parser_mapping):
+            self._xmi_to_parser = {}
+            self._xmi_to_parser_size = len(self._parser_mapping)
+            for pid, mapped_id in self._parser_mapping.items():
+                self._xmi_to_parser.setdefault(mapped_id, pid)
+        return self._xmi_to_parser.get(xmi_id)
 
     def analyze_diagram_structure(self, parsed_data):
         self.parsed_data = parsed_data or {}
 
-        if self._graph_manager is not None:
-            try:
-                positions, grid = self._graph_manager.analyze_diagram_structure(self.parsed_data)
-                if positions:
-                    self.element_positions = {
-                        key: self._coerce_dimensions(value)
-                        for key, value in positions.items()
-                    }
-                else:
-                    self.element_positions = {}
-                self.grid = grid or {'rows': 0, 'columns': 0}
-            except Exception as layout_err:
-                log_warning(f"⚠️ Błąd GraphLayoutManager: {layout_err}")
-                self.element_positions, self.grid = self._generate_fallback_positions()
-        else:
+        try:
+            result = run_layout(
+                'activity',
+                self.parsed_data,
+                engine=self.layout_engine,
+                mode=self.layout_mode,
+                debug=self.debug_positioning,
+                lane_order=self._lane_order,
+            )
+            self.layout_metrics = result.metrics
+            self.element_positions = {
+                key: self._coerce_dimensions(value)
+                for key, value in result.positions.items()
+            }
+            self.grid = result.grid or {'rows': 0, 'columns': 0}
+        except Exception as layout_err:
+            log_warning(f"⚠️ Błąd silnika layoutu: {layout_err}")
             self.element_positions, self.grid = self._generate_fallback_positions()
 
         return self.element_positions, self.grid
@@ -116,11 +241,7 @@ class LayoutManagerAdapter:
                 log_warning("Brak xmi:id podczas pobierania pozycji elementu")
             return None
 
-        parser_id = None
-        for pid, mapped_id in self._parser_mapping.items():
-            if mapped_id == xmi_id:
-                parser_id = pid
-                break
+        parser_id = self._parser_id_for(xmi_id)
 
         if not parser_id:
             if self.debug_positioning:
@@ -146,47 +267,7 @@ class LayoutManagerAdapter:
     # ---- Sekcje pomocnicze ----
 
     def _generate_fallback_positions(self):
-        positions = {}
-        grid_rows = 0
-        lane_offsets = {lane: 0 for lane in self._lane_order}
-
-        flow = self.parsed_data.get('flow', [])
-        for index, item in enumerate(flow):
-            parser_id = item.get('id')
-            if not parser_id:
-                continue
-
-            lane_name = item.get('swimlane')
-            if lane_name not in lane_offsets:
-                lane_offsets[lane_name] = 0
-                self._lane_order.append(lane_name)
-
-            lane_index = self._lane_order.index(lane_name) if lane_name in self._lane_order else 0
-            lane_offset = lane_offsets.get(lane_name, 0)
-            lane_offsets[lane_name] = lane_offset + 1
-
-            x = 130 + lane_index * 280
-            y = 120 + lane_offset * 160
-
-            positions[parser_id] = {
-                'x': x,
-                'y': y,
-                'width': 140,
-                'height': 60,
-                'row': lane_offset,
-                'column': lane_index,
-            }
-
-            grid_rows = max(grid_rows, lane_offset + 1)
-
-        grid_columns = max(1, len(self._lane_order))
-
-        return positions, {
-            'rows': grid_rows,
-            'columns': grid_columns,
-            'width': 1400,
-            'height': max(800, grid_rows * 160 + 200),
-        }
+        return lane_grid_positions(self.parsed_data.get('flow', []), self._lane_order)
 
     def _coerce_dimensions(self, pos):
         coerced = dict(pos)
@@ -243,7 +324,7 @@ class XMIActivityGenerator:
     def _reset_state(self):
         """Resetuje stan generatora przed każdym nowym diagramem."""
         self.id_map = {}
-        self.transitions = []
+        self.transitions = TransitionRegistry()
         self.diagram_objects = []
         self.swimlane_ids = {}
         self.partitions = {} 
@@ -336,8 +417,8 @@ class XMIActivityGenerator:
                 final_nodes_with_outgoing.append(trans)
         
         # Usuń nieprawidłowe przejścia
+        self.transitions.discard_many(final_nodes_with_outgoing)
         for bad_trans in final_nodes_with_outgoing:
-            self.transitions.remove(bad_trans)
             log_debug(f"Usunięto nieprawidłowe przejście z ActivityFinalNode: {bad_trans['id'][-6:]}")
         
         # 2. Sprawdź duplikaty przejść
@@ -352,8 +433,8 @@ class XMIActivityGenerator:
                 seen_transitions.add(key)
         
         # Usuń duplikaty
+        self.transitions.discard_many(duplicates_to_remove)
         for dup in duplicates_to_remove:
-            self.transitions.remove(dup)
             log_debug(f"Usunięto duplikat przejścia: {dup['id'][-6:]}")
         
         # 3. Sprawdź izolowane węzły
@@ -415,7 +496,7 @@ class XMIActivityGenerator:
                 yes_branches = []
                 no_branches = []
                 
-                for trans in self.transitions:
+                for trans in self.transitions.outgoing(node_id):
                     if trans['source_id'] == node_id:  # PEŁNE ID
                         target_id = trans['target_id']   # PEŁNE ID
                         guard = trans.get('name', '')
@@ -601,7 +682,7 @@ class XMIActivityGenerator:
                 final_nodes.append(node_id)
             else:
                 # Sprawdź czy ma przejścia wychodzące
-                has_outgoing = any(trans['source_id'] == node_id for trans in self.transitions)
+                has_outgoing = self.transitions.out_degree(node_id) > 0
                 if not has_outgoing:
                     elements_without_outgoing.append(node_id)
         
@@ -856,7 +937,7 @@ class XMIActivityGenerator:
             for node_id, node in self.id_map.items():
                 if node.attrib.get('xmi:type') == 'uml:ActivityFinalNode':
                     # Sprawdź czy ten Final nie ma zbyt wielu połączeń
-                    incoming_count = sum(1 for t in self.transitions if t['target_id'] == node_id)
+                    incoming_count = self.transitions.in_degree(node_id)
                     if incoming_count < 4:  # Maksymalnie 4 połączenia na Final
                         existing_final = node_id
                         break
@@ -1162,11 +1243,7 @@ class XMIActivityGenerator:
                     node_id = self.parser_id_to_xmi_id[parser_id]
                     
                     # Sprawdź, czy już ma gałąź 'nie'
-                    has_no = False
-                    for trans in self.transitions:
-                        if trans['source_id'] == node_id and trans['name'] == 'nie':
-                            has_no = True
-                            break
+                    has_no = any(trans['name'] == 'nie' for trans in self.transitions.outgoing(node_id))
                     
                     # Jeśli brak gałęzi 'nie', dodaj ją
                     if not has_no:
@@ -1189,8 +1266,8 @@ class XMIActivityGenerator:
         for source_id, target_id in graph['edges']:
             if source_id == decision_id and target_id == node_id:
                 # Sprawdź, czy to przejście ma etykietę
-                for trans in self.transitions:
-                    if trans['source_id'] == source_id and trans['target_id'] == target_id:
+                for trans in self.transitions.outgoing(source_id):
+                    if trans['target_id'] == target_id:
                         guard = trans.get('name', '').lower()
                         if 'tak' in guard:
                             return 'yes'
@@ -1351,13 +1428,7 @@ class XMIActivityGenerator:
         # Sprawdź węzły bez wyjść (poza końcowymi)
         for node_id, node in self.id_map.items():
             if node.attrib.get('xmi:type') not in ['uml:ActivityFinalNode', 'uml:ActivityPartition']:
-                has_outgoing = False
-                for trans in self.transitions:
-                    if trans['source_id'] == node_id:
-                        has_outgoing = True
-                        break
-                
-                if not has_outgoing:
+                if not self.transitions.out_degree(node_id):
                     log_warning(f"Węzeł bez wyjść: {node_id[-6:]} typu {node.attrib.get('xmi:type')}")
         
         # Sprawdź błędy połączeń
@@ -1369,16 +1440,14 @@ class XMIActivityGenerator:
                 log_error(f"Przejście do/z nieistniejącego węzła: {trans['id'][-6:]}")
 
     def _mark_reachable_nodes(self, node_id, reachable_nodes):
-        """Pomocnicza funkcja rekurencyjna do znajdowania osiągalnych węzłów."""
-        if node_id in reachable_nodes:
-            return
-        
-        reachable_nodes.add(node_id)
-        
-        # Znajdź wszystkie węzły osiągalne z bieżącego
-        for trans in self.transitions:
-            if trans['source_id'] == node_id:
-                self._mark_reachable_nodes(trans['target_id'], reachable_nodes)
+        """Oznacza węzły osiągalne z node_id (DFS iteracyjny po listach sąsiedztwa)."""
+        stack = [node_id]
+        while stack:
+            current = stack.pop()
+            if current in reachable_nodes:
+                continue
+            reachable_nodes.add(current)
+            stack.extend(self.transitions.successors(current))
 
     def _handle_note(self, item, parent, stack, prev_id, partition):
         """Obsługuje notatki (komentarze)."""
@@ -1469,16 +1538,13 @@ class XMIActivityGenerator:
         
         # 2. InitialNode NIE MOŻE mieć przejść przychodzących (oprócz pierwszego)
         if target_type == 'uml:InitialNode':
-            existing_incoming = sum(1 for t in self.transitions if t['target_id'] == target_id)
-            if existing_incoming > 0:
+            if self.transitions.in_degree(target_id) > 0:
                 log_error(f"BŁĄD UML: InitialNode {target_id[-6:]} nie może mieć więcej niż jedno przejście przychodzące")
                 return
         
         # 3. Sprawdź duplikaty
-        existing = any(t['source_id'] == source_id and t['target_id'] == target_id 
-                    for t in self.transitions)
-        if existing:
-            log_debug(f"Pomijam duplikat przejścia: {source_id[-6:]} -> {target_id[-6:]}")
+        if self.transitions.has_edge(source_id, target_id):
+            log_debug("Pomijam duplikat przejścia: %s -> %s", source_id[-6:], target_id[-6:])
             return
         
         # 4. Sprawdź samo-połączenia
@@ -1488,7 +1554,7 @@ class XMIActivityGenerator:
         
         # 5. Dodatkowa walidacja dla decision_else
         if hasattr(self, '_processing_decision_else') and self._processing_decision_else:
-            log_debug(f"Przetwarzanie gałęzi NIE dla decyzji: {source_id[-6:]} → {target_id[-6:]}")
+            log_debug("Przetwarzanie gałęzi NIE dla decyzji: %s → %s", source_id[-6:], target_id[-6:])
             self._processing_decision_else = False  # Reset flagi
         
         # Kontynuuj z tworzeniem przejścia...
@@ -1517,7 +1583,7 @@ class XMIActivityGenerator:
             'cross_swimlane': False
         })
         
-        log_debug(f"✅ Utworzono poprawne przejście: {source_id[-6:]} → {target_id[-6:]} ['{name}']")
+        log_debug("✅ Utworzono poprawne przejście: %s → %s ['%s']", source_id[-6:], target_id[-6:], name)
 
     def _find_element_by_id(self, element_id):
         """Znajduje element XML na podstawie jego ID."""
@@ -2177,6 +2243,11 @@ class XMIActivityGenerator:
                 print(f"   🏊 Tor {name}: Left={left}, Top={top}, Right={right}, Bottom={bottom}")
                 log_debug(f"   🏊 Tor {name}: Left={left}, Top={top}, Right={right}, Bottom={bottom}")
         
+        # Odwrotne mapowanie xmi_id -> parser_id (pierwsze wystąpienie, jak przy przeszukiwaniu)
+        xmi_to_parser = {}
+        for p_id, x_id in self.parser_id_to_xmi_id.items():
+            xmi_to_parser.setdefault(x_id, p_id)
+
         # KROK 2: Dodaj WSZYSTKIE elementy z diagram_objects z pozycjami
         for obj in self.diagram_objects:
             if isinstance(obj, dict):
@@ -2186,7 +2257,7 @@ class XMIActivityGenerator:
                 if node_id and node_id in self.id_map:
                     node = self.id_map[node_id]
                     
-                    parser_id = next((p_id for p_id, x_id in self.parser_id_to_xmi_id.items() if x_id == node_id), None)
+                    parser_id = xmi_to_parser.get(node_id)
 
                     position = None
                     if hasattr(self, 'layout_manager'):
@@ -2240,7 +2311,7 @@ class XMIActivityGenerator:
         
         for node_id, node in self.id_map.items():
             if node_id not in added_ids:
-                parser_id = next((p_id for p_id, x_id in self.parser_id_to_xmi_id.items() if x_id == node_id), None)
+                parser_id = xmi_to_parser.get(node_id)
 
                 position = None
                 if hasattr(self, 'layout_manager'):
@@ -2472,17 +2543,8 @@ class XMIActivityGenerator:
             log_debug(f"📋 Mapowanie parser→XMI ustawione: {len(self.parser_id_to_xmi_id)} elementów")
 
     def _sanitize_tree(self, element):
-        """Sanityzuje wszystkie atrybuty w całym drzewie XML rekurencyjnie."""
-        # Sanityzuj atrybuty bieżącego elementu
-        for key, value in list(element.attrib.items()):
-            if value is None:
-                element.attrib[key] = ""
-            elif isinstance(value, bool):
-                element.attrib[key] = 'true' if value else 'false'
-        
-        # Sanityzuj wszystkie elementy potomne
-        for child in element:
-            self._sanitize_tree(child)
+        """Sanityzuje wszystkie atrybuty w całym drzewie XML (iteracyjnie)."""
+        sanitize_attributes(element)
 
     def _format_xml(self, root: ET.Element) -> str:
         """Poprawia nagłówek i formatuje XML do czytelnej postaci."""
@@ -2495,10 +2557,8 @@ class XMIActivityGenerator:
         # Zastosuj sanityzację do całego drzewa XML rekurencyjnie
         self._sanitize_tree(root)
         
-        xml_string = ET.tostring(root, encoding='unicode', method='xml', xml_declaration=True)
-        xml_string_fixed = xml_string.replace("<?xml version='1.0' encoding='unicode'?>", '<?xml version="1.0" encoding="UTF-8"?>')
-        dom = xml.dom.minidom.parseString(xml_string_fixed)
-        return dom.toprettyxml(indent="  ")
+        # Jeden przebieg serializacji (bez ponownego parsowania przez minidom)
+        return serialize_element_tree(root)
 
 # --- Przykład użycia ---
 if __name__ == '__main__':
@@ -0,0 +1,266 @@
+"""
+Równoległy eksport wielu diagramów PlantUML do XMI (Enterprise Architect).
+
+Parsery i generatory XMI to czysta praca CPU, więc diagramy sesji (zakładki
+klas, sekwencji, aktywności, komponentów) są konwertowane w puli procesów -
+każdy proces ma własny `XMIConverter`. Błąd jednego diagramu nie przerywa
+eksportu pozostałych; gdy puli procesów nie da się uruchomić, konwersja
+przechodzi na tryb sekwencyjny w bieżącym procesie.
+
+    jobs = [ExportJob(key=idx, plantuml_code=code, diagram_type_name=name), ...]
+    results = export_diagrams(jobs, progress=lambda done, total, result: ...)
+    write_export_results(results, "wyniki/")              # plik na diagram
+    merged = merge_xmi_documents(results, "Eksport")      # jeden pakiet EA
+
+Konfiguracja (.env): XMI_EXPORT_WORKERS (0 = liczba procesorów).
+"""
+
+import multiprocessing
+import os
+import re
+import time
+import uuid
+import xml.etree.ElementTree as ET
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from concurrent.futures.process import BrokenProcessPool
+from dataclasses import dataclass
+from datetime import datetime
+from io import StringIO
+from typing import Any, Callable, Dict, Hashable, List, Optional, Sequence
+
+from utils.logger_utils import log_debug, log_warning
+from utils.xmi.xmi_conversion import DEFAULT_AUTHOR, XMIConverter
+
+XMI_NS = "http://schema.omg.org/spec/XMI/2.1"
+UML_NS = "http://schema.omg.org/spec/UML/2.1"
+
+_XMI_ID = f"{{{XMI_NS}}}id"
+_XMI_IDREF = f"{{{XMI_NS}}}idref"
+_XMI_TYPE = f"{{{XMI_NS}}}type"
+
+ProgressCallback = Callable[[int, int, "ExportResult"], None]
+
+
+@dataclass
+class ExportJob:
+    """Diagram do eksportu; `key` identyfikuje go u wywołującego (np. indeks zakładki)."""
+    key: Hashable
+    plantuml_code: str
+    diagram_type_name: str
+
+
+@dataclass
+class ExportResult:
+    """Wynik konwersji jednego diagramu (`xmi` puste, gdy `error`)."""
+    key: Hashable
+    diagram_type_name: str
+    title: str = ""
+    xmi: str = ""
+    error: Optional[str] = None
+    elapsed_ms: float = 0.0
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+
+# Konwerter procesu roboczego (bezstanowy - generator powstaje osobno dla każdego diagramu)
+_worker_converter: Optional[XMIConverter] = None
+
+
+def _convert_job(job: ExportJob, author: str = DEFAULT_AUTHOR,
+                 converter: Optional[XMIConverter] = None) -> ExportResult:
+    global _worker_converter
+    if converter is None:
+        if _worker_converter is None or _worker_converter.author != author:
+            _worker_converter = XMIConverter(author)
+        converter = _worker_converter
+
+    started = time.perf_counter()
+    result = ExportResult(job.key, job.diagram_type_name)
+    try:
+        buffer = StringIO()
+        result.title = converter.convert_to_file(job.plantuml_code, job.diagram_type_name, buffer)
+        result.xmi = buffer.getvalue()
+    except Exception as e:
+        result.error = f"{type(e).__name__}: {e}"
+    result.elapsed_ms = round((time.perf_counter() - started) * 1000, 2)
+    return result
+
+
+def export_workers(job_count: int, max_workers: Optional[int] = None) -> int:
+    """Liczba procesów dla eksportu: jawna, z XMI_EXPORT_WORKERS albo liczba procesorów."""
+    if max_workers is None:
+        try:
+            max_workers = int(os.getenv("XMI_EXPORT_WORKERS", "").strip() or 0)
+        except ValueError:
+            max_workers = 0
+    if max_workers <= 0:
+        max_workers = os.cpu_count() or 1
+    return max(1, min(max_workers, job_count))
+
+
+def export_diagrams(jobs: Sequence[ExportJob], max_workers: Optional[int] = None,
+                    progress: Optional[ProgressCallback] = None,
+                    author: str = DEFAULT_AUTHOR) -> List[ExportResult]:
+    """Konwertuje diagramy do XMI równolegle; wyniki w kolejności `jobs`.
+
+    Args:
+        jobs: Diagramy do konwersji
+        max_workers: Liczba procesów (None - XMI_EXPORT_WORKERS; 1 - w bieżącym procesie)
+        progress: Wywoływane po każdym diagramie: (gotowe, wszystkie, wynik)
+        author: Autor zapisywany w XMI
+    """
+    jobs = list(jobs)
+    total = len(jobs)
+    results: Dict[int, ExportResult] = {}
+
+    def finished(idx: int, result: ExportResult):
+        results[idx] = result
+        if progress:
+            progress(len(results), total, result)
+
+    workers = export_workers(total, max_workers)
+    pending = list(range(total))
+    if workers > 1:
+        try:
+            # spawn zamiast fork (Linux): eksport startuje z wątku Qt, a fork procesu
+            # wielowątkowego może skopiować zajęte blokady i zakleszczyć proces potomny
+            with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn")) as pool:
+                futures = {pool.submit(_convert_job, jobs[idx], author): idx for idx in pending}
+                for future in as_completed(futures):
+                    finished(futures[future], future.result())
+            pending = []
+        except (BrokenProcessPool, OSError, NotImplementedError) as e:
+            log_warning(f"Pula procesów eksportu XMI niedostępna ({e}) - konwersja sekwencyjna")
+            pending = [idx for idx in pending if idx not in results]
+
+    if pending:
+        converter = XMIConverter(author)
+        for idx in pending:
+            finished(idx, _convert_job(jobs[idx], author, converter))
+
+    log_debug(f"Eksport XMI: {total} diagramów, {workers} procesów, "
+              f"błędy: {sum(1 for r in results.values() if not r.ok)}")
+    return [results[idx] for idx in range(total)]
+
+
+def _safe_filename(name: str) -> str:
+    return re.sub(r'[\\/:*?"<>|\s]+', "_", name).strip("_") or "diagram"
+
+
+def write_export_results(results: Sequence[ExportResult], directory: str,
+                         timestamp: Optional[str] = None) -> List[str]:
+    """Zapisuje każdy poprawny wynik do osobnego pliku `<typ>_<znacznik czasu>[_n].xmi`."""
+    timestamp = timestamp or datetime.now().strftime("%Y%m%d_%H%M%S")
+    os.makedirs(directory, exist_ok=True)
+    paths = []
+    used = set()
+    for result in results:
+        if not result.ok:
+            continue
+        base = f"{_safe_filename(result.diagram_type_name)}_{timestamp}"
+        name, counter = base, 1
+        while name in used:
+            counter += 1
+            name = f"{base}_{counter}"
+        used.add(name)
+        path = os.path.join(directory, f"{name}.xmi")
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(result.xmi)
+        paths.append(path)
+    return paths
+
+
+def _namespaces(xmi: str) -> Dict[str, str]:
+    return {prefix: uri for _, (prefix, uri) in ET.iterparse(StringIO(xmi), events=("start-ns",))}
+
+
+def _identity(element: ET.Element) -> Any:
+    """Klucz deduplikacji elementu sekcji rozszerzenia EA."""
+    ref = element.get(_XMI_IDREF) or element.get(_XMI_ID)
+    if ref:
+        return element.tag, ref
+    return ET.tostring(element)
+
+
+def merge_xmi_documents(results: Sequence[ExportResult], package_name: str = "Eksport XMI") -> str:
+    """Łączy wyniki eksportu w jeden plik XMI z pakietem EA `package_name`.
+
+    Pakiety diagramów trafiają do wspólnego pakietu nadrzędnego (w modelu UML
+    i w rozszerzeniu EA), a sekcje rozszerzenia (elementy, konektory,
+    diagramy, typy pierwotne...) są sklejane z pominięciem powtórzeń.
+
+    Raises:
+        ValueError: gdy żaden wynik nie zawiera XMI
+    """
+    documents = [result.xmi for result in results if result.ok and result.xmi]
+    if not documents:
+        raise ValueError("Brak poprawnych dokumentów XMI do połączenia")
+
+    namespaces = {}
+    for xmi in documents:
+        namespaces.update(_namespaces(xmi))
+    for prefix, uri in namespaces.items():
+        if prefix:
+            ET.register_namespace(prefix, uri)
+
+    base = ET.fromstring(documents[0].encode("utf-8"))
+    model = base.find(f"{{{UML_NS}}}Model")
+    extension = base.find(f"{{{XMI_NS}}}Extension")
+    if model is None or extension is None:
+        raise ValueError("Dokument XMI nie ma modelu UML lub rozszerzenia EA")
+
+    package_id = "EAPK_" + str(uuid.uuid4()).upper().replace("-", "_")
+    wrapper = ET.Element("packagedElement", {_XMI_TYPE: "uml:Package", _XMI_ID: package_id,
+                                             "name": package_name, "visibility": "public"})
+    sections: Dict[str, ET.Element] = {section.tag: section for section in extension}
+    seen = {_identity(item) for section in sections.values() for item in section}
+    parent_package = None
+
+    for idx, xmi in enumerate(documents):
+        root = base if idx == 0 else ET.fromstring(xmi.encode("utf-8"))
+        doc_model = root.find(f"{{{UML_NS}}}Model")
+        packages = list(doc_model) if doc_model is not None else []
+        package_ids = {package.get(_XMI_ID) for package in packages}
+        for package in packages:
+            doc_model.remove(package)
+            wrapper.append(package)
+
+        doc_extension = root.find(f"{{{XMI_NS}}}Extension")
+        for doc_section in (list(doc_extension) if doc_extension is not None else []):
+            section = sections.get(doc_section.tag)
+            if section is None:
+                section = sections[doc_section.tag] = ET.SubElement(extension, doc_section.tag)
+            for item in list(doc_section):
+                # Pakiety diagramów podpinane pod pakiet nadrzędny
+                if doc_section.tag == "elements" and item.get(_XMI_IDREF) in package_ids:
+                    item_model = item.find("model")
+                    if item_model is not None:
+                        parent_package = parent_package or item_model.get("package")
+                        item_model.set("package", package_id)
+                key = _identity(item)
+                if key in seen:
+                    continue
+                seen.add(key)
+                if root is not base:
+                    section.append(item)
+
+    model.append(wrapper)
+
+    elements = sections.get("elements")
+    if elements is None:
+        elements = sections["elements"] = ET.SubElement(extension, "elements")
+    package_element = ET.Element("element", {_XMI_IDREF: package_id, _XMI_TYPE: "uml:Package",
+                                             "name": package_name, "scope": "public"})
+    ET.SubElement(package_element, "model", {"package": parent_package or package_id,
+                                             "tpos": "0", "ea_eleType": "package"})
+    elements.insert(0, package_element)
+
+    packages_section = sections.get("packages")
+    if packages_section is not None:
+        package_entry = ET.Element("package", {_XMI_IDREF: package_id})
+        ET.SubElement(package_entry, "visibility", {"value": "public"})
+        packages_section.insert(0, package_entry)
+
+    return '<?xml version="1.0" encoding="UTF-8"?>\n' + ET.tostring(base, encoding="unicode")
@@ -1,10 +1,12 @@
 import xml.dom.minidom
 import xml.etree.ElementTree as ET
 from datetime import datetime
+import itertools
 import uuid
 import sys
 import os
 import re
+import tempfile
 from typing import Dict, List, Optional, Tuple
 
 parent_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..'))
@@ -14,6 +16,7 @@ try:
     from utils.plantuml.plantuml_model import UMLClass, UMLRelation, UMLEnum, UMLNote
     from utils.plantuml.plantuml_class_parser import PlantUMLClassParser
     from utils.logger_utils import log_info, log_error, log_exception, log_debug, setup_logger, log_warning
+    from utils.xmi.xml_writer import DEFAULT_INDENT, dom_depth, serialize_dom_document, write_dom_streaming
     from language.translations_pl import TRANSLATIONS as PL
     from language.translations_en import TRANSLATIONS as EN
 except ImportError as e:
@@ -38,6 +41,8 @@ class XMIClassGenerator:
         """
         self.autor = autor
         self.id_map = {}
+        self._diagram_element = None
+        self._reserved_ids = {}
         self.namespaces = {
             'xmi': 'http://schema.omg.org/spec/XMI/2.1',
             'uml': 'http://schema.omg.org/spec/UML/2.1',
@@ -45,6 +50,12 @@ class XMIClassGenerator:
         }
         self.ea_package_id = "EAPK_CB7224AD_95A4_4e31_9549_415EAEE5D3E4"
         
+    def _reset_state(self):
+        """Czyści stan po poprzednim diagramie (mapa ID, zapamiętany element diagramu)."""
+        self.id_map = {}
+        self._diagram_element = None
+        self._reserved_ids = {}
+
     def _generate_uuid(self, prefix="EAID_"):
         """Generuje unikalny identyfikator w formacie EA."""
         return f"{prefix}{str(uuid.uuid4()).replace('-', '_')}"
@@ -64,12 +75,13 @@ class XMIClassGenerator:
         Returns:
             tuple: (dokument DOM, element główny, ID pakietu, ID diagramu)
         """
-        # Tworzymy pusty dokument bez określania root element z prefixem
+        # Tworzymy pusty dokument; elementy z przestrzeni xmi:/uml: mają nazwy kwalifikowane
+        # już przy tworzeniu, więc wynik nie wymaga poprawiania prefiksów
         doc = xml.dom.minidom.getDOMImplementation().createDocument(None, "XMI", None)
         root = doc.documentElement
         
-        # Zmieniamy nazwę na xmi:XMI - najpierw usuwamy stary element root
-        root_new = doc.createElement("XMI")
+        # Zastępujemy root elementem xmi:XMI z atrybutami i deklaracjami przestrzeni nazw
+        root_new = doc.createElement("xmi:XMI")
         # Dodajemy atrybuty i przestrzenie nazw
         root_new.setAttribute("xmi:version", "2.1")
         
@@ -82,14 +94,14 @@ class XMIClassGenerator:
         root = root_new
         
         # Dokumentacja XMI
-        documentation = doc.createElement("Documentation")
+        documentation = doc.createElement("xmi:Documentation")
         documentation.setAttribute("exporter", "Enterprise Architect")
         documentation.setAttribute("exporterVersion", "6.5")
         documentation.setAttribute("exporterID", "1560")
         root.appendChild(documentation)
         
         # Model UML
-        model = doc.createElement("Model")
+        model = doc.createElement("uml:Model")
         model.setAttribute("xmi:type", "uml:Model")
         model.setAttribute("name", "EA_Model")
         model.setAttribute("visibility", "public")
@@ -109,7 +121,7 @@ class XMIClassGenerator:
         model.appendChild(package)
         
         # Rozszerzenie XMI (EA-specific)
-        extension = doc.createElement("Extension")
+        extension = doc.createElement("xmi:Extension")
         extension.setAttribute("extender", "Enterprise Architect")
         extension.setAttribute("extenderID", "6.5")
         root.appendChild(extension)
@@ -205,6 +217,7 @@ class XMIClassGenerator:
         diagram = doc.createElement("diagram")
         diagram.setAttribute("xmi:id", diagram_id)
         diagrams.appendChild(diagram)
+        self._diagram_element = diagram
         
         model_diag = doc.createElement("model")
         model_diag.setAttribute("package", package_id)
@@ -303,7 +316,7 @@ class XMIClassGenerator:
         Returns:
             tuple: (Element klasy, ID klasy)
         """
-        class_id = self._generate_uuid()
+        class_id = self._reserved_ids.pop(f"class_{uml_class.name}", None) or self._generate_uuid()
         self.id_map[f"class_{uml_class.name}"] = class_id
         
         # Tworzymy element klasy w modelu UML
@@ -451,7 +464,7 @@ class XMIClassGenerator:
         Returns:
             tuple: (Element enumeratora, ID enumeratora)
         """
-        enum_id = self._generate_uuid()
+        enum_id = self._reserved_ids.pop(f"enum_{uml_enum.name}", None) or self._generate_uuid()
         self.id_map[f"enum_{uml_enum.name}"] = enum_id
         
         enum_element = doc.createElement("packagedElement")
@@ -533,34 +546,24 @@ class XMIClassGenerator:
             extension_element: Element rozszerzenia EA
             relations: Lista relacji UML
         """
-        # Znajdź diagram
-        diagram_id = self.id_map.get('diagram')
-        if not diagram_id:
-            log_warning("WARN: Nie znaleziono ID diagramu")
-            return
-            
-        diagrams = doc.getElementsByTagName("diagram")
-        diagram = None
-        for diag in diagrams:
-            if diag.getAttribute("xmi:id") == diagram_id:
-                diagram = diag
-                break
-        
-        if not diagram:
-            log_warning("WARN: Nie znaleziono elementu diagramu")
+        diagramlinks = self._get_diagramlinks(doc)
+        if diagramlinks is None:
             return
         
-        # Znajdź lub utwórz sekcję diagramlinks
-        diagramlinks = None
-        for node in diagram.childNodes:
-            if node.nodeType == node.ELEMENT_NODE and node.nodeName == "diagramlinks":
-                diagramlinks = node
-                break
+        for diagramlink in self._iter_relation_diagramlinks(doc, relations):
+            diagramlinks.appendChild(diagramlink)
+
+    def _iter_relation_diagramlinks(self, doc, relations):
+        """
+        Tworzy elementy diagramlink dla relacji (bez duplikatów źródło-cel-konektor).
         
-        if not diagramlinks:
-            diagramlinks = doc.createElement("diagramlinks")
-            diagram.appendChild(diagramlinks)
+        Args:
+            doc: Dokument XML DOM
+            relations: Lista relacji UML
         
+        Yields:
+            Element diagramlink
+        """
         # Stwórz słownik do śledzenia już dodanych linków
         added_links = {}
         # Dodaj linki dla wszystkich relacji
@@ -605,9 +608,44 @@ class XMIClassGenerator:
                     
                     diagramlink.setAttribute("labels", f"lb={lb_value};mt={mt_value};rb={rb_value};")
 
-                diagramlinks.appendChild(diagramlink)
-
                 added_links[link_key] = True
+                yield diagramlink
+
+    def _find_diagram_element(self, doc):
+        """
+        Zwraca element <diagram> bieżącego dokumentu.
+        
+        Element zapamiętany w generate_skeleton jest zwracany bez przeszukiwania
+        całego dokumentu (wcześniej - dla każdej relacji osobno).
+        """
+        if self._diagram_element is not None:
+            return self._diagram_element
+        
+        diagram_id = self.id_map.get('diagram')
+        if not diagram_id:
+            log_warning("WARN: Nie znaleziono ID diagramu")
+            return None
+            
+        for diag in doc.getElementsByTagName("diagram"):
+            if diag.getAttribute("xmi:id") == diagram_id:
+                return diag
+        
+        log_warning("WARN: Nie znaleziono elementu diagramu")
+        return None
+
+    def _get_diagramlinks(self, doc):
+        """Znajduje lub tworzy sekcję diagramlinks w elemencie diagramu."""
+        diagram = self._find_diagram_element(doc)
+        if diagram is None:
+            return None
+        
+        for node in diagram.childNodes:
+            if node.nodeType == node.ELEMENT_NODE and node.nodeName == "diagramlinks":
+                return node
+        
+        diagramlinks = doc.createElement("diagramlinks")
+        diagram.appendChild(diagramlinks)
+        return diagramlinks
 
     def add_relation(self, doc, package_element, relation: UMLRelation):
         """
@@ -796,24 +834,55 @@ class XMIClassGenerator:
             elements_diag = doc.createElement("elements")
             diagram_elem.appendChild(elements_diag)
         
-        # Dodaj elementy klas do diagramu
+        # Dodaj elementy klas i enumów do diagramu
+        for element in self._iter_diagram_elements(doc, classes, enums):
+            elements_diag.appendChild(element)
+        
+        # Znajdź lub utwórz diagramlinks w diagramie
+        diagramlinks = None
+        for node in diagram_elem.childNodes:
+            if node.nodeType == node.ELEMENT_NODE and node.nodeName == "diagramlinks":
+                diagramlinks = node
+                break
+        
+        if not diagramlinks:
+            diagramlinks = doc.createElement("diagramlinks")
+            diagram_elem.appendChild(diagramlinks)
+            
+        # Dodanie relacji do diagramu (pomijamy na razie dla uproszczenia)
+        # TODO: Dodać kod dla rysowania relacji na diagramie
+
+    def _iter_diagram_elements(self, doc, classes, enums):
+        """
+        Tworzy elementy diagramu (pozycje w siatce) dla klas, a następnie enumów.
+        
+        Args:
+            doc: Dokument XML DOM
+            classes: Klasy UML
+            enums: Enumy UML
+        
+        Yields:
+            Element diagramu
+        """
         x, y = 100, 100
         i = 0
         
-        # Dodawanie klas
-        for class_name, uml_class in classes.items():
-            class_id = self.id_map.get(f"class_{class_name}")
-            if not class_id:
+        # Klasy (wysokość 120), potem enumy (wysokość 100)
+        subjects = itertools.chain(
+            ((self.id_map.get(f"class_{name}"), 120) for name in classes),
+            ((self.id_map.get(f"enum_{name}"), 100) for name in enums),
+        )
+        for subject_id, height in subjects:
+            if not subject_id:
                 continue
                 
-            # Dodaj element diagramu dla klasy
             element = doc.createElement("element")
-            element.setAttribute("geometry", f"Left={x};Top={y};Right={x+150};Bottom={y+120};")
-            element.setAttribute("subject", class_id)
+            element.setAttribute("geometry", f"Left={x};Top={y};Right={x+150};Bottom={y+height};")
+            element.setAttribute("subject", subject_id)
             element.setAttribute("seqno", str(i))
             element.setAttribute("style", "DUID=unique_id;")
             
-            elements_diag.appendChild(element)
+            yield element
             i += 1
             
             # Przesuń pozycję dla następnego elementu
@@ -821,42 +890,6 @@ class XMIClassGenerator:
             if x > 700:  # Jeśli przekroczy szerokość diagramu, przejdź do nowej linii
                 x = 100
                 y += 150
-        
-        # Dodawanie enumów
-        for enum_name, uml_enum in enums.items():
-            enum_id = self.id_map.get(f"enum_{enum_name}")
-            if not enum_id:
-                continue
-                
-            # Dodaj element diagramu dla enuma
-            element = doc.createElement("element")
-            element.setAttribute("geometry", f"Left={x};Top={y};Right={x+150};Bottom={y+100};")
-            element.setAttribute("subject", enum_id)
-            element.setAttribute("seqno", str(i))
-            element.setAttribute("style", "DUID=unique_id;")
-            
-            elements_diag.appendChild(element)
-            i += 1
-            
-            # Przesuń pozycję dla następnego elementu
-            x += 200
-            if x > 700:
-                x = 100
-                y += 150
-        
-        # Znajdź lub utwórz diagramlinks w diagramie
-        diagramlinks = None
-        for node in diagram_elem.childNodes:
-            if node.nodeType == node.ELEMENT_NODE and node.nodeName == "diagramlinks":
-                diagramlinks = node
-                break
-        
-        if not diagramlinks:
-            diagramlinks = doc.createElement("diagramlinks")
-            diagram_elem.appendChild(diagramlinks)
-            
-        # Dodanie relacji do diagramu (pomijamy na razie dla uproszczenia)
-        # TODO: Dodać kod dla rysowania relacji na diagramie
 
     def _split_attribute(self, attr: str) -> Tuple[str, Optional[str]]:
         """
@@ -959,28 +992,6 @@ class XMIClassGenerator:
         return self.id_map.get(f'association_{relation.source}_{relation.target}_{relation.label}')
 
 
-    def _fix_xml_prefixes(self, xml_str):
-        """
-        Poprawia prefixy XML w wyjściowym dokumencie.
-        
-        Args:
-            xml_str: String XML do poprawienia
-            
-        Returns:
-            str: Poprawiony XML
-        """
-        # Poprawne prefixy dla głównych elementów
-        xml_str = re.sub(r'<XMI ', r'<xmi:XMI ', xml_str)
-        xml_str = re.sub(r'</XMI>', r'</xmi:XMI>', xml_str)
-        xml_str = re.sub(r'<Documentation ', r'<xmi:Documentation ', xml_str)
-        xml_str = re.sub(r'</Documentation>', r'</xmi:Documentation>', xml_str)
-        xml_str = re.sub(r'<Model ', r'<uml:Model ', xml_str)
-        xml_str = re.sub(r'</Model>', r'</uml:Model>', xml_str)
-        xml_str = re.sub(r'<Extension ', r'<xmi:Extension ', xml_str)
-        xml_str = re.sub(r'</Extension>', r'</xmi:Extension>', xml_str)
-    
-        return xml_str
-    
     def _add_association(self, doc, package_element, relation: UMLRelation, source_id: str, target_id: str):
         """
         Dodaje relację asocjacji, agregacji lub kompozycji.
@@ -1261,34 +1272,11 @@ class XMIClassGenerator:
             source_id: ID elementu źródłowego 
             target_id: ID elementu docelowego
         """
-        # Znajdź diagram
-        diagram_id = self.id_map.get('diagram')
-        if not diagram_id:
-            log_warning("WARN: Nie znaleziono ID diagramu")
-            return
-            
-        diagrams = doc.getElementsByTagName("diagram")
-        diagram = None
-        for diag in diagrams:
-            if diag.getAttribute("xmi:id") == diagram_id:
-                diagram = diag
-                break
-        
-        if not diagram:
-            log_warning("WARN: Nie znaleziono elementu diagramu")
+        # Znajdź lub utwórz sekcję diagramlinks diagramu
+        diagramlinks = self._get_diagramlinks(doc)
+        if diagramlinks is None:
             return
         
-        # Znajdź lub utwórz sekcję diagramlinks
-        diagramlinks = None
-        for node in diagram.childNodes:
-            if node.nodeType == node.ELEMENT_NODE and node.nodeName == "diagramlinks":
-                diagramlinks = node
-                break
-        
-        if not diagramlinks:
-            diagramlinks = doc.createElement("diagramlinks")
-            diagram.appendChild(diagramlinks)
-        
         # Dodaj link diagramu z pełnymi atrybutami jak w starym generatorze
         diagramlink = doc.createElement("diagramlink")
         diagramlink.setAttribute("connectorID", connector_id)
@@ -1345,6 +1333,8 @@ class XMIClassGenerator:
         Returns:
             str: Zawartość pliku XMI jako string
         """
+        self._reset_state()
+        
         # Generuj szkielet XMI z typami pierwotnymi w odpowiedniej sekcji
         doc, root, package, extension = self.generate_skeleton(diagram_name, "DiagramKlas")
         
@@ -1366,12 +1356,156 @@ class XMIClassGenerator:
         # Analizuj wynikowe XMI
         self._analizuj_wynikowe_xmi(doc)
         
-        # Używamy metody do poprawy prefixów XML
-        xml_str = doc.toprettyxml(indent="  ", encoding="UTF-8").decode('utf-8')
-        xml_str = self._fix_xml_prefixes(xml_str)
-        
-        return xml_str
+        # Serializacja strumieniowa (writexml) - bez kodowania do bajtów i poprawiania prefiksów
+        return serialize_dom_document(doc)
     
+    def write_xmi(self, output, classes: Dict[str, UMLClass], relations: List[UMLRelation],
+                  enums: Dict[str, UMLEnum], notes: List[UMLNote],
+                  primitive_types: set = None, diagram_name: str = "DiagramKlas") -> Dict[str, int]:
+        """
+        Generuje XMI i zapisuje go przyrostowo do pliku lub strumienia (tryb dla bardzo dużych modeli).
+        
+        Wynik jest równoważny generate_xmi, ale pełne drzewo DOM nie powstaje:
+        zapisywany jest szkielet dokumentu, a elementy modelu (enumy, klasy,
+        relacje), konektory, elementy diagramu i jego linki są tworzone
+        pojedynczo tuż przed zapisem. Linki diagramu powstające razem z
+        konektorami trafiają do pliku tymczasowego i są przepisywane w
+        sekcji diagramlinks.
+        
+        Args:
+            output: Ścieżka pliku lub strumień tekstowy (obiekt z metodą write)
+            classes: Słownik klas UML
+            relations: Lista relacji UML
+            enums: Słownik enumeratorów UML
+            notes: Lista notatek UML
+            primitive_types: Zbiór typów pierwotnych
+            diagram_name: Nazwa diagramu
+        
+        Returns:
+            dict: Liczniki zapisanych elementów
+        """
+        self._reset_state()
+        doc, root, package, extension = self.generate_skeleton(diagram_name, "DiagramKlas")
+        self._dodaj_typy_pierwotne(doc, None, primitive_types)
+        
+        diagram = self._diagram_element
+        connectors_elem = self._child_element(extension, "connectors")
+        elements_diag = self._child_element(diagram, "elements")
+        diagramlinks = doc.createElement("diagramlinks")
+        diagram.appendChild(diagramlinks)
+        link_indent = DEFAULT_INDENT * (dom_depth(diagramlinks) + 1)
+        
+        # ID klas i enumów rezerwowane z góry - realizacja interfejsu jest zapisywana
+        # razem z klasą źródłową, zanim interfejs docelowy trafi do id_map
+        for uml_class in classes.values():
+            self._reserved_ids[f"class_{uml_class.name}"] = self._generate_uuid()
+        for uml_enum in enums.values():
+            self._reserved_ids[f"enum_{uml_enum.name}"] = self._generate_uuid()
+        
+        realizations = {}
+        for relation in relations:
+            if relation.relation_type == 'realization':
+                realizations.setdefault(relation.source, []).append(relation)
+        
+        counts = {'enums': 0, 'classes': 0, 'interfaces': 0, 'generalizations': 0,
+                  'associations': 0, 'realizations': 0, 'connectors': 0, 'diagramlinks': 0}
+        
+        def element_id(name):
+            return (self.id_map.get(f"class_{name}") or self._reserved_ids.get(f"class_{name}")
+                    or self.id_map.get(f"enum_{name}") or self._reserved_ids.get(f"enum_{name}"))
+        
+        def with_realizations(holder, element, element_name, owner_id):
+            # Realizacje dołączamy tylko do elementu, który generate_xmi wybrałby jako źródło
+            if element_id(element_name) != owner_id:
+                return element
+            for relation in realizations.get(element_name, ()):
+                target_id = element_id(relation.target)
+                if target_id and self._add_realization(doc, holder, relation, owner_id, target_id)[0] is not None:
+                    counts['realizations'] += 1
+            return element
+        
+        def model_elements():
+            for uml_enum in enums.values():
+                holder = doc.createElement("packagedElement")
+                enum_element, enum_id = self.add_enum(doc, holder, uml_enum)
+                counts['enums'] += 1
+                yield with_realizations(holder, enum_element, uml_enum.name, enum_id)
+            
+            for uml_class in classes.values():
+                holder = doc.createElement("packagedElement")
+                class_element, class_id = self.add_class(doc, holder, uml_class)
+                counts['interfaces' if uml_class.stereotype == 'interface' else 'classes'] += 1
+                yield with_realizations(holder, class_element, uml_class.name, class_id)
+            
+            for relation in relations:
+                source_id = self.id_map.get(f"class_{relation.source}") or self.id_map.get(f"enum_{relation.source}")
+                target_id = self.id_map.get(f"class_{relation.target}") or self.id_map.get(f"enum_{relation.target}")
+                if not source_id or not target_id:
+                    log_warning(f"WARN: Nie znaleziono ID dla {relation.source} lub {relation.target}, pomijam relację")
+                    continue
+                if relation.relation_type == 'realization':
+                    continue  # zapisana razem z klasą źródłową
+                
+                holder = doc.createElement("packagedElement")
+                if relation.relation_type == 'inheritance':
+                    rel_elem, _ = self._add_inheritance(doc, holder, relation, source_id, target_id)
+                    counts['generalizations'] += 1
+                else:
+                    rel_elem, _ = self._add_association(doc, holder, relation, source_id, target_id)
+                    counts['associations'] += 1
+                yield rel_elem
+        
+        spool = tempfile.SpooledTemporaryFile(max_size=8 * 1024 * 1024, mode="w+", encoding="utf-8")
+        
+        def connectors():
+            # Konektory i ich linki powstają w roboczych kontenerach i są od razu z nich usuwane
+            scratch_extension = doc.createElement("xmi:Extension")
+            scratch_connectors = doc.createElement("connectors")
+            scratch_extension.appendChild(scratch_connectors)
+            self._diagram_element = doc.createElement("diagram")
+            try:
+                for relation in relations:
+                    self.add_diagram_connectors(doc, scratch_extension, [relation])
+                    for connector in list(scratch_connectors.childNodes):
+                        scratch_connectors.removeChild(connector)
+                        counts['connectors'] += 1
+                        yield connector
+                    scratch_links = self._get_diagramlinks(doc)
+                    for link in list(scratch_links.childNodes):
+                        scratch_links.removeChild(link)
+                        link.writexml(spool, link_indent, DEFAULT_INDENT, "\n")
+                        counts['diagramlinks'] += 1
+            finally:
+                self._diagram_element = diagram
+        
+        def diagram_links():
+            spool.seek(0)
+            for chunk in iter(lambda: spool.read(64 * 1024), ""):
+                yield chunk
+            for link in self._iter_relation_diagramlinks(doc, relations):
+                counts['diagramlinks'] += 1
+                yield link
+        
+        try:
+            write_dom_streaming(root, output, {
+                package: model_elements(),
+                connectors_elem: connectors(),
+                elements_diag: self._iter_diagram_elements(doc, classes, enums),
+                diagramlinks: diagram_links(),
+            })
+        finally:
+            spool.close()
+        
+        log_info(f"Zapisano strumieniowo XMI: {counts}")
+        return counts
+
+    def _child_element(self, parent, name):
+        """Pierwszy bezpośredni element potomny o podanej nazwie."""
+        for node in parent.childNodes:
+            if node.nodeType == node.ELEMENT_NODE and node.nodeName == name:
+                return node
+        return None
+
     def _dodaj_typy_pierwotne(self, doc, model_element, primitive_types=None):
         """
         Dodaje definicje typów pierwotnych do sekcji primitivetypes w rozszerzeniu EA
@@ -1403,7 +1537,7 @@ class XMIClassGenerator:
         
         # Znajdź sekcję primitivetypes w rozszerzeniu
         extension = None
-        for node in doc.getElementsByTagName("Extension"):
+        for node in doc.getElementsByTagName("xmi:Extension"):
             extension = node
             break
         
@@ -1,5 +1,4 @@
 import xml.etree.ElementTree as ET
-import xml.dom.minidom
 import uuid
 from datetime import datetime
 import re
@@ -7,6 +6,8 @@ import os
 from typing import Dict, List, Optional, Tuple
 from utils.logger_utils import log_debug, log_info, log_error, log_exception, log_warning, setup_logger
 from utils.plantuml.plantuml_component_parser import PlantUMLComponentParser
+from utils.xmi.xml_writer import sanitize_attributes, serialize_element_tree
+from utils.xmi.layout_engines import run_layout
 
 setup_logger('xmi_component_generator.log')
 
@@ -615,6 +616,8 @@ class XMIComponentGenerator:
         self.diagram_id = None  # ID diagramu
         self.root_package_id = None  # ID pakietu głównego
         self.added_to_diagram = set()
+        self.layout_metrics = None  # Pomiar silnika układu (LayoutMetrics) z ostatniego diagramu
+        self.component_stereotypes = {}  # Stereotypy komponentów i interfejsów (ID XMI -> stereotyp)
     
     def _register_namespaces(self):
         """Rejestruje przestrzenie nazw XML."""
@@ -1844,8 +1847,9 @@ class XMIComponentGenerator:
 
         self.added_to_diagram = set()
 
-        layout_manager = LayoutManager(self, log_position_info)
-        layout_data = layout_manager.layout()
+        layout_result = run_layout('component', self, log_callback=log_position_info)
+        self.layout_metrics = layout_result.metrics
+        layout_data = layout_result.raw
 
         diagram_obj_map = {
             obj['id']: obj for obj in self.diagram_objects if isinstance(obj, dict) and obj.get('id')
@@ -2069,23 +2073,12 @@ class XMIComponentGenerator:
         # Zastosuj sanityzację do całego drzewa XML rekurencyjnie
         self._sanitize_tree(root)
         
-        xml_string = ET.tostring(root, encoding='unicode', method='xml', xml_declaration=True)
-        xml_string_fixed = xml_string.replace("<?xml version='1.0' encoding='unicode'?>", '<?xml version="1.0" encoding="UTF-8"?>')
-        dom = xml.dom.minidom.parseString(xml_string_fixed)
-        return dom.toprettyxml(indent="  ")
+        # Jeden przebieg serializacji (bez ponownego parsowania przez minidom)
+        return serialize_element_tree(root)
     
     def _sanitize_tree(self, element):
-        """Sanityzuje wszystkie atrybuty w całym drzewie XML rekurencyjnie."""
-        # Sanityzuj atrybuty bieżącego elementu
-        for key, value in list(element.attrib.items()):
-            if value is None:
-                element.attrib[key] = ""
-            elif isinstance(value, bool):
-                element.attrib[key] = 'true' if value else 'false'
-        
-        # Sanityzuj wszystkie elementy potomne
-        for child in element:
-            self._sanitize_tree(child)
+        """Sanityzuje wszystkie atrybuty w całym drzewie XML (iteracyjnie)."""
+        sanitize_attributes(element)
 
 # --- Przykład użycia ---
 if __name__ == '__main__':
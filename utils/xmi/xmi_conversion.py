@@ -0,0 +1,140 @@
+"""
+Konwersja kodu PlantUML do XMI (Enterprise Architect) dla obsługiwanych typów diagramów.
+
+Wspólna ścieżka parser -> generator dla aplikacji desktopowej i Streamlit.
+`XMIConverter` tworzy nowy generator przy każdym wywołaniu (generatory
+przechowują stan diagramu w atrybutach), więc jedna instancja konwertera
+może być współdzielona między sesjami/wątkami i kolejnymi diagramami.
+"""
+
+from typing import Any, Optional, Tuple
+
+XMI_DIAGRAM_KINDS = ("class", "sequence", "activity", "component")
+
+# Fragmenty nazw typów zwracanych przez identify_plantuml_diagram_type (PL/EN)
+_KIND_KEYWORDS = {
+    "class": ("klas", "class"),
+    "sequence": ("sekwencji", "sequence"),
+    "activity": ("aktywności", "activity"),
+    "component": ("komponentów", "component"),
+}
+
+DEFAULT_AUTHOR = "195841"
+
+
+def detect_xmi_kind(diagram_type_name: str) -> Optional[str]:
+    """Zwraca rodzaj diagramu obsługiwany przez eksport XMI lub None."""
+    name = (diagram_type_name or "").lower()
+    for kind, keywords in _KIND_KEYWORDS.items():
+        if any(keyword in name for keyword in keywords):
+            return kind
+    return None
+
+
+class XMIConverter:
+    """Konwerter PlantUML -> XMI; generator jest tworzony osobno dla każdego diagramu."""
+
+    def __init__(self, author: str = DEFAULT_AUTHOR):
+        self.author = author
+
+    def _create_generator(self, kind: str):
+        if kind == "class":
+            from utils.xmi.xmi_class_generator import XMIClassGenerator
+            return XMIClassGenerator(autor=self.author)
+        if kind == "sequence":
+            from utils.xmi.xmi_sequance_generator import XMISequenceGenerator
+            return XMISequenceGenerator(autor=self.author)
+        if kind == "activity":
+            from utils.xmi.xmi_activity_generator import XMIActivityGenerator
+            return XMIActivityGenerator(author=self.author)
+        from utils.xmi.xmi_component_generator import XMIComponentGenerator
+        return XMIComponentGenerator(author=self.author)
+
+    def parse(self, plantuml_code: str, diagram_type_name: str) -> Tuple[str, Any, str]:
+        """Etap 1: parsowanie kodu PlantUML.
+
+        Returns:
+            (rodzaj diagramu, wynik parsera, tytuł diagramu) - wejście dla `generate`
+
+        Raises:
+            ValueError: gdy typ diagramu nie jest obsługiwany przez eksport XMI
+        """
+        kind = detect_xmi_kind(diagram_type_name)
+        if kind is None:
+            raise ValueError(f"Eksport XMI nie jest obsługiwany dla typu: {diagram_type_name}")
+
+        if kind == "class":
+            from utils.plantuml.plantuml_class_parser import PlantUMLClassParser
+            parser = PlantUMLClassParser()
+            parser.parse(plantuml_code)
+            title = parser.title if getattr(parser, 'title', None) else diagram_type_name
+            return kind, parser, title
+
+        if kind == "sequence":
+            from utils.plantuml.plantuml_sequance_parser import PlantUMLSequenceParser
+            parsed_data = PlantUMLSequenceParser(plantuml_code).parse()
+        elif kind == "activity":
+            from utils.plantuml.improved_plantuml_activity_parser import ImprovedPlantUMLActivityParser
+            parsed_data = ImprovedPlantUMLActivityParser(plantuml_code).parse()
+        else:
+            from utils.plantuml.plantuml_component_parser import PlantUMLComponentParser
+            parsed_data = PlantUMLComponentParser(plantuml_code).parse()
+        return kind, parsed_data, parsed_data.get('title') or diagram_type_name
+
+    def generate(self, kind: str, parsed: Any, title: str) -> str:
+        """Etap 2: generowanie XMI z wyniku `parse`."""
+        # Świeży generator - stan poprzedniego diagramu nie przechodzi do następnego
+        generator = self._create_generator(kind)
+        if kind == "class":
+            return generator.save_xmi(parsed.classes, parsed.relations, parsed.enums,
+                                      parsed.notes, parsed.primitive_types, diagram_name=title)
+        if kind == "sequence":
+            return generator.generuj_diagram(nazwa_diagramu=title, dane=parsed)
+        if kind == "activity":
+            return generator.generate_activity_diagram(diagram_name=title, parsed_data=parsed)
+        return generator.generate_component_diagram(diagram_name=title, parsed_data=parsed)
+
+    def convert(self, plantuml_code: str, diagram_type_name: str) -> Tuple[str, str]:
+        """Konwertuje kod PlantUML do XMI.
+
+        Args:
+            plantuml_code: Kod PlantUML
+            diagram_type_name: Nazwa typu diagramu (np. z identify_plantuml_diagram_type)
+
+        Returns:
+            (xmi_content, diagram_title)
+
+        Raises:
+            ValueError: gdy typ diagramu nie jest obsługiwany przez eksport XMI
+        """
+        kind, parsed, title = self.parse(plantuml_code, diagram_type_name)
+        return self.generate(kind, parsed, title), title
+
+    def convert_to_file(self, plantuml_code: str, diagram_type_name: str, output) -> str:
+        """Konwertuje kod PlantUML i zapisuje XMI do pliku lub strumienia tekstowego.
+
+        Diagramy klas są zapisywane strumieniowo (`XMIClassGenerator.write_xmi`),
+        bez budowania całego dokumentu w pamięci.
+
+        Returns:
+            Tytuł diagramu
+        """
+        if detect_xmi_kind(diagram_type_name) == "class":
+            _, parser, title = self.parse(plantuml_code, diagram_type_name)
+            self._create_generator("class").write_xmi(output, parser.classes, parser.relations, parser.enums,
+                                                      parser.notes, parser.primitive_types, diagram_name=title)
+            return title
+
+        xmi, title = self.convert(plantuml_code, diagram_type_name)
+        if hasattr(output, "write"):
+            output.write(xmi)
+        else:
+            with open(output, "w", encoding="utf-8") as f:
+                f.write(xmi)
+        return title
+
+
+def convert_plantuml_to_xmi(plantuml_code: str, diagram_type_name: str,
+                            author: str = DEFAULT_AUTHOR) -> Tuple[str, str]:
+    """Jednorazowa konwersja PlantUML -> XMI (nowy konwerter)."""
+    return XMIConverter(author).convert(plantuml_code, diagram_type_name)
@@ -519,8 +519,9 @@ class XMISequenceGenerator:
             nazwa_pliku: Nazwa pliku XML do zapisu.
             dane: Słownik z danymi zebranymi przez PlantUMLSequenceParser.
         """
-        # Resetuj mapę ID dla każdego nowego diagramu
+        # Resetuj mapę ID i listę komunikatów dla każdego nowego diagramu
         self.id_map = {}
+        self.komunikaty_dla_elements = []
         
         # 1. Tworzenie podstawowej struktury XML (tak jak wcześniej)
         root = self._stworz_korzen_dokumentu()
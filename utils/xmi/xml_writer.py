@@ -0,0 +1,189 @@
+"""
+Serializacja dokumentów XMI bez pośredniego round-tripu przez minidom.
+
+Generatory budują drzewo w pamięci (ElementTree lub minidom). Dotychczas
+wynik był serializowany do napisu, parsowany ponownie przez
+`xml.dom.minidom.parseString` i formatowany `toprettyxml`, a w generatorze
+klas dodatkowo poprawiany wyrażeniami regularnymi (prefiksy xmi:/uml:).
+Funkcje z tego modułu zapisują drzewo jednym przebiegiem - z nagłówkiem
+`<?xml version="1.0" encoding="UTF-8"?>` i wcięciami - bezpośrednio do pliku,
+strumienia lub bufora.
+
+    xmi = serialize_element_tree(root)                 # napis
+    write_element_tree(root, "diagram.xmi")            # plik
+    write_element_tree(root, stream)                   # dowolny obiekt z write()
+
+Dla bardzo dużych modeli `write_dom_streaming` zapisuje szkielet dokumentu
+i dopisuje do wskazanych sekcji treść generowaną dopiero w trakcie zapisu,
+więc pełne drzewo nigdy nie istnieje w pamięci.
+"""
+
+import io
+import os
+import xml.etree.ElementTree as ET
+from typing import IO, Dict, Iterable, Union
+from xml.sax.saxutils import escape
+
+XML_DECLARATION = '<?xml version="1.0" encoding="UTF-8"?>'
+DEFAULT_INDENT = "  "
+_ATTR_ENTITIES = {'"': "&quot;"}
+
+Target = Union[str, os.PathLike, IO[str]]
+
+
+def sanitize_attributes(root: ET.Element) -> ET.Element:
+    """Zamienia atrybuty None na "" i bool na "true"/"false" (ElementTree nie serializuje innych typów)."""
+    for element in root.iter():
+        for key, value in element.attrib.items():
+            if value is None:
+                element.attrib[key] = ""
+            elif isinstance(value, bool):
+                element.attrib[key] = 'true' if value else 'false'
+    return root
+
+
+def _write_to(target: Target, write_body) -> None:
+    if hasattr(target, "write"):
+        write_body(target)
+        return
+    with open(target, "w", encoding="utf-8", newline="\n") as stream:
+        write_body(stream)
+
+
+def write_element_tree(root: ET.Element, target: Target, indent: str = DEFAULT_INDENT) -> None:
+    """Zapisuje drzewo ElementTree z nagłówkiem XML i wcięciami do pliku lub strumienia tekstowego.
+
+    Uwaga: wcięcia są wstawiane do drzewa (`ET.indent`), więc drzewo jest modyfikowane.
+    """
+    if indent:
+        ET.indent(root, space=indent)
+
+    def write_body(stream):
+        stream.write(XML_DECLARATION)
+        stream.write("\n")
+        ET.ElementTree(root).write(stream, encoding="unicode", xml_declaration=False,
+                                   short_empty_elements=True)
+        stream.write("\n")
+
+    _write_to(target, write_body)
+
+
+def serialize_element_tree(root: ET.Element, indent: str = DEFAULT_INDENT) -> str:
+    """Zwraca drzewo ElementTree jako sformatowany napis XML (z nagłówkiem UTF-8)."""
+    buffer = io.StringIO()
+    write_element_tree(root, buffer, indent)
+    return buffer.getvalue()
+
+
+def write_dom_document(doc, target: Target, indent: str = DEFAULT_INDENT) -> None:
+    """Zapisuje dokument minidom strumieniowo (`writexml`) bez budowania pośredniego napisu/bajtów."""
+
+    def write_body(stream):
+        stream.write(XML_DECLARATION)
+        stream.write("\n")
+        for node in doc.childNodes:
+            node.writexml(stream, "", indent, "\n")
+
+    _write_to(target, write_body)
+
+
+def serialize_dom_document(doc, indent: str = DEFAULT_INDENT) -> str:
+    """Zwraca dokument minidom jako sformatowany napis XML (odpowiednik `toprettyxml` bez kodowania do bajtów)."""
+    buffer = io.StringIO()
+    write_dom_document(doc, buffer, indent)
+    return buffer.getvalue()
+
+
+def _dom_attributes(element) -> str:
+    """Atrybuty elementu minidom w formacie `writexml` (kolejność wstawienia, te same encje)."""
+    return "".join(f' {name}="{escape(value, _ATTR_ENTITIES)}"' for name, value in element.attributes.items())
+
+
+def dom_depth(node) -> int:
+    """Głębokość węzła minidom liczona od elementu głównego (root = 0)."""
+    depth = 0
+    parent = node.parentNode
+    while parent is not None and parent.nodeType == parent.ELEMENT_NODE:
+        depth += 1
+        parent = parent.parentNode
+    return depth
+
+
+class DOMStreamWriter:
+    """
+    Przyrostowy zapis XML w formacie `writexml`/`toprettyxml` minidom.
+
+    Szkielet dokumentu zapisywany jest znacznikami `start()`/`end()`, a treść
+    generowana w locie - jako gotowe poddrzewa minidom (`node()`) albo tekst
+    już sformatowany (`raw()`). W pamięci jest tylko bieżący fragment.
+    """
+
+    def __init__(self, stream: IO[str], indent: str = DEFAULT_INDENT):
+        self.stream = stream
+        self.indent = indent
+        self._open_tags = []
+
+    @property
+    def depth(self) -> int:
+        return len(self._open_tags)
+
+    def declaration(self) -> None:
+        self.stream.write(XML_DECLARATION)
+        self.stream.write("\n")
+
+    def start(self, element) -> None:
+        self.stream.write(f"{self.indent * self.depth}<{element.tagName}{_dom_attributes(element)}>\n")
+        self._open_tags.append(element.tagName)
+
+    def end(self) -> None:
+        tag = self._open_tags.pop()
+        self.stream.write(f"{self.indent * self.depth}</{tag}>\n")
+
+    def node(self, node) -> None:
+        node.writexml(self.stream, self.indent * self.depth, self.indent, "\n")
+
+    def raw(self, text: str) -> None:
+        self.stream.write(text)
+
+
+def write_dom_streaming(root, target: Target, slots: Dict[object, Iterable], indent: str = DEFAULT_INDENT) -> None:
+    """Zapisuje szkielet minidom, dopisując do wskazanych elementów treść generowaną w trakcie zapisu.
+
+    Args:
+        root: Element główny szkieletu
+        target: Ścieżka pliku lub strumień tekstowy
+        slots: {element szkieletu: iterowalne węzłów minidom lub gotowych napisów};
+               treść slotu trafia za istniejące dzieci elementu, a iterowalne
+               jest konsumowane dopiero w chwili zapisu tego elementu
+    """
+    slot_content = {id(element): content for element, content in slots.items()}
+    on_path = set(slot_content)
+    for element in slots:
+        parent = element.parentNode
+        while parent is not None and parent.nodeType == parent.ELEMENT_NODE:
+            on_path.add(id(parent))
+            parent = parent.parentNode
+
+    def write_body(stream):
+        writer = DOMStreamWriter(stream, indent)
+        writer.declaration()
+        # Jawny stos zamiast rekurencji: (węzeł, czy_zamknąć)
+        stack = [(root, False)]
+        while stack:
+            node, closing = stack.pop()
+            if closing:
+                for item in slot_content.get(id(node), ()):
+                    if isinstance(item, str):
+                        writer.raw(item)
+                    else:
+                        writer.node(item)
+                writer.end()
+                continue
+            if id(node) not in on_path:
+                writer.node(node)
+                continue
+            writer.start(node)
+            stack.append((node, True))
+            stack.extend((child, False) for child in reversed(node.childNodes))
+
+    _write_to(target, write_body)